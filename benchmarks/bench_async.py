@@ -0,0 +1,103 @@
+"""Benchmark: AsyncPlatformClient vs the threaded sync client against a fake API server
+
+Usage:
+    python benchmarks/bench_async.py [--jobs=2000] [--latency=0.01] [--threads=50]
+                                     [--concurrency=200] [--json]
+
+The threaded side is how asyncio services use the sync SDK today: every
+PlatformClient call wrapped in a thread from a fixed pool (--threads). The
+async side runs everything on one event loop with --concurrency requests in
+flight. Both submit --jobs jobs and then read each job back by name.
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_apiserver import FakeApiServer  # noqa: E402
+from ml_platform.sdk import PlatformClient  # noqa: E402
+from ml_platform.sdk.core.async_client import AsyncPlatformClient  # noqa: E402
+from ml_platform.sdk.core.async_transport import AsyncHttpTransport  # noqa: E402
+from ml_platform.sdk.core.kubeconfig import KubeConfig  # noqa: E402
+from ml_platform.sdk.core.transport import HttpTransport, api_path  # noqa: E402
+
+
+def parse_args(argv):
+    opts = {"jobs": 2000, "latency": 0.01, "threads": 50, "concurrency": 200, "json": False}
+    for arg in argv:
+        if arg == "--json":
+            opts["json"] = True
+        elif arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            opts[key] = type(opts[key])(value)
+    return opts
+
+
+def bench_threaded(opts) -> dict:
+    transport = HttpTransport(KubeConfig.load(), pool_size=opts["threads"])
+    client = PlatformClient(project_id="bench", transport=transport)
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        pool = ThreadPoolExecutor(max_workers=opts["threads"])
+        start = time.perf_counter()
+        jobs = await asyncio.gather(*(loop.run_in_executor(pool, client.submit_job, f"t{i}", "busybox")
+                                      for i in range(opts["jobs"])))
+        submitted = time.perf_counter()
+        await asyncio.gather(*(loop.run_in_executor(pool, transport.get, job.path) for job in jobs))
+        done = time.perf_counter()
+        pool.shutdown()
+        return submitted - start, done - submitted
+
+    submit, read = asyncio.run(run())
+    transport.close()
+    return {"submit_per_s": opts["jobs"] / submit, "get_per_s": opts["jobs"] / read,
+            "client_threads": opts["threads"]}
+
+
+def bench_async(opts) -> dict:
+    async def run():
+        transport = AsyncHttpTransport(KubeConfig.load(), max_connections=opts["concurrency"])
+        async with AsyncPlatformClient("bench", transport=transport) as client:
+            start = time.perf_counter()
+            results = await client.submit_jobs([{"name": f"a{i}", "image": "busybox"}
+                                                for i in range(opts["jobs"])],
+                                               max_concurrency=opts["concurrency"])
+            submitted = time.perf_counter()
+            await asyncio.gather(*(transport.get(api_path("batch", "v1", "jobs", "jobs", r.job.name))
+                                   for r in results))
+            done = time.perf_counter()
+        return submitted - start, done - submitted
+
+    submit, read = asyncio.run(run())
+    return {"submit_per_s": opts["jobs"] / submit, "get_per_s": opts["jobs"] / read,
+            "client_threads": 1}
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    tmp = tempfile.mkdtemp()
+    with FakeApiServer(latency=opts["latency"]) as server:
+        os.environ["KUBECONFIG"] = server.write_kubeconfig(tmp)
+        results = {"threaded": bench_threaded(opts), "async": bench_async(opts)}
+
+    if opts["json"]:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{opts['jobs']} jobs, {opts['latency'] * 1000:.0f} ms simulated API latency\n")
+    print(f"{'client':<10}{'submit':>14}{'get':>14}{'threads':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['submit_per_s']:>12.0f}/s{r['get_per_s']:>12.0f}/s{r['client_threads']:>10}")
+    speedup = results["async"]["submit_per_s"] / results["threaded"]["submit_per_s"]
+    print(f"\nasync submits {speedup:.1f}x faster with {opts['concurrency']} requests in flight "
+          f"on one thread")
+
+
+if __name__ == "__main__":
+    main()
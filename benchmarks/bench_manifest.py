@@ -0,0 +1,60 @@
+"""Benchmark: rendering sweep manifests with ManifestCompiler
+
+Usage:
+    python benchmarks/bench_manifest.py [--jobs=10000] [--workload=stellar_optimization] [--json]
+
+Compiles --jobs manifests that differ only in their env (as a sweep does),
+once through a warm compiler (memoized template) and once through a fresh
+compiler per job (template built and validated every time), which is the cost
+of building each manifest from scratch.
+"""
+
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ml_platform.sdk.core.manifest import JobSpec, ManifestCompiler  # noqa: E402
+
+
+def parse_args(argv):
+    opts = {"jobs": 10000, "workload": "stellar_optimization", "json": False}
+    for arg in argv:
+        if arg == "--json":
+            opts["json"] = True
+        elif arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            opts[key] = type(opts[key])(value)
+    return opts
+
+
+def bench(opts, fresh: bool) -> float:
+    workloads_dir = os.path.join(ROOT, "docs", "examples")
+    compiler = ManifestCompiler("bench", workloads_dir)
+    specs = [JobSpec(opts["workload"], "busybox", env={"SEED": str(i)}) for i in range(opts["jobs"])]
+    start = time.perf_counter()
+    for spec in specs:
+        if fresh:
+            compiler.invalidate()
+        compiler.compile(spec)
+    return time.perf_counter() - start
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    results = {"memoized_s": bench(opts, fresh=False), "uncached_s": bench(opts, fresh=True)}
+
+    if opts["json"]:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{opts['jobs']} manifests for {opts['workload']}\n")
+    for name, seconds in results.items():
+        print(f"{name[:-2]:<10}{seconds * 1000:>10.1f} ms{opts['jobs'] / seconds:>12.0f}/s")
+    print(f"\nmemoized templates render {results['uncached_s'] / results['memoized_s']:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
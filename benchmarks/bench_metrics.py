@@ -0,0 +1,111 @@
+"""Benchmark: cost of SDK instrumentation per call, with a budget check
+
+Usage:
+    python benchmarks/bench_metrics.py [--calls=1000000] [--budget=1.0] [--requests=500] [--json]
+
+Times a no-op method bare, decorated with metrics.instrument while
+instrumentation is disabled, and decorated with a Registry enabled. Exits
+non-zero when the disabled overhead exceeds --budget microseconds per call.
+
+Also runs --requests Job.status calls against the fake API server with and
+without a Registry, to show the enabled cost next to a real (local) request.
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_apiserver import FakeApiServer  # noqa: E402
+from ml_platform.sdk import Job  # noqa: E402
+from ml_platform.sdk.core import metrics  # noqa: E402
+from ml_platform.sdk.core.kubeconfig import KubeConfig  # noqa: E402
+from ml_platform.sdk.core.transport import HttpTransport  # noqa: E402
+
+
+def parse_args(argv):
+    opts = {"calls": 1000000, "budget": 1.0, "requests": 500, "json": False}
+    for arg in argv:
+        if arg == "--json":
+            opts["json"] = True
+        elif arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            opts[key] = type(opts[key])(value)
+    return opts
+
+
+class Target:
+    def bare(self):
+        return None
+
+    @metrics.instrument("status")
+    def instrumented(self):
+        return None
+
+
+def per_call_us(fn, calls: int) -> float:
+    """Best of 3 mean microseconds per call"""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        best = min(best, time.perf_counter() - start)
+    return best / calls * 1e6
+
+
+def request_us(job: Job, requests: int) -> float:
+    job.status()
+    start = time.perf_counter()
+    for _ in range(requests):
+        job.status()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    metrics.disable()
+    target = Target()
+    bare = per_call_us(target.bare, opts["calls"])
+    disabled = per_call_us(target.instrumented, opts["calls"])
+    metrics.enable()
+    enabled = per_call_us(target.instrumented, opts["calls"] // 10)
+    metrics.disable()
+
+    with FakeApiServer() as server:
+        server.seed_jobs(1)
+        transport = HttpTransport(KubeConfig(server.url, {}, {}, "fake"))
+        job = Job("sweep-00000", "jobs", transport=transport)
+        request_off = request_us(job, opts["requests"])
+        metrics.enable()
+        request_on = request_us(job, opts["requests"])
+        metrics.disable()
+
+    results = {
+        "bare_us": bare,
+        "disabled_overhead_us": disabled - bare,
+        "enabled_overhead_us": enabled - bare,
+        "status_request_us": {"disabled": request_off, "enabled": request_on},
+    }
+    over = results["disabled_overhead_us"] > opts["budget"]
+    if opts["json"]:
+        print(json.dumps(dict(results, budget_us=opts["budget"]), indent=2))
+    else:
+        print(f"{'no-op method':<32}{bare:>10.3f} us/call")
+        print(f"{'+ instrument, disabled':<32}{disabled:>10.3f} us/call "
+              f"(+{results['disabled_overhead_us']:.3f})")
+        print(f"{'+ instrument, Registry enabled':<32}{enabled:>10.3f} us/call "
+              f"(+{results['enabled_overhead_us']:.3f})")
+        print(f"\nJob.status over HTTP (fake server): {request_off:.0f} us disabled, "
+              f"{request_on:.0f} us enabled")
+        verdict = "OVER BUDGET" if over else "ok"
+        print(f"\ndisabled overhead: {results['disabled_overhead_us']:.3f} us "
+              f"(budget {opts['budget']:g} us) {verdict}")
+    if over:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Benchmark: queue wait and utilization, cluster FIFO vs. fair-share admission
+
+Usage:
+    python benchmarks/bench_queue.py [--cpu=64] [--big-jobs=200] [--small-every=30] [--json]
+
+Simulates (discrete events, no waiting) one cluster shared by two teams:
+team "sweep" submits --big-jobs 4-CPU, 10-minute jobs at once, team
+"interactive" submits a 1-CPU, 1-minute job every --small-every seconds
+while the sweep runs. Two policies place them:
+
+    fifo        every Job created on submit; pending pods start in creation
+                order wherever they fit (what the scheduler does today)
+    fair-share  jobqueue.plan_admissions: lowest dominant share first, then
+                queue position, with backfill
+
+and reports p50/p95 queue wait per team, cluster CPU utilization and the
+makespan. Then times one plan_admissions pass over --backlog queued entries.
+"""
+
+import heapq
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml_platform.sdk.core.jobqueue import QueueEntry, plan_admissions  # noqa: E402
+
+GIB = 2 ** 30
+
+
+def parse_args(argv):
+    opts = {"cpu": 64, "big_jobs": 200, "small_every": 30, "backlog": 10000, "json": False}
+    for arg in argv:
+        if arg == "--json":
+            opts["json"] = True
+        elif arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            key = key.replace("-", "_")
+            opts[key] = type(opts[key])(value)
+    return opts
+
+
+def entry(n: int, team: str, cpu: float, memory: float, submitted: float) -> QueueEntry:
+    return QueueEntry(n, team, 0, float(n), {}, cpu, memory, "queued", None, None,
+                      submitted, None, None, None)
+
+
+def workload(opts):
+    """(entry, run seconds) per job; the sweep at t=0, small jobs while it runs"""
+    jobs = [(entry(n, "sweep", 4, 16 * GIB, 0.0), 600.0) for n in range(opts["big_jobs"])]
+    sweep_seconds = 600.0 * opts["big_jobs"] * 4 / opts["cpu"]
+    t = float(opts["small_every"])
+    while t < sweep_seconds:
+        jobs.append((entry(len(jobs), "interactive", 1, 2 * GIB, t), 60.0))
+        t += opts["small_every"]
+    return jobs
+
+
+def fifo(queued, usage, quotas, free, capacity, now=None):
+    """Creation order, first fit (pods that fit start ahead of older ones that don't)"""
+    admitted = []
+    free_cpu, free_memory = free
+    for e in sorted(queued, key=lambda e: (e.enqueued_at, e.position)):
+        if e.cpu <= free_cpu and e.memory <= free_memory:
+            free_cpu -= e.cpu
+            free_memory -= e.memory
+            admitted.append(e)
+    return admitted
+
+
+def simulate(jobs, policy, cpu: float, memory: float):
+    """Replay submissions and completions; returns waits per team, utilization, makespan"""
+    run_seconds = {e.id: seconds for e, seconds in jobs}
+    events = [(e.enqueued_at, 1, e.id) for e, _ in jobs]   # (time, 0=finish/1=submit, id)
+    heapq.heapify(events)
+    by_id = {e.id: e for e, _ in jobs}
+    queued, usage = {}, {}
+    free = [cpu, memory]
+    waits = {}
+    busy_cpu_seconds = makespan = 0.0
+    while events:
+        now = events[0][0]
+        while events and events[0][0] == now:
+            _, kind, n = heapq.heappop(events)
+            e = by_id[n]
+            if kind == 1:
+                queued[n] = e
+            else:
+                free[0] += e.cpu
+                free[1] += e.memory
+                usage[e.team][0] -= e.cpu
+                usage[e.team][1] -= e.memory
+                makespan = now
+        for e in policy(list(queued.values()), usage, {}, tuple(free), (cpu, memory), now):
+            del queued[e.id]
+            free[0] -= e.cpu
+            free[1] -= e.memory
+            if policy is fifo:
+                used = usage.setdefault(e.team, [0.0, 0.0])
+                used[0] += e.cpu
+                used[1] += e.memory
+            waits.setdefault(e.team, []).append(now - e.enqueued_at)
+            busy_cpu_seconds += e.cpu * run_seconds[e.id]
+            heapq.heappush(events, (now + run_seconds[e.id], 0, e.id))
+    return waits, busy_cpu_seconds / (cpu * makespan), makespan
+
+
+def percentile(values, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def plan_ms(backlog: int, cpu: float) -> float:
+    """Milliseconds for one admission pass over a large backlog from 20 teams"""
+    queued = [entry(n, f"team-{n % 20}", 1 + n % 4, 4 * GIB, 0.0) for n in range(backlog)]
+    usage = {f"team-{t}": [float(t), 0.0] for t in range(20)}
+    start = time.perf_counter()
+    plan_admissions(queued, usage, {}, (cpu, cpu * 4 * GIB), (cpu, cpu * 4 * GIB))
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    cpu = float(opts["cpu"])
+    memory = cpu * 4 * GIB
+    jobs = workload(opts)
+    results = {"cluster_cpu": cpu, "jobs": {team: sum(e.team == team for e, _ in jobs)
+                                            for team in ("sweep", "interactive")}}
+    for name, policy in (("fifo", fifo), ("fair_share", plan_admissions)):
+        waits, utilization, makespan = simulate(jobs, policy, cpu, memory)
+        results[name] = {
+            "utilization": utilization,
+            "makespan_s": makespan,
+            "wait_s": {team: {"p50": percentile(w, 0.5), "p95": percentile(w, 0.95)}
+                       for team, w in sorted(waits.items())},
+        }
+    results["plan_ms"] = plan_ms(opts["backlog"], cpu)
+
+    if opts["json"]:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{cpu:g}-CPU cluster: {results['jobs']['sweep']} sweep jobs (4 CPU x 10m) at once, "
+          f"{results['jobs']['interactive']} interactive jobs (1 CPU x 1m) every "
+          f"{opts['small_every']}s\n")
+    print(f"{'policy':<12}{'team':<14}{'p50 wait':>10}{'p95 wait':>10}"
+          f"{'utilization':>13}{'makespan':>10}")
+    for name in ("fifo", "fair_share"):
+        r = results[name]
+        for i, (team, w) in enumerate(r["wait_s"].items()):
+            tail = f"{r['utilization']:>12.1%}{r['makespan_s']:>9.0f}s" if i == 0 else ""
+            print(f"{name if i == 0 else '':<12}{team:<14}{w['p50']:>9.0f}s{w['p95']:>9.0f}s{tail}")
+    print(f"\nplan_admissions over {opts['backlog']} queued entries: {results['plan_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Benchmark: collecting usage history and the savings right-sizing projects
+
+Usage:
+    python benchmarks/bench_rightsize.py [--workloads=20] [--runs=10] [--margin=0.2] [--json]
+
+Seeds the fake API server with --runs completed Jobs for each of --workloads
+workload:versions, all requesting the platform default (4 CPU / 16Gi), and
+serves each pod's CPU and memory over its run as Prometheus would. Every
+workload uses a different fraction of its request, with noise and spikes.
+
+Times `rightsize.collect` through PrometheusSource (one pair of range queries
+per Job) and checks that the recorded history gives the same recommendations
+as the raw samples through FixtureSource. Exits non-zero if a recommendation
+would have been below a recorded run's p95 CPU or peak memory. Reports the
+projected savings and the size of the history file.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_apiserver import FakeApiServer  # noqa: E402
+from ml_platform.sdk.core.kubeconfig import KubeConfig  # noqa: E402
+from ml_platform.sdk.core.manifest import parse_quantity  # noqa: E402
+from ml_platform.sdk.core.rightsize import (  # noqa: E402
+    FixtureSource,
+    PrometheusSource,
+    UsageHistory,
+    collect,
+    recommendations,
+)
+from ml_platform.sdk.core.transport import HttpTransport  # noqa: E402
+
+GIB = 2 ** 30
+STEP = 30
+
+
+def parse_args(argv):
+    opts = {"workloads": 20, "runs": 10, "margin": 0.2, "seed": 7, "json": False}
+    for arg in argv:
+        if arg == "--json":
+            opts["json"] = True
+        elif arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            opts[key] = type(opts[key])(value)
+    return opts
+
+
+def iso(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def seed(server: FakeApiServer, opts) -> dict:
+    """Completed Jobs plus per-pod usage; returns the raw samples as a FixtureSource doc"""
+    rng = random.Random(opts["seed"])
+    fixture = {"jobs": {}}
+    now = time.time()
+    for w in range(opts["workloads"]):
+        workload = f"workload_{w:02d}"
+        cpu_use = rng.uniform(0.3, 3.5)
+        memory_use = rng.uniform(1.0, 12.0) * GIB
+        for r in range(opts["runs"]):
+            name = f"{workload.replace('_', '-')}-run-{r:03d}"
+            duration = rng.uniform(600, 3600)
+            start = now - 86400 + r * 4000 + w
+            server.cluster.put("batch/v1", "jobs", {
+                "apiVersion": "batch/v1", "kind": "Job",
+                "metadata": {"name": name, "namespace": "jobs", "labels": {"app": workload},
+                             "creationTimestamp": iso(start)},
+                "spec": {"template": {"spec": {"containers": [{
+                    "name": "worker",
+                    "image": f"europe-west3-docker.pkg.dev/p/ml-platform/{workload}:v1.0.0",
+                    "resources": {"requests": {"cpu": "4", "memory": "16Gi"},
+                                  "limits": {"cpu": "8", "memory": "32Gi"}}}]}}},
+                "status": {"startTime": iso(start), "completionTime": iso(start + duration),
+                           "succeeded": 1,
+                           "conditions": [{"type": "Complete", "status": "True"}]},
+            })
+            samples = []
+            for i in range(int(duration // STEP)):
+                spike = 1.6 if rng.random() < 0.02 else 1.0
+                samples.append((start + i * STEP,
+                                max(0.0, cpu_use * rng.gauss(1.0, 0.15) * spike),
+                                memory_use * min(1.0, 0.3 + i / 20) * rng.uniform(0.95, 1.05)))
+            server.add_usage(f"{name}-abcde", samples)
+            # As Prometheus serves it: no CPU rate at a pod's first point
+            fixture["jobs"][name] = [[c if i else None, m] for i, (_, c, m) in enumerate(samples)]
+    return fixture
+
+
+def check(history: UsageHistory, recs) -> list:
+    """Recommendations below what a recorded run used"""
+    problems = []
+    for rec in recs:
+        for run in history.runs(rec.key):
+            if parse_quantity(rec.cpu) < run.cpu_p95:
+                problems.append(f"{rec.key}: cpu {rec.cpu} < p95 {run.cpu_p95:.2f} ({run.job})")
+            if parse_quantity(rec.memory) < run.memory_max:
+                problems.append(f"{rec.key}: memory {rec.memory} < peak "
+                                f"{run.memory_max / GIB:.2f}Gi ({run.job})")
+    return problems
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    with tempfile.TemporaryDirectory() as tmp, FakeApiServer() as server:
+        fixture = seed(server, opts)
+        transport = HttpTransport(KubeConfig(server.url, {}, {}, "fake"))
+
+        history = UsageHistory(os.path.join(tmp, "usage.json"))
+        start = time.perf_counter()
+        added = collect(transport, PrometheusSource(transport, step=STEP), history)
+        collect_seconds = time.perf_counter() - start
+        requests = server.requests
+        again = collect(transport, PrometheusSource(transport, step=STEP), history)
+
+        offline = UsageHistory(os.path.join(tmp, "fixture.json"))
+        collect(transport, FixtureSource(fixture), offline)
+
+        history_bytes = os.path.getsize(history.path)
+        reloaded = UsageHistory(history.path)
+        recs = recommendations(reloaded, opts["margin"])
+        offline_recs = recommendations(offline, opts["margin"])
+
+    problems = check(reloaded, recs)
+    mismatched = [a.key for a, b in zip(recs, offline_recs)
+                  if (a.cpu, a.memory) != (b.cpu, b.memory)]
+    if len(recs) != len(offline_recs):
+        mismatched.append("(different workloads)")
+    cpu_hours = sum(r.cpu_hours_saved_per_run * r.runs for r in recs)
+    gib_hours = sum(r.gib_hours_saved_per_run * r.runs for r in recs)
+    results = {
+        "jobs": sum(added.values()), "collect_seconds": collect_seconds, "requests": requests,
+        "recollected": sum(again.values()), "history_bytes": history_bytes,
+        "recommendations": [r.to_dict() for r in recs],
+        "saved_cpu_hours": cpu_hours, "saved_gib_hours": gib_hours,
+        "problems": problems, "source_mismatches": mismatched,
+    }
+    if opts["json"]:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"collect: {results['jobs']} jobs in {collect_seconds:.2f}s "
+              f"({requests} API requests), {results['recollected']} added on a second pass")
+        print(f"history: {history_bytes} bytes for {len(reloaded.keys())} workload versions\n")
+        print(f"{'workload:version':<28}{'cpu':>12}{'memory':>18}"
+              f"{'CPU saved':>11}{'mem saved':>11}")
+        for r in recs:
+            print(f"{r.key:<28}{f'{r.current_cpu:g} → {r.cpu}':>12}"
+                  f"{f'{r.current_memory / GIB:.0f}Gi → {r.memory}':>18}"
+                  f"{r.cpu_saving:>11.0%}{r.memory_saving:>11.0%}")
+        print(f"\nprojected over the recorded runs: {cpu_hours:.0f} CPU-hours, "
+              f"{gib_hours:.0f} GiB-hours fewer requested (margin {opts['margin']:.0%})")
+        for problem in problems:
+            print(f"FAIL {problem}")
+        if mismatched:
+            print(f"FAIL Prometheus and fixture sources disagree: {', '.join(mismatched)}")
+    if problems or mismatched or results["recollected"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Benchmark: CLI cold-start import time, with a budget check
+
+Usage:
+    python benchmarks/bench_startup.py [--runs=7] [--budget=150] [--json]
+
+Runs each command's import in a fresh interpreter under `python -X importtime`
+and reports the time spent importing ml_platform and everything it pulls in
+(interpreter start-up excluded), plus wall-clock time for the whole process.
+Exits non-zero when importing the `status` command takes longer than --budget
+milliseconds, or pulls in a module it doesn't use (UNUSED_BY_STATUS), so it
+can gate CI. tests/test_startup.py runs the same checks under pytest.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# status imports in about 75ms on a loaded CI runner (-X importtime inflates it);
+# most of that is http.client/ssl/json, which it needs
+BUDGET_MS = 150.0
+
+# Heavy or unrelated modules `status` must not import: the SDK package exports
+# load lazily, sqlite3 (~18ms) and asyncio (~50ms) only where they're used
+UNUSED_BY_STATUS = (
+    "asyncio", "sqlite3",
+    "ml_platform.sdk.core.client", "ml_platform.sdk.core.jobqueue",
+    "ml_platform.sdk.core.logs", "ml_platform.sdk.core.manifest",
+    "ml_platform.sdk.core.ray_jobs", "ml_platform.sdk.core.rightsize",
+    "ml_platform.sdk.core.scaling", "ml_platform.sdk.core.timeline",
+)
+
+# What `ml-platform <command>` imports before the command starts running
+CASES = {
+    "--help": "import ml_platform.cli.main",
+    "status": "import ml_platform.cli.main; from ml_platform.cli.commands import load; load('status')",
+    "submit": "import ml_platform.cli.main; from ml_platform.cli.commands import load; load('submit')",
+    "logs": "import ml_platform.cli.main; from ml_platform.cli.commands import load; load('logs')",
+}
+
+
+def parse_args(argv):
+    opts = {"runs": 7, "budget": BUDGET_MS, "json": False}
+    for arg in argv:
+        if arg == "--json":
+            opts["json"] = True
+        elif arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            opts[key] = type(opts[key])(value)
+    return opts
+
+
+def top_level_imports(code: str):
+    """Run code in a fresh interpreter; return ({top-level module: cumulative µs}, wall ms)"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    wall = (time.perf_counter() - start) * 1000
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Nested imports are indented; only top-level entries add up without double counting
+        if cumulative.strip().isdigit() and not name[1:].startswith(" "):
+            modules[name.strip()] = int(cumulative)
+    return modules, wall
+
+
+def imported_modules(code: str) -> set:
+    """Every module loaded by running code in a fresh interpreter"""
+    result = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport sys; print('\\n'.join(sys.modules))"],
+        cwd=ROOT, capture_output=True, text=True, check=True)
+    return set(result.stdout.split())
+
+
+def measure(code: str, runs: int, startup: set) -> dict:
+    imports, walls = [], []
+    for _ in range(runs):
+        modules, wall = top_level_imports(code)
+        imports.append(sum(us for name, us in modules.items() if name not in startup) / 1000)
+        walls.append(wall)
+    return {"import_ms": min(imports), "wall_ms": min(walls)}
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    # Modules the interpreter imports on its own (site, encodings, ...) are not ours
+    startup = set(top_level_imports("pass")[0])
+    baseline = measure("pass", opts["runs"], startup)["wall_ms"]
+    results = {name: measure(code, opts["runs"], startup) for name, code in CASES.items()}
+    over = results["status"]["import_ms"] > opts["budget"]
+    unused = sorted(set(UNUSED_BY_STATUS) & imported_modules(CASES["status"]))
+
+    if opts["json"]:
+        print(json.dumps({"interpreter_ms": baseline, "budget_ms": opts["budget"],
+                          "results": results, "unused_imports": unused}, indent=2))
+    else:
+        print(f"interpreter start-up: {baseline:.1f} ms (min of {opts['runs']})\n")
+        print(f"{'command':<10}{'imports':>12}{'process':>12}")
+        for name, r in results.items():
+            print(f"{name:<10}{r['import_ms']:>9.1f} ms{r['wall_ms']:>9.1f} ms")
+        verdict = "OVER BUDGET" if over else "ok"
+        print(f"\nstatus imports: {results['status']['import_ms']:.1f} ms "
+              f"(budget {opts['budget']:.0f} ms) {verdict}")
+        if unused:
+            print(f"status imports modules it doesn't use: {', '.join(unused)}")
+    if over or unused:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Benchmark: job timelines from a recorded fixture, and tracing a large sweep
+
+Usage:
+    python benchmarks/bench_trace.py [--fixture=benchmarks/fixtures/trace_sweep.json] [--jobs=2000] [--json]
+
+Loads a fixture recorded with `ml-platform trace --record=FILE` into the fake
+API server and checks that every job gets its phases back (each phase ends
+at a recorded milestone, phases add up to the total). Exits non-zero when one
+doesn't, so a fixture from a real cluster doubles as an offline test.
+
+Then copies the fixture's jobs --jobs times over and times fetch_timelines
+for the whole sweep, with and without reading the driver logs.
+"""
+
+import copy
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_apiserver import FakeApiServer  # noqa: E402
+from ml_platform.sdk.core.kubeconfig import KubeConfig  # noqa: E402
+from ml_platform.sdk.core.timeline import PHASES, fetch_timelines, summarize  # noqa: E402
+from ml_platform.sdk.core.transport import HttpTransport  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "trace_sweep.json")
+
+
+def parse_args(argv):
+    opts = {"fixture": FIXTURE, "jobs": 2000, "json": False}
+    for arg in argv:
+        if arg == "--json":
+            opts["json"] = True
+        elif arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            opts[key] = type(opts[key])(value)
+    return opts
+
+
+def check(timeline) -> list:
+    """Problems with one fixture timeline (empty when it is consistent)"""
+    problems = []
+    phases = timeline.phases
+    if timeline.pod is None:
+        problems.append("no pod")
+    if phases["queue"] is None or timeline.to_first_work is None:
+        problems.append("no queue/first-work time")
+    if timeline.total is not None:
+        known = sum(v for v in phases.values() if v is not None)
+        if abs(known - timeline.total) > 1e-6:
+            problems.append(f"phases add up to {known:.3f}s, total is {timeline.total:.3f}s")
+    return problems
+
+
+def replicate(fixture: dict, copies: int) -> dict:
+    """The fixture's objects `copies` times over under new job and pod names"""
+    objects, logs = [], {}
+    for n in range(copies):
+        suffix = f"-c{n:05d}"
+        for obj in fixture["objects"]:
+            obj = copy.deepcopy(obj)
+            meta = obj["metadata"]
+            meta["name"] += suffix
+            meta.pop("resourceVersion", None)
+            if "job-name" in meta.get("labels", {}):
+                meta["labels"]["job-name"] += suffix
+            if "involvedObject" in obj:
+                obj["involvedObject"]["name"] += suffix
+            objects.append(obj)
+        for key, text in fixture["logs"].items():
+            logs[key + suffix] = text
+    return {"objects": objects, "logs": logs}
+
+
+def trace_seconds(transport, selector: str, logs: bool):
+    start = time.perf_counter()
+    timelines = fetch_timelines(transport, label_selector=selector, logs=logs)
+    return time.perf_counter() - start, timelines
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    with open(opts["fixture"]) as f:
+        fixture = json.load(f)
+    jobs = [o for o in fixture["objects"] if o["kind"] == "Job"]
+    selector = ",".join(f"{k}={v}" for k, v in sorted(jobs[0]["metadata"].get("labels", {}).items()))
+
+    with FakeApiServer() as server:
+        server.load_fixture(fixture)
+        transport = HttpTransport(KubeConfig(server.url, {}, {}, "fake"))
+        timelines = fetch_timelines(transport, label_selector=selector)
+        failures = {t.name: check(t) for t in timelines if check(t)}
+
+    copies = max(1, opts["jobs"] // len(jobs))
+    with FakeApiServer() as server:
+        server.load_fixture(replicate(fixture, copies))
+        transport = HttpTransport(KubeConfig(server.url, {}, {}, "fake"))
+        with_logs, traced = trace_seconds(transport, selector, logs=True)
+        without_logs, _ = trace_seconds(transport, selector, logs=False)
+        requests = server.requests
+
+    results = {
+        "fixture": {"jobs": [t.to_dict() for t in timelines], "summary": summarize(timelines),
+                    "failures": failures},
+        "sweep": {"jobs": len(traced), "seconds_with_logs": with_logs,
+                  "seconds_without_logs": without_logs, "requests": requests},
+    }
+    if opts["json"]:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"fixture {os.path.basename(opts['fixture'])}: {len(timelines)} jobs\n")
+        print(f"{'job':<48}" + "".join(f"{p:>16}" for p in PHASES) + f"{'first work':>12}")
+        for t in timelines:
+            print(f"{t.name[-48:]:<48}" + "".join(
+                f"{'-' if v is None else f'{v:.1f}s':>16}" for v in t.phases.values())
+                + f"{'-' if t.to_first_work is None else f'{t.to_first_work:.1f}s':>12}")
+        for name, problems in failures.items():
+            print(f"FAIL {name}: {'; '.join(problems)}")
+        print(f"\ntrace of {len(traced)} jobs: {with_logs:.2f}s with logs, "
+              f"{without_logs:.2f}s without ({requests} API requests)")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Benchmark: HTTP (pooled keep-alive) vs kubectl transport against a fake API server
+
+Usage:
+    python benchmarks/bench_transport.py [--calls=200] [--jobs=100] [--latency=0.0]
+                                         [--fake-kubectl] [--json]
+
+Reports calls per second for PlatformClient.list_jobs, PlatformClient.submit_job
+and Job.status. The kubectl transport is included when kubectl is on PATH, or
+through the fake_kubectl.py shim with --fake-kubectl.
+"""
+
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_apiserver import FakeApiServer  # noqa: E402
+from ml_platform.sdk import Job, PlatformClient  # noqa: E402
+from ml_platform.sdk.core.kubeconfig import KubeConfig  # noqa: E402
+from ml_platform.sdk.core.transport import HttpTransport, KubectlTransport  # noqa: E402
+
+
+def parse_args(argv):
+    opts = {"calls": 200, "jobs": 100, "latency": 0.0, "json": False, "fake_kubectl": False}
+    for arg in argv:
+        if arg == "--json":
+            opts["json"] = True
+        elif arg == "--fake-kubectl":
+            opts["fake_kubectl"] = True
+        elif arg.startswith("--") and "=" in arg:
+            key, value = arg[2:].split("=", 1)
+            opts[key] = type(opts[key])(value)
+    return opts
+
+
+def rate(fn, calls: int) -> float:
+    """Calls per second for ``fn`` over ``calls`` sequential invocations"""
+    fn()  # warm-up (connection setup, credential resolution)
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return calls / (time.perf_counter() - start)
+
+
+def bench(transport, calls: int) -> dict:
+    client = PlatformClient(project_id="bench", transport=transport)
+    job = Job("sweep-00000", "jobs", transport=transport)
+    # Names are timestamp-suffixed per second, so give every submit its own prefix
+    names = (f"bench-{i}" for i in itertools.count())
+    return {
+        "list_jobs": rate(lambda: client.list_jobs(), calls),
+        "submit_job": rate(lambda: client.submit_job(next(names), "busybox"), calls),
+        "job_status": rate(job.status, calls),
+    }
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    tmp = tempfile.mkdtemp()
+    results = {}
+    with FakeApiServer(latency=opts["latency"]) as server:
+        server.seed_jobs(opts["jobs"])
+        kubeconfig = server.write_kubeconfig(tmp)
+        os.environ["KUBECONFIG"] = kubeconfig
+
+        http = HttpTransport(KubeConfig.load())
+        results["http"] = bench(http, opts["calls"])
+        http.close()
+
+        # kubectl pays process start-up per call, so fewer iterations are plenty
+        kubectl = shutil.which("kubectl") or (opts["fake_kubectl"] and server.install_kubectl(tmp))
+        if kubectl:
+            results["kubectl"] = bench(KubectlTransport(kubectl=kubectl),
+                                       max(opts["calls"] // 10, 5))
+    shutil.rmtree(tmp, ignore_errors=True)
+
+    if opts["json"]:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'operation':<14}" + "".join(f"{name:>14}" for name in results))
+    for op in ("list_jobs", "submit_job", "job_status"):
+        print(f"{op:<14}" + "".join(f"{results[name][op]:>11.1f}/s " for name in results))
+    if "kubectl" in results:
+        for op in ("list_jobs", "submit_job", "job_status"):
+            print(f"  {op}: {results['http'][op] / results['kubectl'][op]:.0f}x faster over HTTP")
+
+
+if __name__ == "__main__":
+    main()
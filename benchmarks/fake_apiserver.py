@@ -0,0 +1,555 @@
+"""In-process fake Kubernetes API server for offline benchmarks
+
+Implements just enough of the REST API for the SDK: list (with label/field
+selectors and limit/continue paging), get, create, delete (single and
+collection), JSON/merge patch, watch streams and pod logs, plus Prometheus
+range queries for container CPU/memory through the service proxy
+(add_usage). Objects live in memory; nothing is scheduled, so benchmarks
+seed whatever state they need, or load a fixture recorded from a real
+cluster (load_fixture).
+
+    with FakeApiServer() as server:
+        server.seed_jobs(1000)
+        kubeconfig = server.write_kubeconfig(tmpdir)
+"""
+
+import copy
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+def now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _stamp_line(line: str, stamp: Optional[str]) -> str:
+    """A log line with its RFC3339 prefix when stamp is set (kept if already there), else without"""
+    head, sep, rest = line.partition(" ")
+    stamped = sep and len(head) >= 20 and head[4:5] == "-" and head[10:11] == "T"
+    if stamp is None:
+        return rest if stamped else line
+    return line if stamped else f"{stamp} {line}"
+
+
+def _parse_path(path: str) -> Optional[Tuple[str, Optional[str], str, Optional[str], Optional[str]]]:
+    """Split a REST path into (group_version, namespace, resource, name, subresource)"""
+    parts = [p for p in path.split("/") if p]
+    if not parts:
+        return None
+    if parts[0] == "api" and len(parts) >= 3:
+        gv, rest = parts[1], parts[2:]
+    elif parts[0] == "apis" and len(parts) >= 4:
+        gv, rest = f"{parts[1]}/{parts[2]}", parts[3:]
+    else:
+        return None
+    namespace = None
+    if rest[0] == "namespaces" and len(rest) >= 3:
+        namespace, rest = rest[1], rest[2:]
+    resource = rest[0]
+    name = rest[1] if len(rest) > 1 else None
+    sub = rest[2] if len(rest) > 2 else None
+    return gv, namespace, resource, name, sub
+
+
+def _lookup(obj: Dict, dotted: str):
+    for key in dotted.split("."):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(key)
+    return obj
+
+
+def match_labels(obj: Dict, selector: Optional[str]) -> bool:
+    """Equality-based label selectors: a=b, a!=b, a, !a, a in (x,y)"""
+    if not selector:
+        return True
+    labels = obj.get("metadata", {}).get("labels") or {}
+    for term in _split_selector(selector):
+        term = term.strip()
+        if " in " in term:
+            key, values = term.split(" in ", 1)
+            allowed = {v.strip() for v in values.strip("() ").split(",")}
+            if labels.get(key.strip()) not in allowed:
+                return False
+        elif "!=" in term:
+            key, value = term.split("!=", 1)
+            if labels.get(key) == value:
+                return False
+        elif "=" in term:
+            key, value = term.split("=", 1)
+            if labels.get(key.rstrip("=")) != value.lstrip("="):
+                return False
+        elif term.startswith("!"):
+            if term[1:] in labels:
+                return False
+        elif term not in labels:
+            return False
+    return True
+
+
+def _split_selector(selector: str) -> List[str]:
+    terms, depth, current = [], 0, ""
+    for ch in selector:
+        if ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0:
+            terms.append(current)
+            current = ""
+        else:
+            current += ch
+    return terms + [current] if current else terms
+
+
+def match_fields(obj: Dict, selector: Optional[str]) -> bool:
+    """Field selectors: metadata.name=x, status.phase!=Running, status.successful=1"""
+    if not selector:
+        return True
+    for term in selector.split(","):
+        negate = "!=" in term
+        key, value = term.split("!=" if negate else "=", 1)
+        key = key.rstrip("=")
+        if key == "status.successful":
+            # The Job field selector is backed by status.succeeded (missing = 0)
+            actual = str(_lookup(obj, "status.succeeded") or 0)
+        else:
+            actual = _lookup(obj, key)
+            actual = "" if actual is None else str(actual)
+        if (actual == value.lstrip("=")) == negate:
+            return False
+    return True
+
+
+class FakeCluster:
+    """Thread-safe in-memory object store with a watch event log"""
+
+    def __init__(self):
+        self.objects = {}          # (gv, resource) -> {(namespace, name): obj}
+        self.logs = {}             # (namespace, pod) -> text
+        self.events = []           # (rv, gv, resource, namespace, type, obj)
+        self.rv = 0
+        self.cond = threading.Condition()
+
+    def _bump(self, obj: Dict) -> Dict:
+        self.rv += 1
+        obj.setdefault("metadata", {})["resourceVersion"] = str(self.rv)
+        return obj
+
+    def put(self, gv: str, resource: str, obj: Dict, event: str = "ADDED") -> Dict:
+        meta = obj.setdefault("metadata", {})
+        meta.setdefault("uid", str(uuid.uuid4()))
+        meta.setdefault("creationTimestamp", now_iso())
+        with self.cond:
+            self._bump(obj)
+            self.objects.setdefault((gv, resource), {})[(meta.get("namespace"), meta["name"])] = obj
+            self.events.append((self.rv, gv, resource, meta.get("namespace"), event, copy.deepcopy(obj)))
+            self.cond.notify_all()
+        return obj
+
+    def get(self, gv, resource, namespace, name) -> Optional[Dict]:
+        with self.cond:
+            return self.objects.get((gv, resource), {}).get((namespace, name))
+
+    def remove(self, gv, resource, namespace, name) -> Optional[Dict]:
+        with self.cond:
+            obj = self.objects.get((gv, resource), {}).pop((namespace, name), None)
+            if obj is not None:
+                self._bump(obj)
+                self.events.append((self.rv, gv, resource, namespace, "DELETED", copy.deepcopy(obj)))
+                self.cond.notify_all()
+            return obj
+
+    def list(self, gv, resource, namespace, labels=None, fields=None) -> List[Dict]:
+        with self.cond:
+            items = list(self.objects.get((gv, resource), {}).items())
+        return [obj for (ns, _), obj in sorted(items, key=lambda kv: kv[0][1])
+                if (namespace is None or ns == namespace)
+                and match_labels(obj, labels) and match_fields(obj, fields)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "fake-apiserver"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def cluster(self) -> FakeCluster:
+        return self.server.cluster
+
+    def _send(self, status: int, body, content_type: str = "application/json"):
+        data = body if isinstance(body, bytes) else (
+            body.encode() if isinstance(body, str) else json.dumps(body).encode())
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _status(self, code: int, reason: str, message: str):
+        self._send(code, {"kind": "Status", "apiVersion": "v1", "status": "Failure",
+                          "reason": reason, "message": message, "code": code})
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        return json.loads(raw) if raw else None
+
+    def _fault(self, counter: str) -> bool:
+        """Use up one fault injected through FakeApiServer.<counter>, if any are left"""
+        with self.cluster.cond:
+            left = getattr(self.server, counter)
+            setattr(self.server, counter, max(0, left - 1))
+        return left > 0
+
+    def _route(self):
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        return _parse_path(url.path), query
+
+    def _dispatch(self, method: str):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        self.server.requests += 1
+        route, query = self._route()
+        if route is None:
+            self._status(404, "NotFound", f"no route for {self.path}")
+            return
+        getattr(self, f"_do_{method}")(*route, query)
+
+    def do_GET(self):
+        self._dispatch("get")
+
+    def do_POST(self):
+        self._dispatch("post")
+
+    def do_DELETE(self):
+        self._dispatch("delete")
+
+    def do_PATCH(self):
+        self._dispatch("patch")
+
+    def _do_get(self, gv, ns, resource, name, sub, query):
+        if resource == "services" and sub == "proxy" and name.startswith("prometheus"):
+            self._prometheus(query)
+            return
+        if name and sub == "log":
+            text = self.cluster.logs.get((ns, name))
+            if text is None:
+                self._status(404, "NotFound", f'pods "{name}" not found')
+                return
+            if query.get("tailLines"):
+                text = "\n".join(text.splitlines()[-int(query["tailLines"]):]) + "\n"
+            # Recorded logs (load_fixture) keep their own timestamps; others get the current time
+            stamp = now_iso().replace("Z", ".000000000Z") if query.get("timestamps") == "true" else None
+            text = "".join(_stamp_line(line, stamp) + "\n" for line in text.splitlines())
+            if query.get("limitBytes"):
+                text = text.encode()[:int(query["limitBytes"])].decode(errors="ignore")
+            self._send(200, text, "text/plain")
+            return
+        if name:
+            obj = self.cluster.get(gv, resource, ns, name)
+            if obj is None:
+                self._status(404, "NotFound", f'{resource} "{name}" not found')
+            else:
+                self._send(200, obj)
+            return
+        if query.get("watch") in ("true", "1"):
+            self._watch(gv, ns, resource, query)
+            return
+        items = self.cluster.list(gv, resource, ns, query.get("labelSelector"),
+                                  query.get("fieldSelector"))
+        start = int(query.get("continue") or 0)
+        limit = int(query.get("limit") or 0)
+        page = items[start:start + limit] if limit else items[start:]
+        if "as=PartialObjectMetadataList" in (self.headers.get("Accept") or ""):
+            page = [{"apiVersion": "meta.k8s.io/v1", "kind": "PartialObjectMetadata",
+                     "metadata": obj["metadata"]} for obj in page]
+        meta = {"resourceVersion": str(self.cluster.rv)}
+        if limit and start + limit < len(items):
+            meta["continue"] = str(start + limit)
+            meta["remainingItemCount"] = len(items) - start - limit
+        self._send(200, {"kind": "List", "apiVersion": gv, "metadata": meta, "items": page})
+
+    def _prometheus(self, query):
+        """query_range for the two cAdvisor series rightsize.PrometheusSource asks for"""
+        promql = query.get("query", "")
+        pods = re.search(r'pod=~"(.*?)"', promql)
+        namespace = re.search(r'namespace="(.*?)"', promql)
+        column = 1 if "container_cpu_usage_seconds_total" in promql else 2
+        start, end = float(query.get("start", 0)), float(query.get("end", time.time()))
+        result = []
+        for (ns, pod), samples in sorted(self.server.usage.items()):
+            if namespace and ns != namespace.group(1):
+                continue
+            if pods and not re.fullmatch(pods.group(1), pod):
+                continue
+            values = [[s[0], str(s[column])] for s in samples if start <= s[0] <= end]
+            if column == 1:
+                # rate() has no value until a series' second point
+                values = [v for v in values if v[0] > samples[0][0]]
+            if values:
+                result.append({"metric": {"pod": pod}, "values": values})
+        self._send(200, {"status": "success",
+                         "data": {"resultType": "matrix", "result": result}})
+
+    def _watch(self, gv, ns, resource, query):
+        since = int(query.get("resourceVersion") or self.cluster.rv)
+        if self.server.min_watch_rv and since and since < self.server.min_watch_rv:
+            self._status(410, "Expired", "too old resource version")
+            return
+        deadline = time.monotonic() + float(query.get("timeoutSeconds") or 30)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        cursor = since
+        try:
+            while True:
+                with self.cluster.cond:
+                    pending = [e for e in self.cluster.events if e[0] > cursor]
+                    if not pending:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or self.server.stopping:
+                            break
+                        self.cluster.cond.wait(min(remaining, 0.5))
+                        continue
+                for rv, egv, eres, ens, etype, obj in pending:
+                    cursor = rv
+                    if egv != gv or eres != resource or (ns and ens != ns):
+                        continue
+                    if not (match_labels(obj, query.get("labelSelector"))
+                            and match_fields(obj, query.get("fieldSelector"))):
+                        continue
+                    line = json.dumps({"type": etype, "object": obj}).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+    def _do_post(self, gv, ns, resource, name, sub, query):
+        obj = self._body() or {}
+        if self._fault("throttled_creates"):
+            self._status(429, "TooManyRequests", "too many requests, please try again later")
+            return
+        meta = obj.setdefault("metadata", {})
+        if not meta.get("name") and meta.get("generateName"):
+            meta["name"] = meta["generateName"] + uuid.uuid4().hex[:5]
+        meta.setdefault("namespace", ns)
+        if self.cluster.get(gv, resource, ns, meta.get("name")) is not None:
+            self._status(409, "AlreadyExists", f'{resource} "{meta["name"]}" already exists')
+            return
+        if resource == "jobs":
+            obj.setdefault("status", {})
+        created = self.cluster.put(gv, resource, obj)
+        if self._fault("lost_creates"):
+            # Stored, but the response is lost (e.g. an apiserver restart mid-request)
+            self._status(503, "ServiceUnavailable", "the server is currently unable to respond")
+            return
+        self._send(201, created)
+
+    def _do_delete(self, gv, ns, resource, name, sub, query):
+        policy = query.get("propagationPolicy") or (self._body() or {}).get("propagationPolicy")
+        if name:
+            obj = self.cluster.remove(gv, resource, ns, name)
+            if obj is None:
+                self._status(404, "NotFound", f'{resource} "{name}" not found')
+                return
+            self._cascade(ns, resource, [obj], policy)
+            self._send(200, {"kind": "Status", "status": "Success"})
+            return
+        items = self.cluster.list(gv, resource, ns, query.get("labelSelector"),
+                                  query.get("fieldSelector"))
+        for obj in items:
+            self.cluster.remove(gv, resource, ns, obj["metadata"]["name"])
+        self._cascade(ns, resource, items, policy)
+        self._send(200, {"kind": "List", "items": items})
+
+    def _cascade(self, ns, resource, removed, policy):
+        if resource == "jobs" and policy in ("Background", "Foreground") and removed:
+            names = {job["metadata"]["name"] for job in removed}
+            with self.cluster.cond:
+                pods = list(self.cluster.objects.get(("v1", "pods"), {}).values())
+            for pod in pods:
+                if (pod["metadata"].get("namespace") == ns
+                        and (pod["metadata"].get("labels") or {}).get("job-name") in names):
+                    self.cluster.remove("v1", "pods", ns, pod["metadata"]["name"])
+
+    def _do_patch(self, gv, ns, resource, name, sub, query):
+        obj = self.cluster.get(gv, resource, ns, name)
+        if obj is None:
+            self._status(404, "NotFound", f'{resource} "{name}" not found')
+            return
+        patch = self._body()
+        obj = copy.deepcopy(obj)
+        if isinstance(patch, list):
+            for op in patch:
+                target, keys = obj, [k for k in op["path"].split("/") if k]
+                for key in keys[:-1]:
+                    target = target[int(key)] if isinstance(target, list) else target.setdefault(key, {})
+                last = keys[-1]
+                if isinstance(target, list):
+                    target[int(last)] = op.get("value")
+                else:
+                    target[last] = op.get("value")
+        else:
+            _merge(obj, patch or {})
+        self._send(200, self.cluster.put(gv, resource, obj, "MODIFIED"))
+
+
+def _merge(target: Dict, patch: Dict):
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        else:
+            target[key] = value
+
+
+class FakeApiServer(ThreadingHTTPServer):
+    """Fake API server bound to an ephemeral localhost port"""
+
+    daemon_threads = True
+    # Clients open many connections at once; the default backlog of 5 drops SYNs
+    request_queue_size = 1024
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.cluster = FakeCluster()
+        self.latency = latency
+        self.requests = 0
+        self.stopping = False
+        self.min_watch_rv = 0
+        self.throttled_creates = 0  # POSTs answered 429 without storing anything
+        self.lost_creates = 0       # POSTs that store the object, then answer 503
+        self.usage = {}             # (namespace, pod) -> [(time, cpu cores, memory bytes)]
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def start(self) -> "FakeApiServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.stopping = True
+        with self.cluster.cond:
+            self.cluster.cond.notify_all()
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def write_kubeconfig(self, directory: str, context: str = "fake") -> str:
+        """Write a kubeconfig pointing at this server and return its path"""
+        path = os.path.join(directory, "kubeconfig")
+        config = {
+            "apiVersion": "v1",
+            "kind": "Config",
+            "current-context": context,
+            "clusters": [{"name": context, "cluster": {"server": self.url}}],
+            "users": [{"name": context, "user": {"token": "fake-token"}}],
+            "contexts": [{"name": context, "context": {"cluster": context, "user": context}}],
+        }
+        with open(path, "w") as f:
+            json.dump(config, f)
+        return path
+
+    def install_kubectl(self, directory: str) -> str:
+        """Write a `kubectl` that runs fake_kubectl.py into directory; returns its path
+
+        Point KUBECONFIG at write_kubeconfig() and prepend directory to PATH
+        (or pass the path to KubectlTransport) to use it.
+        """
+        path = os.path.join(directory, "kubectl")
+        shim = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_kubectl.py")
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\nexec "{sys.executable}" "{shim}" "$@"\n')
+        os.chmod(path, 0o755)
+        return path
+
+    def seed_jobs(self, count: int, namespace: str = "jobs", app: str = "sweep",
+                  finished_ratio: float = 0.5, pods: bool = False, log_lines: int = 0):
+        """Create ``count`` Jobs (a share of them finished), optionally with one pod each
+
+        Each pod's log gets ``log_lines`` lines of training-style output.
+        """
+        finished = int(count * finished_ratio)
+        for i in range(count):
+            name = f"{app}-{i:05d}"
+            status = {"active": 1}
+            if i < finished:
+                status = {"succeeded": 1, "conditions": [{"type": "Complete", "status": "True"}]}
+            self.cluster.put("batch/v1", "jobs", {
+                "apiVersion": "batch/v1", "kind": "Job",
+                "metadata": {"name": name, "namespace": namespace, "labels": {"app": app}},
+                "spec": {"backoffLimit": 3}, "status": status,
+            })
+            if pods:
+                log = "".join(f"step {n} loss={1.0 / (n + 1):.6f} job={name}\n"
+                              for n in range(log_lines))
+                self.add_pod(f"{name}-pod", namespace, job=name,
+                             phase="Succeeded" if i < finished else "Running", log=log)
+
+    def add_pod(self, name: str, namespace: str = "jobs", job: Optional[str] = None,
+                phase: str = "Running", labels: Optional[Dict] = None, log: str = "",
+                terminated: Optional[str] = None):
+        """A pod of job; terminated is the worker container's exit reason (e.g. OOMKilled)"""
+        labels = dict(labels or {})
+        if job:
+            labels.update({"job-name": job, "batch.kubernetes.io/job-name": job})
+        status = {"phase": phase}
+        if terminated:
+            status["containerStatuses"] = [{"name": "worker", "state": {"terminated": {
+                "reason": terminated, "exitCode": 137 if terminated == "OOMKilled" else 1}}}]
+        self.cluster.put("v1", "pods", {
+            "apiVersion": "v1", "kind": "Pod",
+            "metadata": {"name": name, "namespace": namespace, "labels": labels},
+            "spec": {"containers": [{"name": "worker"}]},
+            "status": status,
+        })
+        self.cluster.logs[(namespace, name)] = log
+
+    def add_usage(self, pod: str, samples: List[Tuple[float, float, float]],
+                  namespace: str = "jobs"):
+        """Container usage Prometheus reports for a pod: (time, CPU cores, memory bytes)"""
+        self.usage[(namespace, pod)] = list(samples)
+
+    def load_fixture(self, fixture) -> Dict:
+        """Load a recorded fixture (a path or the dict itself) into the cluster
+
+        The format is what `ml-platform trace --record` writes: {"objects":
+        [API objects with apiVersion and kind], "logs": {"<namespace>/<pod>":
+        text with RFC3339 timestamps}}. Recorded creationTimestamps are kept.
+        """
+        if isinstance(fixture, str):
+            with open(fixture) as f:
+                fixture = json.load(f)
+        for obj in fixture.get("objects", []):
+            resource = obj["kind"].lower() + ("es" if obj["kind"].endswith("s") else "s")
+            self.cluster.put(obj["apiVersion"], resource, copy.deepcopy(obj))
+        for key, text in fixture.get("logs", {}).items():
+            namespace, pod = key.split("/", 1)
+            self.cluster.logs[(namespace, pod)] = text
+        return fixture
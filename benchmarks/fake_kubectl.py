@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Fake kubectl for offline benchmarks
+
+Speaks the subset of kubectl that KubectlTransport uses (`get/create/replace/
+delete --raw`, `patch`, `config view`) to the API server named in the
+kubeconfig, so the kubectl transport can be measured against FakeApiServer
+on a machine without kubectl. Like kubectl it is one process per call, and
+errors are reported as "Error from server (Reason): message" on stderr.
+
+It only needs the standard library, and reads the JSON kubeconfig that
+FakeApiServer.write_kubeconfig() writes (KUBECONFIG or ~/.kube/config).
+FakeApiServer.install_kubectl(directory) puts a `kubectl` wrapper for it in
+a directory, ready to be prepended to PATH.
+"""
+
+import http.client
+import json
+import os
+import sys
+from urllib.parse import urlsplit
+
+# Resources patched by name -> group/version (everything else is core v1)
+GROUP_VERSIONS = {"jobs": "batch/v1", "cronjobs": "batch/v1", "deployments": "apps/v1",
+                  "rayclusters": "ray.io/v1", "rayjobs": "ray.io/v1"}
+PATCH_TYPES = {"json": "application/json-patch+json", "merge": "application/merge-patch+json",
+               "strategic": "application/strategic-merge-patch+json"}
+
+
+def load_kubeconfig() -> dict:
+    path = (os.environ.get("KUBECONFIG", "").split(os.pathsep)[0]
+            or os.path.expanduser("~/.kube/config"))
+    with open(path) as f:
+        return json.load(f)
+
+
+def server_url(config: dict, context=None) -> str:
+    name = context or config.get("current-context")
+    cluster = next(c["context"]["cluster"] for c in config["contexts"] if c["name"] == name)
+    return next(c["cluster"]["server"] for c in config["clusters"] if c["name"] == cluster)
+
+
+def fail(status: int, body: bytes):
+    try:
+        error = json.loads(body)
+        reason, message = error.get("reason") or "InternalError", error.get("message", "")
+    except ValueError:
+        reason, message = "InternalError", body.decode(errors="replace")
+    sys.stderr.write(f"Error from server ({reason}): {message}\n")
+    sys.exit(1)
+
+
+def call(url: str, method: str, path: str, body=None, content_type="application/json"):
+    """Send one request and copy the response to stdout as it arrives (watches, follows)"""
+    parts = urlsplit(url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=3600)
+    headers = {"Content-Type": content_type} if body is not None else {}
+    conn.request(method, path, body=body.encode() if body is not None else None, headers=headers)
+    response = conn.getresponse()
+    if response.status >= 400:
+        fail(response.status, response.read())
+    out = sys.stdout.buffer
+    while True:
+        chunk = response.read1(65536)
+        if not chunk:
+            break
+        out.write(chunk)
+        out.flush()
+
+
+def patch_path(resource: str, name: str, namespace) -> str:
+    resource, _, group = resource.partition(".")
+    gv = GROUP_VERSIONS.get(resource, "v1")
+    if group:
+        gv = f"{group}/{gv.rsplit('/', 1)[-1]}"
+    prefix = "/api/v1" if gv == "v1" else f"/apis/{gv}"
+    scope = f"/namespaces/{namespace}" if namespace else ""
+    return f"{prefix}{scope}/{resource}/{name}"
+
+
+def main(argv):
+    context = None
+    args = []
+    rest = iter(argv)
+    for arg in rest:
+        if arg == "--context":
+            context = next(rest, None)
+        elif arg.startswith("--context="):
+            context = arg.split("=", 1)[1]
+        else:
+            args.append(arg)
+    if not args:
+        sys.stderr.write("usage: kubectl <command> [--raw PATH] ...\n")
+        return 1
+    config = load_kubeconfig()
+    if args[:2] == ["config", "view"]:
+        print(json.dumps(config))
+        return 0
+    if args[0] == "version":
+        print("Client Version: fake")
+        return 0
+    url = server_url(config, context)
+    command = args[0]
+    if "--raw" in args:
+        path = args[args.index("--raw") + 1]
+        body = sys.stdin.read() if "-f" in args else None
+        method = {"get": "GET", "create": "POST", "replace": "PUT", "delete": "DELETE"}[command]
+        call(url, method, path, body)
+        return 0
+    if command == "patch":
+        resource, name = args[1], args[2]
+        opts = dict(zip(args[3::2], args[4::2]))
+        call(url, "PATCH", patch_path(resource, name, opts.get("-n")), opts["-p"],
+             PATCH_TYPES[opts.get("--type", "strategic")])
+        return 0
+    sys.stderr.write(f"fake kubectl: unsupported command {' '.join(args)}\n")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,145 @@
+"""In-process fake of the Ray dashboard's Job Submission API
+
+Enough of /api/jobs and /api/packages for RayJobClient: submit, info, list,
+logs, stop, delete and working_dir package upload. Jobs go PENDING ->
+RUNNING -> SUCCEEDED on a timer (``run_seconds``) and print a few log lines;
+an entrypoint containing "fail" ends FAILED instead.
+
+    with FakeRayDashboard(run_seconds=0.5) as dashboard:
+        client = RayJobClient(address=dashboard.url)
+"""
+
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body=None):
+        data = json.dumps(body if body is not None else {}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> bytes:
+        length = int(self.headers.get("Content-Length") or 0)
+        return self.rfile.read(length) if length else b""
+
+    def _parts(self):
+        return [p for p in self.path.split("?")[0].split("/") if p][1:]  # drop "api"
+
+    def do_GET(self):
+        parts = self._parts()
+        server = self.server
+        if parts[:1] == ["packages"]:
+            self._send(200 if parts[-1] in server.packages else 404)
+            return
+        if parts == ["jobs"]:
+            self._send(200, [server.info(j) for j in list(server.jobs)])
+            return
+        job = server.jobs.get(parts[1]) if len(parts) > 1 else None
+        if job is None:
+            self._send(404, {"error": "Job does not exist"})
+        elif parts[2:] == ["logs"]:
+            self._send(200, {"logs": server.logs(parts[1])})
+        else:
+            self._send(200, server.info(parts[1]))
+
+    def do_PUT(self):
+        parts = self._parts()
+        self.server.packages[parts[-1]] = self._body()
+        self._send(200)
+
+    def do_POST(self):
+        parts = self._parts()
+        body = self._body()
+        server = self.server
+        if parts == ["jobs"]:
+            spec = json.loads(body or b"{}")
+            submission_id = spec.get("submission_id") or f"raysubmit_{uuid.uuid4().hex[:12]}"
+            if submission_id in server.jobs:
+                self._send(400, {"error": f"Job {submission_id} already exists"})
+                return
+            server.jobs[submission_id] = dict(spec, submitted=time.time(), stopped=False)
+            self._send(200, {"job_id": submission_id, "submission_id": submission_id})
+        elif parts[2:] == ["stop"] and parts[1] in server.jobs:
+            server.jobs[parts[1]]["stopped"] = True
+            self._send(200, {"stopped": True})
+        else:
+            self._send(404, {"error": "Job does not exist"})
+
+    def do_DELETE(self):
+        parts = self._parts()
+        if self.server.jobs.pop(parts[1], None) is None:
+            self._send(404, {"error": "Job does not exist"})
+        else:
+            self._send(200, {"deleted": True})
+
+
+class FakeRayDashboard(ThreadingHTTPServer):
+    """Fake Ray dashboard bound to an ephemeral localhost port"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, run_seconds: float = 0.5, port: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.run_seconds = run_seconds
+        self.jobs = {}
+        self.packages = {}
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def status(self, submission_id: str) -> str:
+        job = self.jobs[submission_id]
+        if job["stopped"]:
+            return "STOPPED"
+        elapsed = time.time() - job["submitted"]
+        if elapsed < self.run_seconds * 0.2:
+            return "PENDING"
+        if elapsed < self.run_seconds:
+            return "RUNNING"
+        return "FAILED" if "fail" in job.get("entrypoint", "") else "SUCCEEDED"
+
+    def info(self, submission_id: str) -> dict:
+        job = self.jobs[submission_id]
+        return {"type": "SUBMISSION", "submission_id": submission_id, "job_id": submission_id,
+                "status": self.status(submission_id), "entrypoint": job.get("entrypoint"),
+                "metadata": job.get("metadata") or {}, "runtime_env": job.get("runtime_env") or {}}
+
+    def logs(self, submission_id: str) -> str:
+        status = self.status(submission_id)
+        lines = []
+        if status != "PENDING":
+            lines.append(f"running {self.jobs[submission_id].get('entrypoint')}")
+        if status in ("SUCCEEDED", "FAILED"):
+            lines.append("done")
+        return "".join(f"{line}\n" for line in lines)
+
+    def start(self) -> "FakeRayDashboard":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,302 @@
+"""Benchmark suite: the SDK and CLI hot paths against one seeded fake cluster, with baselines
+
+Usage:
+    python benchmarks/suite.py [--jobs=10000] [--repeat=3] [--only=list,status]
+                               [--out=results.json] [--baseline=baseline.json]
+                               [--threshold=0.25] [--json]
+
+Seeds the in-process fake API server with --jobs Jobs (half finished) and one
+pod each with a short log, then runs every scenario --repeat times and keeps
+the median of each metric:
+
+    list           PlatformClient.list_jobs over all jobs
+    status         Job.status per call, and PlatformClient.get_status (cluster summary)
+    logs_fanout    LogStream over --fanout jobs' pods, not following
+    kubectl        Job.status and list_jobs through KubectlTransport (kubectl on
+                   PATH, else the fake_kubectl.py shim)
+    cli_cold_start `ml-platform status` import time and an `ml-platform list` process
+    submit         sequential PlatformClient.submit_job
+    bulk_submit    PlatformClient.submit_jobs with --bulk specs
+    cleanup        cleanup_jobs deleting --cleanup finished jobs out of --jobs
+                   (on a cluster of its own, reseeded for every run)
+
+Metric names carry their unit: *_ms and *_s are better lower, *_per_s higher.
+With --baseline, each metric is compared to the same metric of an earlier
+--out file; a change worse than --threshold (a fraction; process-spawning
+scenarios allow more, see THRESHOLDS) is a regression and the exit status is 1.
+Absolute numbers only compare on the same machine and the same parameters:
+
+    git stash && python benchmarks/suite.py --out=/tmp/base.json && git stash pop
+    python benchmarks/suite.py --baseline=/tmp/base.json
+
+Nothing needs network access or a cluster.
+"""
+
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_startup import CASES, measure, top_level_imports  # noqa: E402
+from benchmarks.fake_apiserver import FakeApiServer  # noqa: E402
+from ml_platform.sdk import Job, LogStream, PlatformClient  # noqa: E402
+from ml_platform.sdk.core.cleanup import cleanup_jobs  # noqa: E402
+from ml_platform.sdk.core.kubeconfig import KubeConfig  # noqa: E402
+from ml_platform.sdk.core.transport import HttpTransport, KubectlTransport  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Allowed fractional change per scenario before it counts as a regression;
+# scenarios that start processes are noisier than in-process ones
+THRESHOLDS = {"kubectl": 0.35, "cli_cold_start": 0.35}
+
+# `ml-platform` without needing the console script installed
+CLI = "import sys; from ml_platform.cli.main import main; sys.argv[0] = 'ml-platform'; main()"
+
+
+def parse_args(argv):
+    opts = {"jobs": 10000, "repeat": 3, "only": "", "out": "", "baseline": "",
+            "threshold": 0.25, "submits": 200, "bulk": 1000, "calls": 500, "fanout": 200,
+            "log_lines": 20, "cleanup": 2000, "kubectl_calls": 20, "json": False}
+    valid = ["--json"] + [f"--{key}=" for key in opts if key != "json"]
+    for arg in argv:
+        key, eq, value = arg[2:].partition("=")
+        if arg == "--json":
+            opts["json"] = True
+        elif arg.startswith("--") and eq and key in opts and key != "json":
+            try:
+                opts[key] = type(opts[key])(value)
+            except ValueError:
+                raise SystemExit(f"invalid value for --{key}: {value!r} "
+                                 f"(expected {type(opts[key]).__name__})") from None
+        else:
+            raise SystemExit(f"unknown option: {arg} (choose from {', '.join(valid)})")
+    return opts
+
+
+class Context:
+    """The seeded cluster and the clients every scenario shares"""
+
+    def __init__(self, server: FakeApiServer, opts: dict):
+        self.server = server
+        self.opts = opts
+        self.tmp = tempfile.mkdtemp(prefix="ml-platform-bench-")
+        kubeconfig = server.write_kubeconfig(self.tmp)
+        # KubectlTransport's processes inherit the environment
+        os.environ["KUBECONFIG"] = kubeconfig
+        self.env = dict(os.environ, HOME=self.tmp)
+        self.transport = HttpTransport(KubeConfig(server.url, {}, {}, "fake"))
+        self.client = PlatformClient(project_id="bench", transport=self.transport)
+        self.names = [f"sweep-{i:05d}" for i in range(opts["jobs"])]
+        kubectl = shutil.which("kubectl")
+        self.kubectl_kind = "kubectl" if kubectl else "fake_kubectl.py"
+        self.kubectl = kubectl or server.install_kubectl(self.tmp)
+        self.submitted = 0
+
+    def close(self):
+        self.transport.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def bench_list(ctx: Context) -> dict:
+    seconds, jobs = _timed(lambda: ctx.client.list_jobs())
+    return {"list_s": seconds, "jobs_per_s": len(jobs) / seconds}
+
+
+def bench_status(ctx: Context) -> dict:
+    jobs = [Job(name, "jobs", transport=ctx.transport) for name in ctx.names[:ctx.opts["calls"]]]
+    seconds, _ = _timed(lambda: [job.status() for job in jobs])
+    summary, _ = _timed(ctx.client.get_status)
+    return {"job_status_per_s": len(jobs) / seconds, "get_status_s": summary}
+
+
+def bench_logs_fanout(ctx: Context) -> dict:
+    names = ctx.names[:ctx.opts["fanout"]]
+    seconds, lines = _timed(lambda: sum(1 for _ in LogStream(ctx.transport, jobs=names)))
+    return {"fanout_s": seconds, "lines_per_s": lines / seconds}
+
+
+def bench_kubectl(ctx: Context) -> dict:
+    transport = KubectlTransport(kubectl=ctx.kubectl)
+    client = PlatformClient(project_id="bench", transport=transport)
+    jobs = [Job(name, "jobs", transport=transport)
+            for name in ctx.names[:ctx.opts["kubectl_calls"]]]
+    seconds, _ = _timed(lambda: [job.status() for job in jobs])
+    listing, _ = _timed(client.list_jobs)
+    return {"job_status_per_s": len(jobs) / seconds, "list_s": listing}
+
+
+def bench_cli_cold_start(ctx: Context) -> dict:
+    startup = set(top_level_imports("pass")[0])
+    imports = measure(CASES["status"], 1, startup)
+    seconds, _ = _timed(lambda: subprocess.run(
+        [sys.executable, "-c", CLI, "list", "-l", "app=none"], cwd=ROOT, env=ctx.env,
+        capture_output=True, check=True))
+    return {"status_import_ms": imports["import_ms"], "status_process_ms": imports["wall_ms"],
+            "list_process_ms": seconds * 1000}
+
+
+def bench_submit(ctx: Context) -> dict:
+    latencies = []
+    for _ in range(ctx.opts["submits"]):
+        ctx.submitted += 1
+        seconds, _ = _timed(lambda: ctx.client.submit_job(f"bench-{ctx.submitted}", "busybox",
+                                                          namespace="bench"))
+        latencies.append(seconds)
+    return {"submit_per_s": len(latencies) / sum(latencies),
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": _percentile(latencies, 0.95) * 1000}
+
+
+def bench_bulk_submit(ctx: Context) -> dict:
+    ctx.submitted += 1
+    specs = [{"name": f"bulk-{ctx.submitted}-{i}", "image": "busybox", "namespace": "bench"}
+             for i in range(ctx.opts["bulk"])]
+    seconds, results = _timed(lambda: ctx.client.submit_jobs(specs))
+    return {"bulk_s": seconds, "submit_per_s": len(specs) / seconds,
+            "failed": sum(1 for r in results if not r.ok)}
+
+
+def bench_cleanup(ctx: Context) -> dict:
+    opts = ctx.opts
+    with FakeApiServer() as server:
+        server.seed_jobs(opts["jobs"], finished_ratio=min(1.0, opts["cleanup"] / opts["jobs"]))
+        transport = HttpTransport(KubeConfig(server.url, {}, {}, "fake"))
+        report = cleanup_jobs(transport, status="finished")
+        transport.close()
+    return {"cleanup_s": report.duration, "deleted_per_s": report.jobs_per_second,
+            "failed": len(report.failed)}
+
+
+SCENARIOS = {
+    "list": bench_list,
+    "status": bench_status,
+    "logs_fanout": bench_logs_fanout,
+    "kubectl": bench_kubectl,
+    "cli_cold_start": bench_cli_cold_start,
+    "submit": bench_submit,
+    "bulk_submit": bench_bulk_submit,
+    "cleanup": bench_cleanup,
+}
+
+
+def higher_is_better(metric: str) -> bool:
+    return metric.endswith("_per_s")
+
+
+def timed_metric(metric: str) -> bool:
+    return metric.endswith(("_per_s", "_ms", "_s"))
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """One row per metric present in both: (scenario, metric, before, after, change, regressed)
+
+    change is (after - before) / before; whether that is worse depends on the unit.
+    """
+    rows = []
+    for scenario, metrics in results.items():
+        before_metrics = baseline.get("results", {}).get(scenario, {})
+        limit = THRESHOLDS.get(scenario, threshold)
+        for metric, after in metrics.items():
+            before = before_metrics.get(metric)
+            if not timed_metric(metric) or not before:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better(metric) else change
+            rows.append((scenario, metric, before, after, change, worse > limit))
+    return rows
+
+
+def environment() -> dict:
+    return {"python": platform.python_version(), "implementation": platform.python_implementation(),
+            "machine": platform.machine(), "system": platform.system(), "cpus": os.cpu_count()}
+
+
+def run_scenarios(opts: dict) -> dict:
+    names = [n for n in opts["only"].split(",") if n] or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"unknown scenario(s): {', '.join(unknown)} "
+                         f"(choose from {', '.join(SCENARIOS)})")
+    runs = {name: [] for name in names}
+    with FakeApiServer() as server:
+        server.seed_jobs(opts["jobs"], pods=True, log_lines=opts["log_lines"])
+        ctx = Context(server, opts)
+        try:
+            for _ in range(opts["repeat"]):
+                for name in names:
+                    runs[name].append(SCENARIOS[name](ctx))
+        finally:
+            ctx.close()
+    return {name: {metric: statistics.median(run[metric] for run in samples)
+                   for metric in samples[0]}
+            for name, samples in runs.items()}, ctx.kubectl_kind
+
+
+def _value(metric: str, value: float) -> str:
+    if not timed_metric(metric):
+        return f"{value:g}"
+    return f"{value:.1f}" if metric.endswith(("_ms", "_per_s")) else f"{value:.3f}"
+
+
+def main():
+    opts = parse_args(sys.argv[1:])
+    results, kubectl = run_scenarios(opts)
+    params = {k: v for k, v in opts.items()
+              if k not in ("only", "out", "baseline", "threshold", "json")}
+    report = {"suite": 1, "environment": environment(), "params": params, "kubectl": kubectl,
+              "results": results}
+
+    rows = []
+    if opts["baseline"]:
+        with open(opts["baseline"]) as f:
+            baseline = json.load(f)
+        for key in ("environment", "params"):
+            if baseline.get(key) != report[key]:
+                print(f"⚠️  baseline {key} differs; numbers may not be comparable",
+                      file=sys.stderr)
+        rows = compare(results, baseline, opts["threshold"])
+        report["comparison"] = [dict(zip(("scenario", "metric", "before", "after", "change",
+                                          "regressed"), row)) for row in rows]
+        report["regressions"] = sum(1 for row in rows if row[-1])
+    if opts["out"]:
+        with open(opts["out"], "w") as f:
+            json.dump(report, f, indent=2)
+
+    if opts["json"]:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{opts['jobs']} jobs, median of {opts['repeat']} (kubectl: {kubectl})\n")
+        for scenario, metrics in results.items():
+            print(f"{scenario:<16}" + "  ".join(f"{m}={_value(m, v)}" for m, v in metrics.items()))
+        if opts["baseline"]:
+            print(f"\n{'scenario':<16}{'metric':<20}{'before':>12}{'after':>12}{'change':>10}")
+            for scenario, metric, before, after, change, regressed in rows:
+                verdict = "  REGRESSION" if regressed else ""
+                print(f"{scenario:<16}{metric:<20}{_value(metric, before):>12}"
+                      f"{_value(metric, after):>12}{change:>+10.0%}{verdict}")
+            print(f"\n{report['regressions']} regression(s) against {opts['baseline']}")
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Content-addressed evaluation cache
+
+A config's result is stored under a hash of the workload version and its
+canonicalized params, so re-running an overlapping sweep (say, a wider
+major_radius range) only computes the configs that were never evaluated by
+this version of the code. Two tiers:
+
+- local: JSON files in a directory, evicted least-recently-used once the
+  directory exceeds max_bytes
+- bucket: a results_io store (GCS or a shared directory), consulted on a
+  local miss; bucket hits are copied into the local tier
+
+Drivers check the cache before submitting work, so hits never become Ray
+tasks; `memoize` wraps a Ray remote function the same way:
+
+    cache = EvalCache(version="train-3f2a", local_dir="~/.cache/evals")
+    optimize = memoize(cache)(optimize_remote)
+    refs = [optimize.remote(i, params) for i, params in configs]   # hits: no task
+    results = optimize.get(refs)                                  # misses get stored
+    print(cache.stats())
+"""
+
+import hashlib
+import json
+import math
+import os
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+# Local tier size before least-recently-used entries are evicted
+DEFAULT_MAX_BYTES = 1 << 30
+
+# Eviction frees down to this fraction of max_bytes, so it doesn't run on every put
+EVICT_TO = 0.9
+
+# Prefix of cache entries in a bucket store
+BUCKET_PREFIX = "eval-cache"
+
+
+def canonical(value) -> Any:
+    """JSON-safe, order-independent form of params (numpy scalars/arrays become lists)"""
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in sorted(value.items(), key=lambda kv: str(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if hasattr(value, "tolist"):
+        return canonical(value.tolist())
+    if isinstance(value, float):
+        if math.isnan(value) or math.isinf(value):
+            return repr(value)
+        # -0.0 and 0.0 (and 1.0 vs 1) are the same config
+        return int(value) if value.is_integer() else value
+    return value
+
+
+def config_key(version: str, params, name: str = "") -> str:
+    """Cache key of one evaluation: sha256(version, function name, canonical params)"""
+    body = json.dumps(canonical(params), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(f"{version}\0{name}\0{body}".encode()).hexdigest()
+
+
+class LocalTier:
+    """Directory of <key>.json entries with LRU eviction by access time"""
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = os.path.expanduser(root)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        # key -> size; file mtimes carry recency (touched on every hit)
+        self._sizes = {}
+        for dirpath, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith(".json"):
+                    self._sizes[name[:-5]] = os.path.getsize(os.path.join(dirpath, name))
+        self._total = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._total += len(data) - self._sizes.get(key, 0)
+            self._sizes[key] = len(data)
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        def atime(key):
+            try:
+                return os.path.getmtime(self._path(key))
+            except OSError:
+                return 0.0
+        for key in sorted(self._sizes, key=atime):
+            if self._total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self._total -= self._sizes.pop(key)
+
+
+class BucketTier:
+    """Entries under <store>/eval-cache/<key>.json in a results_io store"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.store.get_bytes(f"{BUCKET_PREFIX}/{key}.json")
+
+    def put(self, key: str, data: bytes):
+        self.store.put_bytes(f"{BUCKET_PREFIX}/{key}.json", data)
+
+
+class EvalCache:
+    """Two-tier result cache for one workload version
+
+    Args:
+        version: Anything that changes when results would (code hash, image tag, MAX_ITER)
+        local_dir: Local tier directory (None disables it)
+        max_bytes: Local tier size limit
+        bucket: results_io store for the shared tier (None disables it)
+    """
+
+    def __init__(self, version: str, local_dir: Optional[str] = None,
+                 max_bytes: int = DEFAULT_MAX_BYTES, bucket=None):
+        self.version = version
+        self.local = LocalTier(local_dir, max_bytes) if local_dir else None
+        self.bucket = BucketTier(bucket) if bucket is not None else None
+        self._lock = threading.Lock()
+        self._counts = {"hits": 0, "misses": 0, "local_hits": 0, "bucket_hits": 0}
+
+    def key(self, params, name: str = "") -> str:
+        return config_key(self.version, params, name)
+
+    def _count(self, *names):
+        with self._lock:
+            for name in names:
+                self._counts[name] += 1
+
+    def lookup(self, key: str) -> Tuple[bool, Any]:
+        """(True, result) on a hit, (False, None) on a miss"""
+        data = self.local.get(key) if self.local else None
+        if data is not None:
+            self._count("hits", "local_hits")
+            return True, json.loads(data)
+        if self.bucket:
+            try:
+                data = self.bucket.get(key)
+            except Exception:  # an unreachable bucket is a miss, not a failed run
+                data = None
+            if data is not None:
+                if self.local:
+                    self.local.put(key, data)
+                self._count("hits", "bucket_hits")
+                return True, json.loads(data)
+        self._count("misses")
+        return False, None
+
+    def store(self, key: str, result):
+        """Save a freshly computed result in every tier"""
+        data = json.dumps(result, separators=(",", ":")).encode()
+        if self.local:
+            self.local.put(key, data)
+        if self.bucket:
+            try:
+                self.bucket.put(key, data)
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counts, for run metrics"""
+        with self._lock:
+            counts = dict(self._counts)
+        looked_up = counts["hits"] + counts["misses"]
+        counts["hit_rate"] = counts["hits"] / looked_up if looked_up else 0.0
+        return counts
+
+
+class MemoizedRemote:
+    """A Ray remote function whose calls are answered from an EvalCache when possible
+
+    .remote() returns an ObjectRef either way: for a hit it is the cached
+    result put in the object store (no task is scheduled), for a miss the
+    real task. Fetch with .get() rather than ray.get so fresh results are
+    stored.
+    """
+
+    def __init__(self, remote_fn, cache: EvalCache, name: Optional[str] = None):
+        self.remote_fn = remote_fn
+        self.cache = cache
+        self.name = name or getattr(remote_fn, "__name__", "") or ""
+        self._pending = {}    # miss ObjectRef -> cache key
+
+    def remote(self, *args, **kwargs):
+        import ray
+        key = self.cache.key([args, kwargs], self.name)
+        hit, result = self.cache.lookup(key)
+        if hit:
+            return ray.put(result)
+        ref = self.remote_fn.remote(*args, **kwargs)
+        self._pending[ref] = key
+        return ref
+
+    def get(self, refs):
+        """ray.get that also stores results of cache misses"""
+        import ray
+        single = not isinstance(refs, list)
+        refs = [refs] if single else refs
+        results = ray.get(refs)
+        for ref, result in zip(refs, results):
+            key = self._pending.pop(ref, None)
+            if key is not None:
+                self.cache.store(key, result)
+        return results[0] if single else results
+
+    def options(self, **options) -> "MemoizedRemote":
+        return MemoizedRemote(self.remote_fn.options(**options), self.cache, self.name)
+
+
+def memoize(cache: EvalCache, name: Optional[str] = None):
+    """Decorator: wrap a @ray.remote function (apply it after @ray.remote)"""
+    def wrap(remote_fn):
+        return MemoizedRemote(remote_fn, cache, name)
+    return wrap
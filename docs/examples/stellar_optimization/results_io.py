@@ -0,0 +1,421 @@
+"""
+Chunked, columnar result artifacts
+
+Results are appended one dict at a time and written in chunks of
+`chunk_rows` rows. Each chunk is a directory holding one file per column:
+numeric and boolean columns as NumPy `.npy` arrays (memory-mappable),
+anything else as a JSON list. Nested dicts are flattened into dotted column
+names (`final_params.geometry.major_radius`), so parameters become columns
+too. A `manifest.json` next to the chunks lists them and their columns; it
+is rewritten after every chunk, so a run that dies midway still leaves a
+readable prefix of its results, and a restarted writer appends after it.
+
+    <prefix>/manifest.json
+    <prefix>/chunk-00000/score.npy
+    <prefix>/chunk-00000/final_params.geometry.major_radius.npy
+    <prefix>/chunk-00000/label.json
+    ...
+
+Chunks are uploaded on a background thread while the run continues. GCS
+uploads are resumable (chunked) uploads, so a dropped connection resumes
+instead of restarting the blob. Everything works the same against a local
+directory (LocalStore), which is also the fallback when GCS is unreachable.
+
+    writer = ResultWriter(open_store("gs://bucket/stellar_optimization/run-1"))
+    for result in results:
+        writer.append(result)
+    writer.close()
+
+    reader = ResultReader(open_store("results/run-1"))
+    scores = reader.column("score")            # one array across all chunks
+    for chunk in reader.iter_column("score"):  # or chunk by chunk, memory-mapped
+        ...
+"""
+
+import io
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numeric columns fall back to JSON
+    np = None
+
+
+MANIFEST = "manifest.json"
+FORMAT = "columnar-chunks/1"
+
+# Rows per chunk
+DEFAULT_CHUNK_ROWS = 10000
+
+# A partial chunk is written once its oldest row is this old (bounds work lost on a crash)
+DEFAULT_FLUSH_SECONDS = 60.0
+
+# GCS resumable upload chunk size (must be a multiple of 256 KiB)
+UPLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Chunks waiting for upload before append() blocks
+MAX_PENDING_CHUNKS = 2
+
+# Column kinds
+BOOL, INT, FLOAT, JSON = "bool", "int64", "float64", "json"
+
+
+# --- stores ---
+
+class LocalStore:
+    """Results under a local directory"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.url = root
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, *name.split("/"))
+
+    def put_file(self, name: str, local_path: str):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(local_path, path + ".tmp")
+        os.replace(path + ".tmp", path)
+
+    def put_bytes(self, name: str, data: bytes):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(data)
+        os.replace(path + ".tmp", path)
+
+    def get_bytes(self, name: str) -> Optional[bytes]:
+        try:
+            with open(self._path(name), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def local_path(self, name: str) -> str:
+        return self._path(name)
+
+
+class GCSStore:
+    """Results under gs://bucket/prefix; reads are cached in a local directory"""
+
+    def __init__(self, url: str, cache_dir: Optional[str] = None):
+        from google.cloud import storage
+        bucket, _, prefix = url[len("gs://"):].partition("/")
+        self.url = url
+        self.prefix = prefix.strip("/")
+        self.bucket = storage.Client().bucket(bucket)
+        self.cache_dir = cache_dir or tempfile.mkdtemp(prefix="results-")
+
+    def _blob(self, name: str):
+        blob = self.bucket.blob(f"{self.prefix}/{name}" if self.prefix else name)
+        # A chunk size makes the client use a resumable upload, retried chunk by chunk
+        blob.chunk_size = UPLOAD_CHUNK_BYTES
+        return blob
+
+    def put_file(self, name: str, local_path: str):
+        self._blob(name).upload_from_filename(local_path)
+
+    def put_bytes(self, name: str, data: bytes):
+        self._blob(name).upload_from_file(io.BytesIO(data), size=len(data))
+
+    def get_bytes(self, name: str) -> Optional[bytes]:
+        from google.api_core.exceptions import NotFound
+        try:
+            return self._blob(name).download_as_bytes()
+        except NotFound:
+            return None
+
+    def local_path(self, name: str) -> str:
+        path = os.path.join(self.cache_dir, *name.split("/"))
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._blob(name).download_to_filename(path + ".tmp")
+            os.replace(path + ".tmp", path)
+        return path
+
+
+def open_store(url: str):
+    """GCSStore for gs:// URLs, LocalStore for anything else"""
+    return GCSStore(url) if url.startswith("gs://") else LocalStore(url)
+
+
+# --- columns ---
+
+def flatten(row: Dict, prefix: str = "") -> Dict[str, Any]:
+    """{"a": {"b": 1}} -> {"a.b": 1}"""
+    flat = {}
+    for key, value in row.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(flatten(value, name + "."))
+        else:
+            flat[name] = value
+    return flat
+
+
+def unflatten(flat: Dict[str, Any]) -> Dict:
+    """Inverse of flatten"""
+    row = {}
+    for name, value in flat.items():
+        *parents, leaf = name.split(".")
+        node = row
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return row
+
+
+def column_kind(values: List) -> str:
+    """Storage kind of a column: bool/int64/float64 when numpy can hold it, else json"""
+    if np is None or not values:
+        return JSON
+    if all(isinstance(v, bool) for v in values):
+        return BOOL
+    if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in values):
+        return JSON
+    if all(isinstance(v, int) and -2 ** 63 <= v < 2 ** 63 for v in values):
+        return INT
+    return FLOAT
+
+
+def _column_file(column: str, kind: str) -> str:
+    return f"{column}.json" if kind == JSON else f"{column}.npy"
+
+
+# --- writer ---
+
+class ResultWriter:
+    """Append result dicts; writes them as columnar chunks to a store
+
+    Args:
+        store: LocalStore or GCSStore (see open_store)
+        chunk_rows: Rows buffered per chunk
+        flush_seconds: Write a partial chunk once rows have waited this long
+        background: Upload chunks on a background thread (append only blocks
+            when MAX_PENDING_CHUNKS are already waiting)
+
+    An existing manifest in the store is picked up, so a restarted run keeps
+    its earlier chunks and numbers new ones after them.
+    """
+
+    def __init__(self, store, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 flush_seconds: float = DEFAULT_FLUSH_SECONDS, background: bool = True):
+        self.store = store
+        self.chunk_rows = chunk_rows
+        self.flush_seconds = flush_seconds
+        self._first_row_at = None
+        existing = store.get_bytes(MANIFEST)
+        self.manifest = json.loads(existing) if existing else {
+            "format": FORMAT, "rows": 0, "columns": {}, "chunks": []}
+        self._rows = []
+        self._appended = self.manifest["rows"]
+        self._next_chunk = len(self.manifest["chunks"])
+        self._staging = tempfile.mkdtemp(prefix="results-chunk-")
+        self._error = None
+        self._queue = None
+        if background:
+            self._queue = queue.Queue(MAX_PENDING_CHUNKS)
+            self._thread = threading.Thread(target=self._upload_loop, daemon=True)
+            self._thread.start()
+
+    @property
+    def rows(self) -> int:
+        """Rows appended so far, including earlier runs and unflushed rows"""
+        return self._appended
+
+    def append(self, result: Dict):
+        """Add one result; writes a chunk every chunk_rows results (or flush_seconds)"""
+        if not self._rows:
+            self._first_row_at = time.monotonic()
+        self._rows.append(flatten(result))
+        self._appended += 1
+        if (len(self._rows) >= self.chunk_rows
+                or time.monotonic() - self._first_row_at >= self.flush_seconds):
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as a chunk now"""
+        if self._error is not None:
+            raise self._error
+        if not self._rows:
+            return
+        chunk = self._write_chunk(self._rows)
+        self._rows = []
+        if self._queue is not None:
+            self._queue.put(chunk)
+        else:
+            self._upload(chunk)
+
+    def close(self):
+        """Flush, wait for pending uploads and write the final manifest"""
+        self.flush()
+        if self._queue is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._queue = None
+        shutil.rmtree(self._staging, ignore_errors=True)
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self) -> "ResultWriter":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _write_chunk(self, rows: List[Dict]) -> Dict:
+        name = f"chunk-{self._next_chunk:05d}"
+        self._next_chunk += 1
+        names = list(dict.fromkeys(key for row in rows for key in row))
+        files, kinds = {}, {}
+        for column in names:
+            values = [row.get(column) for row in rows]
+            kind = column_kind(values)
+            path = os.path.join(self._staging, f"{name}.{len(files)}")
+            if kind == JSON:
+                with open(path, "w") as f:
+                    json.dump(values, f)
+            else:
+                np.save(path, np.array(values, dtype=kind), allow_pickle=False)
+                path += ".npy"
+            files[f"{name}/{_column_file(column, kind)}"] = path
+            kinds[column] = kind
+        return {"name": name, "rows": len(rows), "columns": kinds, "files": files}
+
+    def _upload(self, chunk: Dict):
+        for name, path in chunk["files"].items():
+            self.store.put_file(name, path)
+            os.remove(path)
+        columns = self.manifest["columns"]
+        for column, kind in chunk["columns"].items():
+            # A column stored as JSON in any chunk is JSON overall
+            columns[column] = kind if columns.get(column, kind) == kind else JSON
+        self.manifest["chunks"].append({k: chunk[k] for k in ("name", "rows", "columns")})
+        self.manifest["rows"] += chunk["rows"]
+        # Manifest last: readers only ever see fully uploaded chunks
+        self.store.put_bytes(MANIFEST, json.dumps(self.manifest, indent=1).encode())
+
+    def _upload_loop(self):
+        while True:
+            chunk = self._queue.get()
+            if chunk is None:
+                return
+            if self._error is None:
+                try:
+                    self._upload(chunk)
+                except Exception as e:  # surfaced on the next flush/close
+                    self._error = e
+
+
+# --- checkpoint ---
+
+class Checkpoint:
+    """Resume a sweep where a previous attempt of the same run stopped
+
+    The completed-config index is the key column of the result chunks
+    themselves: anything in a chunk listed by the manifest is done, so
+    checkpointing costs no extra writes and can never disagree with the
+    results. Rows not yet in a chunk when a pod dies (at most chunk_rows, or
+    flush_seconds of work) are redone.
+
+        with Checkpoint(store) as checkpoint:
+            for result in run(checkpoint.remaining(enumerate(configs))):
+                checkpoint.record(result)
+
+    Args:
+        store: Where the run's results live (same prefix across retries)
+        key: Result field identifying a config
+        **writer_options: Passed to ResultWriter
+    """
+
+    def __init__(self, store, key: str = "config_id", **writer_options):
+        self.key = key
+        self.writer = ResultWriter(store, **writer_options)
+        self.completed = set()
+        if self.writer.manifest["chunks"]:
+            for part in ResultReader(store).iter_column(key):
+                self.completed.update(v.item() if hasattr(v, "item") else v for v in part)
+
+    @property
+    def resumed(self) -> bool:
+        """True when an earlier attempt left completed results"""
+        return bool(self.completed)
+
+    def remaining(self, items: Iterable, key=lambda item: item[0]) -> Iterator:
+        """items whose key (default: first element, e.g. from enumerate) isn't completed yet"""
+        return (item for item in items if key(item) not in self.completed)
+
+    def record(self, result: Dict):
+        """Append a finished result (it counts as completed once its chunk is written)"""
+        self.writer.append(result)
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self) -> "Checkpoint":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- reader ---
+
+class ResultReader:
+    """Lazy, column-wise access to results written by ResultWriter"""
+
+    def __init__(self, store):
+        self.store = store
+        data = store.get_bytes(MANIFEST)
+        if data is None:
+            raise FileNotFoundError(f"No {MANIFEST} under {store.url}")
+        self.manifest = json.loads(data)
+
+    def __len__(self) -> int:
+        return self.manifest["rows"]
+
+    @property
+    def columns(self) -> Dict[str, str]:
+        """Column name -> kind"""
+        return dict(self.manifest["columns"])
+
+    def iter_column(self, column: str, mmap: bool = True) -> Iterator:
+        """One array (or list, for JSON columns and chunks lacking the column) per chunk
+
+        NumPy chunks are memory-mapped, so only the pages read are loaded.
+        """
+        for chunk in self.manifest["chunks"]:
+            kind = chunk["columns"].get(column)
+            if kind is None:
+                yield [None] * chunk["rows"]
+                continue
+            path = self.store.local_path(f"{chunk['name']}/{_column_file(column, kind)}")
+            if kind == JSON:
+                with open(path) as f:
+                    yield json.load(f)
+            else:
+                yield np.load(path, mmap_mode="r" if mmap else None, allow_pickle=False)
+
+    def column(self, column: str):
+        """The whole column across chunks: an array for numeric columns, else a list"""
+        parts = list(self.iter_column(column, mmap=False))
+        if self.manifest["columns"].get(column, JSON) == JSON or np is None:
+            return [v for part in parts for v in part]
+        return np.concatenate([np.asarray(p) for p in parts]) if parts else np.array([])
+
+    def rows(self, columns: Optional[List[str]] = None) -> Iterator[Dict]:
+        """Result dicts (nested again), loading only the given columns"""
+        names = columns or list(self.manifest["columns"])
+        readers = [self.iter_column(name) for name in names]
+        for parts in zip(*readers):
+            for values in zip(*parts):
+                yield unflatten({n: (v.item() if hasattr(v, "item") else v)
+                                 for n, v in zip(names, values)})
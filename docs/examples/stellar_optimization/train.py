@@ -5,35 +5,67 @@ This script demonstrates distributed optimization of stellarator configurations
 using Ray for parallelization and the Constellaration library for physics.
 """
 
-import ray
-import os
-import pickle
+import hashlib
 import json
+import os
+import time
 from datetime import datetime
 from pathlib import Path
-from google.cloud import storage
+
+import ray
+from eval_cache import EvalCache
+from results_io import Checkpoint, LocalStore, ResultReader, open_store
 
 # Uncomment when constellaration is available:
 # from constellaration.problems import StellaratorProblem
 # from constellaration.optimization import OptimizationResult
 
 
+def apply_index_env():
+    """In an Indexed Job (ml-platform submit --indexed), apply this index's env
+
+    Same as ml_platform.sdk.core.indexed.apply_index_env, inlined because the
+    SDK is not installed in the image. Returns (index, number of indexes).
+    """
+    index = os.getenv("JOB_COMPLETION_INDEX")
+    if index is None:
+        return None, 1
+    index = int(index)
+    entries = json.loads(os.getenv("INDEX_ENV") or "[]")
+    if index < len(entries):
+        os.environ.update({k: str(v) for k, v in entries[index].items()})
+    return index, int(os.getenv("JOB_COMPLETIONS", "1"))
+
+
+SHARD_INDEX, NUM_SHARDS = apply_index_env()
+
 # Configuration
 NUM_CONFIGS = int(os.getenv("NUM_CONFIGS", "50"))
 MAX_ITER = int(os.getenv("MAX_ITER", "1000"))
 GCS_BUCKET = os.getenv("GCS_BUCKET", "gs://PROJECT-ml-artifacts")
-OUTPUT_PATH = f"stellar_optimization/{datetime.now().strftime('%Y%m%d-%H%M%S')}"
+# Every pod of a job (and every index of an Indexed Job) shares the job's prefix
+RUN_ID = os.getenv("JOB_NAME") or datetime.now().strftime('%Y%m%d-%H%M%S')
+OUTPUT_PATH = f"stellar_optimization/{RUN_ID}"
+if SHARD_INDEX is not None:
+    OUTPUT_PATH += f"/index-{SHARD_INDEX}"
+
+
+# Streaming collection: tasks in flight per cluster CPU, and wanted seconds per task
+IN_FLIGHT_PER_CPU = int(os.getenv("IN_FLIGHT_PER_CPU", "2"))
+TARGET_TASK_SECONDS = float(os.getenv("TARGET_TASK_SECONDS", "1.0"))
+MAX_BATCH_SIZE = 1024
+
+# Progress line every this many results
+REPORT_EVERY = max(1, NUM_CONFIGS // 20)
 
 
-@ray.remote
 def optimize_stellarator_config(config_id: int, params: dict):
     """
     Optimize a single stellarator configuration.
     
-    This runs on a Ray worker and can execute in parallel with other configs.
+    This runs on a Ray worker (in a batch with other configs, see run_batch)
+    and can execute in parallel with other batches.
     """
-    print(f"⚙️  Worker {ray.get_runtime_context().get_worker_id()}: Optimizing config {config_id}")
-    
     # TODO: Replace with actual constellaration code
     # problem = StellaratorProblem(
     #     geometry_params=params["geometry"],
@@ -50,15 +82,75 @@ def optimize_stellarator_config(config_id: int, params: dict):
         "final_params": params,
     }
     
-    print(f"✅ Config {config_id} complete: score={result['score']:.4f}")
     return result
 
 
+@ray.remote
+def run_batch(batch: list):
+    """Optimize a batch of (config_id, params); returns (compute seconds, results)"""
+    start = time.perf_counter()
+    results = [optimize_stellarator_config(config_id, params) for config_id, params in batch]
+    return time.perf_counter() - start, results
+
+
+def stream_results(configs, cache=None):
+    """Yield results as Ray tasks finish, never holding more than a bounded window
+
+    Same approach as ml_platform.sdk.core.ray_driver.imap_unordered, inlined
+    because the SDK is not installed in the image: at most IN_FLIGHT_PER_CPU
+    tasks per CPU are outstanding, configs are read from the iterator only as
+    tasks finish, and configs are batched so each task computes for about
+    TARGET_TASK_SECONDS.
+    
+    With an EvalCache, configs already evaluated by this code version are
+    answered from it and never become tasks; fresh results are added to it.
+    """
+    max_in_flight = max(1, int(ray.cluster_resources().get("CPU", 1)) * IN_FLIGHT_PER_CPU)
+    configs = iter(configs)
+    batch_size, per_item = 1, None
+    pending = []
+    keys = {}  # config_id -> cache key, for configs sent to Ray
+    exhausted = False
+    while True:
+        while not exhausted and len(pending) < max_in_flight:
+            batch = []
+            for config_id, params in configs:
+                if cache is not None:
+                    key = cache.key(params, "optimize_stellarator_config")
+                    hit, result = cache.lookup(key)
+                    if hit:
+                        yield dict(result, config_id=config_id)
+                        continue
+                    keys[config_id] = key
+                batch.append((config_id, params))
+                if len(batch) >= batch_size:
+                    break
+            else:
+                exhausted = True
+            if batch:
+                pending.append(run_batch.remote(batch))
+        if not pending:
+            return
+        ready, pending = ray.wait(pending, num_returns=1)
+        if pending:
+            more, pending = ray.wait(pending, num_returns=len(pending), timeout=0)
+            ready += more
+        for seconds, results in ray.get(ready):
+            # Moving average of seconds per config sets the next batch size (at most 4x per step)
+            sample = seconds / len(results)
+            per_item = sample if per_item is None else 0.3 * sample + 0.7 * per_item
+            wanted = TARGET_TASK_SECONDS / per_item if per_item > 0 else batch_size * 2
+            batch_size = int(max(1, batch_size / 4, min(MAX_BATCH_SIZE, batch_size * 4, wanted)))
+            if cache is not None:
+                for result in results:
+                    cache.store(keys.pop(result["config_id"]), result)
+            yield from results
+
+
 def generate_configurations(num: int):
-    """Generate stellarator configurations to optimize"""
+    """Generate stellarator configurations to optimize (lazily, one at a time)"""
     print(f"📋 Generating {num} configurations...")
     
-    configs = []
     for i in range(num):
         # TODO: Replace with actual parameter generation
         config = {
@@ -72,52 +164,53 @@ def generate_configurations(num: int):
                 "aspect_ratio": 6.0,
             }
         }
-        configs.append(config)
-    
-    return configs
+        yield config
 
 
-def save_results_to_gcs(results: list, metrics: dict):
-    """Save optimization results to Google Cloud Storage"""
-    print(f"\n💾 Saving results to {GCS_BUCKET}/{OUTPUT_PATH}")
-    
-    # Parse bucket and path
-    bucket_name = GCS_BUCKET.replace("gs://", "").split("/")[0]
-    
+def open_results_store():
+    """Results store under GCS_BUCKET/OUTPUT_PATH, or ./results/OUTPUT_PATH if GCS is unreachable"""
+    url = f"{GCS_BUCKET.rstrip('/')}/{OUTPUT_PATH}"
     try:
-        client = storage.Client()
-        bucket = client.bucket(bucket_name)
-        
-        # Save all results
-        blob = bucket.blob(f"{OUTPUT_PATH}/all_results.pkl")
-        blob.upload_from_string(pickle.dumps(results))
-        print(f"  ✅ Saved all_results.pkl")
-        
-        # Save best config
-        best = max(results, key=lambda r: r["score"])
-        blob = bucket.blob(f"{OUTPUT_PATH}/best_config.json")
-        blob.upload_from_string(json.dumps(best, indent=2))
-        print(f"  ✅ Saved best_config.json (score: {best['score']:.4f})")
-        
-        # Save metrics
-        blob = bucket.blob(f"{OUTPUT_PATH}/metrics.json")
-        blob.upload_from_string(json.dumps(metrics, indent=2))
-        print(f"  ✅ Saved metrics.json")
-        
-        print(f"\n📦 Results saved to: {GCS_BUCKET}/{OUTPUT_PATH}")
-        
+        store = open_store(url)
+        store.get_bytes("manifest.json")  # fails fast without credentials or bucket access
+        return store
     except Exception as e:
-        print(f"⚠️  Warning: Could not save to GCS: {e}")
-        print("   Saving locally instead...")
-        
-        # Save locally as fallback
-        Path("results").mkdir(exist_ok=True)
-        with open("results/all_results.pkl", "wb") as f:
-            pickle.dump(results, f)
-        with open("results/best_config.json", "w") as f:
-            json.dump(best, f, indent=2)
-        with open("results/metrics.json", "w") as f:
-            json.dump(metrics, f, indent=2)
+        local = Path("results") / OUTPUT_PATH
+        print(f"⚠️  Warning: Could not reach {url}: {e}")
+        print(f"   Saving locally to {local}/ instead")
+        return LocalStore(str(local))
+
+
+def open_eval_cache():
+    """Evaluation cache shared across runs (None when EVAL_CACHE=0)
+    
+    Keyed by this file's source and MAX_ITER, so changing either starts a
+    fresh cache. Local tier in EVAL_CACHE_DIR, shared tier under the bucket.
+    """
+    if os.getenv("EVAL_CACHE", "1") == "0":
+        return None
+    with open(__file__, "rb") as f:
+        source = f.read()
+    version = os.getenv("EVAL_CACHE_VERSION") or hashlib.sha256(
+        source + f"\0MAX_ITER={MAX_ITER}".encode()).hexdigest()[:16]
+    local_dir = os.getenv("EVAL_CACHE_DIR", "~/.cache/stellar_optimization/eval-cache")
+    bucket = None
+    try:
+        bucket = open_store(f"{GCS_BUCKET.rstrip('/')}/stellar_optimization")
+        bucket.get_bytes("eval-cache/.probe")
+    except Exception:
+        bucket = None
+    print(f"🗃️  Eval cache: {version} ({local_dir}{', + bucket' if bucket else ''})")
+    return EvalCache(version, local_dir=local_dir, bucket=bucket)
+
+
+def save_summary(store, best: dict, metrics: dict):
+    """Save the best config and run metrics next to the result chunks"""
+    store.put_bytes("best_config.json", json.dumps(best, indent=2).encode())
+    print(f"  ✅ Saved best_config.json (score: {best['score']:.4f})")
+    store.put_bytes("metrics.json", json.dumps(metrics, indent=2).encode())
+    print("  ✅ Saved metrics.json")
+    print(f"\n📦 Results saved to: {store.url}")
 
 
 def main():
@@ -127,6 +220,8 @@ def main():
     print("=" * 60)
     print(f"  Configurations: {NUM_CONFIGS}")
     print(f"  Max iterations: {MAX_ITER}")
+    if SHARD_INDEX is not None:
+        print(f"  Shard: {SHARD_INDEX + 1}/{NUM_SHARDS}")
     print(f"  Output: {GCS_BUCKET}/{OUTPUT_PATH}")
     print("=" * 60)
     print()
@@ -136,27 +231,51 @@ def main():
     print(f"🔗 Connecting to Ray: {ray_address}")
     ray.init(address=ray_address)
     
-    print(f"   Ray cluster resources:")
+    print("   Ray cluster resources:")
     print(f"     CPUs: {ray.cluster_resources().get('CPU', 0)}")
     print(f"     Memory: {ray.cluster_resources().get('memory', 0) / 1e9:.1f} GB")
     print(f"     Nodes: {len(ray.nodes())}")
     print()
     
-    # Generate configurations
-    configs = generate_configurations(NUM_CONFIGS)
+    # Generate configurations; an Indexed Job's pods each take every NUM_SHARDS-th one
+    configs = ((i, config) for i, config in enumerate(generate_configurations(NUM_CONFIGS))
+               if SHARD_INDEX is None or i % NUM_SHARDS == SHARD_INDEX)
     
-    # Submit all optimization tasks to Ray
-    print(f"🔄 Submitting {len(configs)} tasks to Ray cluster...")
+    # Stream tasks through Ray; results go out in columnar chunks while the run continues.
+    # A retried pod writes to the same prefix (the job name) and skips what is already there.
+    store = open_results_store()
+    cache = open_eval_cache()
     start_time = datetime.now()
     
-    futures = [
-        optimize_stellarator_config.remote(i, config)
-        for i, config in enumerate(configs)
-    ]
+    total = converged = computed = 0
+    score_sum = 0.0
+    best = None
+    
+    def summarize(result):
+        nonlocal total, converged, score_sum, best
+        total += 1
+        converged += bool(result["converged"])
+        score_sum += result["score"]
+        if best is None or result["score"] > best["score"]:
+            best = result
     
-    # Wait for all results (executes in parallel!)
-    print(f"⏳ Waiting for results...\n")
-    results = ray.get(futures)
+    with Checkpoint(store) as checkpoint:
+        if checkpoint.resumed:
+            print(f"♻️  Resuming: {len(checkpoint.completed)} configs already done, skipping them")
+            for result in ResultReader(store).rows():
+                summarize(result)
+        print("🔄 Running configurations on the Ray cluster...\n")
+        for result in stream_results(checkpoint.remaining(configs), cache):
+            checkpoint.record(result)
+            computed += 1
+            summarize(result)
+            if computed % REPORT_EVERY == 0:
+                print(f"  {total} done, best score {best['score']:.4f}")
+    
+    if not total:
+        print("⚠️  No configurations to run")
+        ray.shutdown()
+        return
     
     end_time = datetime.now()
     duration = (end_time - start_time).total_seconds()
@@ -166,18 +285,15 @@ def main():
     print("📊 Results Summary")
     print("=" * 60)
     
-    converged = sum(1 for r in results if r["converged"])
-    scores = [r["score"] for r in results]
-    best_score = max(scores)
-    avg_score = sum(scores) / len(scores)
-    
     metrics = {
-        "total_configs": len(results),
+        "total_configs": total,
+        "computed_this_attempt": computed,
         "converged": converged,
-        "best_score": best_score,
-        "average_score": avg_score,
+        "best_score": best["score"],
+        "average_score": score_sum / total,
         "duration_seconds": duration,
-        "configs_per_second": len(results) / duration,
+        "configs_per_second": computed / duration if duration else 0.0,
+        "cache": cache.stats() if cache else None,
     }
     
     print(f"  Total configurations: {metrics['total_configs']}")
@@ -186,11 +302,15 @@ def main():
     print(f"  Average score: {metrics['average_score']:.4f}")
     print(f"  Duration: {duration:.1f}s")
     print(f"  Throughput: {metrics['configs_per_second']:.2f} configs/sec")
+    if cache:
+        stats = metrics["cache"]
+        print(f"  Eval cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"({stats['hit_rate']:.0%})")
     print("=" * 60)
     print()
     
-    # Save results
-    save_results_to_gcs(results, metrics)
+    # Save summary (the results themselves are already written)
+    save_summary(store, best, metrics)
     
     print("\n✅ Training complete!\n")
     
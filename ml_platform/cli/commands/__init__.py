@@ -1,4 +1,30 @@
-"""CLI commands package"""
-from . import status, submit, logs, scale, build, port_forward, list_jobs
+"""CLI commands package
 
-__all__ = ['status', 'submit', 'logs', 'scale', 'build', 'port_forward', 'list_jobs']
+Commands are registered by name and imported on first use, so
+`ml-platform --help` and each command only load the modules they need.
+"""
+import importlib
+
+# command name -> module in this package that defines run(args)
+COMMANDS = {
+    'status': 'status',
+    'submit': 'submit',
+    'logs': 'logs',
+    'scale': 'scale',
+    'list': 'list_jobs',
+    'cleanup': 'cleanup',
+    'build': 'build',
+    'port-forward': 'port_forward',
+    'stats': 'stats',
+    'trace': 'trace',
+    'queue': 'queue',
+    'rightsize': 'rightsize',
+}
+
+
+def load(name: str):
+    """Import a command's module and return its run function"""
+    return importlib.import_module(f"{__name__}.{COMMANDS[name]}").run
+
+
+__all__ = ['COMMANDS', 'load']
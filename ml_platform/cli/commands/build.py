@@ -1,80 +1,106 @@
 """Build command - build and push containers"""
 
-import subprocess
-import sys
 import os
+import sys
+
+from ml_platform.sdk.core.build import BuildCache, build_images, ensure_docker_auth
+from ml_platform.sdk.core.config import default_resolver
+
+# Workloads built at once when several are given
+DEFAULT_BUILD_CONCURRENCY = 4
+
+
+def available_workloads() -> list:
+    try:
+        return sorted(d for d in os.listdir("docs/examples") if os.path.isdir(f"docs/examples/{d}"))
+    except OSError:
+        return []
 
 
-def run_cmd(cmd: str) -> tuple:
-    """Run shell command and return output"""
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    return result.stdout.strip(), result.returncode
+def print_workloads():
+    print("\nAvailable workloads:")
+    for name in available_workloads() or ["(none found)"]:
+        print(f"  {name}")
 
 
 def run(args):
-    """Build and push workload container"""
-    if len(args) < 2:
-        print("Usage: ml-platform build <workload> <version>")
+    """Build and push workload containers"""
+    positional = [a for a in args if not a.startswith("--")]
+    if len(positional) < 2:
+        print("Usage: ml-platform build <workload>[,<workload>...] <version> [--force] [--no-cache]")
+        print("                         [--concurrency=N]")
         print("Example: ml-platform build stellar_optimization v1.0.0")
-        print("\nAvailable workloads:")
-        subprocess.run("ls -1 docs/examples/ 2>/dev/null || echo '  (none found)'", shell=True)
+        print_workloads()
         sys.exit(1)
     
-    workload = args[0]
-    version = args[1]
-    
+    *names, version = positional
+    workloads = [w for name in names for w in name.split(",") if w]
+    force = "--force" in args
+    registry_cache = "--no-cache" not in args
+    concurrency = DEFAULT_BUILD_CONCURRENCY
+    for arg in args:
+        if arg.startswith("--concurrency="):
+            try:
+                concurrency = int(arg.split("=", 1)[1])
+            except ValueError:
+                concurrency = 0
+            if concurrency < 1:
+                print(f"❌ Invalid concurrency: {arg} (a positive number of builds)")
+                sys.exit(1)
+        elif arg.startswith("--") and arg not in ("--force", "--no-cache"):
+            print(f"❌ Unknown option: {arg}")
+            sys.exit(1)
+
     # Get project ID
-    project_id, _ = run_cmd("gcloud config get-value project 2>/dev/null")
+    config = default_resolver()
+    project_id = config.project()
     if not project_id:
         print("❌ No GCP project configured")
         print("Fix: gcloud config set project YOUR_PROJECT_ID")
         sys.exit(1)
     
-    # Check workload exists
-    workload_dir = f"docs/examples/{workload}"
-    if not os.path.exists(workload_dir):
-        print(f"❌ Workload not found: {workload_dir}")
-        print("\nAvailable workloads:")
-        subprocess.run("ls -1 docs/examples/", shell=True)
-        sys.exit(1)
-    
-    if not os.path.exists(f"{workload_dir}/Dockerfile"):
-        print(f"❌ No Dockerfile in {workload_dir}")
-        sys.exit(1)
+    # Check workloads exist
+    for workload in workloads:
+        workload_dir = f"docs/examples/{workload}"
+        if not os.path.exists(workload_dir):
+            print(f"❌ Workload not found: {workload_dir}")
+            print_workloads()
+            sys.exit(1)
+        if not os.path.exists(f"{workload_dir}/Dockerfile"):
+            print(f"❌ No Dockerfile in {workload_dir}")
+            sys.exit(1)
     
-    region, _ = run_cmd("gcloud config get-value compute/region 2>/dev/null")
-    if not region:
-        region = "europe-west3"  # Default fallback
-        
-    image = f"{region}-docker.pkg.dev/{project_id}/ml-platform/{workload}:{version}"
-    image_latest = f"{region}-docker.pkg.dev/{project_id}/ml-platform/{workload}:latest"
+    region = config.region()
+    registry = f"{region}-docker.pkg.dev"
+    builds = [{
+        "workload": workload,
+        "context": f"docs/examples/{workload}",
+        "repository": f"{registry}/{project_id}/ml-platform/{workload}",
+        "tags": [version, "latest"],
+    } for workload in workloads]
     
-    print(f"🔨 Building: {workload}")
-    print(f"📦 Version: {version}")
-    print(f"🖼️  Image: {image}\n")
+    print(f"🔨 Building: {', '.join(workloads)}")
+    print(f"📦 Version: {version}\n")
     
-    # Configure Docker
-    print("Configuring Docker...")
-    subprocess.run(f"gcloud auth configure-docker {region}-docker.pkg.dev --quiet", shell=True)
+    # Configure Docker (only the first time for this registry)
+    ensure_docker_auth(registry)
     
-    # Build
-    print("\nBuilding container...")
-    result = subprocess.run(
-        f"docker build -t {image} -t {image_latest} {workload_dir}",
-        shell=True
-    )
-    if result.returncode != 0:
-        sys.exit(1)
+    results = build_images(builds, max_concurrency=concurrency, cache=BuildCache(),
+                           force=force, registry_cache=registry_cache)
     
-    # Push
-    print("\nPushing to registry...")
-    result = subprocess.run(
-        f"docker push {image} && docker push {image_latest}",
-        shell=True
-    )
-    if result.returncode != 0:
+    icons = {"cached": "⏭️ ", "retagged": "🏷️ ", "built": "✅", "failed": "❌"}
+    print()
+    for r in results:
+        print(f"{icons[r.action]} {r.workload}: {r.action} in {r.duration:.1f}s")
+        print(f"   Image: {r.image}")
+        if not r.ok:
+            print(f"   {r.error}")
+            if r.output:
+                print(r.output[-4000:])
+    if not all(r.ok for r in results):
         sys.exit(1)
     
     print(f"\n✅ Build complete!\n")
     print("Next steps:")
-    print(f"  ml-platform submit {workload}:{version}")
+    for workload in workloads:
+        print(f"  ml-platform submit {workload}:{version}")
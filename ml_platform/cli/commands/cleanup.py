@@ -0,0 +1,81 @@
+"""Cleanup command - delete finished jobs in bulk"""
+
+import sys
+
+from ml_platform.cli.utils import parse_duration
+from ml_platform.sdk.core.cleanup import CLEANUP_STATUSES, cleanup_jobs
+from ml_platform.sdk.core.config import default_resolver
+from ml_platform.sdk.core.transport import default_transport
+
+
+def run(args):
+    """Delete finished jobs"""
+    if "-h" in args or "--help" in args:
+        print("Usage: ml-platform cleanup [--status=finished|succeeded|failed] [--older-than=2h]")
+        print("                           [-l SELECTOR] [--dry-run] [--concurrency=N]")
+        print("Example: ml-platform cleanup --older-than=1d -l app=stellar_optimization --dry-run")
+        sys.exit(0)
+
+    status = "finished"
+    older_than = None
+    label_selector = None
+    dry_run = False
+    concurrency = 16
+    rest = iter(args)
+    for arg in rest:
+        try:
+            if arg.startswith("--status="):
+                status = arg.split("=", 1)[1]
+            elif arg.startswith("--older-than="):
+                older_than = parse_duration(arg.split("=", 1)[1])
+            elif arg in ("-l", "--selector"):
+                label_selector = next(rest, None)
+            elif arg.startswith("--selector="):
+                label_selector = arg.split("=", 1)[1]
+            elif arg == "--dry-run":
+                dry_run = True
+            elif arg.startswith("--concurrency="):
+                concurrency = int(arg.split("=", 1)[1])
+            else:
+                print(f"❌ Unknown option: {arg}")
+                sys.exit(1)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    if status not in CLEANUP_STATUSES:
+        print(f"❌ --status must be one of: {', '.join(CLEANUP_STATUSES)}")
+        sys.exit(1)
+
+    # Check for workload context
+    context = default_resolver().context("workload")
+
+    filters = [f"status={status}"]
+    if older_than is not None:
+        filters.append(f"older than {_format_age(older_than)}")
+    if label_selector:
+        filters.append(f"selector {label_selector}")
+    print(f"🧹 Cleaning up jobs ({', '.join(filters)}){' [dry run]' if dry_run else ''}...\n")
+
+    report = cleanup_jobs(default_transport(context), status=status, older_than=older_than,
+                          label_selector=label_selector, dry_run=dry_run,
+                          max_concurrency=concurrency)
+
+    if dry_run:
+        for name in report.matched:
+            print(f"  would delete {name}")
+        print(f"\n{len(report.matched)} jobs would be deleted")
+        return
+
+    for name, error in report.failed.items():
+        print(f"  ❌ {name}: {error}")
+    print(f"✅ Deleted {report.deleted} jobs in {report.duration:.2f}s "
+          f"({report.jobs_per_second:.0f} jobs/s, {report.strategy} delete)")
+    if report.failed:
+        sys.exit(1)
+
+
+def _format_age(seconds: float) -> str:
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size and seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
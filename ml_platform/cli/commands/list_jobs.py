@@ -1,15 +1,107 @@
 """List command - list all jobs"""
 
-import subprocess
+import sys
+from datetime import datetime, timezone
+
+from ml_platform.sdk.core.client import PlatformClient
+from ml_platform.sdk.core.config import default_resolver
+from ml_platform.sdk.core.job import TERMINAL_STATES, job_condition
+
+
+def _parse_time(value: str) -> datetime:
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+def format_duration(seconds: float) -> str:
+    """Compact kubectl-style duration: 45s, 5m32s, 3h12m, 2d4h"""
+    seconds = int(max(seconds, 0))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60}s" if seconds < 600 else f"{seconds // 60}m"
+    if seconds < 86400:
+        return f"{seconds // 3600}h{(seconds % 3600) // 60}m"
+    return f"{seconds // 86400}d{(seconds % 86400) // 3600}h"
+
+
+def job_row(job: dict, now: datetime) -> tuple:
+    """(name, completions, duration, age) for one job"""
+    meta, spec, status = job["metadata"], job.get("spec", {}), job.get("status", {})
+    completions = f"{status.get('succeeded', 0)}/{spec.get('completions', 1)}" if spec else "-"
+    duration = "-"
+    if status.get("startTime"):
+        end = _parse_time(status["completionTime"]) if status.get("completionTime") else now
+        duration = format_duration((end - _parse_time(status["startTime"])).total_seconds())
+    age = "-"
+    if meta.get("creationTimestamp"):
+        age = format_duration((now - _parse_time(meta["creationTimestamp"])).total_seconds())
+    return meta["name"], completions, duration, age
+
+
+def usage():
+    print("Usage: ml-platform list [-l SELECTOR] [--completed|--running] [--names]")
+
+
+def matches(job: dict, completed) -> bool:
+    """Whether a job passes --completed (True) / --running (False)
+
+    The job's final condition decides: a running Indexed Job with some
+    indexes done has status.successful != 0, and a failed job has 0, so the
+    server-side selector can only narrow --completed.
+    """
+    if completed is None:
+        return True
+    state = job_condition(job)
+    return state == "Complete" if completed else state not in TERMINAL_STATES
 
 
 def run(args):
     """List all jobs"""
+    label_selector = None
+    completed = None
+    metadata_only = False
+    rest = iter(args)
+    for arg in rest:
+        if arg in ("-l", "--selector"):
+            label_selector = next(rest, None)
+            if not label_selector:
+                print(f"❌ {arg} requires a label selector")
+                sys.exit(1)
+        elif arg.startswith("--selector="):
+            label_selector = arg.split("=", 1)[1]
+        elif arg == "--completed":
+            completed = True
+        elif arg == "--running":
+            completed = False
+        elif arg == "--names":
+            metadata_only = True
+        elif arg in ("-h", "--help"):
+            usage()
+            sys.exit(0)
+        else:
+            print(f"❌ Unknown option: {arg}")
+            sys.exit(1)
+    if metadata_only and completed is not None:
+        print("❌ --names can't be combined with --completed or --running (they need job status)")
+        sys.exit(1)
+
     # Check for workload context
-    contexts = subprocess.run(["kubectl", "config", "get-contexts", "-o", "name"], capture_output=True, text=True).stdout.splitlines()
-    kubectl_cmd = ["kubectl"]
-    if "workload" in contexts:
-        kubectl_cmd.extend(["--context", "workload"])
-        
+    context = default_resolver().context("workload")
+    client = PlatformClient(project_id="", context=context)
+
     print("📦 Jobs:\n")
-    subprocess.run(kubectl_cmd + ["get", "jobs", "-n", "jobs"])
+    print(f"{'NAME':<50} {'COMPLETIONS':<12} {'DURATION':<10} AGE")
+    count = 0
+    now = datetime.now(timezone.utc)
+    # Rows are printed page by page as they arrive instead of after the full list
+    for job in client.iter_jobs(label_selector=label_selector, completed=completed or None,
+                                metadata_only=metadata_only):
+        if not matches(job, completed):
+            continue
+        name, completions, duration, age = job_row(job, now)
+        print(f"{name:<50} {completions:<12} {duration:<10} {age}")
+        count += 1
+        if count % 500 == 0:
+            sys.stdout.flush()
+    if count == 0:
+        print("No jobs found.")
@@ -1,22 +1,81 @@
 """Logs command - view job logs"""
 
-import subprocess
 import sys
 
+from ml_platform.cli.utils import parse_duration
+from ml_platform.sdk.core.config import default_resolver
+from ml_platform.sdk.core.logs import LogStream
+from ml_platform.sdk.core.ray_jobs import RayJob, RayJobClient
+from ml_platform.sdk.core.transport import default_transport
+
 
 def run(args):
     """View job logs"""
     if len(args) < 1:
-        print("Usage: ml-platform logs <job-name>")
+        print("Usage: ml-platform logs <job-name> [<job-name>...] [-l SELECTOR]")
+        print("                        [--since=10m] [--tail=N] [--no-follow] [--timestamps]")
+        print("                        [--ray [--ray-address=URL]]")
+        print("Example: ml-platform logs -l app=stellar_optimization --tail=20")
         sys.exit(1)
-    
-    job_name = args[0]
-    
+
+    jobs = []
+    label_selector = None
+    since_seconds = None
+    tail = None
+    follow = True
+    timestamps = False
+    ray_mode = False
+    ray_address = None
+    rest = iter(args)
+    for arg in rest:
+        try:
+            if arg in ("-l", "--selector"):
+                label_selector = next(rest, None)
+            elif arg.startswith("--selector="):
+                label_selector = arg.split("=", 1)[1]
+            elif arg.startswith("--since="):
+                since_seconds = int(parse_duration(arg.split("=", 1)[1]))
+            elif arg.startswith("--tail="):
+                tail = int(arg.split("=", 1)[1])
+            elif arg == "--no-follow":
+                follow = False
+            elif arg == "--timestamps":
+                timestamps = True
+            elif arg == "--ray":
+                ray_mode = True
+            elif arg.startswith("--ray-address="):
+                ray_mode = True
+                ray_address = arg.split("=", 1)[1]
+            elif arg.startswith("-"):
+                print(f"❌ Unknown option: {arg}")
+                sys.exit(1)
+            else:
+                jobs.append(arg)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
     # Check for workload context
-    contexts = subprocess.run(["kubectl", "config", "get-contexts", "-o", "name"], capture_output=True, text=True).stdout.splitlines()
-    kubectl_cmd = ["kubectl"]
-    if "workload" in contexts:
-        kubectl_cmd.extend(["--context", "workload"])
-    
-    print(f"📋 Logs for {job_name}...\n")
-    subprocess.run(kubectl_cmd + ["logs", "-n", "jobs", f"job/{job_name}", "-f"])
+    context = default_resolver().context("workload")
+
+    if ray_mode:
+        # Ray jobs have a single driver log, read from the dashboard
+        ray = RayJobClient(default_transport(context), ray_address)
+        for name in jobs:
+            print(f"📋 Logs for Ray job {name}...\n")
+            for line in RayJob(name, ray).stream_logs(follow=follow, tail_lines=tail):
+                print(line.format(timestamps=timestamps, tag=len(jobs) > 1), flush=True)
+        return
+
+    stream = LogStream(default_transport(context), jobs=jobs, label_selector=label_selector,
+                       follow=follow, since_seconds=since_seconds, tail_lines=tail)
+    if not stream.job_names:
+        print("❌ No matching jobs found")
+        sys.exit(1)
+
+    target = ", ".join(jobs) if jobs else label_selector
+    print(f"📋 Logs for {target} ({len(stream.job_names)} jobs)...\n")
+    # Only tag lines with their pod when more than one job is being shown
+    tag = len(stream.job_names) > 1
+    for line in stream:
+        print(line.format(timestamps=timestamps, tag=tag), flush=True)
@@ -3,6 +3,8 @@
 import subprocess
 import sys
 
+from ml_platform.sdk.core.config import default_resolver
+
 
 def run_port_forward(ctx, namespace, resource, local_port, remote_port):
     """Helper to run port-forward with existence check"""
@@ -23,7 +25,7 @@ def run(args):
     service = args[0] if len(args) > 0 else "all"
     
     # Check for contexts
-    contexts = subprocess.run(["kubectl", "config", "get-contexts", "-o", "name"], capture_output=True, text=True).stdout.splitlines()
+    contexts = default_resolver().contexts()
     
     workload_ctx = ""
     if "workload" in contexts:
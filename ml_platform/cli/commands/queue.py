@@ -0,0 +1,250 @@
+"""Queue command - inspect, reorder and dispatch queued submissions"""
+
+import json
+import sys
+import time
+
+from ml_platform.cli.utils import parse_duration
+from ml_platform.sdk.core.jobqueue import STATES, Dispatcher, JobQueue
+from ml_platform.sdk.core.manifest import parse_quantity
+
+
+def usage():
+    print("Usage: ml-platform queue [list] [--team=TEAM] [--all] [--json]")
+    print("       ml-platform queue top|bottom <id>...")
+    print("       ml-platform queue move <id> --before=<id>")
+    print("       ml-platform queue priority <id> <priority>")
+    print("       ml-platform queue cancel <id>...")
+    print("       ml-platform queue quota [<team> --cpu=N --memory=QUANTITY | <team> --clear]")
+    print("       ml-platform queue stats [--since=1d] [--json]")
+    print("       ml-platform queue run [--capacity-cpu=N --capacity-memory=QUANTITY]")
+    print("                             [--headroom-cpu=N] [--headroom-memory=QUANTITY] [--once]")
+    print("Every subcommand takes --db=FILE "
+          "(default: ML_PLATFORM_QUEUE, else ~/.cache/ml-platform/queue.db)")
+    print("Example: ml-platform submit stellar_optimization:v1.0.0 --sweep sweep.yaml "
+          "--queue --team=fusion")
+    print("         ml-platform queue quota fusion --cpu=64 --memory=256Gi")
+
+
+def _gib(value) -> str:
+    return "-" if value is None else f"{value / 2 ** 30:.0f}Gi"
+
+
+def _cpu(value) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def _age(seconds: float) -> str:
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{seconds / size:.1f}{unit}"
+    return f"{seconds:.0f}s"
+
+
+def _ids(values) -> list:
+    try:
+        return [int(v) for v in values]
+    except ValueError:
+        print(f"❌ Queue entry ids are numbers: {' '.join(values)}")
+        sys.exit(1)
+
+
+def list_entries(queue: JobQueue, team, show_all: bool, as_json: bool):
+    entries = queue.entries(STATES if show_all else ("queued", "admitted"), team=team)
+    if as_json:
+        print(json.dumps([e.to_dict() for e in entries], indent=2))
+        return
+    if not entries:
+        print("✅ Queue is empty")
+        return
+    print(f"{'ID':>6}  {'TEAM':<14}{'PRIO':>5}  {'STATE':<10}{'CPU':>6}{'MEMORY':>8}"
+          f"{'WAIT':>8}  NAME / JOB")
+    for e in entries:
+        wait = e.wait_seconds if e.state in ("queued", "admitted") or e.admitted_at else None
+        name = e.job or e.spec.get("name", "")
+        if e.error:
+            name += f" ({e.error})"
+        print(f"{e.id:>6}  {e.team[:13]:<14}{e.priority:>5}  {e.state:<10}{_cpu(e.cpu):>6}"
+              f"{_gib(e.memory):>8}{'-' if wait is None else _age(wait):>8}  {name}")
+    queued = [e for e in entries if e.state == "queued"]
+    print(f"\n{len(queued)} queued, {len(entries) - len(queued)} "
+          f"{'other' if show_all else 'admitted'}")
+
+
+def show_quotas(queue: JobQueue):
+    quotas = queue.quotas()
+    usage = queue.usage()
+    teams = sorted(set(quotas) | set(usage))
+    if not teams:
+        print("No quotas set and nothing admitted (teams are unlimited by default)")
+        return
+    print(f"{'TEAM':<16}{'CPU USED':>10}{'CPU QUOTA':>11}{'MEM USED':>10}{'MEM QUOTA':>11}")
+    for team in teams:
+        cpu, memory = usage.get(team, (0.0, 0.0))
+        quota_cpu, quota_memory = quotas.get(team, (None, None))
+        print(f"{team[:15]:<16}{_cpu(cpu):>10}{_cpu(quota_cpu):>11}{_gib(memory):>10}"
+              f"{_gib(quota_memory):>11}")
+
+
+def show_stats(queue: JobQueue, since, as_json: bool):
+    stats = queue.wait_stats(since=time.time() - since if since else None)
+    if as_json:
+        print(json.dumps(stats, indent=2))
+        return
+    if not stats:
+        print("No admitted entries yet")
+        return
+    print(f"📊 Queue wait{f' (last {_age(since)})' if since else ''}\n")
+    print(f"   {'team':<16}{'jobs':>6}{'p50':>10}{'p95':>10}{'max':>10}")
+    for team in sorted(stats, key=lambda t: (t == "*", t)):
+        s = stats[team]
+        print(f"   {'all' if team == '*' else team[:15]:<16}{s['count']:>6}"
+              + "".join(f"{_age(s[q]):>10}" for q in ("p50", "p95", "max")))
+
+
+def dispatch(queue: JobQueue, capacity, headroom, once: bool):
+    from ml_platform.sdk.core.client import PlatformClient
+    from ml_platform.sdk.core.config import default_resolver
+
+    config = default_resolver()
+    project_id = config.project()
+    if not project_id:
+        print("❌ No GCP project configured. Run: gcloud config set project PROJECT_ID")
+        sys.exit(1)
+    client = PlatformClient(project_id, config.region(), context=config.context("workload"))
+    dispatcher = Dispatcher(client, queue, capacity=capacity, headroom=headroom)
+
+    def report(results):
+        for entry, job, error in results:
+            if error:
+                print(f"  ❌ #{entry.id} {entry.team}: {error}")
+            else:
+                print(f"  ✅ #{entry.id} {entry.team}: {job} (waited {_age(entry.wait_seconds)})")
+
+    try:
+        dispatcher.start()
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    try:
+        total, used, free = dispatcher.capacity().values()
+        print(f"🚀 Dispatching {queue.path}")
+        print(f"   Cluster: {_cpu(total[0])} CPU / {_gib(total[1])}, "
+              f"free {_cpu(free[0])} CPU / {_gib(free[1])}\n")
+        if once:
+            report(dispatcher.dispatch_once())
+        else:
+            dispatcher.run(report)
+    finally:
+        dispatcher.stop()
+
+
+def run(args):
+    """Inspect and manage the job queue"""
+    if "-h" in args or "--help" in args:
+        usage()
+        sys.exit(0)
+
+    path = None
+    team = None
+    show_all = as_json = once = clear = False
+    before = since = None
+    cpu = memory = None
+    capacity = [None, None]
+    headroom = [0.0, 0.0]
+    positional = []
+    for arg in args:
+        key, _, value = arg.partition("=")
+        try:
+            if key == "--db":
+                path = value
+            elif key == "--team":
+                team = value
+            elif arg == "--all":
+                show_all = True
+            elif arg == "--json":
+                as_json = True
+            elif arg == "--once":
+                once = True
+            elif arg == "--clear":
+                clear = True
+            elif key == "--before":
+                before = _ids([value])[0]
+            elif key == "--since":
+                since = parse_duration(value)
+            elif key in ("--cpu", "--capacity-cpu", "--headroom-cpu"):
+                parsed = parse_quantity(value)
+                if key == "--cpu":
+                    cpu = parsed
+                else:
+                    (capacity if key == "--capacity-cpu" else headroom)[0] = parsed
+            elif key in ("--memory", "--capacity-memory", "--headroom-memory"):
+                parsed = parse_quantity(value)
+                if key == "--memory":
+                    memory = parsed
+                else:
+                    (capacity if key == "--capacity-memory" else headroom)[1] = parsed
+            elif arg.startswith("-") and not arg.lstrip("-").isdigit():
+                print(f"❌ Unknown option: {arg}")
+                sys.exit(1)
+            else:
+                positional.append(arg)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    action = positional.pop(0) if positional else "list"
+    queue = JobQueue(path)
+
+    if action == "list":
+        list_entries(queue, team, show_all, as_json)
+    elif action in ("top", "bottom", "move"):
+        ids = _ids(positional)
+        if not ids or (action == "move" and (before is None or len(ids) != 1)):
+            usage()
+            sys.exit(1)
+        # Moving several to the top keeps their order: the last one moved ends up first
+        for entry_id in reversed(ids) if action == "top" else ids:
+            if not queue.move(entry_id, before=before, to=action):
+                print(f"❌ #{entry_id} is not queued (or --before is not a queue entry)")
+                sys.exit(1)
+        print(f"✅ Moved {', '.join(f'#{i}' for i in ids)}"
+              f"{f' before #{before}' if before is not None else f' to the {action}'}")
+    elif action == "priority":
+        if len(positional) != 2:
+            usage()
+            sys.exit(1)
+        entry_id, priority = _ids(positional)
+        if not queue.set_priority(entry_id, priority):
+            print(f"❌ #{entry_id} is not queued")
+            sys.exit(1)
+        print(f"✅ #{entry_id} priority {priority}")
+    elif action == "cancel":
+        ids = _ids(positional)
+        cancelled = queue.cancel(ids)
+        print(f"✅ Cancelled {cancelled}/{len(ids)} entries")
+        if cancelled != len(ids):
+            print("⚠️  Entries already admitted have a Job: delete it instead")
+            sys.exit(1)
+    elif action == "quota":
+        if not positional:
+            show_quotas(queue)
+        elif clear or cpu is not None or memory is not None:
+            queue.set_quota(positional[0], None if clear else cpu, None if clear else memory)
+            print(f"✅ Quota for {positional[0]}: "
+                  + ("unlimited" if clear else f"{_cpu(cpu)} CPU, {_gib(memory)} memory"))
+        else:
+            print("❌ Give --cpu and/or --memory, or --clear")
+            sys.exit(1)
+    elif action == "stats":
+        show_stats(queue, since, as_json)
+    elif action == "run":
+        if (capacity[0] is None) != (capacity[1] is None):
+            print("❌ Give both --capacity-cpu and --capacity-memory")
+            sys.exit(1)
+        dispatch(queue, tuple(capacity) if capacity[0] is not None else None, tuple(headroom),
+                 once)
+    else:
+        print(f"❌ Unknown queue command: {action}")
+        usage()
+        sys.exit(1)
@@ -0,0 +1,161 @@
+"""Rightsize command - collect job usage and suggest smaller requests"""
+
+import json
+import sys
+import time
+
+from ml_platform.cli.utils import parse_duration
+from ml_platform.sdk.core.config import default_resolver
+from ml_platform.sdk.core.rightsize import (
+    DEFAULT_MARGIN,
+    MIN_RUNS,
+    FixtureSource,
+    MetricsApiSampler,
+    PrometheusSource,
+    UsageHistory,
+    collect,
+    recommendations,
+)
+from ml_platform.sdk.core.transport import ApiError, default_transport
+
+
+def usage():
+    print("Usage: ml-platform rightsize [<workload>[:<version>]...] [--margin=0.2] [--json]")
+    print("                             [--cpu-price=USD --memory-price=USD]  (per hour)")
+    print("       ml-platform rightsize collect [--source=prometheus|metrics-api|FILE]")
+    print("                                     [-l SELECTOR] [--prometheus=URL] [--interval=15s]")
+    print("Every subcommand takes --history=FILE (default: ML_PLATFORM_USAGE, else "
+          "~/.cache/ml-platform/usage.json)")
+    print("Example: ml-platform rightsize collect && ml-platform rightsize stellar_optimization")
+    print("         ml-platform submit stellar_optimization:v1.0.0 --rightsize")
+
+
+def _gib(size: float) -> str:
+    return f"{size / 2 ** 30:.1f}Gi"
+
+
+def run_collect(history: UsageHistory, source_name: str, label_selector, prometheus, interval):
+    transport = default_transport(default_resolver().context("workload"))
+    if source_name == "metrics-api":
+        source = MetricsApiSampler(transport, label_selector=label_selector)
+        print(f"📈 Sampling running pods every {interval:g}s from metrics.k8s.io "
+              "(Ctrl+C to stop)\n")
+        try:
+            while True:
+                source.sample()
+                report(collect(transport, source, history, label_selector=label_selector))
+                time.sleep(interval)
+        except KeyboardInterrupt:
+            return
+    if source_name == "prometheus":
+        source = PrometheusSource(transport, prometheus)
+    else:
+        source = FixtureSource(source_name)
+    print(f"📈 Collecting usage of finished jobs into {history.path}\n")
+    added = collect(transport, source, history, label_selector=label_selector)
+    report(added)
+    if not added:
+        print("✅ No new finished jobs with usage data")
+
+
+def report(added):
+    for key, count in sorted(added.items()):
+        print(f"  ✅ {key}: {count} run{'s' if count != 1 else ''} recorded")
+
+
+def show(history: UsageHistory, targets, margin: float, as_json: bool, prices):
+    keys = [key for key in history.keys()
+            if not targets or key in targets or key.split(":", 1)[0] in targets]
+    recs = recommendations(history, margin, keys)
+    if as_json:
+        print(json.dumps([rec.to_dict() for rec in recs], indent=2))
+        return
+    waiting = [key for key in keys if key not in {rec.key for rec in recs}]
+    if not recs:
+        print(f"No workload has {MIN_RUNS} completed runs yet (ml-platform rightsize collect)")
+    else:
+        print(f"📐 Recommended requests per pod (margin {margin:.0%})\n")
+        print(f"   {'workload:version':<36}{'runs':>5}{'cpu':>14}{'memory':>20}"
+              f"{'saved/run':>20}")
+        for rec in recs:
+            cpu = f"{rec.current_cpu:g} → {rec.cpu}"
+            memory = f"{_gib(rec.current_memory)} → {rec.memory}"
+            saved = (f"{rec.cpu_hours_saved_per_run:.1f} CPU-h "
+                     f"{rec.gib_hours_saved_per_run:.0f} GiB-h")
+            print(f"   {rec.key[:35]:<36}{rec.runs:>5}{cpu:>14}{memory:>20}{saved:>20}")
+        cpu_hours = sum(rec.cpu_hours_saved_per_run * rec.runs for rec in recs)
+        gib_hours = sum(rec.gib_hours_saved_per_run * rec.runs for rec in recs)
+        print(f"\n   Over the recorded runs: {cpu_hours:.1f} CPU-hours and {gib_hours:.0f} "
+              "GiB-hours fewer requested")
+        if prices:
+            print(f"   At {prices[0]}/CPU-h and {prices[1]}/GiB-h: "
+                  f"${cpu_hours * prices[0] + gib_hours * prices[1]:.2f}")
+        for rec in recs:
+            if rec.oom_kills:
+                print(f"   ⚠️  {rec.key}: {rec.oom_kills} OOM-killed "
+                      f"run{'s' if rec.oom_kills != 1 else ''}, memory kept above its request")
+        print("\n   Apply with: ml-platform submit <workload>:<version> --rightsize")
+    if waiting:
+        print(f"\n   Not enough runs yet: {', '.join(waiting)}")
+
+
+def run(args):
+    """Collect job usage and suggest requests"""
+    if "-h" in args or "--help" in args:
+        usage()
+        sys.exit(0)
+
+    path = None
+    margin = DEFAULT_MARGIN
+    as_json = False
+    source = "prometheus"
+    label_selector = None
+    prometheus = None
+    interval = 15.0
+    cpu_price = memory_price = None
+    targets = []
+    rest = iter(args)
+    for arg in rest:
+        key, _, value = arg.partition("=")
+        try:
+            if key == "--history":
+                path = value
+            elif key == "--margin":
+                margin = float(value)
+            elif arg == "--json":
+                as_json = True
+            elif key == "--source":
+                source = value
+            elif arg in ("-l", "--selector"):
+                label_selector = next(rest, None)
+            elif key == "--selector":
+                label_selector = value
+            elif key == "--prometheus":
+                prometheus = value
+            elif key == "--interval":
+                interval = parse_duration(value)
+            elif key == "--cpu-price":
+                cpu_price = float(value)
+            elif key == "--memory-price":
+                memory_price = float(value)
+            elif arg.startswith("-"):
+                print(f"❌ Unknown option: {arg}")
+                sys.exit(1)
+            else:
+                targets.append(arg)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+
+    history = UsageHistory(path)
+    if targets[:1] == ["collect"]:
+        try:
+            run_collect(history, source, label_selector, prometheus, interval)
+        except (ApiError, OSError, ValueError) as e:
+            print(f"❌ Error: {e}")
+            sys.exit(1)
+        return
+    if targets[:1] == ["show"]:
+        targets = targets[1:]
+    prices = (cpu_price or 0.0, memory_price or 0.0) if cpu_price or memory_price else None
+    show(history, targets, margin, as_json, prices)
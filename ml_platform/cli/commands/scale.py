@@ -1,50 +1,108 @@
-"""Scale command - scale Ray workers"""
+"""Scale command - resize a Ray worker group and report time-to-capacity"""
 
-import subprocess
-import sys
 import json
+import sys
+
+from ml_platform.cli.utils import parse_duration
+from ml_platform.sdk.core.config import default_resolver
+from ml_platform.sdk.core.ray_jobs import RayJobClient
+from ml_platform.sdk.core.scaling import RayScaler
+from ml_platform.sdk.core.transport import default_transport
+
 
+def usage():
+    print("Usage: ml-platform scale <replicas> [--group=NAME] [--timeout=10m] [--no-wait] [--json]")
+    print("       ml-platform scale --auto [--cpus-per-job=N] [--group=NAME] [--timeout=10m] [--no-wait]")
+    print("Example: ml-platform scale 2 --group=cpu-workers")
 
-def run_cmd(cmd: str) -> tuple:
-    """Run shell command and return output"""
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    return result.stdout.strip(), result.returncode, result.stderr.strip()
+
+def print_result(result, wait: bool):
+    """Human-readable summary of a ScaleResult"""
+    if result.demand is not None:
+        demand = result.demand
+        tasks = ("unknown (Ray dashboard unreachable)" if demand["pending_task_cpus"] is None else
+                 f"{demand['pending_task_cpus']:g} pending + {demand['running_task_cpus']:g} running CPUs")
+        print(f"   Demand: {demand['pending_jobs']} pending jobs, Ray tasks {tasks}")
+    if result.clamped:
+        print(f"⚠️  {result.requested} is outside the group's replicas range; using {result.replicas}")
+    if not result.changed:
+        print(f"✅ {result.group} already at {result.replicas} workers")
+    else:
+        print(f"✅ {result.group}: {result.previous} -> {result.replicas} workers")
+    if result.autoscaler:
+        print("⚠️  The cluster runs Ray's autoscaler, which may resize the group again")
+    if not wait:
+        return
+    if result.timed_out:
+        print(f"⚠️  Timed out waiting for capacity ({result.ready_pods} pods ready"
+              + (f", Ray reports {result.ray_cpus:g}/{result.expected_cpus:g} CPUs)"
+                 if result.ray_cpus is not None and result.expected_cpus is not None else ")"))
+        return
+    print(f"   Pods ready after {result.pods_ready_seconds:.1f}s")
+    if result.ray_cpus is not None:
+        print(f"⏱️  Ray reports {result.ray_cpus:g} CPUs after {result.capacity_seconds:.1f}s")
+    else:
+        print(f"⏱️  Capacity after {result.capacity_seconds:.1f}s (Ray dashboard unreachable; pods only)")
 
 
 def run(args):
     """Scale Ray workers"""
-    if len(args) < 1:
-        print("Usage: ml-platform scale <replicas>")
-        print("Example: ml-platform scale 10")
+    if "-h" in args or "--help" in args:
+        usage()
+        sys.exit(0)
+
+    replicas = None
+    group = None
+    auto = False
+    cpus_per_job = None
+    wait = True
+    timeout = 600.0
+    as_json = False
+    for arg in args:
+        try:
+            if arg.startswith("--group="):
+                group = arg.split("=", 1)[1]
+            elif arg == "--auto":
+                auto = True
+            elif arg.startswith("--cpus-per-job="):
+                cpus_per_job = float(arg.split("=", 1)[1])
+            elif arg.startswith("--timeout="):
+                timeout = parse_duration(arg.split("=", 1)[1])
+            elif arg == "--no-wait":
+                wait = False
+            elif arg == "--json":
+                as_json = True
+            elif replicas is None and not arg.startswith("-"):
+                replicas = int(arg)
+            else:
+                print(f"❌ Unknown option: {arg}")
+                sys.exit(1)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+    if (replicas is None) == (not auto):
+        usage()
         sys.exit(1)
-    
-    replicas = args[0]
-    
+
     # Check for workload context
-    contexts = subprocess.run(["kubectl", "config", "get-contexts", "-o", "name"], capture_output=True, text=True).stdout.splitlines()
-    ctx_flag = ""
-    if "workload" in contexts:
-        ctx_flag = "--context workload"
-    
-    print(f"⚖️  Scaling Ray to {replicas} workers...\n")
-    
-    # Use kubectl patch with JSON patch to update worker replicas
-    # This updates only the replicas field while preserving other spec fields
-    patch = json.dumps([{"op": "replace", "path": "/spec/workerGroupSpecs/0/replicas", "value": int(replicas)}])
-    cmd = f"kubectl {ctx_flag} patch raycluster ray-cluster-kuberay -n ray-system --type json -p '{patch}'"
-    out, code, err = run_cmd(cmd)
-    
-    if code == 0:
-        print(f"✅ Scaled to {replicas} workers")
-        print(f"   Updating Ray worker pods (may take ~30 seconds)...")
-        
-        # Wait for pods to update
-        check_cmd = f"kubectl {ctx_flag} get pods -n ray-system -l ray.io/node-type=worker --no-headers | wc -l"
-        check_out, _, _ = run_cmd(check_cmd)
-        current_workers = int(check_out)
-        print(f"   Current workers: {current_workers}")
-    else:
-        print(f"❌ Error: {err if err else out}")
-        sys.exit(1)
+    transport = default_transport(default_resolver().context("workload"))
+    scaler = RayScaler(transport, ray=RayJobClient(transport))
 
+    if not as_json:
+        target = "demand" if auto else f"{replicas} workers"
+        print(f"⚖️  Scaling Ray {group or 'workers'} to {target}...\n")
+    try:
+        if auto:
+            result = scaler.autoscale(group, cpus_per_job, wait=wait, timeout=timeout)
+        else:
+            result = scaler.scale(replicas, group, wait=wait, timeout=timeout)
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
 
+    if as_json:
+        print(json.dumps(result.to_dict(), indent=2))
+    else:
+        print_result(result, wait)
+    if result.timed_out:
+        sys.exit(1)
@@ -0,0 +1,81 @@
+"""Stats command - show SDK call latency, retries, errors and bytes recorded so far"""
+
+import json
+import os
+import sys
+
+from ml_platform.sdk.core.metrics import (
+    METRICS_ENV,
+    load_stats,
+    prometheus_text,
+    quantile,
+    stats_path,
+)
+
+
+def _ms(seconds) -> str:
+    return "-" if seconds is None else f"{seconds * 1000:.0f}ms"
+
+
+def _size(n: int) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if n < 1024 or unit == "GB":
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+
+
+def print_stats(snapshot: dict, path: str):
+    print(f"📊 SDK call statistics ({path})\n")
+    print(f"{'operation':<10}{'calls':>8}{'failed':>8}{'retries':>9}{'errors':>8}"
+          f"{'p50':>9}{'p95':>9}{'p99':>9}{'sent':>10}{'received':>10}")
+    for name, s in sorted(snapshot["operations"].items()):
+        print(f"{name:<10}{s['count']:>8}{s['failures']:>8}{s['retries']:>9}"
+              f"{sum(s['errors'].values()):>8}"
+              + "".join(f"{_ms(quantile(snapshot, name, q)):>9}" for q in (0.5, 0.95, 0.99))
+              + f"{_size(s['bytes_sent']):>10}{_size(s['bytes_received']):>10}")
+    errors = {f"{name} {code}": n for name, s in snapshot["operations"].items()
+              for code, n in s["errors"].items()}
+    if errors:
+        print("\nFailed requests: " + ", ".join(f"{k} x{n}" for k, n in sorted(errors.items())))
+    print()
+
+
+def run(args):
+    """Show recorded SDK statistics"""
+    if "-h" in args or "--help" in args:
+        print("Usage: ml-platform stats [--json|--prometheus] [--reset] [--file=PATH]")
+        print(f"Numbers are recorded by processes run with {METRICS_ENV}=1, e.g.")
+        print(f"  {METRICS_ENV}=1 ml-platform submit stellar_optimization:v1.0.0")
+        sys.exit(0)
+
+    path = stats_path()
+    for arg in args:
+        if arg.startswith("--file="):
+            path = arg.split("=", 1)[1]
+        elif arg not in ("--json", "--prometheus", "--reset"):
+            print(f"❌ Unknown option: {arg}")
+            sys.exit(1)
+
+    if "--reset" in args:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        print("✅ SDK statistics cleared")
+        return
+
+    snapshot = load_stats(path)
+    if not snapshot or not snapshot["operations"]:
+        print(f"No SDK statistics recorded yet. Run commands or scripts with {METRICS_ENV}=1")
+        print(f"(e.g. {METRICS_ENV}=1 ml-platform list) to collect them in {path}")
+        return
+    if "--json" in args:
+        out = dict(snapshot)
+        out["quantiles"] = {name: {f"p{int(q * 100)}": quantile(snapshot, name, q)
+                                   for q in (0.5, 0.95, 0.99)}
+                            for name in snapshot["operations"]}
+        print(json.dumps(out, indent=2))
+    elif "--prometheus" in args:
+        sys.stdout.write(prometheus_text(snapshot))
+    else:
+        print_stats(snapshot, path)
@@ -1,38 +1,84 @@
 """Status command - show ml-platform health"""
 
-import subprocess
+import json
+import sys
+import time
 
+from ml_platform.sdk.core.config import default_resolver
+from ml_platform.sdk.core.status import StatusWatcher, collect_status
+from ml_platform.sdk.core.transport import default_transport
 
-def run_cmd(cmd: str) -> tuple:
-    """Run shell command and return output"""
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    return result.stdout.strip(), result.returncode
 
+def _fmt(value, missing: str = "0") -> str:
+    return missing if value is None else str(value)
 
-def run(args):
-    """Show ml-platform status"""
-    # Check for workload context
-    contexts = subprocess.run(["kubectl", "config", "get-contexts", "-o", "name"], capture_output=True, text=True).stdout.splitlines()
-    ctx_flag = ""
-    if "workload" in contexts:
-        ctx_flag = "--context workload"
-        
+
+def print_status(status: dict):
+    """Print a status summary in the human-readable layout"""
     print("🔍 ml-platform Status\n")
-    
+
     print("Cluster:")
-    out, _ = run_cmd(f"kubectl {ctx_flag} get nodes --no-headers 2>/dev/null | wc -l")
-    print(f"  Nodes: {out or 'Not connected'}")
-    
+    if status["connected"]:
+        print(f"  Nodes: {status['nodes']} ({status['ready_nodes']} ready)")
+    else:
+        print("  Nodes: Not connected")
+
     print("\nRay Cluster:")
-    out, _ = run_cmd(f"kubectl {ctx_flag} get pods -n ray-system --no-headers 2>/dev/null | grep Running | wc -l")
-    print(f"  Running pods: {out or '0'}")
-    
+    print(f"  Running pods: {_fmt(status['ray_pods'])}")
+    print(f"  Workers: {_fmt(status['ray_workers'])}")
+
     print("\nJobs:")
-    out, _ = run_cmd(f"kubectl {ctx_flag} get jobs -n jobs --no-headers 2>/dev/null | wc -l")
-    print(f"  Total: {out or '0'}")
-    out, _ = run_cmd(f"kubectl {ctx_flag} get jobs -n jobs --no-headers 2>/dev/null | grep -c '1/1' || echo 0")
-    print(f"  Completed: {out}")
-    out, _ = run_cmd(f"kubectl {ctx_flag} get pods -n jobs --field-selector=status.phase=Running --no-headers 2>/dev/null | wc -l")
-    print(f"  Running: {out or '0'}")
-    
+    print(f"  Total: {_fmt(status['total_jobs'])}")
+    print(f"  Active: {_fmt(status['active_jobs'])}")
+    print(f"  Completed: {_fmt(status['completed_jobs'])}")
+    print(f"  Failed: {_fmt(status['failed_jobs'])}")
+    print(f"  Running pods: {_fmt(status['running_jobs'])}")
+    print(f"  Pending pods: {_fmt(status['pending_pods'])}")
+
     print()
+
+
+def watch(transport, as_json: bool, interval: float):
+    """Redraw whenever a watched object changes (at most once per interval)"""
+    watcher = StatusWatcher(transport).start()
+    last = None
+    try:
+        while True:
+            status = watcher.summary()
+            if status != last:
+                if as_json:
+                    print(json.dumps(dict(status, timestamp=time.time())), flush=True)
+                else:
+                    # Clear screen and redraw
+                    sys.stdout.write("\033[2J\033[H")
+                    print_status(status)
+                    print(f"(watching, updated {time.strftime('%H:%M:%S')} - Ctrl+C to stop)")
+                    sys.stdout.flush()
+                last = status
+            watcher.wait_for_change(timeout=30)
+            time.sleep(interval)
+    finally:
+        watcher.stop()
+
+
+def run(args):
+    """Show ml-platform status"""
+    as_json = "--json" in args
+    interval = 1.0
+    for arg in args:
+        if arg.startswith("--interval="):
+            interval = float(arg.split("=", 1)[1])
+
+    # Check for workload context
+    context = default_resolver().context("workload")
+    transport = default_transport(context)
+
+    if "--watch" in args or "-w" in args:
+        watch(transport, as_json, interval)
+        return
+
+    status = collect_status(transport)
+    if as_json:
+        print(json.dumps(status, indent=2))
+    else:
+        print_status(status)
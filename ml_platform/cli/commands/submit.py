@@ -1,39 +1,324 @@
 """Submit command - submit training jobs"""
 
-import subprocess
+import itertools
+import json
+import os
 import sys
-from datetime import datetime
+import time
+from typing import Optional
 
+from ml_platform.sdk.core.client import PlatformClient
+from ml_platform.sdk.core.config import default_resolver
+from ml_platform.sdk.core.indexed import pack_specs
+from ml_platform.sdk.core.jobqueue import default_team
+from ml_platform.sdk.core.manifest import ManifestError
+from ml_platform.sdk.core.rightsize import (
+    DEFAULT_MARGIN,
+    MIN_RUNS,
+    UsageHistory,
+    apply_recommendation,
+    recommend,
+)
+from ml_platform.sdk.core.transport import ApiError
 
-# Default TTL for completed jobs (24 hours)
-DEFAULT_TTL_SECONDS = 86400
+# Default number of concurrent API requests for --sweep
+DEFAULT_SWEEP_CONCURRENCY = 16
 
+# Keys a sweep variant may set (passed through to PlatformClient.submit_job)
+SWEEP_KEYS = {"name", "command", "env", "cpu", "memory", "cpu_limit", "memory_limit",
+              "namespace", "ttl_seconds", "backoff_limit", "workload"}
 
-def run_cmd(cmd: str) -> tuple:
-    """Run shell command and return output"""
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    return result.stdout.strip(), result.returncode
+
+def load_sweep(path: str) -> dict:
+    """Load a sweep file (YAML, or JSON when PyYAML is not installed)"""
+    with open(path) as f:
+        text = f.read()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        import yaml
+    except ImportError:
+        print("❌ PyYAML is required for YAML sweep files (pip install pyyaml), or use JSON")
+        sys.exit(1)
+    return yaml.safe_load(text) or {}
+
+
+def expand_sweep(doc: dict) -> list:
+    """Expand a sweep document into one submit_job spec per variant
+    
+    Format:
+        name: my-sweep            # optional job name prefix
+        defaults:                 # applied to every variant
+          env: {MAX_ITER: "1000"}
+          cpu: "2"
+        matrix:                   # cartesian product over env values
+          LR: [0.1, 0.01]
+          SEED: [1, 2, 3]
+        jobs:                     # explicit variants, merged over defaults
+          - env: {NUM_CONFIGS: "10"}
+    """
+    defaults = dict(doc.get("defaults") or {})
+    if doc.get("name"):
+        defaults.setdefault("name", doc["name"])
+    variants = list(doc.get("jobs") or [])
+    matrix = doc.get("matrix") or {}
+    if matrix:
+        keys = list(matrix)
+        base = variants or [{}]
+        variants = [
+            dict(v, env=dict(v.get("env") or {}, **dict(zip(keys, combo))))
+            for v in base
+            for combo in itertools.product(*(matrix[k] for k in keys))
+        ]
+    specs = []
+    for variant in variants or [{}]:
+        unknown = set(variant) - SWEEP_KEYS
+        if unknown:
+            raise ValueError(f"Unknown sweep keys: {', '.join(sorted(unknown))}")
+        spec = dict(defaults, **variant)
+        spec["env"] = {k: str(v) for k, v in dict(defaults.get("env") or {}, **(variant.get("env") or {})).items()}
+        specs.append(spec)
+    return specs
+
+
+def run_sweep(workload: str, image: str, project_id: str, region: str, path: str,
+              ttl_seconds: Optional[int], concurrency: Optional[int], context: str = None,
+              indexed: bool = False, parallelism: Optional[int] = None,
+              queue: Optional[dict] = None, margin: Optional[float] = None):
+    """Submit every variant in a sweep file concurrently (or as one Indexed Job)
+
+    concurrency is the --concurrency flag (None if not given), which wins over
+    the sweep file's own concurrency.
+    """
+    doc = load_sweep(path)
+    try:
+        specs = expand_sweep(doc)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    for spec in specs:
+        spec.setdefault("name", workload)
+        spec.setdefault("workload", workload)
+        if ttl_seconds is not None:
+            spec.setdefault("ttl_seconds", ttl_seconds)
+        spec["image"] = image
+    
+    if margin is not None:
+        rightsize(PlatformClient(project_id, region, context=context), specs, workload,
+                  image.rsplit(":", 1)[1], margin)
+    
+    if indexed:
+        try:
+            spec = pack_specs(specs)
+        except ValueError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        print(f"🚀 Submitting sweep: {len(specs)} variants from {path} as one Indexed Job"
+              f"{f' (parallelism {parallelism})' if parallelism else ''}")
+        print(f"   Image: {image}\n")
+        submit_single(PlatformClient(project_id, region, context=context),
+                      dict(spec, parallelism=parallelism), queue)
+        return
+    
+    if queue is not None:
+        enqueue(PlatformClient(project_id, region, context=context), specs, queue)
+        return
+    
+    if concurrency is None:
+        value = doc.get("concurrency", DEFAULT_SWEEP_CONCURRENCY)
+        try:
+            concurrency = int(value)
+        except (TypeError, ValueError):
+            concurrency = 0
+        if concurrency < 1 or isinstance(value, bool):
+            print(f"❌ Invalid concurrency in {path}: {value!r} (a positive number of requests)")
+            sys.exit(1)
+    print(f"🚀 Submitting sweep: {len(specs)} jobs from {path} (concurrency {concurrency})")
+    print(f"   Image: {image}\n")
+    
+    client = PlatformClient(project_id, region, context=context)
+    start = time.perf_counter()
+    results = client.submit_jobs(specs, max_concurrency=concurrency)
+    duration = time.perf_counter() - start
+    
+    failed = [r for r in results if not r.ok]
+    for r in results:
+        if r.ok:
+            print(f"  ✅ {r.job.name}")
+        else:
+            print(f"  ❌ {r.spec.get('name')} {r.spec.get('env')}: {r.error}")
+    print(f"\n{len(results) - len(failed)}/{len(results)} jobs submitted in {duration:.1f}s")
+    if failed:
+        sys.exit(1)
+
+
+def enqueue(client: PlatformClient, specs: list, queue: dict):
+    """Add jobs to the fair-share queue; `ml-platform queue run` creates them"""
+    try:
+        ids = client.enqueue_jobs(specs, team=queue["team"], priority=queue["priority"])
+    except ManifestError as e:
+        print(f"❌ Invalid job: {e}")
+        sys.exit(1)
+    first = f"#{ids[0]}" if len(ids) == 1 else f"#{ids[0]}-#{ids[-1]}"
+    team = queue["team"] or default_team()
+    print(f"✅ Queued {len(ids)} job{'s' if len(ids) != 1 else ''} ({first}) for team {team}, "
+          f"priority {queue['priority']}\n")
+    print("Follow with:")
+    print(f"  ml-platform queue --team={team}")
+
+
+def rightsize(client: PlatformClient, specs: list, workload: str, version: str, margin: float):
+    """Set requests from the workload's usage history (specs with their own cpu/memory keep it)"""
+    history = UsageHistory()
+    key = f"{workload}:{version}"
+    if history.completed(key) < MIN_RUNS:
+        # A new version has no history yet; the latest version with enough runs is the best guess
+        key = history.latest(workload)
+        if key is None:
+            print(f"⚠️  No usage history for {workload} (need {MIN_RUNS} completed runs, "
+                  f"see ml-platform rightsize collect); keeping the default requests\n")
+            return
+    rec = recommend(history.runs(key), margin, key)
+    try:
+        changed = apply_recommendation(client.manifests, specs, rec)
+    except ManifestError as e:
+        print(f"❌ Invalid job: {e}")
+        sys.exit(1)
+    if changed:
+        print(f"📐 Right-sized from {rec.runs} runs of {key} (margin {margin:.0%}): "
+              f"cpu {rec.cpu}, memory {rec.memory}\n")
+
+
+def ray_runtime_env(workload: str) -> dict:
+    """runtime_env for --ray: the workload directory as working_dir, plus its requirements"""
+    workload_dir = f"docs/examples/{workload}"
+    runtime_env = {}
+    if os.path.isdir(workload_dir):
+        runtime_env["working_dir"] = workload_dir
+        requirements = os.path.join(workload_dir, "requirements.txt")
+        if os.path.exists(requirements):
+            with open(requirements) as f:
+                pip = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+            if pip:
+                runtime_env["pip"] = pip
+    return runtime_env
+
+
+def run_ray(workload: str, project_id: str, region: str, context: str = None,
+            ray_address: str = None):
+    """Submit the workload's driver straight to the Ray head (no Kubernetes Job pod)"""
+    client = PlatformClient(project_id, region, context=context, ray_address=ray_address)
+    runtime_env = ray_runtime_env(workload)
+    print(f"🚀 Submitting to Ray: {workload}")
+    print(f"   Working dir: {runtime_env.get('working_dir', '(none)')}\n")
+    try:
+        job = client.submit_job(workload, image="", mode="ray", runtime_env=runtime_env)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ Ray job submitted: {job.name}\n")
+    print("Monitor with:")
+    print(f"  ml-platform logs {job.name} --ray")
 
 
 def run(args):
     """Submit a training job"""
     if len(args) < 1:
-        print("Usage: ml-platform submit <workload>:<version> [--ttl=SECONDS]")
+        print("Usage: ml-platform submit <workload>:<version> [--ttl=SECONDS] [--sweep FILE] [--concurrency=N]")
         print("Example: ml-platform submit stellar_optimization:v1.0.0")
         print("         ml-platform submit stellar_optimization:v1.0.0 --ttl=3600")
+        print("         ml-platform submit stellar_optimization:v1.0.0 --sweep sweep.yaml")
+        print("         ml-platform submit stellar_optimization:v1.0.0 --sweep sweep.yaml --indexed [--parallelism=N]")
+        print("         ml-platform submit stellar_optimization:v1.0.0 --indexed=8 [--parallelism=N]")
+        print("         ml-platform submit stellar_optimization:v1.0.0 --ray [--ray-address=URL]")
+        print("         ml-platform submit stellar_optimization:v1.0.0 --queue [--team=T] [--priority=N]")
+        print("         ml-platform submit stellar_optimization:v1.0.0 --rightsize[=MARGIN]")
         sys.exit(1)
     
     workload_version = args[0]
     
-    # Parse optional TTL argument
-    ttl_seconds = DEFAULT_TTL_SECONDS
-    for arg in args[1:]:
+    # Parse optional arguments (TTL defaults to the workload's job.yaml, then 24h)
+    ttl_seconds = None
+    sweep_file = None
+    concurrency = None
+    ray_mode = False
+    ray_address = None
+    indexed = False
+    completions = None
+    parallelism = None
+    queue = None
+    team = None
+    priority = 0
+    margin = None
+    rest = iter(args[1:])
+    for arg in rest:
         if arg.startswith("--ttl="):
             try:
                 ttl_seconds = int(arg.split("=")[1])
             except ValueError:
                 print(f"❌ Invalid TTL value: {arg}")
                 sys.exit(1)
+        elif arg == "--sweep":
+            sweep_file = next(rest, None)
+        elif arg.startswith("--sweep="):
+            sweep_file = arg.split("=", 1)[1]
+        elif arg.startswith("--concurrency="):
+            try:
+                concurrency = int(arg.split("=", 1)[1])
+            except ValueError:
+                concurrency = 0
+            if concurrency < 1:
+                print(f"❌ Invalid concurrency: {arg} (a positive number of requests)")
+                sys.exit(1)
+        elif arg == "--indexed":
+            indexed = True
+        elif arg.startswith("--indexed=") or arg.startswith("--parallelism="):
+            try:
+                value = int(arg.split("=", 1)[1])
+            except ValueError:
+                print(f"❌ Invalid value: {arg}")
+                sys.exit(1)
+            if arg.startswith("--indexed="):
+                indexed, completions = True, value
+            else:
+                parallelism = value
+        elif arg == "--rightsize" or arg.startswith("--rightsize="):
+            try:
+                margin = float(arg.split("=", 1)[1]) if "=" in arg else DEFAULT_MARGIN
+            except ValueError:
+                print(f"❌ Invalid margin: {arg} (e.g. --rightsize=0.3 for 30%)")
+                sys.exit(1)
+        elif arg == "--queue":
+            queue = True
+        elif arg.startswith("--team="):
+            team = arg.split("=", 1)[1]
+        elif arg.startswith("--priority="):
+            try:
+                priority = int(arg.split("=", 1)[1])
+            except ValueError:
+                print(f"❌ Invalid priority: {arg}")
+                sys.exit(1)
+        elif arg == "--ray":
+            ray_mode = True
+        elif arg.startswith("--ray-address="):
+            ray_mode = True
+            ray_address = arg.split("=", 1)[1]
+        else:
+            print(f"❌ Unknown option: {arg}")
+            sys.exit(1)
+    if "--sweep" in args[1:] and not sweep_file:
+        print("❌ --sweep requires a file")
+        sys.exit(1)
+    if indexed and not sweep_file and completions is None:
+        print("❌ --indexed needs a shard count (--indexed=N) or a --sweep file")
+        sys.exit(1)
+    
+    if (team is not None or priority) and not queue:
+        print("❌ --team and --priority only apply with --queue")
+        sys.exit(1)
+    queue = {"team": team, "priority": priority} if queue else None
     
     if ':' not in workload_version:
         print("❌ Format: workload:version (e.g., stellar_optimization:v1.0.0)")
@@ -42,80 +327,77 @@ def run(args):
     workload, version = workload_version.split(':', 1)
     
     # Get project ID and region
-    project_id, _ = run_cmd("gcloud config get-value project 2>/dev/null")
+    config = default_resolver()
+    project_id = config.project()
     if not project_id:
         print("❌ No GCP project configured. Run: gcloud config set project PROJECT_ID")
         sys.exit(1)
     
-    region, _ = run_cmd("gcloud config get-value compute/region 2>/dev/null")
-    if not region:
-        region = "europe-west3"  # Default fallback
+    region = config.region()
     
     image = f"{region}-docker.pkg.dev/{project_id}/ml-platform/{workload}:{version}"
-    job_name = f"{workload}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
     
-    print(f"🚀 Submitting: {job_name}")
-    print(f"   Image: {image}")
-    print(f"   TTL: {ttl_seconds}s (auto-cleanup after completion)\n")
+    if ray_mode:
+        if sweep_file:
+            print("❌ --sweep is not supported with --ray yet")
+            sys.exit(1)
+        if indexed:
+            print("❌ --indexed is not supported with --ray")
+            sys.exit(1)
+        if margin is not None:
+            print("❌ --rightsize is not supported with --ray (no pod requests)")
+            sys.exit(1)
+        if queue is not None:
+            print("❌ --queue is not supported with --ray (the Ray head queues its own jobs)")
+            sys.exit(1)
+        run_ray(workload, project_id, region, config.context("workload"), ray_address)
+        return
     
-    # Check for workload cluster context
-    kubectl_cmd = ["kubectl", "apply", "-f", "-"]
+    if sweep_file:
+        context = config.context("workload")
+        run_sweep(workload, image, project_id, region, sweep_file, ttl_seconds, concurrency, context,
+                  indexed, parallelism, queue, margin)
+        return
     
-    # Try to use 'workload' context if available
-    contexts = subprocess.run(
-        "kubectl config get-contexts -o name", 
-        shell=True, capture_output=True, text=True
-    ).stdout.splitlines()
+    print(f"🚀 Submitting: {workload}")
+    print(f"   Image: {image}")
+    if ttl_seconds is not None:
+        print(f"   TTL: {ttl_seconds}s (auto-cleanup after completion)")
+    if completions:
+        print(f"   Indexed: {completions} shards"
+              f"{f', {parallelism} at a time' if parallelism else ''}")
+    print()
     
-    if "workload" in contexts:
+    # Try to use 'workload' context if available
+    context = config.context("workload")
+    if context:
         print("🌍 Targeting cluster: workload")
-        kubectl_cmd.extend(["--context", "workload"])
     else:
         print("⚠️  'workload' context not found. Using current context.")
     
-    manifest = f"""
-apiVersion: batch/v1
-kind: Job
-metadata:
-  name: {job_name}
-  namespace: jobs
-  labels:
-    app: {workload}
-spec:
-  ttlSecondsAfterFinished: {ttl_seconds}
-  backoffLimit: 3
-  template:
-    spec:
-      restartPolicy: Never
-      serviceAccountName: job-runner
-      containers:
-      - name: worker
-        image: {image}
-        env:
-        - name: RAY_ADDRESS
-          value: "ray://ray-cluster-head-svc.ray-system.svc.cluster.local:10001"
-        - name: GCS_BUCKET
-          value: "gs://{project_id}-ml-artifacts"
-        resources:
-          requests:
-            cpu: "4"
-            memory: "16Gi"
-          limits:
-            cpu: "8"
-            memory: "32Gi"
-"""
-    
-    result = subprocess.run(
-        ["kubectl", "apply", "-f", "-"],
-        input=manifest,
-        text=True,
-        capture_output=True
-    )
-    
-    if result.returncode == 0:
-        print(f"✅ Job submitted: {job_name}\n")
-        print("Monitor with:")
-        print(f"  ml-platform logs {job_name}")
-    else:
-        print(f"❌ Error: {result.stderr}")
+    # Same manifest compiler as the SDK: workload defaults from its job.yaml, validated locally
+    client = PlatformClient(project_id, region, context=context)
+    spec = {"name": workload, "image": image, "ttl_seconds": ttl_seconds, "workload": workload,
+            "completions": completions, "parallelism": parallelism}
+    if margin is not None:
+        rightsize(client, [spec], workload, version, margin)
+    submit_single(client, spec, queue)
+
+
+def submit_single(client: PlatformClient, spec: dict, queue: Optional[dict] = None):
+    """Submit one Job (plain or Indexed) and print how to follow it"""
+    if queue is not None:
+        enqueue(client, [spec], queue)
+        return
+    try:
+        job = client.submit_job(**spec)
+    except ManifestError as e:
+        print(f"❌ Invalid job: {e}")
+        sys.exit(1)
+    except (ApiError, RuntimeError) as e:
+        print(f"❌ Error: {e}")
         sys.exit(1)
+    
+    print(f"✅ Job submitted: {job.name}\n")
+    print("Monitor with:")
+    print(f"  ml-platform logs {job.name}")
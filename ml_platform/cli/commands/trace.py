@@ -0,0 +1,109 @@
+"""Trace command - where the time went between submit and first useful work"""
+
+import json
+import sys
+
+from ml_platform.sdk.core.config import default_resolver
+from ml_platform.sdk.core.timeline import PHASES, build_timelines, collect, summarize, to_fixture
+from ml_platform.sdk.core.transport import ApiError, default_transport
+
+BAR_WIDTH = 30
+
+
+def usage():
+    print("Usage: ml-platform trace <job-name> [<job-name>...] [-l SELECTOR]")
+    print("                         [--json] [--no-logs] [--record=FILE]")
+    print("Example: ml-platform trace -l app=stellar_optimization --json > before.json")
+
+
+def _s(seconds) -> str:
+    return "-" if seconds is None else f"{seconds:.1f}s"
+
+
+def print_timeline(timeline):
+    pods = f"{timeline.attempts} pod" + ("s" if timeline.attempts != 1 else "")
+    print(f"⏱️  {timeline.name} ({timeline.status}, {pods})\n")
+    phases = timeline.phases
+    longest = max([v for v in phases.values() if v is not None], default=0) or 1
+    for phase, seconds in phases.items():
+        bar = "█" * round(BAR_WIDTH * seconds / longest) if seconds else ""
+        note = " (image cached)" if phase == "image_pull" and timeline.image_cached else ""
+        print(f"   {phase:<17}{_s(seconds):>10}  {bar}{note}")
+    print(f"\n   {'first useful work':<17}{_s(timeline.to_first_work):>10}")
+    print(f"   {'total':<17}{_s(timeline.total):>10}\n")
+
+
+def print_summary(timelines, summary):
+    print(f"📊 {len(timelines)} jobs\n")
+    print(f"   {'phase':<19}{'jobs':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    for key in list(PHASES) + ["to_first_work", "total"]:
+        if key in summary:
+            s = summary[key]
+            print(f"   {key:<19}{s['count']:>6}" + "".join(
+                f"{_s(s[q]):>10}" for q in ("p50", "p90", "p99", "max")))
+    slowest = sorted((t for t in timelines if t.to_first_work is not None),
+                     key=lambda t: t.to_first_work, reverse=True)[:3]
+    if slowest:
+        print("\n   Slowest to first useful work: "
+              + ", ".join(f"{t.name} ({_s(t.to_first_work)})" for t in slowest))
+    print()
+
+
+def run(args):
+    """Break job start-up time into phases"""
+    if "-h" in args or "--help" in args:
+        usage()
+        sys.exit(0)
+
+    names = []
+    label_selector = None
+    as_json = False
+    logs = True
+    record = None
+    rest = iter(args)
+    for arg in rest:
+        if arg in ("-l", "--selector"):
+            label_selector = next(rest, None)
+        elif arg.startswith("--selector="):
+            label_selector = arg.split("=", 1)[1]
+        elif arg == "--json":
+            as_json = True
+        elif arg == "--no-logs":
+            logs = False
+        elif arg.startswith("--record="):
+            record = arg.split("=", 1)[1]
+        elif arg.startswith("-"):
+            print(f"❌ Unknown option: {arg}")
+            sys.exit(1)
+        else:
+            names.append(arg)
+    if not names and not label_selector:
+        usage()
+        sys.exit(1)
+
+    # Check for workload context
+    transport = default_transport(default_resolver().context("workload"))
+    try:
+        objects = collect(transport, names=names or None, label_selector=label_selector,
+                          logs=logs)
+    except ApiError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if not objects["jobs"]:
+        print("❌ No matching jobs found")
+        sys.exit(1)
+    if record:
+        with open(record, "w") as f:
+            json.dump(to_fixture(objects), f, indent=1)
+        if not as_json:
+            print(f"✅ Recorded {len(objects['jobs'])} jobs to {record}\n")
+
+    timelines = build_timelines(objects)
+    summary = summarize(timelines)
+    if as_json:
+        print(json.dumps({"jobs": [t.to_dict() for t in timelines], "summary": summary},
+                         indent=2))
+    elif len(timelines) == 1:
+        print_timeline(timelines[0])
+    else:
+        print_summary(timelines, summary)
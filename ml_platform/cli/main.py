@@ -5,18 +5,8 @@ This module dispatches commands to their respective handlers.
 """
 
 import sys
-from .commands import status, submit, logs, scale, build, port_forward, list_jobs
 
-
-COMMANDS = {
-    'status': status.run,
-    'submit': submit.run,
-    'logs': logs.run,
-    'scale': scale.run,
-    'list': list_jobs.run,
-    'build': build.run,
-    'port-forward': port_forward.run,
-}
+from .commands import COMMANDS, load
 
 
 def print_usage():
@@ -28,20 +18,27 @@ Usage:
     ml-platform <command> [options]
 
 Commands:
-    status                           Show platform status
-    build <workload> <version>       Build and push container
-    submit <workload>:<version>      Submit training job
-    logs <job-name>                  View job logs
-    list                             List all jobs
-    scale <replicas>                 Scale Ray workers
+    status [--watch] [--json]        Show platform status
+    build <workload>... <version>    Build and push container (skipped if unchanged)
+    submit <workload>:<version>      Submit training job (--sweep FILE, --ray, --queue, --rightsize)
+    logs <job-name>... [-l SELECTOR] View job logs (--since, --tail, --no-follow, --ray)
+    list [-l SELECTOR] [--completed|--running]   List jobs (streamed)
+    cleanup [--older-than=2h]        Delete finished jobs (--dry-run to preview)
+    scale <replicas>|--auto          Scale a Ray worker group (--group, --no-wait)
     port-forward [ray|grafana|all]   Access dashboards
+    stats [--json|--prometheus]      SDK call latency/errors (record with ML_PLATFORM_METRICS=1)
+    trace <job>... [-l SELECTOR]     Time per start-up phase, percentiles for a sweep (--json)
+    queue [list|top|priority|quota|run]  Fair-share job queue: inspect, reorder, dispatch
+    rightsize [collect] [<workload>] Requests from past usage, projected savings (--margin)
 
 Examples:
     ml-platform status
     ml-platform build stellar_optimization v1.0.0
     ml-platform submit stellar_optimization:v1.0.0
     ml-platform logs stellar-optimization-20251201-120000
-    ml-platform scale 10
+    ml-platform trace -l app=stellar_optimization
+    ml-platform queue --team=fusion
+    ml-platform scale 2 --group=cpu-workers
     ml-platform port-forward ray
     """)
 
@@ -63,9 +60,9 @@ def main():
         print_usage()
         sys.exit(1)
     
-    # Run the command
+    # Run the command (its module is imported only now)
     try:
-        COMMANDS[command](sys.argv[2:])
+        load(command)(sys.argv[2:])
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted")
         sys.exit(130)
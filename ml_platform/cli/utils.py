@@ -0,0 +1,14 @@
+"""Shared helpers for CLI commands"""
+
+import re
+
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)([smhdw]?)$")
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(value: str) -> float:
+    """Parse a duration like 90, 30s, 15m, 2h, 7d or 1w into seconds"""
+    match = _DURATION.match(value.strip())
+    if not match:
+        raise ValueError(f"Invalid duration: {value} (use e.g. 30s, 15m, 2h, 7d)")
+    return float(match.group(1)) * _UNITS[match.group(2)]
@@ -1,5 +1,47 @@
 """SDK package - programmatic platform access"""
-from .core.client import PlatformClient
-from .core.job import Job
 
-__all__ = ['PlatformClient', 'Job']
+# Exports are imported on first access: every CLI command imports config (and so
+# this package), and most need only a few of these modules. asyncio alone costs ~50ms.
+_EXPORTS = {
+    'PlatformClient': '.core.client',
+    'SubmitResult': '.core.client',
+    'Informer': '.core.informer',
+    'JobInformer': '.core.informer',
+    'Job': '.core.job',
+    'Dispatcher': '.core.jobqueue',
+    'JobQueue': '.core.jobqueue',
+    'QueueEntry': '.core.jobqueue',
+    'LogLine': '.core.logs',
+    'LogStream': '.core.logs',
+    'JobSpec': '.core.manifest',
+    'ManifestCompiler': '.core.manifest',
+    'ManifestError': '.core.manifest',
+    'RayJob': '.core.ray_jobs',
+    'RayJobClient': '.core.ray_jobs',
+    'RayScaler': '.core.scaling',
+    'ScaleResult': '.core.scaling',
+    'Timeline': '.core.timeline',
+    'ApiError': '.core.transport',
+    'HttpTransport': '.core.transport',
+    'KubectlTransport': '.core.transport',
+    'Transport': '.core.transport',
+    'default_transport': '.core.transport',
+    'AsyncPlatformClient': '.core.async_client',
+    'AsyncJob': '.core.async_client',
+    'AsyncHttpTransport': '.core.async_transport',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
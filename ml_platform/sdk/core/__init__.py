@@ -1,5 +1,47 @@
 """Core SDK modules"""
-from .client import PlatformClient
-from .job import Job
 
-__all__ = ['PlatformClient', 'Job']
+# Exports are imported on first access: every CLI command imports config (and so
+# this package), and most need only a few of these modules. asyncio alone costs ~50ms.
+_EXPORTS = {
+    'PlatformClient': '.client',
+    'SubmitResult': '.client',
+    'Informer': '.informer',
+    'JobInformer': '.informer',
+    'Job': '.job',
+    'Dispatcher': '.jobqueue',
+    'JobQueue': '.jobqueue',
+    'QueueEntry': '.jobqueue',
+    'LogLine': '.logs',
+    'LogStream': '.logs',
+    'JobSpec': '.manifest',
+    'ManifestCompiler': '.manifest',
+    'ManifestError': '.manifest',
+    'RayJob': '.ray_jobs',
+    'RayJobClient': '.ray_jobs',
+    'RayScaler': '.scaling',
+    'ScaleResult': '.scaling',
+    'Timeline': '.timeline',
+    'ApiError': '.transport',
+    'HttpTransport': '.transport',
+    'KubectlTransport': '.transport',
+    'Transport': '.transport',
+    'default_transport': '.transport',
+    'AsyncPlatformClient': '.async_client',
+    'AsyncJob': '.async_client',
+    'AsyncHttpTransport': '.async_transport',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        import importlib
+        value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
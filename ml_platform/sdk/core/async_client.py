@@ -0,0 +1,426 @@
+"""Async platform client - PlatformClient and Job for asyncio applications
+
+AsyncPlatformClient mirrors PlatformClient (submit, list, delete, logs,
+wait, scale, status) with coroutines on AsyncHttpTransport, so an asyncio
+service can drive thousands of jobs from one event loop instead of a thread
+pool. Waiting is served by one watch per namespace (AsyncJobWatcher), the
+async counterpart of JobInformer: any number of AsyncJob.wait() calls share
+a single connection.
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional
+
+from .async_transport import AsyncHttpTransport, apaginate
+from .client import RETRYABLE_STATUSES, PlatformClient, SubmitResult, _completed_selector
+from .indexed import index_states
+from .job import TERMINAL_STATES, job_condition
+from .manifest import DEFAULT_WORKLOADS_DIR, ManifestCompiler
+from .metrics import instrument, record_retry
+from .metrics import sinks as metric_sinks
+from .scaling import RAY_CLUSTER, RAY_NAMESPACE, ScaleResult, autoscaler_enabled, worker_group
+from .status import STATUS_SOURCES, summarize_status
+from .transport import JSON_PATCH, ApiError, api_path
+
+
+class AsyncJobWatcher:
+    """One watch over the Jobs of a namespace, resolving waiters as jobs finish"""
+
+    def __init__(self, transport: AsyncHttpTransport, namespace: str = "jobs",
+                 watch_timeout: int = 300):
+        self.transport = transport
+        self.namespace = namespace
+        self.watch_timeout = watch_timeout
+        self.path = api_path("batch", "v1", "jobs", namespace)
+        self.resource_version = None
+        self._states = {}
+        self._waiters = {}
+        self._synced = None
+        self._task = None
+
+    def state(self, name: str) -> str:
+        """Cached job status, no I/O"""
+        return self._states.get(name, "Unknown")
+
+    def observe(self, obj: Dict):
+        """Feed an object we already have (e.g. a create response) into the cache"""
+        self._apply("ADDED", obj)
+
+    async def start(self, timeout: float = 30.0) -> "AsyncJobWatcher":
+        """Start the background watch (idempotent) and wait for the first list"""
+        if self._task is None:
+            self._synced = asyncio.Event()
+            self._task = asyncio.ensure_future(self._run())
+        try:
+            await asyncio.wait_for(self._synced.wait(), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Job watch for {self.path} did not sync within {timeout}s") from None
+        return self
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def future(self, name: str) -> asyncio.Future:
+        """Future resolved with the terminal status, or "Deleted" if the job disappears"""
+        future = asyncio.get_running_loop().create_future()
+        state = self.state(name)
+        if state in TERMINAL_STATES:
+            future.set_result(state)
+        else:
+            self._waiters.setdefault(name, []).append(future)
+        return future
+
+    async def _relist(self):
+        listing = await self.transport.get(self.path)
+        names = set()
+        for item in listing.get("items", []):
+            names.add(item["metadata"]["name"])
+            self._apply("ADDED", item)
+        for name in [n for n in self._states if n not in names]:
+            self._apply("DELETED", {"metadata": {"name": name}})
+        self.resource_version = listing.get("metadata", {}).get("resourceVersion")
+        self._synced.set()
+
+    async def _run(self):
+        backoff = 0.5
+        need_list = True
+        while True:
+            try:
+                if need_list:
+                    await self._relist()
+                    need_list = False
+                await self._watch()
+                backoff = 0.5
+            except ApiError as e:
+                # 410: our resourceVersion was compacted away; start over from a fresh list
+                need_list = e.status == 410
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            except (OSError, ValueError, asyncio.TimeoutError):
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    async def _watch(self):
+        params = {"watch": True, "allowWatchBookmarks": True, "timeoutSeconds": self.watch_timeout,
+                  "resourceVersion": self.resource_version}
+        async for line in self.transport.stream(self.path, params):
+            if not line:
+                continue
+            event = json.loads(line)
+            kind, obj = event.get("type"), event.get("object") or {}
+            if kind == "ERROR":
+                raise ApiError(obj.get("code", 500), obj.get("message", ""), obj.get("reason", ""))
+            if kind != "BOOKMARK":
+                self._apply(kind, obj)
+            version = obj.get("metadata", {}).get("resourceVersion")
+            if version:
+                self.resource_version = version
+
+    def _apply(self, kind: str, obj: Dict):
+        name = obj.get("metadata", {}).get("name")
+        if not name:
+            return
+        if kind == "DELETED":
+            self._states.pop(name, None)
+            state = "Deleted"
+        else:
+            state = self._states[name] = job_condition(obj)
+        if state in TERMINAL_STATES or state == "Deleted":
+            for future in self._waiters.pop(name, []):
+                if not future.done():
+                    future.set_result(state)
+
+
+class AsyncJob:
+    """Async handle for a submitted job"""
+
+    def __init__(self, name: str, namespace: str, transport: AsyncHttpTransport,
+                 watcher: Optional[AsyncJobWatcher] = None):
+        self.name = name
+        self.namespace = namespace
+        self.transport = transport
+        self.watcher = watcher
+
+    @property
+    def path(self) -> str:
+        return api_path("batch", "v1", "jobs", self.namespace, self.name)
+
+    @instrument("status")
+    async def status(self) -> str:
+        """Get job status (from the shared watch when there is one)"""
+        if self.watcher is not None:
+            try:
+                return (await self.watcher.start()).state(self.name)
+            except TimeoutError:
+                pass  # watch not synced (API slow or unreachable): ask directly
+        try:
+            return job_condition(await self.transport.get(self.path))
+        except ApiError:
+            return "Unknown"
+
+    async def wait(self, timeout: Optional[float] = 3600) -> str:
+        """Wait for the job to complete (or fail). Returns the final status."""
+        watcher = self.watcher or AsyncJobWatcher(self.transport, self.namespace)
+        try:
+            await watcher.start()
+            try:
+                return await asyncio.wait_for(asyncio.shield(watcher.future(self.name)), timeout)
+            except asyncio.TimeoutError:
+                return watcher.state(self.name)
+        finally:
+            if watcher is not self.watcher:
+                watcher.stop()
+
+    async def indexes(self) -> Dict[int, str]:
+        """Per-index state of an Indexed Job ({} for a regular Job)"""
+        try:
+            return index_states(await self.transport.get(self.path))
+        except ApiError:
+            return {}
+
+    async def _latest_pod(self) -> Optional[str]:
+        pods = (await self.transport.get(api_path("", "v1", "pods", self.namespace),
+                                         {"labelSelector": f"job-name={self.name}"})).get("items", [])
+        if not pods:
+            return None
+        pods.sort(key=lambda p: p["metadata"].get("creationTimestamp", ""))
+        return pods[-1]["metadata"]["name"]
+
+    async def stream_logs(self, follow: bool = False,
+                          tail_lines: Optional[int] = None) -> AsyncIterator[str]:
+        """Log lines of the job's latest pod as they arrive"""
+        pod = await self._latest_pod()
+        if not pod:
+            return
+        params = {"follow": follow or None, "tailLines": tail_lines}
+        async for line in self.transport.stream(
+                api_path("", "v1", "pods", self.namespace, pod, "log"), params):
+            yield line
+
+    @instrument("logs")
+    async def logs(self) -> str:
+        """Get job logs (latest pod)"""
+        try:
+            pod = await self._latest_pod()
+            if not pod:
+                return ""
+            return await self.transport.request_raw(
+                "GET", api_path("", "v1", "pods", self.namespace, pod, "log"))
+        except ApiError:
+            return ""
+
+    @instrument("delete")
+    async def delete(self):
+        """Delete the job"""
+        try:
+            await self.transport.delete(self.path, {"propagationPolicy": "Background"})
+        except ApiError:
+            pass
+
+    def __repr__(self) -> str:
+        return f"AsyncJob(name={self.name!r}, namespace={self.namespace!r})"
+
+
+class AsyncPlatformClient:
+    """asyncio client for the ML platform (same surface as PlatformClient)
+
+    Use as ``async with AsyncPlatformClient(project_id) as client: ...`` or
+    call ``close()`` when done.
+    """
+
+    # Manifests are identical to the sync client's
+    build_manifest = PlatformClient.build_manifest
+
+    def __init__(
+        self,
+        project_id: str,
+        region: str = "europe-west3",
+        context: Optional[str] = None,
+        transport: Optional[AsyncHttpTransport] = None,
+        max_connections: int = 64,
+        workloads_dir: str = DEFAULT_WORKLOADS_DIR
+    ):
+        self.project_id = project_id
+        self.region = region
+        self.registry = f"{region}-docker.pkg.dev/{project_id}/ml-platform"
+        self.manifests = ManifestCompiler(project_id, workloads_dir)
+        self.transport = transport or AsyncHttpTransport.from_kubeconfig(
+            context, max_connections=max_connections)
+        self._watchers = {}
+
+    async def __aenter__(self) -> "AsyncPlatformClient":
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for watcher in self._watchers.values():
+            watcher.stop()
+        self.transport.close()
+
+    def watch_jobs(self, namespace: str = "jobs") -> AsyncJobWatcher:
+        """Shared watch over the Jobs of a namespace (started on first wait/status)"""
+        if namespace not in self._watchers:
+            self._watchers[namespace] = AsyncJobWatcher(self.transport, namespace)
+        return self._watchers[namespace]
+
+    def get_job(self, name: str, namespace: str = "jobs") -> AsyncJob:
+        """Job handle for an existing job, backed by the shared watch"""
+        return AsyncJob(name, namespace, self.transport, self.watch_jobs(namespace))
+
+    async def submit_job(
+        self,
+        name: str,
+        image: str,
+        command: Optional[List[str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        cpu: Optional[str] = None,
+        memory: Optional[str] = None,
+        cpu_limit: Optional[str] = None,
+        memory_limit: Optional[str] = None,
+        namespace: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        backoff_limit: Optional[int] = None,
+        workload: Optional[str] = None,
+        completions: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        index_env: Optional[List[Dict[str, str]]] = None
+    ) -> AsyncJob:
+        """Submit a training job (arguments as PlatformClient.submit_job)"""
+        manifest = self.build_manifest(
+            name, image, command=command, env=env, cpu=cpu, memory=memory,
+            cpu_limit=cpu_limit, memory_limit=memory_limit, namespace=namespace,
+            ttl_seconds=ttl_seconds, backoff_limit=backoff_limit, workload=workload,
+            completions=completions, parallelism=parallelism, index_env=index_env
+        )
+        try:
+            return await self.create_job(manifest)
+        except ApiError as e:
+            raise RuntimeError(f"Failed to submit job: {e}") from e
+
+    @instrument("submit")
+    async def create_job(self, manifest: Dict, retries: int = 0) -> AsyncJob:
+        """Async variant of PlatformClient.create_job"""
+        namespace = manifest["metadata"]["namespace"]
+        for attempt in range(retries + 1):
+            try:
+                created = await self.transport.create(api_path("batch", "v1", "jobs", namespace),
+                                                      manifest)
+                break
+            except ApiError as e:
+                if e.status == 409 and attempt > 0:
+                    # An earlier attempt was stored before its response was lost; the name is ours
+                    created = await self.transport.get(
+                        api_path("batch", "v1", "jobs", namespace, manifest["metadata"]["name"]))
+                    break
+                if e.status not in RETRYABLE_STATUSES or attempt == retries:
+                    raise
+                if metric_sinks:
+                    record_retry()
+                await asyncio.sleep(0.2 * 2 ** attempt)
+        watcher = self.watch_jobs(namespace)
+        if created.get("metadata", {}).get("name"):
+            watcher.observe(created)
+        return AsyncJob(manifest["metadata"]["name"], namespace, self.transport, watcher)
+
+    async def submit_jobs(self, specs: List[Dict], max_concurrency: int = 64,
+                          retries: int = 2) -> List[SubmitResult]:
+        """Submit many jobs concurrently; failures are recorded on each SubmitResult"""
+        results = [SubmitResult(spec) for spec in specs]
+        limit = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def submit(result):
+            try:
+                manifest = self.build_manifest(**result.spec)
+            except (TypeError, ValueError) as e:
+                result.error = f"Invalid job spec: {e}"
+                return
+            async with limit:
+                try:
+                    result.job = await self.create_job(manifest, retries)
+                except (ApiError, OSError, asyncio.TimeoutError) as e:
+                    result.error = str(e) or type(e).__name__
+
+        await asyncio.gather(*(submit(r) for r in results))
+        return results
+
+    def iter_jobs(
+        self,
+        namespace: str = "jobs",
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None,
+        completed: Optional[bool] = None,
+        metadata_only: bool = False,
+        page_size: int = 500
+    ) -> AsyncIterator[Dict]:
+        """Async-iterate jobs page by page (filters as PlatformClient.iter_jobs)"""
+        fields = [f for f in (field_selector, _completed_selector(completed)) if f]
+        params = {"labelSelector": label_selector, "fieldSelector": ",".join(fields) or None}
+        return apaginate(self.transport, api_path("batch", "v1", "jobs", namespace), params,
+                         page_size, metadata_only)
+
+    @instrument("list")
+    async def list_jobs(self, namespace: str = "jobs", **kwargs) -> List[Dict]:
+        """List all jobs (accepts the same filters as iter_jobs)"""
+        try:
+            return [job async for job in self.iter_jobs(namespace, **kwargs)]
+        except ApiError:
+            return []
+
+    async def wait_all(self, jobs: List[AsyncJob], timeout: Optional[float] = None) -> Dict[str, str]:
+        """Wait until every job finishes. Returns {job name: status}."""
+        results = await asyncio.gather(*(job.wait(timeout) for job in jobs))
+        return {job.name: state for job, state in zip(jobs, results)}
+
+    async def wait_any(self, jobs: List[AsyncJob], timeout: Optional[float] = None) -> Optional[AsyncJob]:
+        """Wait until the first of the jobs finishes and return it (None on timeout)"""
+        if not jobs:
+            return None
+        tasks = {asyncio.ensure_future(job.wait(timeout)): job for job in jobs}
+        done, pending = await asyncio.wait(list(tasks), timeout=timeout,
+                                           return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        finished = [tasks[t] for t in done if t.result() in TERMINAL_STATES]
+        return finished[0] if finished else None
+
+    @instrument("delete")
+    async def delete_job(self, name: str, namespace: str = "jobs") -> bool:
+        """Delete a job by name"""
+        try:
+            await self.transport.delete(api_path("batch", "v1", "jobs", namespace, name),
+                                        {"propagationPolicy": "Background"})
+        except ApiError as e:
+            raise RuntimeError(f"Failed to delete job: {e}") from e
+        return True
+
+    @instrument("scale")
+    async def scale_ray(self, replicas: int, group: Optional[str] = None):
+        """Scale a Ray worker group, clamped to its min/max (as PlatformClient.scale_ray, no wait)"""
+        path = api_path("ray.io", "v1", "rayclusters", RAY_NAMESPACE, RAY_CLUSTER)
+        try:
+            cluster = await self.transport.get(path)
+            target = worker_group(cluster, group)
+            result = ScaleResult(target, replicas, autoscaler_enabled(cluster))
+            if result.changed:
+                await self.transport.patch(path, target.patch(result.replicas), JSON_PATCH)
+        except ApiError as e:
+            raise RuntimeError(f"Failed to scale: {e}") from e
+        return result
+
+    @instrument("status")
+    async def get_status(self) -> Dict:
+        """Get platform status (one concurrent list per source, as PlatformClient.get_status)"""
+        async def fetch(path):
+            try:
+                return (await self.transport.get(path)).get("items", [])
+            except (ApiError, OSError, asyncio.TimeoutError):
+                return None
+
+        names = list(STATUS_SOURCES)
+        results = await asyncio.gather(*(fetch(STATUS_SOURCES[n]) for n in names))
+        return summarize_status(dict(zip(names, results)))
@@ -0,0 +1,312 @@
+"""Async transport - the HTTP transport on asyncio streams
+
+Same REST-shaped surface as transport.HttpTransport, but every call is a
+coroutine and connections are asyncio streams, so one event loop can keep
+thousands of requests and watches in flight without a thread per call.
+Keep-alive connections are pooled per transport; ``max_connections`` caps
+how many requests are on the wire at once (the rest queue on the loop).
+"""
+
+import asyncio
+import json
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from . import metrics
+from .kubeconfig import KubeConfig
+from .transport import MERGE_PATCH, METADATA_ONLY, _api_error, _decode, _with_query
+
+# StreamReader buffer limit; watch events and log lines can exceed the 64 KiB default
+_READ_LIMIT = 16 * 1024 * 1024
+
+# Errors that mean a pooled keep-alive connection went stale between requests
+_STALE_ERRORS = (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError)
+
+
+class _Response:
+    def __init__(self, status: int, headers: Dict[str, str], reader: asyncio.StreamReader,
+                 method: str = "GET"):
+        self.status = status
+        self.headers = headers
+        self.reader = reader
+        self.method = method
+
+    @property
+    def bodyless(self) -> bool:
+        # RFC 9112 6.3: never a body, whatever the framing headers say
+        return self.method == "HEAD" or self.status < 200 or self.status in (204, 304)
+
+    @property
+    def chunked(self) -> bool:
+        return "chunked" in self.headers.get("transfer-encoding", "").lower()
+
+    @property
+    def will_close(self) -> bool:
+        return (self.headers.get("connection", "").lower() == "close"
+                or (not self.bodyless and not self.chunked
+                    and "content-length" not in self.headers))
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        """Body as it arrives (de-chunked)"""
+        if self.bodyless:
+            return
+        if self.chunked:
+            while True:
+                size = int((await self.reader.readline()).split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # Trailers end with an empty line
+                    while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return
+                yield await self.reader.readexactly(size)
+                await self.reader.readline()
+        elif "content-length" in self.headers:
+            remaining = int(self.headers["content-length"])
+            while remaining > 0:
+                data = await self.reader.read(min(remaining, 1 << 16))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"", remaining)
+                remaining -= len(data)
+                yield data
+        else:
+            while True:
+                data = await self.reader.read(1 << 16)
+                if not data:
+                    return
+                yield data
+
+    async def read(self) -> bytes:
+        return b"".join([chunk async for chunk in self.chunks()])
+
+
+class AsyncConnectionPool:
+    """Pool of keep-alive asyncio stream connections to one host"""
+
+    def __init__(self, base_url: str, ssl_context=None, max_connections: int = 64,
+                 timeout: float = 30.0):
+        url = urlsplit(base_url)
+        self.scheme = url.scheme or "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.scheme == "https" else 80)
+        self.base_path = url.path.rstrip("/")
+        self.ssl_context = ssl_context
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = None
+
+    @property
+    def slots(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore binds to the loop that first uses it
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_connections)
+        return self._slots
+
+    async def open(self, timeout: Optional[float] = None):
+        ssl = self.ssl_context if self.scheme == "https" else None
+        return await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl, limit=_READ_LIMIT,
+                                    server_hostname=self.host if ssl else None),
+            timeout or self.timeout)
+
+    async def acquire(self):
+        """Return (reader, writer, reused)"""
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await self.open()
+        return reader, writer, False
+
+    def release(self, reader, writer):
+        if len(self._idle) < self.max_connections:
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+
+
+class AsyncHttpTransport:
+    """Direct API server access from asyncio over pooled keep-alive connections"""
+
+    def __init__(self, config: KubeConfig, max_connections: int = 64, timeout: float = 30.0):
+        self.config = config
+        self.timeout = timeout
+        self.pool = AsyncConnectionPool(config.server, config.ssl_context(), max_connections,
+                                        timeout)
+        self._refresh = None    # in-flight exec credential refresh, shared by all requests
+
+    @classmethod
+    def from_kubeconfig(cls, context: Optional[str] = None, **kwargs) -> "AsyncHttpTransport":
+        return cls(KubeConfig.load(context), **kwargs)
+
+    async def _auth_headers(self) -> Dict[str, str]:
+        """Authorization header; an exec auth plugin (a subprocess) runs off the loop
+
+        The token is cached by the KubeConfig until it expires, and concurrent
+        requests that find it stale wait on one refresh.
+        """
+        if not self.config.credentials_stale():
+            return self.config.auth_headers()
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.get_running_loop().run_in_executor(
+                None, self.config.auth_headers)
+        # Shielded: one cancelled request must not cancel the refresh for the others
+        return await asyncio.shield(self._refresh)
+
+    async def _head(self, method: str, url: str, content_type: Optional[str],
+                    extra: Optional[Dict[str, str]], length: Optional[int]) -> bytes:
+        headers = {"Host": f"{self.pool.host}:{self.pool.port}", "Accept": "application/json",
+                   "User-Agent": "ml-platform-sdk"}
+        headers.update(await self._auth_headers())
+        if content_type:
+            headers["Content-Type"] = content_type
+        if length is not None:
+            headers["Content-Length"] = str(length)
+        headers.update(extra or {})
+        lines = [f"{method} {url} HTTP/1.1"] + [f"{k}: {v}" for k, v in headers.items()]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode()
+
+    @staticmethod
+    async def _read_head(reader: asyncio.StreamReader) -> Tuple[int, Dict[str, str]]:
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b"", None)
+        status = int(status_line.split(None, 2)[1])
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return status, headers
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+
+    async def request_raw(self, method: str, path: str, params: Optional[Dict] = None,
+                          body=None, content_type: str = "application/json",
+                          headers: Optional[Dict[str, str]] = None) -> str:
+        """Send a request and return the response body as text"""
+        url = self.pool.base_path + _with_query(path, params)
+        payload = b""
+        if body is not None:
+            payload = body if isinstance(body, (bytes, str)) else json.dumps(body)
+            payload = payload.encode() if isinstance(payload, str) else payload
+        head = await self._head(method, url, content_type if body is not None else None, headers,
+                                len(payload) if body is not None
+                                or method in ("POST", "PUT", "PATCH") else None)
+
+        async with self.pool.slots:
+            while True:
+                reader, writer, reused = await self.pool.acquire()
+                try:
+                    writer.write(head + payload)
+                    await writer.drain()
+                    status, resp_headers = await asyncio.wait_for(self._read_head(reader),
+                                                                  self.timeout)
+                    resp = _Response(status, resp_headers, reader, method)
+                    data = await asyncio.wait_for(resp.read(), self.timeout)
+                except _STALE_ERRORS as e:
+                    writer.close()
+                    if reused:
+                        # The server closed an idle keep-alive connection; retry on a fresh one
+                        if metrics.sinks:
+                            metrics.record_retry()
+                        continue
+                    if metrics.sinks:
+                        metrics.record_error(type(e).__name__)
+                    raise
+                except BaseException as e:
+                    writer.close()
+                    if metrics.sinks and isinstance(e, (OSError, asyncio.TimeoutError)):
+                        metrics.record_error(type(e).__name__)
+                    raise
+                if resp.will_close:
+                    writer.close()
+                else:
+                    self.pool.release(reader, writer)
+                break
+
+        if metrics.sinks:
+            metrics.record_transfer(len(payload), len(data))
+            if status >= 400:
+                metrics.record_error(status)
+        text = data.decode("utf-8", errors="replace")
+        if status >= 400:
+            raise _api_error(status, text)
+        return text
+
+    async def request(self, method: str, path: str, params: Optional[Dict] = None,
+                      body=None, content_type: str = "application/json",
+                      headers: Optional[Dict[str, str]] = None) -> Dict:
+        """Send a request and return the decoded JSON response"""
+        return _decode(await self.request_raw(method, path, params, body, content_type, headers))
+
+    async def stream(self, path: str, params: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Stream a long-running GET (watch, log follow) line by line on its own connection"""
+        server_timeout = (params or {}).get("timeoutSeconds")
+        reader, writer = await self.pool.open()
+        try:
+            writer.write(await self._head("GET", self.pool.base_path + _with_query(path, params),
+                                          None, None, None))
+            await writer.drain()
+            status, resp_headers = await asyncio.wait_for(self._read_head(reader), self.timeout)
+            resp = _Response(status, resp_headers, reader)
+            if status >= 400:
+                if metrics.sinks:
+                    metrics.record_error(status)
+                raise _api_error(status, (await resp.read()).decode("utf-8", errors="replace"))
+            buffer = b""
+            chunks = resp.chunks().__aiter__()
+            while True:
+                try:
+                    # Mirror the sync transport: give up a little past the server-side timeout
+                    chunk = await asyncio.wait_for(
+                        chunks.__anext__(), float(server_timeout) + 30 if server_timeout else None)
+                except StopAsyncIteration:
+                    break
+                if metrics.sinks:
+                    metrics.record_transfer(0, len(chunk))
+                buffer += chunk
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    yield line.decode("utf-8", errors="replace")
+            if buffer:
+                yield buffer.decode("utf-8", errors="replace")
+        finally:
+            writer.close()
+
+    async def get(self, path: str, params: Optional[Dict] = None, **kwargs) -> Dict:
+        return await self.request("GET", path, params, **kwargs)
+
+    async def create(self, path: str, body: Dict, params: Optional[Dict] = None) -> Dict:
+        return await self.request("POST", path, params, body=body)
+
+    async def delete(self, path: str, params: Optional[Dict] = None,
+                     body: Optional[Dict] = None) -> Dict:
+        return await self.request("DELETE", path, params, body=body)
+
+    async def patch(self, path: str, body, content_type: str = MERGE_PATCH) -> Dict:
+        return await self.request("PATCH", path, body=body, content_type=content_type)
+
+    def close(self):
+        """Close idle pooled connections"""
+        self.pool.close()
+
+
+async def apaginate(transport: AsyncHttpTransport, path: str, params: Optional[Dict] = None,
+                    page_size: int = 500, metadata_only: bool = False) -> AsyncIterator[Dict]:
+    """Async counterpart of transport.paginate"""
+    params = dict(params or {}, limit=page_size or None)
+    headers = {"Accept": METADATA_ONLY} if metadata_only else None
+    while True:
+        page = await transport.get(path, params, headers=headers)
+        for item in page.get("items") or []:
+            yield item
+        token = page.get("metadata", {}).get("continue")
+        if not token:
+            return
+        params["continue"] = token
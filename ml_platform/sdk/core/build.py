@@ -0,0 +1,306 @@
+"""Container builds - content-hashed, cache-aware image builds
+
+Every image is tagged with a hash of its build context (all files docker
+would send, minus .dockerignore matches). A local manifest records which
+hashes have already been pushed to which repository, so rebuilding an
+unchanged workload only points the requested tags at the existing image
+(a registry-side retag, no layer transfer) instead of building and pushing.
+
+Builds go through `docker buildx` with a registry layer cache and push
+every tag in the same step. The cache is only exported (--cache-to) when the
+active builder can do it: the stock `docker` driver cannot, so it only
+imports. Without buildx they fall back to a classic `docker build
+--cache-from` followed by a single `docker push --all-tags`, and cached
+images are rebuilt rather than retagged.
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .config import cache_path
+
+# Files never part of a build context's identity
+IGNORED_NAMES = ("__pycache__", ".git", ".DS_Store")
+IGNORED_SUFFIXES = (".pyc", ".pyo")
+
+# Tag holding the buildx layer cache in each repository
+CACHE_TAG = "buildcache"
+
+# Prefix of content-hash tags
+HASH_TAG_PREFIX = "src-"
+
+
+def _dockerignore(context: str) -> List[str]:
+    try:
+        with open(os.path.join(context, ".dockerignore")) as f:
+            lines = [line.strip() for line in f]
+    except OSError:
+        return []
+    return [line.rstrip("/") for line in lines if line and not line.startswith("#")]
+
+
+def _ignored(relpath: str, patterns: List[str]) -> bool:
+    parts = relpath.split("/")
+    if any(p in IGNORED_NAMES for p in parts) or relpath.endswith(IGNORED_SUFFIXES):
+        return True
+    ignored = False
+    for pattern in patterns:
+        negate = pattern.startswith("!")
+        pattern = pattern.lstrip("!")
+        # A pattern matching a directory excludes everything beneath it
+        if any(fnmatch.fnmatch("/".join(parts[:i]), pattern) for i in range(1, len(parts) + 1)):
+            ignored = not negate
+    return ignored
+
+
+def context_hash(context: str) -> str:
+    """SHA-256 over the relative path and content of every file in the build context"""
+    digest = hashlib.sha256()
+    patterns = _dockerignore(context)
+    for root, dirs, files in os.walk(context):
+        dirs.sort()
+        rel_root = os.path.relpath(root, context)
+        for name in sorted(files):
+            rel = name if rel_root == "." else f"{rel_root}/{name}".replace(os.sep, "/")
+            if _ignored(rel, patterns):
+                continue
+            digest.update(rel.encode() + b"\0")
+            with open(os.path.join(root, name), "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(chunk)
+            digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def build_cache_path() -> str:
+    """Location of the local manifest of pushed content hashes"""
+    return os.path.join(os.path.dirname(cache_path()), "builds.json")
+
+
+class BuildCache:
+    """Local manifest of images already pushed: repository -> content hash -> tags"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or build_cache_path()
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self._images = json.load(f)
+        except (OSError, ValueError):
+            self._images = {}
+
+    def lookup(self, repository: str, digest: str) -> Optional[Dict]:
+        with self._lock:
+            return self._images.get(repository, {}).get(digest)
+
+    def record(self, repository: str, digest: str, tags: List[str]):
+        with self._lock:
+            images = self._images.setdefault(repository, {})
+            # A tag names one image: moving it here takes it away from older hashes
+            for other, entry in images.items():
+                if other != digest:
+                    entry["tags"] = [t for t in entry["tags"] if t not in tags]
+            entry = images.setdefault(digest, {"tags": []})
+            entry["tags"] = sorted(set(entry["tags"]) | set(tags))
+            entry["pushed"] = time.time()
+            self._save()
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".builds-")
+            with os.fdopen(fd, "w") as f:
+                json.dump(self._images, f, indent=1)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+class BuildResult:
+    """Outcome of building one workload"""
+
+    def __init__(self, workload: str, image: str, digest: str):
+        self.workload = workload
+        self.image = image
+        self.digest = digest
+        self.action = ""       # "cached", "retagged", "built" or "failed"
+        self.error = None
+        self.output = ""
+        self.duration = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.action != "failed"
+
+    def __repr__(self) -> str:
+        return f"BuildResult({self.image}, {self.action}, {self.duration:.1f}s)"
+
+
+def docker_auth_configured(registry: str) -> bool:
+    """True if docker already has a credential helper for the registry host"""
+    path = os.path.join(os.environ.get("DOCKER_CONFIG") or os.path.expanduser("~/.docker"),
+                        "config.json")
+    try:
+        with open(path) as f:
+            return registry in (json.load(f).get("credHelpers") or {})
+    except (OSError, ValueError):
+        return False
+
+
+def ensure_docker_auth(registry: str):
+    """Run `gcloud auth configure-docker` only if the registry isn't configured yet"""
+    if not docker_auth_configured(registry):
+        subprocess.run(["gcloud", "auth", "configure-docker", registry, "--quiet"],
+                       capture_output=True, text=True)
+
+
+_buildx = None
+
+
+def has_buildx() -> bool:
+    global _buildx
+    if _buildx is None:
+        try:
+            _buildx = subprocess.run(["docker", "buildx", "version"],
+                                     capture_output=True).returncode == 0
+        except FileNotFoundError:
+            _buildx = False
+    return _buildx
+
+
+_buildx_driver = None
+
+
+def buildx_driver() -> str:
+    """Driver of the active buildx builder ("docker", "docker-container", ...; "" if unknown)"""
+    global _buildx_driver
+    if _buildx_driver is None:
+        _buildx_driver = ""
+        if has_buildx():
+            try:
+                out = subprocess.run(["docker", "buildx", "inspect"], capture_output=True,
+                                     text=True).stdout
+            except FileNotFoundError:
+                out = ""
+            for line in out.splitlines():
+                key, _, value = line.partition(":")
+                if key.strip() == "Driver":
+                    _buildx_driver = value.strip()
+                    break
+    return _buildx_driver
+
+
+def build_commands(context: str, repository: str, tags: List[str],
+                   registry_cache: bool = True) -> List[List[str]]:
+    """docker commands that build the context and push every tag"""
+    refs = [f"{repository}:{tag}" for tag in tags]
+    if has_buildx():
+        cmd = ["docker", "buildx", "build", "--push"]
+        if registry_cache:
+            cache_ref = f"{repository}:{CACHE_TAG}"
+            cmd += ["--cache-from", f"type=registry,ref={cache_ref}"]
+            # The default docker driver rejects cache export
+            if buildx_driver() not in ("", "docker"):
+                cmd += ["--cache-to", f"type=registry,ref={cache_ref},mode=max"]
+        for ref in refs:
+            cmd += ["-t", ref]
+        return [cmd + [context]]
+    cmd = ["docker", "build"]
+    if registry_cache:
+        cmd += ["--cache-from", f"{repository}:latest"]
+    for ref in refs:
+        cmd += ["-t", ref]
+    return [cmd + [context], ["docker", "push", "--all-tags", repository]]
+
+
+def retag_command(repository: str, source_tag: str, tags: List[str]) -> Optional[List[str]]:
+    """Point tags at an image already in the registry (manifest copy, no layers moved)
+
+    None without buildx, which the registry-side copy needs.
+    """
+    if not has_buildx():
+        return None
+    cmd = ["docker", "buildx", "imagetools", "create"]
+    for tag in tags:
+        cmd += ["-t", f"{repository}:{tag}"]
+    return cmd + [f"{repository}:{source_tag}"]
+
+
+def build_image(
+    workload: str,
+    context: str,
+    repository: str,
+    tags: List[str],
+    cache: Optional[BuildCache] = None,
+    force: bool = False,
+    registry_cache: bool = True,
+    stream_output: bool = True
+) -> BuildResult:
+    """Build and push one workload unless its content hash was already pushed
+
+    Args:
+        workload: Workload name (for reporting)
+        context: Build context directory (contains the Dockerfile)
+        repository: Image repository without tag
+        tags: Tags to publish, e.g. [version, "latest"]
+        cache: Manifest of pushed hashes (None disables skipping)
+        force: Build and push even if the hash is cached
+        registry_cache: Use the registry layer cache (cache-from/cache-to)
+        stream_output: Let docker write to the terminal; otherwise capture it
+    """
+    start = time.perf_counter()
+    digest = context_hash(context)
+    hash_tag = HASH_TAG_PREFIX + digest[:16]
+    result = BuildResult(workload, f"{repository}:{hash_tag}", digest)
+    all_tags = [hash_tag] + [t for t in tags if t != hash_tag]
+
+    entry = cache.lookup(repository, digest) if cache is not None and not force else None
+    if entry is not None:
+        missing = [t for t in tags if t not in entry["tags"]]
+        if not missing:
+            result.action = "cached"
+            result.duration = time.perf_counter() - start
+            return result
+    retag = retag_command(repository, hash_tag, missing) if entry is not None else None
+    if retag is not None:
+        result.action = "retagged"
+        commands = [retag]
+    else:
+        result.action = "built"
+        commands = build_commands(context, repository, all_tags, registry_cache)
+
+    for cmd in commands:
+        try:
+            proc = subprocess.run(cmd, text=True, capture_output=not stream_output)
+        except FileNotFoundError as e:
+            result.action, result.error = "failed", str(e)
+            break
+        if not stream_output:
+            result.output += (proc.stdout or "") + (proc.stderr or "")
+        if proc.returncode != 0:
+            result.action = "failed"
+            result.error = f"{' '.join(cmd[:3])} exited with {proc.returncode}"
+            break
+    if result.ok and cache is not None:
+        cache.record(repository, digest, all_tags)
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def build_images(builds: List[Dict], max_concurrency: int = 4, **kwargs) -> List[BuildResult]:
+    """Build several workloads in parallel
+
+    builds: dicts with workload, context, repository and tags (see build_image).
+    Output is captured per build when more than one runs at once.
+    """
+    kwargs.setdefault("stream_output", len(builds) == 1)
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(builds) or 1))) as pool:
+        return list(pool.map(lambda b: build_image(**b, **kwargs), builds))
@@ -0,0 +1,143 @@
+"""Job cleanup - select finished jobs server-side and delete them in bulk"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+from .metrics import propagate
+from .transport import ApiError, Transport, api_path, paginate
+
+# Job states cleanup can select
+CLEANUP_STATUSES = ("finished", "succeeded", "failed")
+
+
+class CleanupReport:
+    """Outcome of a cleanup run"""
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.matched = []      # names selected for deletion
+        self.deleted = 0
+        self.failed = {}       # name -> error
+        self.duration = 0.0
+        self.strategy = ""
+
+    @property
+    def jobs_per_second(self) -> float:
+        return self.deleted / self.duration if self.duration > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f"CleanupReport(matched={len(self.matched)}, deleted={self.deleted}, "
+                f"failed={len(self.failed)}, {self.jobs_per_second:.1f} jobs/s)")
+
+
+def _timestamp(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+
+
+def job_outcome(job: Dict) -> Optional[str]:
+    """Outcome of a Job object: succeeded, failed, or None while it is still running
+
+    Only the terminal Complete/Failed conditions count: an Indexed Job has
+    status.succeeded > 0 (and can have no active pod between retries) long
+    before all of its indexes are done.
+    """
+    for condition in job.get("status", {}).get("conditions") or []:
+        if condition.get("status", "True") != "True":
+            continue
+        if condition.get("type") == "Complete":
+            return "succeeded"
+        if condition.get("type") == "Failed":
+            return "failed"
+    return None
+
+
+def finished_at(job: Dict) -> Optional[float]:
+    """When the job finished (epoch seconds), falling back to its creation time"""
+    status = job.get("status", {})
+    if status.get("completionTime"):
+        return _timestamp(status["completionTime"])
+    for condition in status.get("conditions") or []:
+        if condition.get("type") in ("Complete", "Failed") and condition.get("lastTransitionTime"):
+            return _timestamp(condition["lastTransitionTime"])
+    return _timestamp(job.get("metadata", {}).get("creationTimestamp"))
+
+
+def select_jobs(jobs, status: str = "finished", older_than: Optional[float] = None,
+                now: Optional[float] = None) -> List[str]:
+    """Names of jobs matching a status and minimum finished age (seconds)"""
+    now = now or time.time()
+    names = []
+    for job in jobs:
+        outcome = job_outcome(job)
+        if outcome is None or (status != "finished" and outcome != status):
+            continue
+        if older_than is not None:
+            finished = finished_at(job)
+            if finished is None or now - finished < older_than:
+                continue
+        names.append(job["metadata"]["name"])
+    return names
+
+
+def cleanup_jobs(
+    transport: Transport,
+    namespace: str = "jobs",
+    status: str = "finished",
+    older_than: Optional[float] = None,
+    label_selector: Optional[str] = None,
+    dry_run: bool = False,
+    max_concurrency: int = 16,
+    propagation_policy: str = "Background"
+) -> CleanupReport:
+    """Delete finished jobs
+
+    Args:
+        transport: API transport
+        namespace: Kubernetes namespace
+        status: "finished" (succeeded or failed), "succeeded" or "failed"
+        older_than: Only jobs finished at least this many seconds ago
+        label_selector: Server-side label filter, e.g. "app=my-sweep"
+        dry_run: Report what would be deleted without deleting
+        max_concurrency: Parallel delete requests
+        propagation_policy: "Background" or "Foreground" removes the job's pods too
+
+    Jobs are listed page by page (succeeded ones narrowed server-side by
+    status.successful), filtered here on their terminal condition, and deleted
+    with bounded concurrency. There is no collection delete: status.successful
+    also matches running Indexed Jobs with some indexes done.
+    """
+    if status not in CLEANUP_STATUSES:
+        raise ValueError(f"status must be one of {', '.join(CLEANUP_STATUSES)}")
+    report = CleanupReport(dry_run)
+    path = api_path("batch", "v1", "jobs", namespace)
+    # Only succeeded jobs can be selected server-side; there is no field for failed
+    field_selector = "status.successful!=0" if status == "succeeded" else None
+    start = time.perf_counter()
+    report.strategy = "concurrent"
+    listing = paginate(transport, path, {"labelSelector": label_selector,
+                                         "fieldSelector": field_selector})
+    report.matched = select_jobs(listing, status, older_than)
+    if dry_run:
+        report.duration = time.perf_counter() - start
+        return report
+
+    def delete(name):
+        try:
+            transport.delete(f"{path}/{name}", {"propagationPolicy": propagation_policy})
+            return name, None
+        except ApiError as e:
+            # Already gone (e.g. removed by its TTL) counts as cleaned up
+            return name, None if e.not_found else str(e)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+        for name, error in pool.map(propagate(delete), report.matched):
+            if error:
+                report.failed[name] = error
+            else:
+                report.deleted += 1
+    report.duration = time.perf_counter() - start
+    return report
@@ -1,23 +1,160 @@
 """Platform client - main SDK interface"""
 
-import subprocess
-import json
-from datetime import datetime
-from typing import Optional, Dict, List
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor
+from concurrent.futures import wait as wait_futures
+from typing import Dict, Iterator, List, Optional
+
+from .cleanup import CleanupReport, cleanup_jobs
+from .informer import JobInformer
 from .job import Job
+from .logs import LogStream
+from .manifest import DEFAULT_WORKLOADS_DIR, JobSpec, ManifestCompiler, generate_job_name
+from .metrics import instrument, record_retry
+from .metrics import sinks as metric_sinks
+from .status import collect_status
+from .transport import ApiError, Transport, api_path, default_transport, paginate
+
+# Throttling and transient server errors worth retrying on submit
+RETRYABLE_STATUSES = (429, 500, 502, 503, 504)
+
+# Driver command for mode="ray" when none is given (the example workloads' CMD)
+DEFAULT_RAY_ENTRYPOINT = "python train.py"
+
+
+def _completed_selector(completed: Optional[bool]) -> Optional[str]:
+    if completed is None:
+        return None
+    return "status.successful!=0" if completed else "status.successful=0"
 
 
-# Default TTL for completed jobs (24 hours)
-DEFAULT_TTL_SECONDS = 86400
+def _job_by_name(jobs: List[Job], name: str) -> Job:
+    return next(job for job in jobs if job.name == name)
+
+
+class SubmitResult:
+    """Outcome of one job in a bulk submission"""
+    
+    def __init__(self, spec: Dict, job: Optional[Job] = None, error: Optional[str] = None):
+        self.spec = spec
+        self.job = job
+        self.error = error
+    
+    @property
+    def ok(self) -> bool:
+        return self.job is not None
+    
+    def __repr__(self) -> str:
+        return f"SubmitResult(job={self.job!r}, error={self.error!r})"
 
 
 class PlatformClient:
     """Client for interacting with the ML platform"""
     
-    def __init__(self, project_id: str, region: str = "europe-west3"):
+    def __init__(
+        self,
+        project_id: str,
+        region: str = "europe-west3",
+        context: Optional[str] = None,
+        transport: Optional[Transport] = None,
+        ray_address: Optional[str] = None,
+        workloads_dir: str = DEFAULT_WORKLOADS_DIR
+    ):
         self.project_id = project_id
         self.region = region
         self.registry = f"{region}-docker.pkg.dev/{project_id}/ml-platform"
+        # Memoized per-workload manifest templates
+        self.manifests = ManifestCompiler(project_id, workloads_dir)
+        # Shared per context, so every client and Job reuses one connection pool
+        self.transport = transport or default_transport(context)
+        self._informers = {}
+        self._informers_lock = threading.Lock()
+        self.ray_address = ray_address
+        self._ray = None
+        self._scaler = None
+    
+    @property
+    def ray(self):
+        """Ray Job Submission client (through the API server proxy unless ray_address is set)"""
+        if self._ray is None:
+            from .ray_jobs import RayJobClient
+            self._ray = RayJobClient(self.transport, self.ray_address)
+        return self._ray
+    
+    def watch_jobs(self, namespace: str = "jobs", start: bool = True) -> JobInformer:
+        """Shared watch-backed cache of the Jobs in a namespace
+        
+        One watch connection per namespace serves Job.status, Job.wait and
+        wait_all/wait_any for every job from this client.
+        """
+        with self._informers_lock:
+            informer = self._informers.get(namespace)
+            if informer is None:
+                informer = self._informers[namespace] = JobInformer(self.transport, namespace)
+        return informer.start() if start else informer
+    
+    def get_job(self, name: str, namespace: str = "jobs") -> Job:
+        """Job handle for an existing job, backed by the shared watch"""
+        return Job(name, namespace, transport=self.transport,
+                   informer=self.watch_jobs(namespace, start=False))
+    
+    def wait_all(self, jobs: List[Job], timeout: Optional[float] = None) -> Dict[str, str]:
+        """Wait until every job finishes. Returns {job name: status}."""
+        futures = {job.name: job.future() for job in jobs}
+        wait_futures(list(futures.values()), timeout)
+        return {name: f.result() if f.done() else _job_by_name(jobs, name).status()
+                for name, f in futures.items()}
+    
+    def wait_any(self, jobs: List[Job], timeout: Optional[float] = None) -> Optional[Job]:
+        """Wait until the first of the jobs finishes and return it (None on timeout)"""
+        futures = {job.future(): job for job in jobs}
+        done, _ = wait_futures(list(futures), timeout, return_when=FIRST_COMPLETED)
+        return futures[next(iter(done))] if done else None
+    
+    async def wait_all_async(self, jobs: List[Job], timeout: Optional[float] = None) -> Dict[str, str]:
+        """Async variant of wait_all"""
+        import asyncio  # deferred: costs ~50ms at import and only async callers need it
+        futures = {job.name: asyncio.wrap_future(job.future()) for job in jobs}
+        if futures:
+            await asyncio.wait(list(futures.values()), timeout=timeout)
+        return {name: f.result() if f.done() else _job_by_name(jobs, name).status()
+                for name, f in futures.items()}
+    
+    async def wait_any_async(self, jobs: List[Job], timeout: Optional[float] = None) -> Optional[Job]:
+        """Async variant of wait_any"""
+        import asyncio
+        futures = {asyncio.wrap_future(job.future()): job for job in jobs}
+        if not futures:
+            return None
+        done, _ = await asyncio.wait(list(futures), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        return futures[next(iter(done))] if done else None
+    
+    def build_manifest(
+        self,
+        name: str,
+        image: str,
+        command: Optional[List[str]] = None,
+        env: Optional[Dict[str, str]] = None,
+        cpu: Optional[str] = None,
+        memory: Optional[str] = None,
+        cpu_limit: Optional[str] = None,
+        memory_limit: Optional[str] = None,
+        namespace: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        backoff_limit: Optional[int] = None,
+        workload: Optional[str] = None,
+        completions: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        index_env: Optional[List[Dict[str, str]]] = None
+    ) -> Dict:
+        """Build and validate the Job manifest for a submission (see submit_job for arguments)"""
+        return self.manifests.compile(JobSpec(
+            name, image, command=command, env=env, cpu=cpu, memory=memory,
+            cpu_limit=cpu_limit, memory_limit=memory_limit, namespace=namespace,
+            ttl_seconds=ttl_seconds, backoff_limit=backoff_limit, workload=workload,
+            completions=completions, parallelism=parallelism, index_env=index_env
+        ))
     
     def submit_job(
         self,
@@ -25,21 +162,31 @@ class PlatformClient:
         image: str,
         command: Optional[List[str]] = None,
         env: Optional[Dict[str, str]] = None,
-        cpu: str = "4",
-        memory: str = "16Gi",
-        cpu_limit: str = "8",
-        memory_limit: str = "32Gi",
-        namespace: str = "jobs",
-        ttl_seconds: int = DEFAULT_TTL_SECONDS,
-        backoff_limit: int = 3
+        cpu: Optional[str] = None,
+        memory: Optional[str] = None,
+        cpu_limit: Optional[str] = None,
+        memory_limit: Optional[str] = None,
+        namespace: Optional[str] = None,
+        ttl_seconds: Optional[int] = None,
+        backoff_limit: Optional[int] = None,
+        workload: Optional[str] = None,
+        completions: Optional[int] = None,
+        parallelism: Optional[int] = None,
+        index_env: Optional[List[Dict[str, str]]] = None,
+        mode: str = "k8s",
+        runtime_env: Optional[Dict] = None
     ) -> Job:
         """Submit a training job
         
+        Options left as None take the workload's defaults (its job.yaml, see
+        manifest.ManifestCompiler), then the platform's (4 CPU / 16Gi requested,
+        8 / 32Gi limit, namespace "jobs", 24h TTL, 3 retries).
+        
         Args:
             name: Job name prefix
             image: Container image to run
             command: Optional command to run
-            env: Environment variables
+            env: Environment variables (merged over the workload's)
             cpu: CPU request
             memory: Memory request
             cpu_limit: CPU limit
@@ -47,112 +194,256 @@ class PlatformClient:
             namespace: Kubernetes namespace
             ttl_seconds: Time to live after job completion (for auto-cleanup)
             backoff_limit: Number of retries before marking job as failed
+            workload: Workload whose defaults apply (default: name)
+            completions: Run as an Indexed Job with this many indexes; each pod
+                gets JOB_COMPLETION_INDEX and JOB_COMPLETIONS (see indexed.shard)
+            parallelism: Indexes running at once (default: all of them)
+            index_env: One env dict per index, applied in the pod by
+                indexed.apply_index_env; implies completions=len(index_env)
+            mode: "k8s" runs the driver in its own Kubernetes Job pod; "ray" submits
+                it to the Ray head's Job Submission API (no pod, no image pull).
+                In ray mode the image and resources are not used and command
+                defaults to DEFAULT_RAY_ENTRYPOINT.
+            runtime_env: Ray runtime_env for mode="ray", e.g. {"working_dir":
+                "docs/examples/stellar_optimization"} (local dirs are uploaded)
             
         Returns:
-            Job object for monitoring
+            Job object for monitoring (a RayJob in ray mode, same interface)
         """
+        if mode == "ray":
+            return self._submit_ray_job(name, command, env, runtime_env)
+        if mode != "k8s":
+            raise ValueError(f"Unknown submit mode: {mode} (use 'k8s' or 'ray')")
+        manifest = self.build_manifest(
+            name, image, command=command, env=env, cpu=cpu, memory=memory,
+            cpu_limit=cpu_limit, memory_limit=memory_limit, namespace=namespace,
+            ttl_seconds=ttl_seconds, backoff_limit=backoff_limit, workload=workload,
+            completions=completions, parallelism=parallelism, index_env=index_env
+        )
+        try:
+            return self.create_job(manifest)
+        except ApiError as e:
+            raise RuntimeError(f"Failed to submit job: {e}") from e
+    
+    @instrument("submit")
+    def _submit_ray_job(self, name: str, command: Optional[List[str]],
+                        env: Optional[Dict[str, str]], runtime_env: Optional[Dict]) -> Job:
+        from .ray_jobs import RayJob
+        runtime_env = dict(runtime_env or {})
+        # Same environment the Kubernetes driver pod gets, minus RAY_ADDRESS (we are on the head)
+        env_vars = {"GCS_BUCKET": f"gs://{self.project_id}-ml-artifacts"}
+        env_vars.update({k: str(v) for k, v in (env or {}).items()})
+        env_vars.update(runtime_env.get("env_vars") or {})
+        runtime_env["env_vars"] = env_vars
+        entrypoint = " ".join(command) if command else DEFAULT_RAY_ENTRYPOINT
+        try:
+            submission_id = self.ray.submit(entrypoint, generate_job_name(name), runtime_env,
+                                            metadata={"app": name})
+        except ApiError as e:
+            raise RuntimeError(f"Failed to submit job: {e}") from e
+        return RayJob(submission_id, self.ray)
+    
+    @instrument("submit")
+    def create_job(self, manifest: Dict, retries: int = 0) -> Job:
+        """Create a Job from a compiled manifest (see build_manifest or manifests.compile)
+
+        Retries throttled (429) or transient 5xx errors up to retries times;
+        any other ApiError is raised as is. A retry that finds the job already
+        there (409) means an earlier attempt created it, which counts as success.
+        """
+        namespace = manifest["metadata"]["namespace"]
+        for attempt in range(retries + 1):
+            try:
+                created = self.transport.create(api_path("batch", "v1", "jobs", namespace), manifest)
+                break
+            except ApiError as e:
+                if e.status == 409 and attempt > 0:
+                    # An earlier attempt was stored before its response was lost; the name is ours
+                    created = self.transport.get(
+                        api_path("batch", "v1", "jobs", namespace, manifest["metadata"]["name"]))
+                    break
+                if e.status not in RETRYABLE_STATUSES or attempt == retries:
+                    raise
+                if metric_sinks:
+                    record_retry()
+                time.sleep(0.2 * 2 ** attempt)
+        informer = self.watch_jobs(namespace, start=False)
+        if created.get("metadata", {}).get("name"):
+            # Seed the cache so status() sees the job before its watch event arrives
+            informer.observe(created)
+        return Job(manifest["metadata"]["name"], namespace, transport=self.transport,
+                   informer=informer)
+    
+    def submit_jobs(self, specs: List[Dict], max_concurrency: int = 16,
+                    retries: int = 2) -> List["SubmitResult"]:
+        """Submit many jobs concurrently (e.g. a parameter sweep)
         
-        job_name = f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-        
-        # Build job manifest
-        manifest = {
-            "apiVersion": "batch/v1",
-            "kind": "Job",
-            "metadata": {
-                "name": job_name,
-                "namespace": namespace,
-                "labels": {"app": name}
-            },
-            "spec": {
-                "ttlSecondsAfterFinished": ttl_seconds,
-                "backoffLimit": backoff_limit,
-                "template": {
-                    "spec": {
-                        "restartPolicy": "Never",
-                        "serviceAccountName": "job-runner",
-                        "containers": [{
-                            "name": "worker",
-                            "image": image,
-                            "env": [
-                                {"name": "RAY_ADDRESS", "value": "ray://ray-cluster-head-svc.ray-system.svc.cluster.local:10001"},
-                                {"name": "GCS_BUCKET", "value": f"gs://{self.project_id}-ml-artifacts"}
-                            ] + [{"name": k, "value": v} for k, v in (env or {}).items()],
-                            "resources": {
-                                "requests": {"cpu": cpu, "memory": memory},
-                                "limits": {"cpu": cpu_limit, "memory": memory_limit}
-                            }
-                        }]
-                    }
-                }
-            }
-        }
+        Args:
+            specs: One dict of submit_job keyword arguments per job
+            max_concurrency: Maximum number of in-flight API requests
+            retries: Retries per job on throttling (429) or transient 5xx errors
+            
+        Returns:
+            One SubmitResult per spec, in input order. Failures are recorded on
+            the result instead of raised, so one bad spec does not stop the sweep.
+        """
+        results = [SubmitResult(spec) for spec in specs]
         
-        if command:
-            manifest["spec"]["template"]["spec"]["containers"][0]["command"] = command
+        # Build every manifest up front so invalid specs fail before any API traffic
+        pending = []
+        for result in results:
+            try:
+                pending.append((result, self.build_manifest(**result.spec)))
+            except (TypeError, ValueError) as e:
+                result.error = f"Invalid job spec: {e}"
         
-        # Apply manifest (use JSON instead of YAML)
-        json_str = json.dumps(manifest)
-        result = subprocess.run(
-            ["kubectl", "apply", "-f", "-"],
-            input=json_str,
-            text=True,
-            capture_output=True
-        )
+        def submit(item):
+            result, manifest = item
+            try:
+                result.job = self.create_job(manifest, retries)
+            except (ApiError, OSError) as e:
+                result.error = str(e)
         
-        if result.returncode != 0:
-            raise RuntimeError(f"Failed to submit job: {result.stderr}")
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as pool:
+            list(pool.map(submit, pending))
+        return results
+
+    def enqueue_jobs(self, specs: List[Dict], team: Optional[str] = None, priority: int = 0,
+                     queue=None) -> List[int]:
+        """Queue jobs for fair-share admission instead of creating them now
+
+        A Dispatcher (`ml-platform queue run`) creates each Job once the cluster
+        has room for it and its team is within quota, see jobqueue.py.
+
+        Args:
+            specs: One dict of submit_job keyword arguments per job (k8s mode)
+            team: Team the jobs count against (default: ML_PLATFORM_TEAM, else the login name)
+            priority: Higher priorities are admitted first
+            queue: JobQueue to add to (default: the local queue file, see jobqueue.queue_path)
+
+        Returns:
+            Queue entry ids, in input order
+
+        Raises:
+            ManifestError: A spec is invalid (nothing is queued)
+        """
+        from .jobqueue import JobQueue, default_team, spec_requests
+        # Resolve every spec up front: validates it and gives the requests admission counts
+        requests = [spec_requests(self.manifests.resolve(JobSpec(**spec))) for spec in specs]
+        queue = queue or JobQueue()
+        return queue.enqueue(specs, team or default_team(), priority, requests)
+
+    def iter_jobs(
+        self,
+        namespace: str = "jobs",
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None,
+        completed: Optional[bool] = None,
+        metadata_only: bool = False,
+        page_size: int = 500
+    ) -> Iterator[Dict]:
+        """Stream jobs page by page (constant memory for large namespaces)
         
-        return Job(job_name, namespace)
+        Args:
+            namespace: Kubernetes namespace
+            label_selector: Server-side label filter, e.g. "app=stellar_optimization"
+            field_selector: Server-side field filter, e.g. "status.successful=1"
+            completed: True for succeeded jobs only, False for not-yet-succeeded ones
+            metadata_only: Fetch only object metadata (names, labels, timestamps)
+            page_size: Objects per request (limit/continue paging)
+        """
+        fields = [f for f in (field_selector, _completed_selector(completed)) if f]
+        params = {"labelSelector": label_selector, "fieldSelector": ",".join(fields) or None}
+        return paginate(self.transport, api_path("batch", "v1", "jobs", namespace), params,
+                        page_size, metadata_only)
     
-    def list_jobs(self, namespace: str = "jobs") -> List[Dict]:
-        """List all jobs"""
-        cmd = f"kubectl get jobs -n {namespace} -o json"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode == 0:
-            data = json.loads(result.stdout)
-            return data.get("items", [])
-        return []
+    @instrument("list")
+    def list_jobs(self, namespace: str = "jobs", **kwargs) -> List[Dict]:
+        """List all jobs (accepts the same filters as iter_jobs)"""
+        try:
+            return list(self.iter_jobs(namespace, **kwargs))
+        except ApiError:
+            return []
     
+    def stream_logs(
+        self,
+        jobs: Optional[List] = None,
+        label_selector: Optional[str] = None,
+        namespace: str = "jobs",
+        follow: bool = False,
+        since_seconds: Optional[int] = None,
+        tail_lines: Optional[int] = None,
+        buffer_lines: int = 10000
+    ) -> LogStream:
+        """Multiplexed logs for many jobs (Job objects or names) or a whole sweep label
+        
+        Iterate the result for LogLine records tagged with job, pod and container;
+        memory stays bounded by buffer_lines however chatty the jobs are.
+        """
+        names = [j.name if isinstance(j, Job) else j for j in (jobs or [])]
+        return LogStream(self.transport, namespace, jobs=names, label_selector=label_selector,
+                         follow=follow, since_seconds=since_seconds, tail_lines=tail_lines,
+                         buffer_lines=buffer_lines)
+    
+    @instrument("delete")
     def delete_job(self, name: str, namespace: str = "jobs") -> bool:
         """Delete a job by name"""
-        cmd = f"kubectl delete job {name} -n {namespace}"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"Failed to delete job: {result.stderr}")
+        # Background propagation matches kubectl: the job's pods are removed too
+        try:
+            self.transport.delete(api_path("batch", "v1", "jobs", namespace, name),
+                                  {"propagationPolicy": "Background"})
+        except ApiError as e:
+            raise RuntimeError(f"Failed to delete job: {e}") from e
         return True
     
+    @instrument("cleanup")
+    def cleanup_jobs(
+        self,
+        namespace: str = "jobs",
+        status: str = "finished",
+        older_than: Optional[float] = None,
+        label_selector: Optional[str] = None,
+        dry_run: bool = False,
+        max_concurrency: int = 16
+    ) -> CleanupReport:
+        """Delete finished jobs and their pods (see cleanup.cleanup_jobs)"""
+        return cleanup_jobs(self.transport, namespace, status, older_than, label_selector,
+                            dry_run, max_concurrency)
+    
     def cleanup_completed_jobs(self, namespace: str = "jobs") -> int:
         """Delete all completed jobs. Returns count of deleted jobs."""
-        jobs = self.list_jobs(namespace)
-        deleted = 0
-        for job in jobs:
-            status = job.get("status", {})
-            if status.get("succeeded", 0) > 0 or status.get("failed", 0) > 0:
-                name = job["metadata"]["name"]
-                try:
-                    self.delete_job(name, namespace)
-                    deleted += 1
-                except RuntimeError:
-                    pass
-        return deleted
-    
-    def scale_ray(self, replicas: int):
-        """Scale Ray workers"""
-        cmd = f"kubectl scale raycluster ray-cluster --replicas={replicas} -n ray-system"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        if result.returncode != 0:
-            raise RuntimeError(f"Failed to scale: {result.stderr}")
-        return True
+        return self.cleanup_jobs(namespace).deleted
+    
+    @property
+    def scaler(self):
+        """RayScaler for the platform's RayCluster (sees Ray demand through self.ray)"""
+        if self._scaler is None:
+            from .scaling import RayScaler
+            self._scaler = RayScaler(self.transport, ray=self.ray)
+        return self._scaler
+    
+    @instrument("scale")
+    def scale_ray(self, replicas: int, group: Optional[str] = None, wait: bool = False,
+                  timeout: float = 300.0):
+        """Scale a Ray worker group, clamped to its minReplicas/maxReplicas
+        
+        With wait=True, blocks until the pods are Ready and Ray reports their
+        CPUs (or timeout); the returned ScaleResult carries time-to-capacity.
+        """
+        return self.scaler.scale(replicas, group, wait, timeout)
     
+    @instrument("scale")
+    def autoscale_ray(self, group: Optional[str] = None, cpus_per_job: Optional[float] = None,
+                      wait: bool = False, timeout: float = 300.0):
+        """Scale a Ray worker group to the pending Job and Ray task demand"""
+        return self.scaler.autoscale(group, cpus_per_job, wait=wait, timeout=timeout)
+    
+    @instrument("status")
     def get_status(self) -> Dict:
-        """Get platform status"""
-        def run(cmd):
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            return result.stdout.strip()
+        """Get platform status
         
-        return {
-            "nodes": run("kubectl get nodes --no-headers | wc -l").strip(),
-            "ray_pods": run("kubectl get pods -n ray-system --no-headers | grep Running | wc -l").strip(),
-            "total_jobs": run("kubectl get jobs -n jobs --no-headers | wc -l").strip(),
-            "running_jobs": run("kubectl get pods -n jobs --field-selector=status.phase=Running --no-headers | wc -l").strip(),
-        }
+        Lists nodes, Ray pods, job pods and jobs concurrently (one request each)
+        and counts them in Python. Counts are None when a list is not permitted
+        or fails.
+        """
+        return collect_status(self.transport)
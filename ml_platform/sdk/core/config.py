@@ -0,0 +1,195 @@
+"""Config resolution - kubeconfig contexts and gcloud properties without subprocesses
+
+Every CLI command needs the kubeconfig context names and most need the
+gcloud project and region. Asking kubectl/gcloud for them costs a process
+start each (about a second for gcloud), so they are read straight from the
+files instead and the results are cached on disk, keyed by the files' mtimes.
+A repeated invocation with unchanged config is a stat() per file and one
+small JSON read.
+"""
+
+import configparser
+import json
+import os
+import subprocess
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional
+
+from .kubeconfig import KubeConfigError, kubeconfig_paths, load_raw_config
+
+# Region used when gcloud has no compute/region configured
+DEFAULT_REGION = "europe-west3"
+
+# Bump when the shape of cached values changes
+CACHE_VERSION = 1
+
+
+def cache_path() -> str:
+    """Location of the on-disk config cache"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ml-platform", "config.json")
+
+
+def gcloud_config_dir() -> str:
+    return os.environ.get("CLOUDSDK_CONFIG") or os.path.expanduser("~/.config/gcloud")
+
+
+def _stamp(path: str) -> Optional[List[int]]:
+    """Change stamp of a file (mtime, size), or None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class ConfigResolver:
+    """Resolve kubeconfig contexts and gcloud properties, cached across processes
+
+    Args:
+        path: Cache file (default ~/.cache/ml-platform/config.json, None to disable)
+    """
+
+    def __init__(self, path: Optional[str] = ""):
+        self.path = cache_path() if path == "" else path
+        self._lock = threading.Lock()
+        self._entries = None
+        self._dirty = False
+
+    # --- cache plumbing ---
+
+    def _load(self) -> Dict:
+        if self._entries is None:
+            self._entries = {}
+            if self.path:
+                try:
+                    with open(self.path) as f:
+                        doc = json.load(f)
+                    if doc.get("version") == CACHE_VERSION:
+                        self._entries = doc.get("entries", {})
+                except (OSError, ValueError, AttributeError):
+                    pass
+        return self._entries
+
+    def _save(self):
+        if not self.path or not self._dirty:
+            return
+        # Write-then-rename so concurrent CLI invocations never read a partial file
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.path), prefix=".config-")
+            with os.fdopen(fd, "w") as f:
+                json.dump({"version": CACHE_VERSION, "entries": self._entries}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def _cached(self, key: str, sources: List[str], compute: Callable):
+        """Return the cached value for key while none of its source files changed"""
+        stamps = {p: _stamp(p) for p in sources}
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is not None and entry.get("sources") == stamps:
+                return entry["value"]
+        value = compute()
+        with self._lock:
+            self._entries[key] = {"sources": stamps, "value": value}
+            self._dirty = True
+            self._save()
+        return value
+
+    def invalidate(self):
+        """Drop every cached value (in memory and on disk)"""
+        with self._lock:
+            self._entries = {}
+            self._dirty = True
+            self._save()
+
+    # --- kubeconfig ---
+
+    def _kubeconfig(self) -> Dict:
+        paths = kubeconfig_paths()
+
+        def compute():
+            try:
+                raw = load_raw_config(paths)
+            except (KubeConfigError, OSError, ValueError):
+                return {"contexts": [], "current": None}
+            # Only names are cached; credentials never touch the cache file
+            return {"contexts": [c.get("name") for c in raw.get("contexts") or []],
+                    "current": raw.get("current-context")}
+
+        return self._cached("kubeconfig:" + os.pathsep.join(paths), paths, compute)
+
+    def contexts(self) -> List[str]:
+        """Names of all kubeconfig contexts"""
+        return list(self._kubeconfig()["contexts"])
+
+    def current_context(self) -> Optional[str]:
+        return self._kubeconfig()["current"]
+
+    def context(self, name: str) -> Optional[str]:
+        """name if the kubeconfig has such a context, else None (use the current one)"""
+        return name if name in self._kubeconfig()["contexts"] else None
+
+    # --- gcloud ---
+
+    def _gcloud_sources(self) -> List[str]:
+        base = gcloud_config_dir()
+        active = os.environ.get("CLOUDSDK_ACTIVE_CONFIG_NAME")
+        if not active:
+            try:
+                with open(os.path.join(base, "active_config")) as f:
+                    active = f.read().strip()
+            except OSError:
+                pass
+        return [os.path.join(base, "active_config"),
+                os.path.join(base, "configurations", f"config_{active or 'default'}")]
+
+    def gcloud_property(self, section: str, name: str) -> Optional[str]:
+        """A gcloud property such as core/project, as `gcloud config get-value` reports it"""
+        env = os.environ.get(f"CLOUDSDK_{section.upper()}_{name.upper()}")
+        if env:
+            return env
+        sources = self._gcloud_sources()
+
+        def compute():
+            parser = configparser.ConfigParser(interpolation=None)
+            try:
+                parser.read(sources[1])
+            except configparser.Error:
+                parser = None
+            if parser is not None and parser.has_option(section, name):
+                return parser.get(section, name).strip() or None
+            if _stamp(sources[1]) is not None:
+                return None
+            # No properties file where we expect one (unusual install): ask gcloud once
+            try:
+                result = subprocess.run(["gcloud", "config", "get-value", f"{section}/{name}"],
+                                        capture_output=True, text=True)
+            except FileNotFoundError:
+                return None
+            return result.stdout.strip() or None
+
+        return self._cached(f"gcloud:{sources[1]}:{section}/{name}", sources, compute)
+
+    def project(self) -> Optional[str]:
+        return self.gcloud_property("core", "project")
+
+    def region(self, default: str = DEFAULT_REGION) -> str:
+        return self.gcloud_property("compute", "region") or default
+
+
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def default_resolver() -> ConfigResolver:
+    """Process-wide resolver backed by the shared on-disk cache"""
+    global _resolver
+    with _resolver_lock:
+        if _resolver is None:
+            _resolver = ConfigResolver()
+        return _resolver
@@ -0,0 +1,133 @@
+"""Indexed Jobs - one Job whose pods each run one shard of a sweep
+
+A Job submitted with completions=N runs in Indexed completion mode: Kubernetes
+starts N pods (parallelism at a time) and gives each its index in
+JOB_COMPLETION_INDEX. The platform adds JOB_COMPLETIONS (N) and, when the
+spec has index_env, INDEX_ENV: a JSON list with one env dict per index, which
+the worker applies with apply_index_env. A sweep is then one API object and
+one cleanup instead of N Jobs.
+
+Worker side (inside the pod):
+
+    index = apply_index_env()
+    for config_id, config in shard(configs):
+        ...
+
+Client side:
+
+    job = client.submit_job("sweep", image, index_env=[{"LR": "0.1"}, {"LR": "0.01"}])
+    results = gather_index_results(job, lambda i: load_from_bucket(f"{job.name}/index-{i}"))
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Set by Kubernetes in every pod of an Indexed Job
+INDEX_VAR = "JOB_COMPLETION_INDEX"
+
+# Set by the platform: number of indexes, and per-index env as JSON
+COMPLETIONS_VAR = "JOB_COMPLETIONS"
+INDEX_ENV_VAR = "INDEX_ENV"
+
+# Linux caps one "NAME=value" environment string at 128 KiB (MAX_ARG_STRLEN);
+# a longer INDEX_ENV would stop every pod from starting
+MAX_INDEX_ENV_BYTES = 128 * 1024 - len(INDEX_ENV_VAR) - 2
+
+# Per-index states reported by Job.indexes
+SUCCEEDED, FAILED, PENDING = "Succeeded", "Failed", "Pending"
+
+
+def parse_indexes(value: Optional[str]) -> List[int]:
+    """Indexes from a Job status interval list ("0,2-4" -> [0, 2, 3, 4])"""
+    indexes = []
+    for part in (value or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        first, _, last = part.partition("-")
+        indexes.extend(range(int(first), int(last or first) + 1))
+    return indexes
+
+
+def index_states(job: Dict) -> Dict[int, str]:
+    """State of every index of an Indexed Job object, by index ({} if not indexed)"""
+    spec = job.get("spec", {})
+    if spec.get("completionMode") != "Indexed":
+        return {}
+    completions = spec.get("completions") or 0
+    status = job.get("status", {})
+    states = dict.fromkeys(range(completions), PENDING)
+    states.update(dict.fromkeys(parse_indexes(status.get("failedIndexes")), FAILED))
+    states.update(dict.fromkeys(parse_indexes(status.get("completedIndexes")), SUCCEEDED))
+    return states
+
+
+def pack_specs(specs: List[Dict]) -> Dict:
+    """Fold submit_job specs that differ only in env into one Indexed Job spec
+
+    Env shared by every spec stays in the pod template; the rest goes to
+    index_env. Raises ValueError when specs differ in anything but env.
+    """
+    if not specs:
+        raise ValueError("No specs to pack")
+    base = {k: v for k, v in specs[0].items() if k != "env"}
+    for spec in specs[1:]:
+        other = {k: v for k, v in spec.items() if k != "env"}
+        if other != base:
+            keys = sorted(k for k in set(base) | set(other) if base.get(k) != other.get(k))
+            raise ValueError(f"Indexed sweeps can only vary env; variants differ in: "
+                             f"{', '.join(keys)}")
+    envs = [{k: str(v) for k, v in (spec.get("env") or {}).items()} for spec in specs]
+    shared = {k: v for k, v in envs[0].items() if all(e.get(k) == v for e in envs[1:])}
+    packed = dict(base, env=shared)
+    packed["index_env"] = [{k: v for k, v in e.items() if k not in shared} for e in envs]
+    return packed
+
+
+# --- worker side ---
+
+def current_index(environ=None) -> Optional[int]:
+    """This pod's index, or None outside an Indexed Job"""
+    value = (os.environ if environ is None else environ).get(INDEX_VAR)
+    return int(value) if value not in (None, "") else None
+
+
+def apply_index_env(environ=None) -> Optional[int]:
+    """Set this index's entry of INDEX_ENV in the environment; returns the index"""
+    environ = os.environ if environ is None else environ
+    index = current_index(environ)
+    raw = environ.get(INDEX_ENV_VAR)
+    if index is not None and raw:
+        entries = json.loads(raw)
+        if index < len(entries):
+            environ.update({k: str(v) for k, v in entries[index].items()})
+    return index
+
+
+def shard(items: Iterable, environ=None) -> List[Tuple[int, Any]]:
+    """(position, item) pairs this index should process (every one outside an Indexed Job)
+
+    Items are dealt round-robin, so shards differ in size by at most one and
+    positions stay global (usable as config ids across indexes).
+    """
+    environ = os.environ if environ is None else environ
+    index = current_index(environ)
+    count = int(environ.get(COMPLETIONS_VAR) or 1)
+    if index is None:
+        return list(enumerate(items))
+    return [(i, item) for i, item in enumerate(items) if i % count == index]
+
+
+# --- client side ---
+
+def gather_index_results(job, load: Callable[[int], Any],
+                         timeout: Optional[float] = 3600) -> Dict[int, Any]:
+    """Wait for an Indexed Job, then load(index) for every index that succeeded
+
+    Returns {index: result}; failed or unfinished indexes are left out (see
+    Job.indexes for their states).
+    """
+    job.wait(timeout)
+    states = job.indexes()
+    return {i: load(i) for i, state in sorted(states.items()) if state == SUCCEEDED}
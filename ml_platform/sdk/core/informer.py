@@ -0,0 +1,247 @@
+"""Informers - shared list+watch caches of cluster objects
+
+An Informer lists a collection once, then follows a single watch stream and
+keeps an in-memory copy of every object. Reads hit the cache with no I/O.
+When the stream drops it resumes from the last resourceVersion; if that
+version has expired (410 Gone) it relists.
+
+JobInformer adds completion tracking on top, so any number of callers can
+wait on any number of Jobs off one watch connection.
+"""
+
+import json
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from .job import TERMINAL_STATES, job_condition
+from .transport import ApiError, Transport, api_path
+
+
+class Informer:
+    """List+watch cache of one resource collection"""
+
+    def __init__(
+        self,
+        transport: Transport,
+        path: str,
+        label_selector: Optional[str] = None,
+        field_selector: Optional[str] = None,
+        watch_timeout: int = 300
+    ):
+        self.transport = transport
+        self.path = path
+        self.label_selector = label_selector
+        self.field_selector = field_selector
+        self.watch_timeout = watch_timeout
+        self.resource_version = None
+        self.relists = 0
+        self._cache = {}
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._synced = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    # --- cache access (no I/O) ---
+
+    def get(self, name: str) -> Optional[Dict]:
+        with self._lock:
+            return self._cache.get(name)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return list(self._cache.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._cache)
+
+    @property
+    def synced(self) -> bool:
+        return self._synced.is_set()
+
+    def add_listener(self, fn: Callable[[str, Dict], None]):
+        """Call fn(event_type, obj) for every ADDED/MODIFIED/DELETED change"""
+        self._listeners.append(fn)
+
+    # --- lifecycle ---
+
+    def start(self, wait: bool = True, timeout: float = 30.0) -> "Informer":
+        """Start the background watch (idempotent), optionally waiting for the first list"""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"informer{self.path}",
+                                                daemon=True)
+                self._thread.start()
+        if wait and not self._synced.wait(timeout):
+            raise TimeoutError(f"Informer for {self.path} did not sync within {timeout}s")
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+    def observe(self, obj: Dict):
+        """Feed an object we already have (e.g. a create response) into the cache"""
+        self._apply("ADDED", obj)
+
+    def _params(self, **extra) -> Dict:
+        params = {"labelSelector": self.label_selector, "fieldSelector": self.field_selector}
+        params.update(extra)
+        return params
+
+    def _relist(self):
+        listing = self.transport.get(self.path, self._params())
+        items = {i["metadata"]["name"]: i for i in listing.get("items", [])}
+        with self._lock:
+            removed = [o for n, o in self._cache.items() if n not in items]
+            self._cache = items
+            self.resource_version = listing.get("metadata", {}).get("resourceVersion")
+        for obj in removed:
+            self._notify("DELETED", obj)
+        for obj in items.values():
+            self._notify("ADDED", obj)
+        self._synced.set()
+
+    def _run(self):
+        backoff = 0.5
+        need_list, just_listed = True, False
+        while not self._stopped.is_set():
+            try:
+                if need_list:
+                    self._relist()
+                    need_list, just_listed = False, True
+                self._watch()
+                just_listed = False
+                backoff = 0.5
+            except ApiError as e:
+                if e.status != 410:
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 30)
+                    continue
+                # Our resourceVersion was compacted away; start over from a fresh list
+                self.relists += 1
+                need_list = True
+                if just_listed:
+                    # Expired again straight after a relist: don't spin
+                    time.sleep(backoff)
+                    backoff = min(backoff * 2, 30)
+            except (OSError, ValueError):
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+
+    def _watch(self):
+        params = self._params(watch=True, allowWatchBookmarks=True,
+                              resourceVersion=self.resource_version,
+                              timeoutSeconds=self.watch_timeout)
+        for line in self.transport.stream(self.path, params):
+            if self._stopped.is_set():
+                return
+            if not line:
+                continue
+            event = json.loads(line)
+            kind, obj = event.get("type"), event.get("object") or {}
+            if kind == "ERROR":
+                raise ApiError(obj.get("code", 500), obj.get("message", ""), obj.get("reason", ""))
+            version = obj.get("metadata", {}).get("resourceVersion")
+            if kind != "BOOKMARK":
+                self._apply(kind, obj)
+            if version:
+                self.resource_version = version
+
+    def _apply(self, kind: str, obj: Dict):
+        name = obj.get("metadata", {}).get("name")
+        if not name:
+            return
+        with self._lock:
+            if kind == "DELETED":
+                self._cache.pop(name, None)
+            else:
+                current = self._cache.get(name)
+                if current is not None and _newer(current, obj):
+                    return
+                self._cache[name] = obj
+        self._notify(kind, obj)
+
+    def _notify(self, kind: str, obj: Dict):
+        for fn in list(self._listeners):
+            fn(kind, obj)
+
+
+def _newer(current: Dict, incoming: Dict) -> bool:
+    """True when the cached object is newer than the incoming one"""
+    try:
+        return int(current["metadata"]["resourceVersion"]) > int(incoming["metadata"]["resourceVersion"])
+    except (KeyError, ValueError):
+        return False
+
+
+class JobInformer(Informer):
+    """Informer over the Jobs of one namespace with completion futures"""
+
+    def __init__(self, transport: Transport, namespace: str = "jobs", **kwargs):
+        super().__init__(transport, api_path("batch", "v1", "jobs", namespace), **kwargs)
+        self.namespace = namespace
+        self._futures = {}
+        self.add_listener(self._on_event)
+
+    def state(self, name: str) -> str:
+        """Cached job status (same values as Job.status), no I/O"""
+        obj = self.get(name)
+        return job_condition(obj) if obj is not None else "Unknown"
+
+    def future(self, name: str) -> Future:
+        """Future resolved with the terminal status (Complete/Failed) of a job
+
+        Resolves with "Deleted" if the job disappears before finishing, or
+        is not in the namespace at all. A job missing from the synced cache
+        may just be newer than the last event seen (created by another
+        process), so its absence is confirmed with a GET first.
+        """
+        future = Future()
+        with self._lock:
+            obj = self.get(name)
+            state = job_condition(obj) if obj is not None else None
+            if state in TERMINAL_STATES:
+                future.set_result(state)
+                return future
+            # Registered before the GET so a DELETED event in between still reaches it
+            self._futures.setdefault(name, []).append(future)
+            confirm = obj is None and self.synced
+        if confirm:
+            self._confirm_missing(name)
+        return future
+
+    def _confirm_missing(self, name: str):
+        """Resolve name's waiters if a GET shows the job gone or finished"""
+        try:
+            state = job_condition(self.transport.get(f"{self.path}/{name}"))
+        except ApiError as e:
+            if not e.not_found:
+                return  # can't tell: keep waiting for the watch
+            state = "Deleted"
+        if state in TERMINAL_STATES or state == "Deleted":
+            self._resolve(name, state)
+
+    def _relist(self):
+        super()._relist()
+        # Waiters registered before the first list (or across a 410 relist) on
+        # jobs the listing doesn't have would otherwise never hear about them
+        with self._lock:
+            missing = [name for name in self._futures if name not in self._cache]
+        for name in missing:
+            self._confirm_missing(name)
+
+    def _on_event(self, kind: str, obj: Dict):
+        name = obj["metadata"]["name"]
+        state = "Deleted" if kind == "DELETED" else job_condition(obj)
+        if state in TERMINAL_STATES or state == "Deleted":
+            self._resolve(name, state)
+
+    def _resolve(self, name: str, state: str):
+        with self._lock:
+            waiters = self._futures.pop(name, [])
+        for future in waiters:
+            if not future.done():
+                future.set_result(state)
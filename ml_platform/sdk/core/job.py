@@ -1,34 +1,180 @@
 """Job class - represents a training job"""
 
-import subprocess
+import json
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, Iterator, Optional
+
+from .metrics import instrument
+from .transport import ApiError, Transport, api_path, default_transport
+
+# Job conditions after which a job will not run again
+TERMINAL_STATES = ("Complete", "Failed")
+
+
+def job_condition(job: Dict) -> str:
+    """Status of a Job object: its terminal condition if any, else the first condition type"""
+    conditions = job.get("status", {}).get("conditions") or []
+    for condition in conditions:
+        if condition.get("type") in TERMINAL_STATES and condition.get("status", "True") == "True":
+            return condition["type"]
+    return conditions[0].get("type", "Unknown") if conditions else "Unknown"
 
 
 class Job:
     """Represents a submitted training job"""
-    
-    def __init__(self, name: str, namespace: str = "jobs"):
+
+    def __init__(
+        self,
+        name: str,
+        namespace: str = "jobs",
+        transport: Optional[Transport] = None,
+        informer=None
+    ):
         self.name = name
         self.namespace = namespace
-    
+        self.transport = transport or default_transport()
+        # Shared JobInformer (set for jobs created through PlatformClient); when
+        # present, status and wait are served from its watch cache
+        self.informer = informer
+
+    @property
+    def path(self) -> str:
+        return api_path("batch", "v1", "jobs", self.namespace, self.name)
+
+    @instrument("status")
     def status(self) -> str:
         """Get job status"""
-        cmd = f"kubectl get job {self.name} -n {self.namespace} -o jsonpath='{{.status.conditions[0].type}}'"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        return result.stdout.strip() or "Unknown"
-    
+        if self.informer is not None:
+            try:
+                return self.informer.start().state(self.name)
+            except TimeoutError:
+                pass  # watch not synced (API slow or unreachable): ask directly
+        try:
+            return job_condition(self.transport.get(self.path))
+        except ApiError:
+            return "Unknown"
+
+    def indexes(self) -> Dict[int, str]:
+        """Per-index state of an Indexed Job ({} for a regular Job)"""
+        from .indexed import index_states
+        obj = self.informer.start().get(self.name) if self.informer is not None else None
+        if obj is None:
+            try:
+                obj = self.transport.get(self.path)
+            except ApiError:
+                return {}
+        return index_states(obj)
+
+    def timeline(self, logs: bool = True):
+        """Phase breakdown (queue, schedule, image pull, container start, Ray connect, run)
+
+        With logs=False the driver log isn't read and ray_connect stays empty.
+        """
+        from .timeline import fetch_timelines
+        return fetch_timelines(self.transport, self.namespace, names=[self.name], logs=logs)[0]
+
+    def _latest_pod(self) -> Optional[str]:
+        pods = self.transport.get(api_path("", "v1", "pods", self.namespace),
+                                  {"labelSelector": f"job-name={self.name}"}).get("items", [])
+        if not pods:
+            return None
+        pods.sort(key=lambda p: p["metadata"].get("creationTimestamp", ""))
+        return pods[-1]["metadata"]["name"]
+
+    def stream_logs(
+        self,
+        follow: bool = False,
+        since_seconds: Optional[int] = None,
+        tail_lines: Optional[int] = None
+    ) -> Iterator:
+        """Stream log lines from every pod and container of this job as they arrive"""
+        from .logs import LogStream
+        return iter(LogStream(self.transport, self.namespace, jobs=[self.name], follow=follow,
+                              since_seconds=since_seconds, tail_lines=tail_lines))
+
+    @instrument("logs")
     def logs(self, follow: bool = False) -> str:
-        """Get job logs"""
-        follow_flag = "-f" if follow else ""
-        cmd = f"kubectl logs -n {self.namespace} job/{self.name} {follow_flag}"
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-        return result.stdout
-    
-    def wait(self, timeout: int = 3600):
-        """Wait for job to complete"""
-        cmd = f"kubectl wait --for=condition=complete --timeout={timeout}s job/{self.name} -n {self.namespace}"
-        subprocess.run(cmd, shell=True)
-    
+        """Get job logs (latest pod). With follow=True, returns once the pod exits;
+        use stream_logs to consume lines as they arrive."""
+        try:
+            pod = self._latest_pod()
+            if not pod:
+                return ""
+            path = api_path("", "v1", "pods", self.namespace, pod, "log")
+            if follow:
+                return "\n".join(self.transport.stream(path, {"follow": True}))
+            return self.transport.request_raw("GET", path)
+        except ApiError:
+            return ""
+
+    def future(self) -> Future:
+        """Future resolved with the final status once the job completes or fails"""
+        if self.informer is not None:
+            try:
+                return self.informer.start().future(self.name)
+            except TimeoutError:
+                pass  # watch not synced (API slow or unreachable): follow this job alone
+        future = Future()
+        threading.Thread(target=lambda: future.set_result(self._watch_until_done(None)),
+                         daemon=True).start()
+        return future
+
+    async def wait_async(self, timeout: Optional[float] = None) -> str:
+        """Async variant of wait"""
+        import asyncio  # deferred: costs ~50ms at import and only async callers need it
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.future()), timeout)
+        except asyncio.TimeoutError:
+            return self.status()
+
+    def wait(self, timeout: int = 3600) -> str:
+        """Wait for job to complete (or fail). Returns the final status."""
+        if self.informer is not None:
+            try:
+                return self.future().result(timeout)
+            except FutureTimeout:
+                return self.status()
+        return self._watch_until_done(timeout)
+
+    def _watch_until_done(self, timeout: Optional[float]) -> str:
+        """Standalone wait: list+watch this one job until it finishes"""
+        deadline = time.monotonic() + (timeout if timeout is not None else float("inf"))
+        params = {"fieldSelector": f"metadata.name={self.name}"}
+        while True:
+            listing = self.transport.get(api_path("batch", "v1", "jobs", self.namespace), params)
+            for item in listing.get("items", []):
+                if job_condition(item) in TERMINAL_STATES:
+                    return job_condition(item)
+            # Watches are capped server-side anyway; re-arm hourly when waiting forever
+            remaining = int(min(deadline - time.monotonic(), 3600))
+            if remaining <= 0:
+                return self.status()
+            watch = dict(params, watch=True, timeoutSeconds=remaining,
+                         resourceVersion=listing.get("metadata", {}).get("resourceVersion"))
+            try:
+                for line in self.transport.stream(api_path("batch", "v1", "jobs", self.namespace), watch):
+                    if not line:
+                        continue
+                    event = json.loads(line)
+                    state = job_condition(event.get("object", {}))
+                    if state in TERMINAL_STATES:
+                        return state
+            except (ApiError, OSError):
+                # Watch dropped or expired; relist and continue until the deadline
+                pass
+            if time.monotonic() >= deadline:
+                return self.status()
+
+    @instrument("delete")
     def delete(self):
         """Delete the job"""
-        cmd = f"kubectl delete job {self.name} -n {self.namespace}"
-        subprocess.run(cmd, shell=True)
+        try:
+            self.transport.delete(self.path, {"propagationPolicy": "Background"})
+        except ApiError:
+            pass
+
+    def __repr__(self) -> str:
+        return f"Job(name={self.name!r}, namespace={self.namespace!r})"
@@ -0,0 +1,571 @@
+"""Job queue - fair-share admission of JobSpecs ahead of the cluster
+
+submit_job creates a Job at once, so a 500-job sweep lands in the cluster's
+pending queue ahead of everyone else's work and the scheduler, which knows
+nothing of teams, runs it first come first served. Queued submissions wait
+here instead, in a SQLite file shared by every process on the machine (or
+a volume shared with a sidecar), and a Dispatcher creates their Jobs only
+when the cluster has room for them:
+
+    queue = JobQueue()
+    queue.set_quota("fusion", cpu=64, memory=256 * 2**30)
+    queue.enqueue([{"name": "stellar_optimization", "image": image}], team="fusion")
+    Dispatcher(client, queue).run()        # or `ml-platform queue run`
+
+Admission order:
+
+1. Higher priority first.
+2. Within a priority, the team with the smallest dominant share goes next:
+   its admitted CPU or memory requests (whichever is larger) as a
+   fraction of its quota, or of the cluster when it has none. A team with
+   nothing running always comes ahead of one running a large sweep.
+3. Within a team, queue position (enqueue order unless reordered). An entry
+   that doesn't fit the free capacity or its team's quota is passed over for
+   a later one that does, so small jobs backfill the gaps.
+4. Backfill is bounded: once an entry that is within its quota but too big
+   for the free capacity has waited BACKFILL_WAIT seconds, nothing after it
+   in this order is admitted, so capacity frees up for it instead of going
+   to smaller or lower-priority entries forever.
+
+Capacity comes from watches: allocatable CPU/memory of Ready nodes, minus
+the requests of every pod not yet finished, minus what admitted Jobs will
+request once their pods exist. Node, pod and Job events wake the
+dispatcher, so a finished Job's resources are handed on immediately. The
+queue file is polled as well, to pick up entries other processes add.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .informer import Informer
+from .job import TERMINAL_STATES, job_condition
+from .manifest import PLATFORM_DEFAULTS, JobSpec, deep_merge, parse_quantity
+from .transport import ApiError, api_path
+
+# Labels a dispatched Job carries
+QUEUE_LABEL = "ml-platform.io/queue-entry"
+TEAM_LABEL = "ml-platform.io/team"
+
+# Entry states: waiting, Job created, Job finished (or deleted), removed by a user,
+# Job could not be created
+STATES = ("queued", "admitted", "done", "cancelled", "failed")
+ACTIVE_STATES = ("queued", "admitted")
+
+# Seconds between dispatch passes when no watch event arrives
+POLL_INTERVAL = 5.0
+
+# Seconds an entry can be passed over by backfill before capacity is held for it
+BACKFILL_WAIT = 1800.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    team TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    position REAL NOT NULL,
+    spec TEXT NOT NULL,
+    cpu REAL NOT NULL,
+    memory REAL NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    job TEXT,
+    namespace TEXT,
+    enqueued_at REAL NOT NULL,
+    admitted_at REAL,
+    finished_at REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS entries_state ON entries (state, priority, position);
+CREATE TABLE IF NOT EXISTS quotas (
+    team TEXT PRIMARY KEY,
+    cpu REAL,
+    memory REAL
+);
+"""
+
+
+def queue_path() -> str:
+    """Queue database: ML_PLATFORM_QUEUE, else ~/.cache/ml-platform/queue.db"""
+    if os.environ.get("ML_PLATFORM_QUEUE"):
+        return os.environ["ML_PLATFORM_QUEUE"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ml-platform", "queue.db")
+
+
+def default_team() -> str:
+    """ML_PLATFORM_TEAM, else the login name"""
+    return (os.environ.get("ML_PLATFORM_TEAM") or os.environ.get("USER")
+            or os.environ.get("LOGNAME") or "default")
+
+
+class QueueEntry(NamedTuple):
+    """One queued submission: the submit_job arguments and what they request"""
+    id: int
+    team: str
+    priority: int
+    position: float
+    spec: Dict
+    cpu: float                      # requested by the whole Job (all parallel pods)
+    memory: float                   # bytes
+    state: str
+    job: Optional[str]
+    namespace: Optional[str]
+    enqueued_at: float
+    admitted_at: Optional[float]
+    finished_at: Optional[float]
+    error: Optional[str]
+
+    @property
+    def wait_seconds(self) -> float:
+        """Time queued so far, or until admission"""
+        return (self.admitted_at or time.time()) - self.enqueued_at
+
+    def to_dict(self) -> Dict:
+        return dict(self._asdict(), wait_seconds=self.wait_seconds)
+
+
+def spec_requests(values: Dict) -> Tuple[float, float]:
+    """(CPU, memory bytes) a Job with these resolved spec values requests at once"""
+    pods = (values.get("parallelism") or values.get("completions")
+            or len(values.get("index_env") or ()) or 1)
+    return parse_quantity(values["cpu"]) * pods, parse_quantity(values["memory"]) * pods
+
+
+def pod_requests(pod: Dict) -> Tuple[float, float]:
+    """(CPU, memory bytes) requested by a pod's containers"""
+    cpu = memory = 0.0
+    for container in pod.get("spec", {}).get("containers") or []:
+        requests = (container.get("resources") or {}).get("requests") or {}
+        cpu += parse_quantity(requests.get("cpu", 0))
+        memory += parse_quantity(requests.get("memory", 0))
+    return cpu, memory
+
+
+def node_allocatable(node: Dict) -> Tuple[float, float]:
+    """(CPU, memory bytes) a schedulable, Ready node offers; (0, 0) otherwise"""
+    if node.get("spec", {}).get("unschedulable"):
+        return 0.0, 0.0
+    conditions = node.get("status", {}).get("conditions") or []
+    if not any(c.get("type") == "Ready" and c.get("status") == "True" for c in conditions):
+        return 0.0, 0.0
+    allocatable = node.get("status", {}).get("allocatable") or {}
+    return parse_quantity(allocatable.get("cpu", 0)), parse_quantity(allocatable.get("memory", 0))
+
+
+def dominant_share(usage: Tuple[float, float], quota: Tuple[Optional[float], Optional[float]],
+                   capacity: Tuple[float, float]) -> float:
+    """Largest fraction of its quota (or of the cluster, where it has none) a team uses"""
+    share = 0.0
+    for used, limit, total in zip(usage, quota, capacity):
+        denominator = limit if limit else total
+        if denominator:
+            share = max(share, used / denominator)
+    return share
+
+
+def plan_admissions(queued: Iterable[QueueEntry], usage: Dict[str, List[float]],
+                    quotas: Dict[str, Tuple[Optional[float], Optional[float]]],
+                    free: Tuple[float, float], capacity: Tuple[float, float],
+                    now: Optional[float] = None,
+                    backfill_wait: float = BACKFILL_WAIT) -> List[QueueEntry]:
+    """Entries to admit now, in admission order (see the module docstring)
+
+    Args:
+        queued: Waiting entries
+        usage: team -> [CPU, memory] requested by its admitted entries (updated in place)
+        quotas: team -> (CPU, memory) limits; None or a missing team is unlimited
+        free: CPU and memory free in the cluster
+        capacity: CPU and memory of the whole cluster
+        now: Current time (epoch seconds), for how long entries have waited
+        backfill_wait: Seconds after which an entry too big for the free capacity
+            stops everything behind it from being admitted
+    """
+    now = time.time() if now is None else now
+    levels = {}
+    for entry in queued:
+        levels.setdefault(entry.priority, {}).setdefault(entry.team, []).append(entry)
+    free_cpu, free_memory = free
+    admitted = []
+    for priority in sorted(levels, reverse=True):
+        teams = {team: sorted(entries, key=lambda e: e.position)
+                 for team, entries in levels[priority].items()}
+        while teams:
+            # Lowest dominant share first; ties go to the team whose head waited longest
+            team = min(teams, key=lambda t: (
+                dominant_share(usage.get(t, (0.0, 0.0)), quotas.get(t, (None, None)), capacity),
+                teams[t][0].position))
+            used = usage.setdefault(team, [0.0, 0.0])
+            quota_cpu, quota_memory = quotas.get(team, (None, None))
+            chosen = None
+            for entry in teams[team]:
+                if quota_cpu is not None and used[0] + entry.cpu > quota_cpu:
+                    continue
+                if quota_memory is not None and used[1] + entry.memory > quota_memory:
+                    continue
+                if entry.cpu > free_cpu or entry.memory > free_memory:
+                    if (now - entry.enqueued_at >= backfill_wait
+                            and entry.cpu <= capacity[0] and entry.memory <= capacity[1]):
+                        # Starved by backfill: hold what is free (and frees up) for it
+                        return admitted
+                    continue
+                chosen = entry
+                break
+            if chosen is None:
+                del teams[team]
+                continue
+            teams[team].remove(chosen)
+            if not teams[team]:
+                del teams[team]
+            used[0] += chosen.cpu
+            used[1] += chosen.memory
+            free_cpu -= chosen.cpu
+            free_memory -= chosen.memory
+            admitted.append(chosen)
+    return admitted
+
+
+class JobQueue:
+    """Persistent queue of submit_job specs with priorities and per-team quotas
+
+    Args:
+        path: SQLite database (default: queue_path()); created on first use
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or queue_path()
+        self._local = threading.local()
+
+    @property
+    def db(self):
+        # One connection per thread; sqlite3 costs ~20ms to import, so only queue users pay it
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            import sqlite3
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _entries(self, where: str, params=()) -> List[QueueEntry]:
+        rows = self.db.execute(f"SELECT * FROM entries WHERE {where} "
+                               "ORDER BY priority DESC, position, id", params).fetchall()
+        return [QueueEntry(**dict(row, spec=json.loads(row["spec"]))) for row in rows]
+
+    # --- submissions ---
+
+    def enqueue(self, specs: List[Dict], team: str, priority: int = 0,
+                requests: Optional[List[Tuple[float, float]]] = None) -> List[int]:
+        """Queue submit_job specs for a team; returns their entry ids
+
+        requests gives each spec's (CPU, memory bytes), default: from the spec and
+        the platform defaults. PlatformClient.enqueue_jobs resolves (and validates)
+        them with the workload's defaults as well.
+        """
+        if requests is None:
+            requests = [spec_requests(dict(PLATFORM_DEFAULTS, **{
+                k: v for k, v in spec.items() if v is not None})) for spec in specs]
+        now = time.time()
+        ids = []
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            position = db.execute("SELECT COALESCE(MAX(position), 0) FROM entries").fetchone()[0]
+            for spec, (cpu, memory) in zip(specs, requests):
+                position += 1
+                cursor = db.execute(
+                    "INSERT INTO entries (team, priority, position, spec, cpu, memory, enqueued_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (team, priority, position, json.dumps(spec), cpu, memory, now))
+                ids.append(cursor.lastrowid)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return ids
+
+    def get(self, entry_id: int) -> Optional[QueueEntry]:
+        entries = self._entries("id = ?", (entry_id,))
+        return entries[0] if entries else None
+
+    def entries(self, states: Iterable[str] = ACTIVE_STATES,
+                team: Optional[str] = None) -> List[QueueEntry]:
+        """Entries in the given states, in admission order within each priority"""
+        states = list(states)
+        where = f"state IN ({','.join('?' * len(states))})"
+        params = states
+        if team:
+            where += " AND team = ?"
+            params = states + [team]
+        return self._entries(where, params)
+
+    def queued(self) -> List[QueueEntry]:
+        return self.entries(["queued"])
+
+    # --- reordering ---
+
+    def set_priority(self, entry_id: int, priority: int) -> bool:
+        return self._update_queued(entry_id, "priority = ?", (priority,))
+
+    def move(self, entry_id: int, before: Optional[int] = None, to: str = "top") -> bool:
+        """Move a queued entry to the top or bottom of the queue, or just before another"""
+        db = self.db
+        if before is not None:
+            target = self.get(before)
+            if target is None:
+                return False
+            previous = db.execute("SELECT MAX(position) FROM entries WHERE position < ?",
+                                  (target.position,)).fetchone()[0]
+            position = (target.position + (previous if previous is not None
+                                           else target.position - 1)) / 2
+        elif to == "top":
+            position = db.execute(
+                "SELECT COALESCE(MIN(position), 1) - 1 FROM entries").fetchone()[0]
+        else:
+            position = db.execute(
+                "SELECT COALESCE(MAX(position), 0) + 1 FROM entries").fetchone()[0]
+        return self._update_queued(entry_id, "position = ?", (position,))
+
+    def cancel(self, entry_ids: Iterable[int]) -> int:
+        """Remove queued entries (admitted ones already have a Job; delete that instead)"""
+        return sum(self._update_queued(i, "state = 'cancelled', finished_at = ?", (time.time(),))
+                   for i in entry_ids)
+
+    def _update_queued(self, entry_id: int, assignments: str, params) -> bool:
+        cursor = self.db.execute(
+            f"UPDATE entries SET {assignments} WHERE id = ? AND state = 'queued'",
+            tuple(params) + (entry_id,))
+        return cursor.rowcount > 0
+
+    # --- quotas ---
+
+    def set_quota(self, team: str, cpu: Optional[float] = None, memory: Optional[float] = None):
+        """Cap a team's admitted requests (None: unlimited); both None removes the quota"""
+        if cpu is None and memory is None:
+            self.db.execute("DELETE FROM quotas WHERE team = ?", (team,))
+        else:
+            self.db.execute("INSERT OR REPLACE INTO quotas (team, cpu, memory) VALUES (?, ?, ?)",
+                            (team, cpu, memory))
+
+    def quotas(self) -> Dict[str, Tuple[Optional[float], Optional[float]]]:
+        return {row["team"]: (row["cpu"], row["memory"])
+                for row in self.db.execute("SELECT * FROM quotas")}
+
+    def usage(self) -> Dict[str, List[float]]:
+        """team -> [CPU, memory] requested by its admitted (running or pending) Jobs"""
+        rows = self.db.execute("SELECT team, SUM(cpu), SUM(memory) FROM entries "
+                               "WHERE state = 'admitted' GROUP BY team")
+        return {team: [cpu, memory] for team, cpu, memory in rows}
+
+    # --- dispatcher bookkeeping ---
+
+    def admit(self, entry_id: int, job: str, namespace: str) -> bool:
+        cursor = self.db.execute(
+            "UPDATE entries SET state = 'admitted', job = ?, namespace = ?, admitted_at = ? "
+            "WHERE id = ? AND state = 'queued'", (job, namespace, time.time(), entry_id))
+        return cursor.rowcount > 0
+
+    def fail(self, entry_id: int, error: str):
+        self.db.execute("UPDATE entries SET state = 'failed', error = ?, finished_at = ? "
+                        "WHERE id = ?", (error, time.time(), entry_id))
+
+    def finish(self, entry_id: int, error: Optional[str] = None):
+        """An admitted entry's Job completed, failed or was deleted"""
+        self.db.execute("UPDATE entries SET state = 'done', error = ?, finished_at = ? "
+                        "WHERE id = ? AND state = 'admitted'", (error, time.time(), entry_id))
+
+    def wait_stats(self, since: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """Queue wait of admitted entries per team (and "*" for all): count, p50, p95, max"""
+        rows = self.db.execute("SELECT team, admitted_at - enqueued_at FROM entries "
+                               "WHERE admitted_at IS NOT NULL AND admitted_at >= ?",
+                               (since or 0,)).fetchall()
+        waits = {}
+        for team, wait in rows:
+            waits.setdefault(team, []).append(wait)
+            waits.setdefault("*", []).append(wait)
+        stats = {}
+        for team, values in waits.items():
+            values.sort()
+            stats[team] = {"count": len(values),
+                           "p50": values[(len(values) - 1) // 2],
+                           "p95": values[min(len(values) - 1, int(0.95 * len(values)))],
+                           "max": values[-1]}
+        return stats
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class Dispatcher:
+    """Admits queued entries as the cluster frees up, creating their Jobs
+
+    Args:
+        client: PlatformClient whose transport and manifest compiler create the Jobs
+        queue: The JobQueue to drain
+        namespace: Namespace the queue's Jobs run in (watched for completions)
+        capacity: (CPU, memory bytes) to schedule into instead of the nodes'
+            allocatable, e.g. when listing nodes isn't permitted
+        headroom: (CPU, memory bytes) admitted beyond the free capacity, so a
+            node-pool autoscaler sees pending pods and adds nodes
+        poll_interval: Seconds between passes when no watch event arrives
+    """
+
+    def __init__(self, client, queue: JobQueue, namespace: str = "jobs",
+                 capacity: Optional[Tuple[float, float]] = None,
+                 headroom: Tuple[float, float] = (0.0, 0.0), poll_interval: float = POLL_INTERVAL):
+        self.client = client
+        self.queue = queue
+        self.namespace = namespace
+        self.fixed_capacity = capacity
+        self.headroom = headroom
+        self.poll_interval = poll_interval
+        transport = client.transport
+        self._nodes = None if capacity else Informer(transport, api_path("", "v1", "nodes"))
+        self._pods = Informer(transport, api_path("", "v1", "pods"),
+                              field_selector="status.phase!=Succeeded,status.phase!=Failed")
+        self._jobs = Informer(transport, api_path("batch", "v1", "jobs", namespace),
+                              label_selector=QUEUE_LABEL)
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._lock_file = None
+
+    def _on_change(self, kind: str, obj: Dict):
+        self._wake.set()
+
+    def _on_job(self, kind: str, job: Dict):
+        entry_id = (job["metadata"].get("labels") or {}).get(QUEUE_LABEL)
+        if entry_id is None:
+            return
+        if kind == "DELETED":
+            self.queue.finish(int(entry_id), "deleted")
+        elif job_condition(job) in TERMINAL_STATES:
+            state = job_condition(job)
+            self.queue.finish(int(entry_id), None if state == "Complete" else state)
+        else:
+            return
+        self._wake.set()
+
+    def _lock(self):
+        """One dispatcher per queue file (advisory lock next to it, where supported)"""
+        try:
+            import fcntl
+        except ImportError:
+            return
+        self._lock_file = open(self.queue.path + ".lock", "w")
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            raise RuntimeError(
+                f"Another dispatcher is already running for {self.queue.path}") from None
+
+    def start(self) -> "Dispatcher":
+        """Lock the queue, sync the watches and reconcile entries with the cluster"""
+        self._lock()
+        for informer in (self._nodes, self._pods):
+            if informer is not None:
+                informer.add_listener(self._on_change)
+                informer.start()
+        self._jobs.add_listener(self._on_job)
+        self._jobs.start()
+        self._reconcile()
+        return self
+
+    def _reconcile(self):
+        """Adopt Jobs created just before a crash; close entries whose Job is gone or done"""
+        jobs = {}
+        for job in self._jobs.list():
+            entry_id = (job["metadata"].get("labels") or {}).get(QUEUE_LABEL)
+            if entry_id is not None:
+                jobs[int(entry_id)] = job
+        for entry in self.queue.entries():
+            job = jobs.get(entry.id)
+            if entry.state == "queued" and job is not None:
+                self.queue.admit(entry.id, job["metadata"]["name"], self.namespace)
+            if entry.state == "admitted" or job is not None:
+                if job is None:
+                    self.queue.finish(entry.id, "deleted")
+                elif job_condition(job) in TERMINAL_STATES:
+                    state = job_condition(job)
+                    self.queue.finish(entry.id, None if state == "Complete" else state)
+
+    def capacity(self) -> Dict[str, Tuple[float, float]]:
+        """Cluster total, used (pod requests plus admitted Jobs without pods yet) and free"""
+        if self.fixed_capacity:
+            total = tuple(self.fixed_capacity)
+        else:
+            total = tuple(map(sum, zip((0.0, 0.0), *map(node_allocatable, self._nodes.list()))))
+        used_cpu = used_memory = 0.0
+        by_job = {}
+        for pod in self._pods.list():
+            cpu, memory = pod_requests(pod)
+            used_cpu += cpu
+            used_memory += memory
+            job = (pod["metadata"].get("labels") or {}).get("job-name")
+            if job:
+                seen = by_job.setdefault(job, [0.0, 0.0])
+                seen[0] += cpu
+                seen[1] += memory
+        # An admitted Job's pods may not exist yet; hold its requests until they do
+        for entry in self.queue.entries(["admitted"]):
+            seen = by_job.get(entry.job, (0.0, 0.0))
+            used_cpu += max(0.0, entry.cpu - seen[0])
+            used_memory += max(0.0, entry.memory - seen[1])
+        used = (used_cpu, used_memory)
+        free = tuple(t + h - u for t, h, u in zip(total, self.headroom, used))
+        return {"total": total, "used": used, "free": free}
+
+    def dispatch_once(self) -> List[Tuple[QueueEntry, Optional[str], Optional[str]]]:
+        """One admission pass; returns (entry, job name, error) per entry acted on"""
+        queued = self.queue.queued()
+        if not queued:
+            return []
+        capacity = self.capacity()
+        plan = plan_admissions(queued, self.queue.usage(), self.queue.quotas(),
+                               capacity["free"], capacity["total"])
+        results = []
+        for entry in plan:
+            labels = {QUEUE_LABEL: str(entry.id), TEAM_LABEL: entry.team}
+            spec = dict(entry.spec, namespace=self.namespace)
+            spec["overrides"] = deep_merge(spec.get("overrides") or {},
+                                           {"metadata": {"labels": labels}})
+            try:
+                manifest = self.client.manifests.compile(JobSpec(**spec))
+                job = self.client.create_job(manifest, retries=2)
+            except (ApiError, OSError, TypeError, ValueError) as e:
+                self.queue.fail(entry.id, str(e))
+                results.append((entry, None, str(e)))
+                continue
+            self.queue.admit(entry.id, job.name, self.namespace)
+            results.append((entry, job.name, None))
+        return results
+
+    def run(self, callback=None):
+        """Dispatch until stop(); callback(results) is called after each pass that acted"""
+        if self._lock_file is None:
+            self.start()
+        while not self._stopped.is_set():
+            self._wake.clear()
+            results = self.dispatch_once()
+            if results and callback:
+                callback(results)
+            self._wake.wait(self.poll_interval)
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+        for informer in (self._nodes, self._pods, self._jobs):
+            if informer is not None:
+                informer.stop()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,228 @@
+"""Kubeconfig loading - resolve API server address and credentials once"""
+
+import base64
+import json
+import os
+import re
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+class KubeConfigError(RuntimeError):
+    """Raised when a usable kubeconfig cannot be resolved"""
+
+
+def kubeconfig_paths() -> List[str]:
+    """Return the kubeconfig files in precedence order"""
+    env = os.environ.get("KUBECONFIG")
+    if env:
+        return [p for p in env.split(os.pathsep) if p]
+    return [os.path.expanduser("~/.kube/config")]
+
+
+def _parse_document(text: str) -> Dict:
+    """Parse a kubeconfig document (JSON or YAML)"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    try:
+        import yaml
+    except ImportError:
+        return None
+    return yaml.safe_load(text) or {}
+
+
+def _kubectl_view(context: Optional[str] = None) -> Dict:
+    """Ask kubectl for the merged kubeconfig (used when no YAML parser is installed)"""
+    cmd = ["kubectl", "config", "view", "--raw", "-o", "json"]
+    if context:
+        cmd.extend(["--context", context])
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True)
+    except FileNotFoundError as e:
+        raise KubeConfigError("kubectl not found and kubeconfig could not be parsed") from e
+    if result.returncode != 0:
+        raise KubeConfigError(f"Failed to read kubeconfig: {result.stderr.strip()}")
+    return json.loads(result.stdout)
+
+
+def load_raw_config(paths: Optional[List[str]] = None) -> Dict:
+    """Load and merge kubeconfig files (first definition of a name wins)"""
+    merged = {"clusters": [], "users": [], "contexts": [], "current-context": None}
+    seen = {"clusters": set(), "users": set(), "contexts": set()}
+    found = False
+    for path in paths or kubeconfig_paths():
+        if not os.path.exists(path):
+            continue
+        found = True
+        with open(path) as f:
+            doc = _parse_document(f.read())
+        if doc is None:
+            return _kubectl_view()
+        if not merged["current-context"]:
+            merged["current-context"] = doc.get("current-context")
+        for key in ("clusters", "users", "contexts"):
+            for entry in doc.get(key) or []:
+                if entry.get("name") not in seen[key]:
+                    seen[key].add(entry.get("name"))
+                    merged[key].append(entry)
+    if not found:
+        raise KubeConfigError("No kubeconfig found (set KUBECONFIG or run gcloud get-credentials)")
+    return merged
+
+
+def _find(entries: List[Dict], name: str, kind: str) -> Dict:
+    for entry in entries:
+        if entry.get("name") == name:
+            return entry.get(kind) or {}
+    raise KubeConfigError(f"{kind} '{name}' not found in kubeconfig")
+
+
+def _write_temp(data: bytes) -> str:
+    fd, path = tempfile.mkstemp(prefix="ml-platform-")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    return path
+
+
+class KubeConfig:
+    """Resolved connection settings for one kubeconfig context"""
+
+    def __init__(self, server: str, cluster: Dict, user: Dict, context: str,
+                 namespace: Optional[str] = None):
+        self.server = server.rstrip("/")
+        self.cluster = cluster
+        self.user = user
+        self.context = context
+        self.namespace = namespace or "default"
+        self._lock = threading.Lock()
+        self._token = None
+        self._token_expiry = None
+        self._exec_cert = None
+
+    @classmethod
+    def load(cls, context: Optional[str] = None, paths: Optional[List[str]] = None) -> "KubeConfig":
+        """Load the kubeconfig and resolve the given (or current) context"""
+        raw = load_raw_config(paths)
+        name = context or raw.get("current-context")
+        if not name:
+            raise KubeConfigError("No current-context set in kubeconfig")
+        ctx = _find(raw["contexts"], name, "context")
+        cluster = _find(raw["clusters"], ctx.get("cluster"), "cluster")
+        user = _find(raw["users"], ctx.get("user"), "user") if ctx.get("user") else {}
+        if not cluster.get("server"):
+            raise KubeConfigError(f"Cluster for context '{name}' has no server")
+        return cls(cluster["server"], cluster, user, name, ctx.get("namespace"))
+
+    @property
+    def scheme(self) -> str:
+        return self.server.split("://", 1)[0] if "://" in self.server else "https"
+
+    def ssl_context(self) -> Optional[ssl.SSLContext]:
+        """Build the TLS context (CA bundle and client certificate)"""
+        if self.scheme != "https":
+            return None
+        if self.cluster.get("insecure-skip-tls-verify"):
+            ctx = ssl.create_default_context()
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+        elif self.cluster.get("certificate-authority-data"):
+            ca = base64.b64decode(self.cluster["certificate-authority-data"]).decode()
+            ctx = ssl.create_default_context(cadata=ca)
+        else:
+            ctx = ssl.create_default_context(cafile=self.cluster.get("certificate-authority"))
+
+        cert, key = self._client_cert()
+        if cert and key:
+            self._load_cert_chain(ctx, cert, key)
+        return ctx
+
+    def _client_cert(self):
+        if self.user.get("client-certificate-data"):
+            return (base64.b64decode(self.user["client-certificate-data"]),
+                    base64.b64decode(self.user["client-key-data"]))
+        if self.user.get("client-certificate"):
+            with open(self.user["client-certificate"], "rb") as c, open(self.user["client-key"], "rb") as k:
+                return c.read(), k.read()
+        if self.user.get("exec"):
+            self._exec_credential()
+            if self._exec_cert:
+                return self._exec_cert
+        return None, None
+
+    @staticmethod
+    def _load_cert_chain(ctx: ssl.SSLContext, cert: bytes, key: bytes):
+        # ssl only loads certificates from disk, so stage them in short-lived files
+        cert_path, key_path = _write_temp(cert), _write_temp(key)
+        try:
+            ctx.load_cert_chain(cert_path, key_path)
+        finally:
+            os.unlink(cert_path)
+            os.unlink(key_path)
+
+    def auth_headers(self) -> Dict[str, str]:
+        """Return the Authorization header, refreshing exec credentials when expired"""
+        if self.user.get("token"):
+            return {"Authorization": f"Bearer {self.user['token']}"}
+        if self.user.get("tokenFile"):
+            with open(self.user["tokenFile"]) as f:
+                return {"Authorization": f"Bearer {f.read().strip()}"}
+        if self.user.get("exec"):
+            token = self._exec_credential()
+            if token:
+                return {"Authorization": f"Bearer {token}"}
+        if self.user.get("username"):
+            raw = f"{self.user['username']}:{self.user.get('password', '')}".encode()
+            return {"Authorization": f"Basic {base64.b64encode(raw).decode()}"}
+        return {}
+
+    def _token_valid(self) -> bool:
+        return bool(self._token) and (self._token_expiry is None
+                                      or time.time() < self._token_expiry - 60)
+
+    def credentials_stale(self) -> bool:
+        """True if the next auth_headers() call has to run the exec auth plugin
+
+        Doesn't take the lock, which a running refresh holds: callers on an
+        event loop must not block on it.
+        """
+        if self.user.get("token") or self.user.get("tokenFile") or not self.user.get("exec"):
+            return False
+        return not self._token_valid()
+
+    def _exec_credential(self) -> Optional[str]:
+        """Run the exec auth plugin (e.g. gke-gcloud-auth-plugin) and cache its token"""
+        with self._lock:
+            if self._token_valid():
+                return self._token
+            spec = self.user["exec"]
+            env = dict(os.environ)
+            for item in spec.get("env") or []:
+                env[item["name"]] = item["value"]
+            cmd = [spec["command"]] + list(spec.get("args") or [])
+            try:
+                result = subprocess.run(cmd, capture_output=True, text=True, env=env)
+            except FileNotFoundError as e:
+                raise KubeConfigError(f"Auth plugin not found: {spec['command']}") from e
+            if result.returncode != 0:
+                raise KubeConfigError(f"Auth plugin failed: {result.stderr.strip()}")
+            status = json.loads(result.stdout).get("status", {})
+            self._token = status.get("token")
+            expiry = status.get("expirationTimestamp")
+            self._token_expiry = _parse_timestamp(expiry) if expiry else None
+            if status.get("clientCertificateData"):
+                self._exec_cert = (status["clientCertificateData"].encode(),
+                                   status["clientKeyData"].encode())
+            return self._token
+
+
+def _parse_timestamp(value: str) -> float:
+    """Parse an RFC 3339 timestamp into epoch seconds"""
+    value = re.sub(r"\.\d+", "", value).replace("Z", "+00:00")
+    return datetime.fromisoformat(value).timestamp()
@@ -0,0 +1,204 @@
+"""Log streaming - multiplex logs from many jobs, pods and containers
+
+LogStream yields tagged LogLine records from every container of every pod
+that belongs to the selected jobs. Each container is read line by line on
+its own stream, so no log is ever held in memory whole; all readers feed one
+bounded queue, which blocks them (and, through TCP, the API server) when
+the consumer falls behind. In follow mode a pod watch attaches new pods
+(sweep jobs starting late, retried pods) as they start.
+"""
+
+import queue
+import threading
+from collections import deque
+from contextlib import nullcontext
+from typing import Iterator, List, NamedTuple, Optional
+
+from .informer import Informer
+from .transport import ApiError, Transport, api_path, paginate
+
+# Jobs named in one "job-name in (...)" selector before falling back to client-side filtering
+MAX_SELECTOR_NAMES = 100
+
+_DONE = object()
+
+
+class LogLine(NamedTuple):
+    """One log line tagged with its source"""
+    timestamp: Optional[str]
+    job: Optional[str]
+    pod: str
+    container: str
+    text: str
+
+    def format(self, timestamps: bool = False, tag: bool = True) -> str:
+        prefix = f"{self.timestamp} " if timestamps and self.timestamp else ""
+        source = f"[{self.pod}/{self.container}] " if tag else ""
+        return f"{prefix}{source}{self.text}"
+
+
+def split_timestamp(raw: str):
+    """Split '<RFC3339Nano> text' (timestamps=true output) into (timestamp, text)"""
+    head, sep, rest = raw.partition(" ")
+    if sep and len(head) >= 20 and head[4:5] == "-" and head[10:11] == "T":
+        return head, rest
+    return None, raw
+
+
+def _terminal(pod) -> bool:
+    return pod.get("status", {}).get("phase") in ("Succeeded", "Failed")
+
+
+class LogStream:
+    """Multiplexed, bounded-memory log stream for a set of jobs
+
+    Args:
+        transport: API transport
+        namespace: Namespace of the jobs
+        jobs: Job names to include
+        label_selector: Include every job matching this label selector (e.g. a sweep's app label)
+        follow: Keep streaming and attach new pods until all selected pods have finished
+        since_seconds: Only lines newer than this
+        tail_lines: Only the last N lines of each container
+        buffer_lines: Queue size; readers block when it is full (backpressure)
+        max_streams: Concurrent container streams when not following
+    """
+
+    def __init__(
+        self,
+        transport: Transport,
+        namespace: str = "jobs",
+        jobs: Optional[List[str]] = None,
+        label_selector: Optional[str] = None,
+        follow: bool = False,
+        since_seconds: Optional[int] = None,
+        tail_lines: Optional[int] = None,
+        buffer_lines: int = 10000,
+        max_streams: int = 32
+    ):
+        self.transport = transport
+        self.namespace = namespace
+        self.follow = follow
+        self.since_seconds = since_seconds
+        self.tail_lines = tail_lines
+        self.job_names = set(jobs or [])
+        if label_selector:
+            self.job_names.update(j["metadata"]["name"] for j in paginate(
+                transport, api_path("batch", "v1", "jobs", namespace),
+                {"labelSelector": label_selector}, metadata_only=True))
+        self._queue = queue.Queue(maxsize=buffer_lines)
+        # Followed streams stay open for the pod's lifetime, so only cap one-shot reads
+        self._slots = nullcontext() if follow else threading.Semaphore(max_streams)
+        self._lock = threading.Lock()
+        self._attached = set()
+        self._active = 0
+        self._stopped = threading.Event()
+        self._informer = None
+        self._started = False
+
+    def _pod_selector(self) -> str:
+        if 0 < len(self.job_names) <= MAX_SELECTOR_NAMES:
+            return f"job-name in ({','.join(sorted(self.job_names))})"
+        return "job-name"
+
+    def _wanted(self, pod) -> bool:
+        return pod["metadata"].get("labels", {}).get("job-name") in self.job_names
+
+    def _start(self):
+        if self._started:
+            return
+        self._started = True
+        if not self.job_names:
+            return
+        path = api_path("", "v1", "pods", self.namespace)
+        if self.follow:
+            self._informer = Informer(self.transport, path, label_selector=self._pod_selector())
+            self._informer.add_listener(lambda kind, pod: kind != "DELETED" and self._attach(pod))
+            self._informer.start()
+        else:
+            for pod in paginate(self.transport, path, {"labelSelector": self._pod_selector()}):
+                self._attach(pod)
+
+    def _attach(self, pod):
+        """Start one reader per container of a pod (once its containers have started)"""
+        if not self._wanted(pod) or pod.get("status", {}).get("phase") in (None, "Pending"):
+            return
+        name = pod["metadata"]["name"]
+        job = pod["metadata"].get("labels", {}).get("job-name")
+        for container in pod.get("spec", {}).get("containers", []):
+            key = (name, container["name"])
+            with self._lock:
+                if key in self._attached:
+                    continue
+                self._attached.add(key)
+                self._active += 1
+            threading.Thread(target=self._read, args=(name, container["name"], job),
+                             daemon=True).start()
+
+    def _put(self, item) -> bool:
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _read(self, pod: str, container: str, job: Optional[str]):
+        params = {"container": container, "timestamps": True, "follow": self.follow or None,
+                  "sinceSeconds": self.since_seconds, "tailLines": self.tail_lines}
+        path = api_path("", "v1", "pods", self.namespace, pod, "log")
+        try:
+            with self._slots:
+                for raw in self.transport.stream(path, params):
+                    timestamp, text = split_timestamp(raw)
+                    if not self._put(LogLine(timestamp, job, pod, container, text)):
+                        return
+        except (ApiError, OSError) as e:
+            self._put(LogLine(None, job, pod, container, f"<log stream error: {e}>"))
+        finally:
+            self._put(_DONE)
+
+    def _finished(self) -> bool:
+        with self._lock:
+            if self._active:
+                return False
+        if not self.follow:
+            return True
+        pods = [p for p in self._informer.list() if self._wanted(p)] if self._informer else []
+        return bool(pods) and all(_terminal(p) for p in pods)
+
+    def __iter__(self) -> Iterator[LogLine]:
+        if not self.job_names:
+            return
+        self._start()
+        try:
+            while not self._stopped.is_set():
+                try:
+                    item = self._queue.get(timeout=1.0)
+                except queue.Empty:
+                    if self._finished():
+                        return
+                    continue
+                if item is _DONE:
+                    with self._lock:
+                        self._active -= 1
+                    if self._queue.empty() and self._finished():
+                        return
+                    continue
+                yield item
+        finally:
+            self.close()
+
+    def tail(self, n: int) -> List[LogLine]:
+        """Last n lines across all containers, ordered by timestamp (ring buffer, O(n) memory)
+
+        Consumes the stream, so use it without follow.
+        """
+        ring = deque(self, maxlen=n)
+        return sorted(ring, key=lambda line: line.timestamp or "")
+
+    def close(self):
+        self._stopped.set()
+        if self._informer is not None:
+            self._informer.stop()
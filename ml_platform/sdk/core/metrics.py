@@ -0,0 +1,487 @@
+"""SDK instrumentation - per-operation latency, retries, errors and bytes transferred
+
+Client operations (submit, list, delete, status, logs, scale) run inside a
+Span that the transports add to: bytes sent and received, failed requests
+by status code, and retries. Finished spans go to every enabled sink:
+
+- Registry: in-process latency histograms and counters, exportable as
+  Prometheus text (prometheus_text, serve_prometheus) or saved to disk for
+  `ml-platform stats`
+- SpanRecorder: the last N spans as OpenTelemetry-shaped dicts
+- OtelSink: forwards spans to an opentelemetry tracer, if one is installed
+
+Nothing is enabled by default, and then an instrumented call costs one
+list truth test (well under 1us, see benchmarks/bench_metrics.py):
+
+    registry = metrics.enable()
+    client.submit_job(...)
+    print(metrics.prometheus_text(registry.snapshot()))
+
+Setting ML_PLATFORM_METRICS=1 enables a Registry at import and merges it
+into the stats file (ML_PLATFORM_METRICS=<path> picks the file) when the
+process exits, which is how the CLI and scripts feed `ml-platform stats`.
+"""
+
+import contextvars
+import json
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+from typing import Dict, List, Optional
+
+# Histogram bucket upper bounds (seconds); an implicit +Inf bucket follows
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Set to 1 (or a stats file path) to record every SDK call of a process
+METRICS_ENV = "ML_PLATFORM_METRICS"
+
+# Operation bytes, retries and errors are booked under when no span is open
+UNSCOPED = "other"
+
+# Bump when the stats file layout changes
+STATS_VERSION = 1
+
+# Enabled sinks; empty means instrumentation is off (mutated in place, never rebound)
+sinks = []
+
+_current = contextvars.ContextVar("ml_platform_span", default=None)
+
+# co_flags bit of `async def` functions (inspect.CO_COROUTINE, without importing inspect)
+_CO_COROUTINE = 0x80
+
+
+class Sink:
+    """Receiver of finished spans"""
+
+    def on_span_end(self, span: "Span"):
+        raise NotImplementedError
+
+
+class Span:
+    """One SDK operation; transports add bytes, errors and retries while it is current"""
+
+    __slots__ = ("operation", "attributes", "parent", "start_ns", "duration", "retries", "errors",
+                 "bytes_sent", "bytes_received", "error", "_t0", "_token", "_span_id", "_trace_id")
+
+    def __init__(self, operation: str, attributes: Optional[Dict] = None):
+        self.operation = operation
+        self.attributes = attributes or {}
+        self.parent = _current.get()
+        self.start_ns = time.time_ns()
+        self.duration = None        # seconds; None for spans that only carry counters
+        self.retries = 0
+        self.errors = []            # status codes of failed requests
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.error = None           # what the operation raised, if anything
+        self._t0 = time.perf_counter()
+        self._token = None
+        self._span_id = self._trace_id = None
+
+    # IDs are only needed by span exporters, so they are made on first use
+
+    @property
+    def span_id(self) -> str:
+        if self._span_id is None:
+            self._span_id = f"{random.getrandbits(64):016x}"
+        return self._span_id
+
+    @property
+    def trace_id(self) -> str:
+        if self._trace_id is None:
+            self._trace_id = (self.parent.trace_id if self.parent is not None
+                              else f"{random.getrandbits(128):032x}")
+        return self._trace_id
+
+    @property
+    def parent_id(self) -> Optional[str]:
+        return self.parent.span_id if self.parent is not None else None
+
+    @property
+    def end_ns(self) -> int:
+        return self.start_ns + int((self.duration or 0.0) * 1e9)
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self._t0
+        _current.reset(self._token)
+        if exc_type is not None:
+            status = getattr(exc, "status", None)
+            self.error = f"{exc_type.__name__} {status}" if status else exc_type.__name__
+        _emit(self)
+        return False
+
+
+def _emit(span: Span):
+    for sink in list(sinks):
+        sink.on_span_end(span)
+
+
+def _book(update):
+    # Apply update to the current span, or to a counters-only span booked under UNSCOPED
+    span = _current.get()
+    if span is not None:
+        update(span)
+        return
+    span = Span(UNSCOPED)
+    update(span)
+    _emit(span)
+
+
+def _add_bytes(sent: int, received: int):
+    def update(span):
+        span.bytes_sent += sent
+        span.bytes_received += received
+    return update
+
+
+def _add_retry(span: Span):
+    span.retries += 1
+
+
+def record_transfer(sent: int, received: int):
+    """Count bytes of one request (transports call this only when sinks is non-empty)"""
+    _book(_add_bytes(sent, received))
+
+
+def record_retry():
+    """Count one retried request"""
+    _book(_add_retry)
+
+
+def record_error(status):
+    """Count one failed request (HTTP status, or an exception name)"""
+    _book(lambda span: span.errors.append(str(status)))
+
+
+def instrument(operation: str):
+    """Decorator running a function (sync or async) inside a Span when instrumentation is on"""
+    def decorate(fn):
+        if fn.__code__.co_flags & _CO_COROUTINE:
+            @wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not sinks:
+                    return await fn(*args, **kwargs)
+                with Span(operation):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not sinks:
+                return fn(*args, **kwargs)
+            with Span(operation):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def propagate(fn):
+    """fn bound to the caller's current span, for work handed to a thread pool"""
+    span = _current.get()
+    if span is None:
+        return fn
+
+    @wraps(fn)
+    def run(*args, **kwargs):
+        token = _current.set(span)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return run
+
+
+# --- sinks ---
+
+class _OperationStats:
+    __slots__ = ("buckets", "sum", "count", "failures", "retries", "errors", "bytes_sent",
+                 "bytes_received")
+
+    def __init__(self, size: int):
+        self.buckets = [0] * (size + 1)   # non-cumulative; last is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self.failures = 0
+        self.retries = 0
+        self.errors = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+class Registry(Sink):
+    """In-process latency histograms and counters per operation"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._ops = {}
+
+    def on_span_end(self, span: Span):
+        with self._lock:
+            stats = self._ops.get(span.operation)
+            if stats is None:
+                stats = self._ops[span.operation] = _OperationStats(len(self.buckets))
+            if span.duration is not None:
+                # Buckets are "less than or equal" (Prometheus le)
+                stats.buckets[bisect_left(self.buckets, span.duration)] += 1
+                stats.sum += span.duration
+                stats.count += 1
+                if span.error is not None:
+                    stats.failures += 1
+            stats.retries += span.retries
+            for code in span.errors:
+                stats.errors[code] = stats.errors.get(code, 0) + 1
+            stats.bytes_sent += span.bytes_sent
+            stats.bytes_received += span.bytes_received
+
+    def snapshot(self) -> Dict:
+        """JSON-safe copy: {"buckets": bounds, "operations": {name: counters}}"""
+        with self._lock:
+            return {"version": STATS_VERSION, "buckets": list(self.buckets), "operations": {
+                name: {"count": s.count, "sum": s.sum, "buckets": list(s.buckets),
+                       "failures": s.failures, "retries": s.retries, "errors": dict(s.errors),
+                       "bytes_sent": s.bytes_sent, "bytes_received": s.bytes_received}
+                for name, s in self._ops.items()}}
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+
+def merge_snapshots(base: Optional[Dict], extra: Dict) -> Dict:
+    """Sum two snapshots (extra's buckets win if the bounds differ)"""
+    if not base or base.get("buckets") != extra.get("buckets"):
+        base = {"version": STATS_VERSION, "buckets": extra.get("buckets"), "operations": {}}
+    merged = json.loads(json.dumps(base))
+    for name, stats in extra.get("operations", {}).items():
+        into = merged["operations"].get(name)
+        if into is None:
+            merged["operations"][name] = json.loads(json.dumps(stats))
+            continue
+        for key in ("count", "sum", "failures", "retries", "bytes_sent", "bytes_received"):
+            into[key] += stats[key]
+        into["buckets"] = [a + b for a, b in zip(into["buckets"], stats["buckets"])]
+        for code, n in stats["errors"].items():
+            into["errors"][code] = into["errors"].get(code, 0) + n
+    return merged
+
+
+def quantile(snapshot: Dict, operation: str, q: float) -> Optional[float]:
+    """Latency quantile estimated from histogram buckets (as PromQL histogram_quantile)"""
+    stats = snapshot["operations"].get(operation)
+    if not stats or not stats["count"]:
+        return None
+    bounds = snapshot["buckets"]
+    rank = q * stats["count"]
+    seen = 0
+    for i, n in enumerate(stats["buckets"]):
+        if seen + n >= rank and n:
+            if i == len(bounds):
+                return bounds[-1]    # in the +Inf bucket: the highest finite bound
+            lower = bounds[i - 1] if i else 0.0
+            return lower + (bounds[i] - lower) * (rank - seen) / n
+        seen += n
+    return bounds[-1]
+
+
+def _labels(**labels) -> str:
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+def prometheus_text(snapshot: Dict, prefix: str = "ml_platform_sdk") -> str:
+    """Prometheus text exposition (format 0.0.4) of a Registry snapshot"""
+    ops = snapshot.get("operations", {})
+    bounds = snapshot.get("buckets", [])
+    lines = [f"# HELP {prefix}_operation_duration_seconds Latency of SDK operations",
+             f"# TYPE {prefix}_operation_duration_seconds histogram"]
+    for name, s in sorted(ops.items()):
+        cumulative = 0
+        for bound, n in zip([*map(repr, bounds), "+Inf"], s["buckets"]):
+            cumulative += n
+            lines.append(f"{prefix}_operation_duration_seconds_bucket"
+                         f"{{{_labels(operation=name, le=bound)}}} {cumulative}")
+        lines.append(f"{prefix}_operation_duration_seconds_sum{{{_labels(operation=name)}}} {s['sum']!r}")
+        lines.append(f"{prefix}_operation_duration_seconds_count{{{_labels(operation=name)}}} {s['count']}")
+    counters = [
+        ("operation_failures_total", "SDK operations that raised", "failures"),
+        ("retries_total", "Requests retried by the SDK", "retries"),
+    ]
+    for metric, help_text, key in counters:
+        lines += [f"# HELP {prefix}_{metric} {help_text}", f"# TYPE {prefix}_{metric} counter"]
+        lines += [f"{prefix}_{metric}{{{_labels(operation=name)}}} {s[key]}"
+                  for name, s in sorted(ops.items())]
+    lines += [f"# HELP {prefix}_request_errors_total Failed API requests by status code",
+              f"# TYPE {prefix}_request_errors_total counter"]
+    lines += [f"{prefix}_request_errors_total{{{_labels(operation=name, code=code)}}} {n}"
+              for name, s in sorted(ops.items()) for code, n in sorted(s["errors"].items())]
+    lines += [f"# HELP {prefix}_bytes_total Bytes transferred by the SDK",
+              f"# TYPE {prefix}_bytes_total counter"]
+    for name, s in sorted(ops.items()):
+        lines.append(f"{prefix}_bytes_total{{{_labels(operation=name, direction='sent')}}} {s['bytes_sent']}")
+        lines.append(f"{prefix}_bytes_total{{{_labels(operation=name, direction='received')}}} "
+                     f"{s['bytes_received']}")
+    return "\n".join(lines) + "\n"
+
+
+def serve_prometheus(registry: Optional["Registry"] = None, port: int = 9464, host: str = ""):
+    """Serve /metrics from a daemon thread (for pods annotated prometheus.io/scrape)
+
+    Returns the HTTP server; call .shutdown() to stop it.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    registry = registry or enable_registry()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = prometheus_text(registry.snapshot()).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+class SpanRecorder(Sink):
+    """Keeps the last max_spans spans as OpenTelemetry-shaped dicts (OTLP JSON field names)"""
+
+    def __init__(self, max_spans: int = 1000):
+        from collections import deque
+        self._spans = deque(maxlen=max_spans)
+
+    def on_span_end(self, span: Span):
+        if span.duration is not None:
+            self._spans.append(span_dict(span))
+
+    def spans(self) -> List[Dict]:
+        return list(self._spans)
+
+    def dump(self, path: str):
+        """Write the recorded spans as JSON lines"""
+        with open(path, "w") as f:
+            for span in self.spans():
+                f.write(json.dumps(span) + "\n")
+
+
+def span_dict(span: Span) -> Dict:
+    attributes = dict(span.attributes)
+    attributes.update({"ml_platform.operation": span.operation, "ml_platform.retries": span.retries,
+                       "ml_platform.request_errors": len(span.errors),
+                       "ml_platform.bytes_sent": span.bytes_sent,
+                       "ml_platform.bytes_received": span.bytes_received})
+    return {"traceId": span.trace_id, "spanId": span.span_id, "parentSpanId": span.parent_id or "",
+            "name": f"ml_platform.{span.operation}", "kind": "SPAN_KIND_CLIENT",
+            "startTimeUnixNano": span.start_ns, "endTimeUnixNano": span.end_ns,
+            "attributes": attributes,
+            "status": {"code": "STATUS_CODE_ERROR", "message": span.error} if span.error
+            else {"code": "STATUS_CODE_OK"}}
+
+
+class OtelSink(Sink):
+    """Forward spans to OpenTelemetry (needs opentelemetry-api; spans are exported as roots)"""
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            from opentelemetry import trace
+            tracer = trace.get_tracer("ml_platform.sdk")
+        from opentelemetry.trace import Status, StatusCode
+        self.tracer = tracer
+        self._error = lambda message: Status(StatusCode.ERROR, message)
+
+    def on_span_end(self, span: Span):
+        if span.duration is None:
+            return
+        record = span_dict(span)
+        otel_span = self.tracer.start_span(record["name"], start_time=span.start_ns,
+                                           attributes=record["attributes"])
+        if span.error:
+            otel_span.set_status(self._error(span.error))
+        otel_span.end(end_time=span.end_ns)
+
+
+# --- switching on and off ---
+
+def enable(*new_sinks: Sink) -> Sink:
+    """Turn instrumentation on with the given sinks (a new Registry if none); returns the first"""
+    new_sinks = new_sinks or (Registry(),)
+    sinks.extend(new_sinks)
+    return new_sinks[0]
+
+
+def disable():
+    """Remove every sink; instrumented calls go back to zero overhead"""
+    sinks.clear()
+
+
+def enable_registry() -> Registry:
+    """The enabled Registry, enabling one if there is none"""
+    for sink in sinks:
+        if isinstance(sink, Registry):
+            return sink
+    return enable(Registry())
+
+
+# --- stats file (ml-platform stats) ---
+
+def stats_path() -> str:
+    """Where processes run with ML_PLATFORM_METRICS=1 accumulate their numbers"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ml-platform", "sdk-metrics.json")
+
+
+def load_stats(path: Optional[str] = None) -> Optional[Dict]:
+    try:
+        with open(path or stats_path()) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return snapshot if snapshot.get("version") == STATS_VERSION else None
+
+
+def save_stats(registry: Registry, path: Optional[str] = None):
+    """Add a registry's numbers to the stats file and reset it"""
+    snapshot = registry.snapshot()
+    if not snapshot["operations"]:
+        return
+    path = path or stats_path()
+    merged = merge_snapshots(load_stats(path), snapshot)
+    # Write-then-rename so concurrent processes never read a partial file
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(merged, f)
+        os.replace(tmp, path)
+    except OSError:
+        return
+    registry.reset()
+
+
+def enable_from_env():
+    """Enable a Registry saved at exit when ML_PLATFORM_METRICS is set"""
+    value = os.environ.get(METRICS_ENV, "")
+    if value.lower() in ("", "0", "false", "no"):
+        return
+    import atexit
+    path = None if value.lower() in ("1", "true", "yes") else value
+    atexit.register(save_stats, enable_registry(), path)
+
+
+enable_from_env()
@@ -0,0 +1,336 @@
+"""Ray driver helpers - stream task results as they finish, with bounded memory
+
+A driver that submits one task per config and then blocks in
+ray.get(futures) holds every result at once and can report nothing until
+the slowest task is done. imap_unordered instead keeps at most
+max_in_flight tasks outstanding, pulls new items from the input only as
+tasks finish, and yields each result as soon as ray.wait reports it, so the
+caller can write and summarize incrementally.
+
+Small items are batched: each task runs several items and reports how long
+they took, and the batch size is adjusted so a task runs for about
+target_seconds. Per-task scheduling overhead (~1ms) then stays small next to
+the work even for sweeps of 100k cheap configs.
+
+    for config_id, result in imap_unordered(optimize, enumerate(configs)):
+        writer.append(result)
+
+Large inputs shared by many tasks (geometry, equilibria) should not be
+serialized into every task. SharedInputs puts each distinct value in the
+object store once, keyed by a content hash, and swaps it for a small
+SharedRef; imap_unordered resolves SharedRefs on the worker with one
+ray.get per batch. NumPy arrays come back as read-only views of the object
+store (zero-copy), so N tasks on a node share one copy. Values are hashed
+on every call unless they can't change in place (bytes, arrays marked
+read-only with arr.setflags(write=False)): a buffer refilled between calls
+is uploaded again rather than sent as its old content. The memo of what
+was uploaded is an LRU bounded by max_bytes and max_entries, so values that stop recurring
+(say one array per config) are dropped from it, and Ray frees each object
+once the tasks holding its ref have finished.
+
+    shared = SharedInputs(min_bytes=1 << 16)
+    items = ((i, shared.dedupe(params)) for i, params in enumerate(configs))
+    for config_id, result in imap_unordered(optimize, items):
+        ...
+
+Ray is imported on first use; this module is safe to import without it.
+"""
+
+import hashlib
+import pickle
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Aim for tasks of about this many seconds when batching adaptively
+DEFAULT_TARGET_SECONDS = 1.0
+
+# Upper bound on items per task
+MAX_BATCH_SIZE = 1024
+
+# In-flight tasks per cluster CPU when max_in_flight is not given
+IN_FLIGHT_PER_CPU = 2
+
+# Values at least this large are moved to the object store by SharedInputs.dedupe
+DEFAULT_SHARE_BYTES = 64 * 1024
+
+# Uploaded values SharedInputs keeps refs to for reuse (least recently used go first)
+DEFAULT_MEMO_BYTES = 256 * 1024 * 1024
+DEFAULT_MEMO_ENTRIES = 1024
+
+
+class SharedRef:
+    """Placeholder for a value in the object store (see SharedInputs)"""
+
+    __slots__ = ("ref", "digest")
+
+    def __init__(self, ref, digest: str):
+        self.ref = ref
+        self.digest = digest
+
+    def __reduce__(self):
+        return SharedRef, (self.ref, self.digest)
+
+    def __repr__(self) -> str:
+        return f"SharedRef({self.digest[:12]})"
+
+
+def _nbytes(value) -> int:
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return len(value)
+    return 0
+
+
+def _frozen(value) -> bool:
+    """True if value can't change in place, so the same object always has the same content"""
+    while value is not None:
+        if isinstance(value, bytes):
+            return True
+        flags = getattr(value, "flags", None)
+        # A read-only view of a writable array still changes with it
+        if flags is None or getattr(flags, "writeable", True):
+            return False
+        value = getattr(value, "base", None)
+    return True
+
+
+def content_hash(value) -> str:
+    """Hash of a value's content: raw buffer for arrays and bytes, pickle for the rest"""
+    digest = hashlib.blake2b(digest_size=20)
+    if hasattr(value, "dtype") and hasattr(value, "shape"):
+        import numpy as np
+        digest.update(f"ndarray:{value.dtype.str}:{value.shape}:".encode())
+        digest.update(memoryview(np.ascontiguousarray(value)).cast("B"))
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        digest.update(b"bytes:")
+        digest.update(value)
+    else:
+        digest.update(b"pickle:")
+        digest.update(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    return digest.hexdigest()
+
+
+class SharedInputs:
+    """Content-addressed ray.put: each distinct value is uploaded once while it keeps recurring
+
+    Args:
+        min_bytes: dedupe() moves arrays and byte strings at least this large
+        put: Upload function returning a reference (default: ray.put)
+        max_bytes, max_entries: Size and count of the values whose refs are kept for
+            reuse. Past either, the least recently used are forgotten (and uploaded
+            again if they recur).
+    """
+
+    def __init__(self, min_bytes: int = DEFAULT_SHARE_BYTES, put: Optional[Callable] = None,
+                 max_bytes: int = DEFAULT_MEMO_BYTES, max_entries: int = DEFAULT_MEMO_ENTRIES):
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._put = put
+        self._by_digest = OrderedDict()  # content hash -> (SharedRef, size, id), oldest use first
+        self._by_id = {}                 # id(value) -> (value, digest); immutable values only
+        self.memo_bytes = 0
+        self.puts = 0
+        self.hits = 0
+        self.evictions = 0
+        self.bytes_put = 0
+
+    def put(self, value) -> SharedRef:
+        """SharedRef for value, uploading it only if identical content isn't there yet"""
+        seen = self._by_id.get(id(value))
+        digest = seen[1] if seen is not None and seen[0] is value else content_hash(value)
+        entry = self._by_digest.get(digest)
+        if entry is not None:
+            self.hits += 1
+            self._by_digest.move_to_end(digest)
+        else:
+            if self._put is None:
+                import ray
+                self._put = ray.put
+            entry = self._by_digest[digest] = (SharedRef(self._put(value), digest),
+                                               _nbytes(value), id(value))
+            self.puts += 1
+            self.bytes_put += entry[1]
+            self.memo_bytes += entry[1]
+            if _frozen(value):
+                # Holding value keeps its id from being reused by another object
+                self._by_id[id(value)] = (value, digest)
+            self._evict()
+        return entry[0]
+
+    def _evict(self):
+        while len(self._by_digest) > 1 and (self.memo_bytes > self.max_bytes
+                                            or len(self._by_digest) > self.max_entries):
+            _, (_, size, key) = self._by_digest.popitem(last=False)
+            self._by_id.pop(key, None)
+            self.memo_bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """Forget every upload; Ray frees them once no pending task holds their refs"""
+        self._by_digest.clear()
+        self._by_id.clear()
+        self.memo_bytes = 0
+
+    def dedupe(self, value):
+        """Copy of value with every large array or bytes (in dicts, lists, tuples) put once"""
+        if isinstance(value, dict):
+            return {k: self.dedupe(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return _rebuild(value, [self.dedupe(v) for v in value])
+        if _nbytes(value) >= self.min_bytes:
+            return self.put(value)
+        return value
+
+    def stats(self) -> Dict[str, int]:
+        return {"puts": self.puts, "hits": self.hits, "evictions": self.evictions,
+                "bytes_put": self.bytes_put, "memo_bytes": self.memo_bytes}
+
+
+def _rebuild(sequence, items: List):
+    if isinstance(sequence, list):
+        return items
+    # namedtuples take their fields positionally
+    return type(sequence)(*items) if hasattr(sequence, "_fields") else type(sequence)(items)
+
+
+def _collect_refs(value, found: Dict):
+    if isinstance(value, SharedRef):
+        found[value.digest] = value.ref
+    elif isinstance(value, dict):
+        for v in value.values():
+            _collect_refs(v, found)
+    elif isinstance(value, (list, tuple)):
+        for v in value:
+            _collect_refs(v, found)
+
+
+def _substitute(value, resolved: Dict):
+    if isinstance(value, SharedRef):
+        return resolved[value.digest]
+    if isinstance(value, dict):
+        return {k: _substitute(v, resolved) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return _rebuild(value, [_substitute(v, resolved) for v in value])
+    return value
+
+
+def resolve_shared(value):
+    """value with every SharedRef replaced by its object (one ray.get for all of them)"""
+    found = {}
+    _collect_refs(value, found)
+    if not found:
+        return value
+    import ray
+    digests = list(found)
+    resolved = dict(zip(digests, ray.get([found[d] for d in digests])))
+    return _substitute(value, resolved)
+
+
+def _run_batch(fn: Callable, batch: List[Tuple]) -> Tuple[float, List]:
+    # Runs on a worker: apply fn to every item, report the compute time
+    batch = resolve_shared(batch)
+    start = time.perf_counter()
+    results = [fn(*args) for args in batch]
+    return time.perf_counter() - start, results
+
+
+class BatchSizer:
+    """Items per task, adapted so tasks take about target_seconds
+
+    Tracks an exponential moving average of seconds per item from finished
+    batches. A fixed size disables adaptation.
+    """
+
+    def __init__(self, size: Optional[int] = None, target_seconds: float = DEFAULT_TARGET_SECONDS,
+                 max_size: int = MAX_BATCH_SIZE, smoothing: float = 0.3):
+        self.fixed = size is not None
+        self.size = max(1, size or 1)
+        self.target_seconds = target_seconds
+        self.max_size = max_size
+        self.smoothing = smoothing
+        self.per_item = None
+
+    def observe(self, items: int, seconds: float):
+        """Record a finished batch of items that computed for seconds"""
+        if self.fixed or items <= 0:
+            return
+        sample = seconds / items
+        self.per_item = sample if self.per_item is None else (
+            self.smoothing * sample + (1 - self.smoothing) * self.per_item)
+        if self.per_item <= 0:
+            # Ran too fast to measure: grow geometrically
+            self.size = min(self.max_size, self.size * 2)
+        else:
+            # Move at most 4x per step so one outlier batch can't swing it far
+            wanted = self.target_seconds / self.per_item
+            self.size = int(max(1, self.size / 4, min(self.max_size, self.size * 4, wanted)))
+
+
+def imap_unordered(
+    fn: Callable,
+    items: Iterable,
+    max_in_flight: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    target_seconds: float = DEFAULT_TARGET_SECONDS,
+    remote_options: Optional[Dict] = None
+) -> Iterator[Tuple[int, Any]]:
+    """Run fn(*item) on the Ray cluster for every item, yielding (position, result) as they finish
+
+    Args:
+        fn: Plain function (not @ray.remote); items that aren't tuples are passed as one argument
+        items: Any iterable, consumed lazily as tasks finish
+        max_in_flight: Cap on outstanding tasks (default: 2 per cluster CPU), which bounds
+            object-store use to max_in_flight batches of results
+        batch_size: Items per task; None adapts it to target_seconds
+        target_seconds: Wanted duration of one task when batching adaptively
+        remote_options: Passed to .options() of each task, e.g. {"num_cpus": 2}
+
+    Results arrive in completion order; position is the item's index in items.
+    A task that raises propagates its error to the caller. SharedRefs anywhere
+    in an item (see SharedInputs) are resolved before fn sees it.
+    """
+    import ray
+
+    remote = ray.remote(_run_batch)
+    if remote_options:
+        remote = remote.options(**remote_options)
+    if max_in_flight is None:
+        max_in_flight = max(1, int(ray.cluster_resources().get("CPU", 1)) * IN_FLIGHT_PER_CPU)
+    sizer = BatchSizer(batch_size, target_seconds)
+    fn_ref = ray.put(fn)
+    source = iter(enumerate(items))
+    pending = {}   # ObjectRef -> positions in the batch
+    exhausted = False
+
+    def submit():
+        nonlocal exhausted
+        batch, positions = [], []
+        for position, item in source:
+            positions.append(position)
+            batch.append(item if isinstance(item, tuple) else (item,))
+            if len(batch) >= sizer.size:
+                break
+        else:
+            exhausted = True
+        if batch:
+            pending[remote.remote(fn_ref, batch)] = positions
+
+    while True:
+        while not exhausted and len(pending) < max_in_flight:
+            submit()
+        if not pending:
+            return
+        ready, _ = ray.wait(list(pending), num_returns=1)
+        # Collect whatever else has finished too, so one ray.get serves them all
+        if len(pending) > 1:
+            more, _ = ray.wait([ref for ref in pending if ref not in ready],
+                               num_returns=len(pending) - 1, timeout=0)
+            ready += more
+        for ref, (seconds, results) in zip(ready, ray.get(ready)):
+            positions = pending.pop(ref)
+            sizer.observe(len(results), seconds)
+            yield from zip(positions, results)
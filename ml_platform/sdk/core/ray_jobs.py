@@ -0,0 +1,283 @@
+"""Ray job submission - run a driver on the Ray head instead of in a Kubernetes Job
+
+In "k8s" mode every submission schedules a pod (pulling the workload image
+and reserving 4 CPU / 16Gi) whose only work is a driver connecting to the
+cluster over ray://. In "ray" mode the entrypoint is handed to the Ray Job
+Submission API on the head's dashboard port (8265) and runs there, with a
+runtime_env carrying the workload's code and environment.
+
+The dashboard is reached through the Kubernetes API server's service proxy
+by default (same credentials and connection pool as everything else), or
+directly at a URL such as http://127.0.0.1:8265 for a port-forward or a
+local single-node head (`ray start --head`).
+
+RayJob has the same interface as Job (status, wait, future, logs,
+stream_logs, delete), so callers don't care which mode ran a job.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from typing import Dict, Iterator, List, Optional
+
+from .job import TERMINAL_STATES, Job
+from .kubeconfig import KubeConfig
+from .logs import LogLine
+from .metrics import instrument
+from .transport import ApiError, HttpTransport, Transport, api_path
+
+# Ray head service the dashboard (job submission API) listens on
+RAY_HEAD_SERVICE = "ray-cluster-head-svc"
+RAY_NAMESPACE = "ray-system"
+RAY_DASHBOARD_PORT = 8265
+
+# Ray job status -> Job.status vocabulary
+RAY_STATES = {
+    "PENDING": "Pending",
+    "RUNNING": "Running",
+    "SUCCEEDED": "Complete",
+    "FAILED": "Failed",
+    "STOPPED": "Failed",
+}
+
+# Packaging a working_dir skips the same files docker builds do
+_SKIP_DIRS = ("__pycache__", ".git")
+_SKIP_SUFFIXES = (".pyc", ".pyo")
+
+
+def ray_dashboard_address() -> Optional[str]:
+    """Dashboard URL from ML_PLATFORM_RAY_ADDRESS or an http(s) RAY_ADDRESS, if set"""
+    address = os.environ.get("ML_PLATFORM_RAY_ADDRESS") or os.environ.get("RAY_ADDRESS", "")
+    return address if address.startswith(("http://", "https://")) else None
+
+
+def package_working_dir(path: str):
+    """Zip a directory deterministically; returns (content-addressed package name, bytes)"""
+    # zipfile pulls in the compression modules; only submissions need it
+    import io
+    import zipfile
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as zf:
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if d not in _SKIP_DIRS)
+            for name in sorted(files):
+                if name.endswith(_SKIP_SUFFIXES):
+                    continue
+                full = os.path.join(root, name)
+                info = zipfile.ZipInfo(os.path.relpath(full, path).replace(os.sep, "/"),
+                                       date_time=(1980, 1, 1, 0, 0, 0))
+                info.external_attr = (os.stat(full).st_mode & 0o777) << 16
+                with open(full, "rb") as f:
+                    zf.writestr(info, f.read(), zipfile.ZIP_DEFLATED)
+    data = buffer.getvalue()
+    return f"_ray_pkg_{hashlib.sha1(data).hexdigest()[:16]}.zip", data
+
+
+class RayJobClient:
+    """Ray Job Submission REST API on the head's dashboard
+
+    Args:
+        transport: Cluster transport, used through the API server's service proxy
+        address: Dashboard URL (e.g. http://127.0.0.1:8265); overrides the proxy
+        poll_interval: Seconds between status polls while jobs are being waited on
+    """
+
+    def __init__(self, transport: Optional[Transport] = None, address: Optional[str] = None,
+                 poll_interval: float = 1.0):
+        address = address or ray_dashboard_address()
+        if address:
+            # A bare URL needs no kubeconfig: no TLS client certs, no auth header
+            self.transport = HttpTransport(KubeConfig(address, {}, {}, "ray-dashboard"))
+            self.base_path = ""
+        else:
+            if transport is None:
+                raise ValueError("RayJobClient needs a cluster transport or a dashboard address")
+            self.transport = transport
+            self.base_path = api_path("", "v1", "services", RAY_NAMESPACE,
+                                      f"{RAY_HEAD_SERVICE}:{RAY_DASHBOARD_PORT}", "proxy")
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._futures = {}
+        self._poller = None
+
+    def _path(self, *parts: str) -> str:
+        return self.base_path + "/api/" + "/".join(parts)
+
+    # --- REST calls ---
+
+    def upload_working_dir(self, path: str) -> str:
+        """Upload a local directory once (content-addressed) and return its gcs:// URI"""
+        name, data = package_working_dir(path)
+        package = self._path("packages", "gcs", name)
+        try:
+            self.transport.request_raw("GET", package)
+        except ApiError as e:
+            if not e.not_found:
+                raise
+            self.transport.request_raw("PUT", package, body=data,
+                                       content_type="application/octet-stream")
+        return f"gcs://{name}"
+
+    def submit(self, entrypoint: str, submission_id: Optional[str] = None,
+               runtime_env: Optional[Dict] = None, metadata: Optional[Dict[str, str]] = None,
+               entrypoint_num_cpus: Optional[float] = None) -> str:
+        """Submit an entrypoint; returns the submission id"""
+        runtime_env = dict(runtime_env or {})
+        working_dir = runtime_env.get("working_dir")
+        if working_dir and os.path.isdir(working_dir):
+            runtime_env["working_dir"] = self.upload_working_dir(working_dir)
+        body = {"entrypoint": entrypoint, "submission_id": submission_id,
+                "runtime_env": runtime_env, "metadata": metadata or {}}
+        if entrypoint_num_cpus is not None:
+            body["entrypoint_num_cpus"] = entrypoint_num_cpus
+        return self.transport.request("POST", self._path("jobs") + "/", body=body)["submission_id"]
+
+    def info(self, submission_id: str) -> Dict:
+        return self.transport.get(self._path("jobs", submission_id))
+
+    def list(self) -> List[Dict]:
+        result = self.transport.get(self._path("jobs") + "/")
+        # Older dashboards return a {job_id: info} mapping instead of a list
+        return list(result.values()) if isinstance(result, dict) else result
+
+    def logs(self, submission_id: str) -> str:
+        return self.transport.get(self._path("jobs", submission_id, "logs")).get("logs", "")
+
+    def stop(self, submission_id: str) -> bool:
+        result = self.transport.request("POST", self._path("jobs", submission_id, "stop"))
+        return result.get("stopped", False)
+
+    def delete(self, submission_id: str):
+        self.transport.request("DELETE", self._path("jobs", submission_id))
+
+    # --- state API (cluster nodes and tasks, for scaling decisions) ---
+
+    def _state_list(self, resource: str, params: Dict) -> List[Dict]:
+        result = self.transport.get(self._path("v0", resource), params)
+        # {"data": {"result": {"result": [...]}}} on Ray 2.x; tolerate a flatter shape
+        data = result.get("data", result)
+        data = data.get("result", data) if isinstance(data, dict) else data
+        data = data.get("result", data) if isinstance(data, dict) else data
+        return data if isinstance(data, list) else []
+
+    def nodes(self) -> List[Dict]:
+        """Ray nodes (node_id, state, is_head_node, resources_total)"""
+        return self._state_list("nodes", {"limit": 10000})
+
+    def tasks(self, state: str, limit: int = 10000) -> List[Dict]:
+        """Ray tasks in one state, e.g. PENDING_NODE_ASSIGNMENT or RUNNING"""
+        return self._state_list("tasks", {"limit": limit, "filter_keys": "state",
+                                          "filter_predicates": "=", "filter_values": state})
+
+    # --- shared completion polling ---
+
+    def future(self, submission_id: str) -> Future:
+        """Future resolved with the final status (Complete/Failed)
+
+        One background thread lists all jobs per poll for every pending
+        future, rather than one status request per waiter.
+        """
+        future = Future()
+        with self._lock:
+            self._futures.setdefault(submission_id, []).append(future)
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(target=self._poll, name="ray-job-poller",
+                                                daemon=True)
+                self._poller.start()
+        return future
+
+    def _poll(self):
+        while True:
+            with self._lock:
+                if not self._futures:
+                    self._poller = None
+                    return
+            try:
+                states = {j.get("submission_id"): RAY_STATES.get(j.get("status"), "Unknown")
+                          for j in self.list()}
+            except (ApiError, OSError, ValueError):
+                states = {}
+            with self._lock:
+                for submission_id in list(self._futures):
+                    state = states.get(submission_id)
+                    if state in TERMINAL_STATES:
+                        for future in self._futures.pop(submission_id):
+                            future.set_result(state)
+            time.sleep(self.poll_interval)
+
+
+class RayJob(Job):
+    """A job submitted through the Ray Job Submission API (same interface as Job)"""
+
+    def __init__(self, name: str, ray: RayJobClient, namespace: str = RAY_NAMESPACE):
+        super().__init__(name, namespace, transport=ray.transport)
+        self.ray = ray
+
+    @instrument("status")
+    def status(self) -> str:
+        try:
+            return RAY_STATES.get(self.ray.info(self.name).get("status"), "Unknown")
+        except ApiError:
+            return "Unknown"
+
+    def future(self) -> Future:
+        return self.ray.future(self.name)
+
+    def wait(self, timeout: int = 3600) -> str:
+        try:
+            return self.future().result(timeout)
+        except FutureTimeout:
+            return self.status()
+
+    @instrument("logs")
+    def logs(self, follow: bool = False) -> str:
+        if follow:
+            return "\n".join(line.text for line in self.stream_logs(follow=True))
+        try:
+            return self.ray.logs(self.name)
+        except ApiError:
+            return ""
+
+    def stream_logs(self, follow: bool = False, since_seconds: Optional[int] = None,
+                    tail_lines: Optional[int] = None) -> Iterator[LogLine]:
+        """Driver log lines; with follow, polls for new output until the job finishes"""
+        seen = 0
+        while True:
+            # Read the state first so output written just before the job ended isn't lost
+            done = not follow or self.status() in TERMINAL_STATES
+            lines = self.logs().splitlines()
+            new = lines[seen:]
+            if tail_lines is not None and seen == 0:
+                new = new[-tail_lines:] if tail_lines else []
+            for text in new:
+                yield LogLine(None, self.name, self.name, "driver", text)
+            seen = len(lines)
+            if done:
+                return
+            time.sleep(self.ray.poll_interval)
+
+    def timeline(self, logs: bool = True):
+        """Submitted and finished times from the dashboard; there are no pods to break down"""
+        from .timeline import Timeline
+        info = self.ray.info(self.name)
+        # The dashboard reports milliseconds since the epoch (0 while unset)
+        milestones = {"submitted": (info.get("start_time") or 0) / 1000 or None,
+                      "finished": (info.get("end_time") or 0) / 1000 or None}
+        return Timeline(self.name, self.namespace, milestones,
+                        RAY_STATES.get(info.get("status"), "Unknown"))
+
+    @instrument("delete")
+    def delete(self):
+        try:
+            if self.status() not in TERMINAL_STATES:
+                self.ray.stop(self.name)
+                self.wait(timeout=30)
+            self.ray.delete(self.name)
+        except ApiError:
+            pass
+
+    def __repr__(self) -> str:
+        return f"RayJob(name={self.name!r})"
@@ -0,0 +1,487 @@
+"""Right-sizing - job requests from what past runs of a workload actually used
+
+Every Job requests the workload's (or the platform's 4 CPU / 16Gi) resources
+whatever it uses, and on Autopilot the request is what is billed and what
+limits how many pods fit a node. This module records what finished runs
+used, per workload:version, and turns that into smaller requests:
+
+    history = UsageHistory()
+    collect(transport, PrometheusSource(transport), history)
+    rec = recommend(history.runs("stellar_optimization:v1.0.0"))
+    print(rec.cpu, rec.memory, rec.cpu_hours_saved_per_run)
+
+Usage is per pod: samples are each pod's CPU (cores) and working-set memory
+(bytes) over its run, so Indexed Jobs and retries count once per pod. Each
+run is kept only as a summary (p50/p95/max CPU, p95/max memory, requests and
+duration), the last HISTORY_RUNS per workload:version, in one small JSON
+file (~/.cache/ml-platform/usage.json, ML_PLATFORM_USAGE to move it).
+
+Samples come from one of:
+
+    PrometheusSource  container_cpu_usage_seconds_total / container_memory_working_set_bytes
+                      over each finished Job's run (cAdvisor metrics, any retention)
+    MetricsApiSampler metrics.k8s.io snapshots of running pods, taken every few
+                      seconds by `ml-platform rightsize collect --source=metrics-api`
+    FixtureSource     a JSON file of per-job samples, for offline use and benchmarks
+
+The CPU request covers the highest per-run p95 (CPU is compressible, a busy
+minute over it is only throttled); the memory request covers the largest peak
+(memory is not: a pod over its limit is OOM-killed). Both get a safety margin
+and are rounded up to Autopilot's steps. Failed runs are recorded too, with
+their outcome: their usage counts towards the peaks, and a run that was
+OOM-killed keeps the memory request above what it had when it was killed.
+"""
+
+import json
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .job import TERMINAL_STATES, job_condition
+from .manifest import JobSpec, parse_quantity
+from .metrics import propagate
+from .timeline import parse_time
+from .transport import ApiError, HttpTransport, Transport, api_path, paginate
+
+# Runs kept per workload:version
+HISTORY_RUNS = 20
+
+# Runs needed before a recommendation is made
+MIN_RUNS = 3
+
+# Headroom added to observed usage
+DEFAULT_MARGIN = 0.2
+
+# Autopilot bills CPU in 250m steps and needs at least 250m / 512Mi per pod
+CPU_STEP = 0.25
+MEMORY_STEP = 256 * 2 ** 20
+MIN_CPU = 0.25
+MIN_MEMORY = 512 * 2 ** 20
+
+# Bump when the shape of the history file changes (older files load with defaults
+# for the fields they lack)
+HISTORY_VERSION = 2
+
+# In-cluster Prometheus (gitops/apps/prometheus), reached through the API server proxy
+PROMETHEUS_NAMESPACE = "monitoring"
+PROMETHEUS_SERVICE = "prometheus-server:80"
+
+# Seconds between points of a Prometheus range query
+PROMETHEUS_STEP = 30
+
+# Platform images are <registry>/ml-platform/<workload>:<version>
+_IMAGE = re.compile(r"/([^/:@]+):([^/:@]+)$")
+
+
+def usage_path() -> str:
+    """Usage history: ML_PLATFORM_USAGE, else ~/.cache/ml-platform/usage.json"""
+    if os.environ.get("ML_PLATFORM_USAGE"):
+        return os.environ["ML_PLATFORM_USAGE"]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "ml-platform", "usage.json")
+
+
+def _percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, math.ceil(q * len(values)) - 1))]
+
+
+def _round_up(value: float, step: float) -> float:
+    return math.ceil(value / step - 1e-9) * step
+
+
+def format_cpu(cores: float) -> str:
+    """Cores as a Kubernetes quantity: "2", "1.5" -> "1500m\""""
+    millis = int(round(cores * 1000))
+    return str(millis // 1000) if millis % 1000 == 0 else f"{millis}m"
+
+
+def format_memory(size: float) -> str:
+    """Bytes as a Kubernetes quantity in Gi or Mi"""
+    mib = int(math.ceil(size / 2 ** 20))
+    return f"{mib // 1024}Gi" if mib % 1024 == 0 else f"{mib}Mi"
+
+
+def job_workload(job: Dict) -> Tuple[str, str]:
+    """(workload, version) of a Job, from its image tag (else its app label and "latest")"""
+    containers = job.get("spec", {}).get("template", {}).get("spec", {}).get("containers") or [{}]
+    match = _IMAGE.search(containers[0].get("image", ""))
+    if match:
+        return match.group(1), match.group(2)
+    labels = job.get("metadata", {}).get("labels") or {}
+    return labels.get("app") or job["metadata"]["name"], "latest"
+
+
+def job_requests(job: Dict) -> Tuple[float, float]:
+    """Per-pod (CPU, memory bytes) requested by a Job's first container"""
+    containers = job.get("spec", {}).get("template", {}).get("spec", {}).get("containers") or [{}]
+    requests = (containers[0].get("resources") or {}).get("requests") or {}
+    return parse_quantity(requests.get("cpu", 0)), parse_quantity(requests.get("memory", 0))
+
+
+class RunUsage(NamedTuple):
+    """What one finished Job's pods used, per pod, and how it ended"""
+    job: str
+    finished: float                 # completion time (epoch seconds)
+    duration: float                 # seconds from start to completion
+    pods: int
+    cpu_request: float              # cores
+    memory_request: float           # bytes
+    cpu_p50: float
+    cpu_p95: float
+    cpu_max: float
+    memory_p95: float
+    memory_max: float
+    outcome: str = "Complete"       # "Complete", "Failed" or "OOMKilled"
+
+
+def summarize_run(job: Dict, samples: List[Tuple[Optional[float], float]], pods: int = 1,
+                  outcome: Optional[str] = None) -> RunUsage:
+    """A RunUsage from a Job object and its pods' (CPU, memory) samples
+
+    CPU may be None in a sample (no rate yet at a pod's first point). A run
+    without samples (an OOM-killed pod Prometheus never scraped) has zero usage.
+    outcome defaults to the Job's terminal condition.
+    """
+    status = job.get("status") or {}
+    start = parse_time(status.get("startTime")) or parse_time(
+        job["metadata"].get("creationTimestamp")) or 0.0
+    end = parse_time(status.get("completionTime")) or _condition_time(job) or start
+    cpu = [s[0] for s in samples if s[0] is not None] or [0.0]
+    memory = [s[1] for s in samples] or [0.0]
+    cpu_request, memory_request = job_requests(job)
+    return RunUsage(job["metadata"]["name"], end, max(0.0, end - start), pods,
+                    cpu_request, memory_request,
+                    _percentile(cpu, 0.5), _percentile(cpu, 0.95), max(cpu),
+                    _percentile(memory, 0.95), max(memory), outcome or job_condition(job))
+
+
+def _condition_time(job: Dict) -> Optional[float]:
+    for condition in (job.get("status") or {}).get("conditions") or []:
+        if condition.get("type") in ("Complete", "Failed"):
+            return parse_time(condition.get("lastTransitionTime"))
+    return None
+
+
+class UsageHistory:
+    """Per-run usage summaries, HISTORY_RUNS per workload:version, in one JSON file
+
+    Runs are stored as rows of RunUsage fields (not objects with keys), which
+    keeps a few hundred workloads' history to tens of kilobytes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or usage_path()
+        self._runs = None
+
+    def _load(self) -> Dict[str, List[RunUsage]]:
+        if self._runs is None:
+            self._runs = {}
+            try:
+                with open(self.path) as f:
+                    doc = json.load(f)
+                fields = doc.get("fields") or []
+                if (1 <= doc.get("version", 0) <= HISTORY_VERSION
+                        and set(fields) <= set(RunUsage._fields)):
+                    self._runs = {key: [RunUsage(**dict(zip(fields, row))) for row in rows]
+                                  for key, rows in doc.get("workloads", {}).items()}
+            except (OSError, ValueError, TypeError, AttributeError):
+                pass
+        return self._runs
+
+    def save(self):
+        doc = {"version": HISTORY_VERSION, "fields": list(RunUsage._fields),
+               "workloads": {key: [[round(v, 4) if isinstance(v, float) else v for v in run]
+                                   for run in runs]
+                             for key, runs in sorted(self._load().items())}}
+        # Write-then-rename so a concurrent submit --rightsize never reads a partial file
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(doc, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def add(self, key: str, run: RunUsage) -> bool:
+        """Record a run under workload:version; False if that Job is already recorded"""
+        runs = self._load().setdefault(key, [])
+        if any(r.job == run.job for r in runs):
+            return False
+        runs.append(run)
+        runs.sort(key=lambda r: r.finished)
+        del runs[:-HISTORY_RUNS]
+        return True
+
+    def jobs(self) -> set:
+        return {run.job for runs in self._load().values() for run in runs}
+
+    def keys(self) -> List[str]:
+        return sorted(self._load())
+
+    def runs(self, key: str) -> List[RunUsage]:
+        return list(self._load().get(key, []))
+
+    def completed(self, key: str) -> int:
+        """Completed runs recorded under workload:version (what recommend() needs min_runs of)"""
+        return sum(run.outcome == "Complete" for run in self._load().get(key, []))
+
+    def latest(self, workload: str, min_runs: int = MIN_RUNS) -> Optional[str]:
+        """Most recently run workload:version of a workload with at least min_runs completed runs"""
+        keys = [(runs[-1].finished, key) for key, runs in self._load().items()
+                if key.split(":", 1)[0] == workload and self.completed(key) >= min_runs]
+        return max(keys)[1] if keys else None
+
+
+class Recommendation(NamedTuple):
+    """Suggested per-pod requests for a workload:version, and what they save"""
+    key: str
+    runs: int
+    cpu: str
+    memory: str
+    current_cpu: float              # cores requested by the latest run
+    current_memory: float           # bytes
+    cpu_hours_saved_per_run: float  # (current - recommended) x pods x duration
+    gib_hours_saved_per_run: float
+    oom_kills: int = 0              # runs OOM-killed; memory stays above their request
+
+    @property
+    def cpu_saving(self) -> float:
+        """Fraction of the CPU request saved"""
+        return 1 - parse_quantity(self.cpu) / self.current_cpu if self.current_cpu else 0.0
+
+    @property
+    def memory_saving(self) -> float:
+        return 1 - parse_quantity(self.memory) / self.current_memory if self.current_memory else 0.0
+
+    def to_dict(self) -> Dict:
+        return dict(self._asdict(), cpu_saving=self.cpu_saving, memory_saving=self.memory_saving)
+
+
+def recommend(runs: List[RunUsage], margin: float = DEFAULT_MARGIN, key: str = "",
+              min_runs: int = MIN_RUNS) -> Optional[Recommendation]:
+    """Requests covering past runs plus a margin (None with fewer than min_runs completed runs)
+
+    Failed runs' usage counts towards the peaks, and an OOM-killed run's memory
+    request (which proved too small) is raised by the margin as a floor.
+    """
+    completed = [r for r in runs if r.outcome == "Complete"]
+    if len(completed) < max(1, min_runs):
+        return None
+    oom_requests = [r.memory_request for r in runs if r.outcome == "OOMKilled"]
+    cpu = _round_up(max(MIN_CPU, max(r.cpu_p95 for r in runs) * (1 + margin)), CPU_STEP)
+    memory = _round_up(max(MIN_MEMORY, max(r.memory_max for r in runs) * (1 + margin),
+                           max(oom_requests, default=0.0) * (1 + margin)), MEMORY_STEP)
+    latest = runs[-1]
+    pod_hours = sum(r.pods * r.duration for r in completed) / len(completed) / 3600
+    return Recommendation(key, len(runs), format_cpu(cpu), format_memory(memory),
+                          latest.cpu_request, latest.memory_request,
+                          (latest.cpu_request - cpu) * pod_hours,
+                          (latest.memory_request - memory) / 2 ** 30 * pod_hours,
+                          len(oom_requests))
+
+
+def rightsize_spec(values: Dict, rec: Recommendation) -> Dict:
+    """cpu/memory (and limits, keeping their ratio to the requests) for a resolved spec"""
+    cpu, memory = parse_quantity(rec.cpu), parse_quantity(rec.memory)
+    cpu_ratio = parse_quantity(values["cpu_limit"]) / parse_quantity(values["cpu"])
+    memory_ratio = parse_quantity(values["memory_limit"]) / parse_quantity(values["memory"])
+    return {"cpu": rec.cpu, "memory": rec.memory,
+            "cpu_limit": format_cpu(_round_up(cpu * max(1.0, cpu_ratio), CPU_STEP)),
+            "memory_limit": format_memory(_round_up(memory * max(1.0, memory_ratio), MEMORY_STEP))}
+
+
+# --- sample sources ---
+
+
+class FixtureSource:
+    """Per-pod samples from a JSON file: {"jobs": {job name: [[cpu, memory bytes], ...]}}"""
+
+    def __init__(self, path_or_doc):
+        if isinstance(path_or_doc, str):
+            with open(path_or_doc) as f:
+                path_or_doc = json.load(f)
+        self.samples = path_or_doc.get("jobs", {})
+
+    def samples_for(self, job: Dict) -> Tuple[List[Tuple[float, float]], int]:
+        """(samples, pods) for a finished Job; no samples if the source has none"""
+        return [tuple(s) for s in self.samples.get(job["metadata"]["name"], [])], 1
+
+
+class PrometheusSource:
+    """Per-pod usage over each Job's run from Prometheus (cAdvisor metrics)
+
+    Args:
+        transport: Cluster transport; Prometheus is reached through the API server's
+            service proxy (PROMETHEUS_NAMESPACE/PROMETHEUS_SERVICE)
+        address: Prometheus URL (e.g. http://127.0.0.1:9090 for a port-forward)
+        step: Seconds between points
+    """
+
+    def __init__(self, transport: Optional[Transport] = None, address: Optional[str] = None,
+                 step: int = PROMETHEUS_STEP):
+        address = address or os.environ.get("ML_PLATFORM_PROMETHEUS_URL")
+        if address:
+            from .kubeconfig import KubeConfig
+            self.transport = HttpTransport(KubeConfig(address, {}, {}, "prometheus"))
+            self.base_path = ""
+        else:
+            if transport is None:
+                raise ValueError("PrometheusSource needs a cluster transport or an address")
+            self.transport = transport
+            self.base_path = api_path("", "v1", "services", PROMETHEUS_NAMESPACE,
+                                      PROMETHEUS_SERVICE, "proxy")
+        self.step = step
+
+    def _range(self, query: str, start: float, end: float) -> Dict[str, Dict[float, float]]:
+        """pod -> {timestamp: value}"""
+        result = self.transport.get(self.base_path + "/api/v1/query_range", {
+            "query": query, "start": f"{start:.3f}", "end": f"{end:.3f}", "step": str(self.step)})
+        series = {}
+        for item in (result.get("data") or {}).get("result") or []:
+            pod = item.get("metric", {}).get("pod", "")
+            series.setdefault(pod, {}).update(
+                (float(t), float(v)) for t, v in item.get("values") or [])
+        return series
+
+    def samples_for(self, job: Dict) -> Tuple[List[Tuple[float, float]], int]:
+        meta = job["metadata"]
+        status = job.get("status") or {}
+        start = parse_time(status.get("startTime")) or parse_time(meta.get("creationTimestamp"))
+        end = parse_time(status.get("completionTime")) or _condition_time(job) or time.time()
+        # Job names are DNS labels, so the pod regex needs no escaping
+        selector = (f'namespace="{meta.get("namespace", "jobs")}",'
+                    f'pod=~"{meta["name"]}-.*",container="worker"')
+        cpu = self._range(f"sum by (pod) (rate(container_cpu_usage_seconds_total{{{selector}}}"
+                          f"[{2 * self.step}s]))", start, end)
+        memory = self._range(f"sum by (pod) (container_memory_working_set_bytes{{{selector}}})",
+                             start, end)
+        # rate() needs two points, so a pod's CPU series starts a step after its memory:
+        # pair the two by timestamp, leaving CPU unknown where there is no rate yet
+        samples = []
+        for pod, values in memory.items():
+            cores = cpu.get(pod, {})
+            samples.extend((cores.get(t), m) for t, m in sorted(values.items()))
+        return samples, len(memory)
+
+
+class MetricsApiSampler:
+    """Running pods' usage from metrics.k8s.io, accumulated per Job between snapshots
+
+    The metrics API only knows the present, so sample() is called every few
+    seconds while jobs run; samples_for() then serves the finished ones.
+    """
+
+    def __init__(self, transport: Transport, namespace: str = "jobs",
+                 label_selector: Optional[str] = None):
+        self.transport = transport
+        self.path = api_path("metrics.k8s.io", "v1beta1", "pods", namespace)
+        self.label_selector = label_selector
+        self._samples = {}          # job -> [(cpu, memory)]
+        self._pods = {}             # job -> pod names seen
+
+    def sample(self) -> int:
+        """Take one snapshot; returns the number of pods sampled"""
+        count = 0
+        for item in paginate(self.transport, self.path, {"labelSelector": self.label_selector}):
+            job = (item["metadata"].get("labels") or {}).get("job-name")
+            if not job:
+                continue
+            cpu = memory = 0.0
+            for container in item.get("containers") or []:
+                usage = container.get("usage") or {}
+                cpu += parse_quantity(usage.get("cpu", 0))
+                memory += parse_quantity(usage.get("memory", 0))
+            self._samples.setdefault(job, []).append((cpu, memory))
+            self._pods.setdefault(job, set()).add(item["metadata"]["name"])
+            count += 1
+        return count
+
+    def samples_for(self, job: Dict) -> Tuple[List[Tuple[float, float]], int]:
+        name = job["metadata"]["name"]
+        return self._samples.pop(name, []), len(self._pods.pop(name, ()))
+
+
+def _key(job: Dict) -> str:
+    return ":".join(job_workload(job))
+
+
+def _outcome(transport: Transport, job: Dict) -> str:
+    """Complete, or for a failed Job OOMKilled if one of its pods' containers was"""
+    state = job_condition(job)
+    if state != "Failed":
+        return state
+    meta = job["metadata"]
+    try:
+        pods = transport.get(api_path("", "v1", "pods", meta.get("namespace", "jobs")),
+                             {"labelSelector": f"job-name={meta['name']}"}).get("items", [])
+    except ApiError:
+        return state
+    for pod in pods:
+        for status in (pod.get("status") or {}).get("containerStatuses") or []:
+            for key in ("state", "lastState"):
+                if ((status.get(key) or {}).get("terminated") or {}).get("reason") == "OOMKilled":
+                    return "OOMKilled"
+    return state
+
+
+def collect(transport: Transport, source, history: UsageHistory, namespace: str = "jobs",
+            label_selector: Optional[str] = None, max_concurrency: int = 8) -> Dict[str, int]:
+    """Record every finished Job not yet in the history; returns runs added per workload:version
+
+    Failed Jobs are recorded with their outcome (Failed or OOMKilled). Jobs the
+    source has no samples for are skipped (and tried again next time), except
+    OOM-killed ones, whose memory request is worth keeping on its own.
+    """
+    recorded = history.jobs()
+    finished = [job for job in paginate(transport, api_path("batch", "v1", "jobs", namespace),
+                                        {"labelSelector": label_selector})
+                if job["metadata"]["name"] not in recorded and job_condition(job) in TERMINAL_STATES]
+
+    def fetch(job):
+        outcome = _outcome(transport, job)
+        try:
+            return job, outcome, source.samples_for(job)
+        except ApiError:
+            return job, outcome, ([], 0)
+
+    added = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(finished) or 1))) as pool:
+        for job, outcome, (samples, pods) in pool.map(propagate(fetch), finished):
+            if not samples and outcome != "OOMKilled":
+                continue
+            if history.add(_key(job), summarize_run(job, samples, max(1, pods), outcome)):
+                added[_key(job)] = added.get(_key(job), 0) + 1
+    if added:
+        history.save()
+    return added
+
+
+def recommendations(history: UsageHistory, margin: float = DEFAULT_MARGIN,
+                    keys: Optional[Iterable[str]] = None,
+                    min_runs: int = MIN_RUNS) -> List[Recommendation]:
+    """One Recommendation per workload:version with enough runs"""
+    recs = (recommend(history.runs(key), margin, key, min_runs) for key in keys or history.keys())
+    return [rec for rec in recs if rec is not None]
+
+
+def apply_recommendation(compiler, specs: List[Dict], rec: Recommendation) -> int:
+    """Set a recommendation's requests and limits on submit_job specs, in place
+
+    Specs that set cpu or memory themselves are left alone. Returns the number changed.
+
+    Args:
+        compiler: ManifestCompiler that resolves each spec's current resources
+        specs: submit_job keyword dicts
+        rec: From recommend()
+    """
+    changed = 0
+    for spec in specs:
+        if spec.get("cpu") is not None or spec.get("memory") is not None:
+            continue
+        values = compiler.resolve(JobSpec(**{k: v for k, v in spec.items()
+                                             if k in JobSpec._fields}))
+        spec.update(rightsize_spec(values, rec))
+        changed += 1
+    return changed
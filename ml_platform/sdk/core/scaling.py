@@ -0,0 +1,307 @@
+"""Ray worker scaling - resize a named worker group and wait for the capacity to arrive
+
+RayCluster has no scale subresource, so a worker group is resized by
+patching its replicas. The patch addresses the group by position but
+guards it with a JSON patch "test" on the group's name, so a reordered
+spec fails the patch instead of resizing the wrong group. Requests are
+clamped to the group's minReplicas/maxReplicas.
+
+Waiting is watch-driven: an informer over the group's pods, started
+before the patch, notices them becoming Ready (or going away), then the Ray
+dashboard's state API is polled until the cluster reports the expected
+CPUs. Both times are reported, so time-to-capacity can be tracked while
+tuning node pools and images:
+
+    scaler = RayScaler(transport)
+    result = scaler.scale(4, group="cpu-workers", timeout=600)
+    print(result.pods_ready_seconds, result.capacity_seconds)
+
+autoscale() sizes the group from demand instead: Ray tasks waiting for a
+node or running, plus Jobs that have not started yet (each expected to
+need cpus_per_job once its driver connects).
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+from .informer import Informer
+from .manifest import parse_quantity
+from .transport import JSON_PATCH, ApiError, Transport, api_path
+
+# The platform's RayCluster (kubernetes/ray/ray-cluster.yaml)
+RAY_CLUSTER = "ray-cluster"
+RAY_NAMESPACE = "ray-system"
+
+# Ray task states counted as demand by autoscale()
+PENDING_TASK_STATES = ("PENDING_NODE_ASSIGNMENT", "PENDING_ARGS_AVAIL")
+RUNNING_TASK_STATE = "RUNNING"
+
+# Seconds between dashboard polls once the pods are ready
+CAPACITY_POLL_INTERVAL = 1.0
+
+
+def group_cpus(spec: Dict) -> float:
+    """CPUs one pod of a head or worker group gives Ray (num-cpus, else the container request)"""
+    num_cpus = (spec.get("rayStartParams") or {}).get("num-cpus")
+    if num_cpus is not None:
+        return float(num_cpus)
+    containers = spec.get("template", {}).get("spec", {}).get("containers") or [{}]
+    request = containers[0].get("resources", {}).get("requests", {}).get("cpu")
+    return parse_quantity(request) if request is not None else 1.0
+
+
+class WorkerGroup:
+    """One entry of a RayCluster's workerGroupSpecs"""
+
+    def __init__(self, spec: Dict, index: int):
+        self.name = spec.get("groupName", "")
+        self.index = index
+        self.replicas = int(spec.get("replicas", 0))
+        self.min_replicas = int(spec.get("minReplicas", 0))
+        self.max_replicas = int(spec.get("maxReplicas", max(self.replicas, self.min_replicas)))
+        self.cpus_per_worker = group_cpus(spec)
+
+    def clamp(self, replicas: int) -> int:
+        return max(self.min_replicas, min(self.max_replicas, int(replicas)))
+
+    def patch(self, replicas: int):
+        """JSON patch setting replicas, guarded by a test on the group name"""
+        base = f"/spec/workerGroupSpecs/{self.index}"
+        return [{"op": "test", "path": f"{base}/groupName", "value": self.name},
+                {"op": "add", "path": f"{base}/replicas", "value": int(replicas)}]
+
+    def __repr__(self) -> str:
+        return (f"WorkerGroup({self.name!r}, replicas={self.replicas}, "
+                f"min={self.min_replicas}, max={self.max_replicas})")
+
+
+def worker_group(cluster: Dict, name: Optional[str] = None) -> WorkerGroup:
+    """The named worker group of a RayCluster object (the first one if name is None)"""
+    specs = cluster.get("spec", {}).get("workerGroupSpecs") or []
+    for index, spec in enumerate(specs):
+        if name is None or spec.get("groupName") == name:
+            return WorkerGroup(spec, index)
+    known = ", ".join(s.get("groupName", "?") for s in specs) or "none"
+    raise ValueError(f"Worker group {name!r} not found (groups: {known})")
+
+
+def autoscaler_enabled(cluster: Dict) -> bool:
+    """True when KubeRay's in-tree autoscaler manages replicas (and may undo a manual scale)"""
+    return bool(cluster.get("spec", {}).get("enableInTreeAutoscaling"))
+
+
+def _pod_ready(pod: Dict) -> bool:
+    if pod.get("metadata", {}).get("deletionTimestamp"):
+        return False
+    status = pod.get("status", {})
+    return status.get("phase") == "Running" and any(
+        c.get("type") == "Ready" and c.get("status") == "True" for c in status.get("conditions") or [])
+
+
+class ScaleResult:
+    """Outcome of a scale: what was asked, what was set, and how long capacity took"""
+
+    def __init__(self, group: WorkerGroup, requested: int, autoscaler: bool = False):
+        self.group = group.name
+        self.previous = group.replicas
+        self.requested = requested
+        self.replicas = group.clamp(requested)
+        self.autoscaler = autoscaler
+        self.demand = None              # autoscale() only: the demand it sized from
+        self.ready_pods = None
+        self.ray_cpus = None            # CPUs Ray reported when done (None: dashboard unreachable)
+        self.expected_cpus = None
+        self.pods_ready_seconds = None  # patch -> group pods Ready
+        self.capacity_seconds = None    # patch -> Ray reports the CPUs
+        self.timed_out = False
+
+    @property
+    def clamped(self) -> bool:
+        return self.replicas != self.requested
+
+    @property
+    def changed(self) -> bool:
+        return self.replicas != self.previous
+
+    def to_dict(self) -> Dict:
+        return {"group": self.group, "previous": self.previous, "requested": self.requested,
+                "replicas": self.replicas, "clamped": self.clamped, "autoscaler": self.autoscaler,
+                "demand": self.demand, "ready_pods": self.ready_pods, "ray_cpus": self.ray_cpus,
+                "expected_cpus": self.expected_cpus,
+                "pods_ready_seconds": self.pods_ready_seconds,
+                "capacity_seconds": self.capacity_seconds, "timed_out": self.timed_out}
+
+    def __repr__(self) -> str:
+        return (f"ScaleResult({self.group!r}, {self.previous} -> {self.replicas}, "
+                f"capacity_seconds={self.capacity_seconds}, timed_out={self.timed_out})")
+
+
+class RayScaler:
+    """Scale worker groups of one RayCluster
+
+    Args:
+        transport: Cluster transport
+        cluster: RayCluster name
+        namespace: RayCluster namespace
+        ray: RayJobClient for the cluster's dashboard; without it capacity is
+            judged from pod readiness only and autoscale() sees no task demand
+    """
+
+    def __init__(self, transport: Transport, cluster: str = RAY_CLUSTER,
+                 namespace: str = RAY_NAMESPACE, ray=None):
+        self.transport = transport
+        self.cluster = cluster
+        self.namespace = namespace
+        self.ray = ray
+        self.path = api_path("ray.io", "v1", "rayclusters", namespace, cluster)
+
+    def get_cluster(self) -> Dict:
+        return self.transport.get(self.path)
+
+    def group(self, name: Optional[str] = None) -> WorkerGroup:
+        return worker_group(self.get_cluster(), name)
+
+    # --- Ray-side view ---
+
+    def ray_cpus(self) -> Optional[float]:
+        """Total CPUs of the live Ray nodes, or None when the dashboard can't be reached"""
+        if self.ray is None:
+            return None
+        try:
+            nodes = self.ray.nodes()
+        except (ApiError, OSError, ValueError):
+            return None
+        return sum(float((n.get("resources_total") or {}).get("CPU", 0))
+                   for n in nodes if n.get("state", "ALIVE") == "ALIVE")
+
+    def demand(self, job_namespace: str = "jobs") -> Dict:
+        """CPU demand autoscale() sizes from
+
+        pending_task_cpus / running_task_cpus are None when the dashboard
+        can't be reached; pending_jobs counts Job pods still Pending plus
+        Ray submissions not started yet.
+        """
+        demand = {"pending_task_cpus": None, "running_task_cpus": None, "pending_jobs": 0}
+        try:
+            pods = self.transport.get(api_path("", "v1", "pods", job_namespace),
+                                      {"fieldSelector": "status.phase=Pending"})
+            demand["pending_jobs"] = len(pods.get("items", []))
+        except ApiError:
+            pass
+        if self.ray is None:
+            return demand
+
+        def task_cpus(states):
+            return sum(float((t.get("required_resources") or {}).get("CPU", 1))
+                       for state in states for t in self.ray.tasks(state))
+        try:
+            demand["pending_task_cpus"] = task_cpus(PENDING_TASK_STATES)
+            demand["running_task_cpus"] = task_cpus((RUNNING_TASK_STATE,))
+            demand["pending_jobs"] += sum(1 for j in self.ray.list() if j.get("status") == "PENDING")
+        except (ApiError, OSError, ValueError):
+            pass
+        return demand
+
+    # --- scaling ---
+
+    def scale(self, replicas: int, group: Optional[str] = None, wait: bool = True,
+              timeout: float = 300.0) -> ScaleResult:
+        """Set a worker group's replicas (clamped to its min/max), optionally waiting for capacity
+
+        Raises ValueError for an unknown group and RuntimeError when the
+        patch is rejected. A wait that runs out sets result.timed_out
+        rather than raising.
+        """
+        cluster = self.get_cluster()
+        return self._scale(cluster, worker_group(cluster, group), replicas, wait, timeout)
+
+    def autoscale(self, group: Optional[str] = None, cpus_per_job: Optional[float] = None,
+                  job_namespace: str = "jobs", wait: bool = True,
+                  timeout: float = 300.0) -> ScaleResult:
+        """Size a worker group from current demand (see demand), then scale like scale()"""
+        cluster = self.get_cluster()
+        target = worker_group(cluster, group)
+        demand = self.demand(job_namespace)
+        per_job = cpus_per_job if cpus_per_job is not None else target.cpus_per_worker
+        needed = ((demand["pending_task_cpus"] or 0) + (demand["running_task_cpus"] or 0)
+                  + demand["pending_jobs"] * per_job)
+        # The head takes tasks too; only what it can't hold needs workers
+        needed -= group_cpus(cluster.get("spec", {}).get("headGroupSpec") or {})
+        replicas = math.ceil(needed / target.cpus_per_worker) if needed > 0 else 0
+        result = self._scale(cluster, target, replicas, wait, timeout)
+        result.demand = demand
+        return result
+
+    def _scale(self, cluster: Dict, group: WorkerGroup, replicas: int, wait: bool,
+               timeout: float) -> ScaleResult:
+        result = ScaleResult(group, replicas, autoscaler_enabled(cluster))
+        pods, changed = None, threading.Event()
+        if wait:
+            # Watch before patching so no pod event is missed
+            pods = Informer(self.transport, api_path("", "v1", "pods", self.namespace),
+                            label_selector=f"ray.io/cluster={self.cluster},ray.io/group={group.name}")
+            pods.add_listener(lambda kind, obj: changed.set())
+        try:
+            ready_before, cpus_before = 0, None
+            if pods is not None:
+                try:
+                    pods.start(timeout=timeout)
+                    ready_before = sum(1 for p in pods.list() if _pod_ready(p))
+                    cpus_before = self.ray_cpus()
+                except TimeoutError:
+                    # Can't watch: still scale, just don't wait
+                    result.timed_out = True
+                    pods.stop()
+                    pods = None
+            started = time.monotonic()
+            if result.changed:
+                try:
+                    self.transport.patch(self.path, group.patch(result.replicas), JSON_PATCH)
+                except ApiError as e:
+                    raise RuntimeError(f"Failed to scale: {e}") from e
+            if pods is not None:
+                self._wait(result, group, pods, changed, ready_before, cpus_before, started, timeout)
+        finally:
+            if pods is not None:
+                pods.stop()
+        return result
+
+    def _wait(self, result: ScaleResult, group: WorkerGroup, pods: Informer,
+              changed: threading.Event, ready_before: int, cpus_before: Optional[float],
+              started: float, timeout: float):
+        """Block until the group's pods are Ready and Ray reports their CPUs (fills result)"""
+        deadline = started + timeout
+        # Pods: Ready ones when growing, all remaining ones when shrinking
+        while True:
+            changed.clear()
+            current = pods.list()
+            ready = sum(1 for p in current if _pod_ready(p))
+            alive = sum(1 for p in current if not p["metadata"].get("deletionTimestamp"))
+            result.ready_pods = ready
+            if ready >= result.replicas and alive <= result.replicas:
+                result.pods_ready_seconds = time.monotonic() - started
+                break
+            if not changed.wait(max(0.0, deadline - time.monotonic())):
+                result.timed_out = True
+                return
+
+        if cpus_before is None:
+            # No dashboard: ready pods are the best capacity signal there is
+            result.capacity_seconds = result.pods_ready_seconds
+            return
+        # Ray counted cpus_before with ready_before workers of this group
+        result.expected_cpus = cpus_before + (result.replicas - ready_before) * group.cpus_per_worker
+        growing = result.replicas >= ready_before
+        while True:
+            cpus = self.ray_cpus()
+            if cpus is not None:
+                result.ray_cpus = cpus
+                if (cpus >= result.expected_cpus) if growing else (cpus <= result.expected_cpus):
+                    result.capacity_seconds = time.monotonic() - started
+                    return
+            if time.monotonic() + CAPACITY_POLL_INTERVAL > deadline:
+                result.timed_out = True
+                return
+            time.sleep(CAPACITY_POLL_INTERVAL)
@@ -0,0 +1,99 @@
+"""Platform status - one concurrent list per resource kind, counted in Python"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from .informer import Informer
+from .metrics import propagate
+from .transport import ApiError, Transport, api_path
+
+# name -> REST collection the status summary is built from
+STATUS_SOURCES = {
+    "nodes": api_path("", "v1", "nodes"),
+    "ray_pods": api_path("", "v1", "pods", "ray-system"),
+    "job_pods": api_path("", "v1", "pods", "jobs"),
+    "jobs": api_path("batch", "v1", "jobs", "jobs"),
+}
+
+
+def _phase(obj: Dict) -> Optional[str]:
+    return obj.get("status", {}).get("phase")
+
+
+def _node_ready(node: Dict) -> bool:
+    return any(c.get("type") == "Ready" and c.get("status") == "True"
+               for c in node.get("status", {}).get("conditions") or [])
+
+
+def summarize_status(lists: Dict[str, Optional[List[Dict]]]) -> Dict:
+    """Count a status summary from listed objects (None = that list failed)"""
+    def count(name, predicate=None):
+        items = lists.get(name)
+        if items is None:
+            return None
+        return len(items) if predicate is None else sum(1 for i in items if predicate(i))
+
+    return {
+        "connected": lists.get("nodes") is not None,
+        "nodes": count("nodes"),
+        "ready_nodes": count("nodes", _node_ready),
+        "ray_pods": count("ray_pods", lambda p: _phase(p) == "Running"),
+        "ray_workers": count("ray_pods", lambda p: _phase(p) == "Running" and
+                             p["metadata"].get("labels", {}).get("ray.io/node-type") == "worker"),
+        "total_jobs": count("jobs"),
+        "active_jobs": count("jobs", lambda j: j.get("status", {}).get("active", 0) > 0),
+        "completed_jobs": count("jobs", lambda j: j.get("status", {}).get("succeeded", 0) > 0),
+        "failed_jobs": count("jobs", lambda j: j.get("status", {}).get("failed", 0) > 0
+                             and not j.get("status", {}).get("succeeded")),
+        "running_jobs": count("job_pods", lambda p: _phase(p) == "Running"),
+        "pending_pods": count("job_pods", lambda p: _phase(p) == "Pending"),
+    }
+
+
+def collect_status(transport: Transport, max_workers: int = 4) -> Dict:
+    """List every status source concurrently and summarize"""
+    def fetch(path):
+        try:
+            return transport.get(path).get("items", [])
+        except (ApiError, OSError):
+            return None
+
+    names = list(STATUS_SOURCES)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        results = pool.map(propagate(fetch), [STATUS_SOURCES[n] for n in names])
+    return summarize_status(dict(zip(names, results)))
+
+
+class StatusWatcher:
+    """Live status: one informer per source, summary recomputed from the caches"""
+
+    def __init__(self, transport: Transport):
+        self.informers = {name: Informer(transport, path) for name, path in STATUS_SOURCES.items()}
+        self.changed = threading.Event()
+        for informer in self.informers.values():
+            informer.add_listener(lambda kind, obj: self.changed.set())
+
+    def start(self, timeout: float = 30.0) -> "StatusWatcher":
+        for informer in self.informers.values():
+            informer.start(wait=False)
+        for informer in self.informers.values():
+            try:
+                informer.start(timeout=timeout)
+            except TimeoutError:
+                pass
+        return self
+
+    def stop(self):
+        for informer in self.informers.values():
+            informer.stop()
+
+    def summary(self) -> Dict:
+        return summarize_status({name: inf.list() if inf.synced else None
+                                 for name, inf in self.informers.items()})
+
+    def wait_for_change(self, timeout: Optional[float] = None) -> bool:
+        """Block until any watched object changes (or timeout). Returns True on change."""
+        changed = self.changed.wait(timeout)
+        self.changed.clear()
+        return changed
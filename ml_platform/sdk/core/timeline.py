@@ -0,0 +1,357 @@
+"""Job timelines - where the time goes between submit and first useful work
+
+A Job's life is cut into phases at milestones the API server already
+records, so no instrumentation in the workload is needed:
+
+    queue            Job created            -> its first pod created
+    schedule         pod created            -> PodScheduled
+    image_pull       scheduled              -> image pulled (Pulled event)
+    container_start  image pulled           -> container running (startedAt)
+    ray_connect      container running      -> driver connected to Ray (first matching log line)
+    run              connected              -> Job Complete/Failed
+
+The first pod is used, since it is the one that stood between the submit and
+the first useful work; later pods only raise the attempt count. A milestone
+that can't be found (events are kept for about an hour, pods get deleted, a
+driver may never print) leaves its phase empty and the next phase starts at
+the last milestone that is known, so the phases always add up to the total.
+
+build_timeline() works on plain API objects and is what tests and recorded
+fixtures use; fetch_timelines() reads them from the cluster for one job or a
+whole sweep with a handful of list requests, and summarize() turns many
+timelines into per-phase percentiles:
+
+    timelines = fetch_timelines(transport, label_selector="app=my-sweep")
+    print(summarize(timelines)["ray_connect"]["p90"])
+"""
+
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+from .job import job_condition
+from .logs import MAX_SELECTOR_NAMES, split_timestamp
+from .metrics import propagate
+from .transport import ApiError, Transport, api_path, paginate
+
+MILESTONES = ("submitted", "pod_created", "scheduled", "image_pulled", "container_started",
+              "ray_connected", "finished")
+
+# phase -> the milestone that ends it (it starts at the previous known milestone)
+PHASES = {
+    "queue": "pod_created",
+    "schedule": "scheduled",
+    "image_pull": "image_pulled",
+    "container_start": "container_started",
+    "ray_connect": "ray_connected",
+    "run": "finished",
+}
+
+# Driver output that means ray.init() returned (train.py prints the cluster
+# resources right after connecting; Ray's client prints the second)
+RAY_CONNECTED = re.compile(r"Ray cluster resources|Connected to Ray cluster")
+
+# Only the start of a log is searched for the connect line
+LOG_SCAN_BYTES = 64 * 1024
+
+QUANTILES = (0.5, 0.9, 0.99)
+
+_FRACTION = re.compile(r"\.\d+")
+
+
+def parse_time(value: Optional[str]) -> Optional[float]:
+    """Epoch seconds from an RFC3339 timestamp, keeping fractional seconds and offsets"""
+    if not value:
+        return None
+    try:
+        moment = datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+    except ValueError:
+        return None
+    rest = value[19:]
+    fraction = 0.0
+    match = _FRACTION.match(rest)
+    if match:
+        fraction = float(match.group(0))
+        rest = rest[match.end():]
+    if rest[:1] in ("+", "-"):
+        hours, _, minutes = rest[1:].partition(":")
+        offset = timedelta(hours=int(hours or 0), minutes=int(minutes or 0))
+        moment = moment - offset if rest[0] == "+" else moment + offset
+    return moment.timestamp() + fraction
+
+
+def _event_time(event: Dict) -> Optional[float]:
+    return parse_time(event.get("eventTime") or event.get("firstTimestamp")
+                      or event.get("metadata", {}).get("creationTimestamp"))
+
+
+def _main_container(event: Dict) -> bool:
+    # Init containers and sidecars injected as init containers don't gate the workload
+    field_path = event.get("involvedObject", {}).get("fieldPath", "")
+    return not field_path.startswith("spec.initContainers")
+
+
+def _condition_time(conditions, kind: str) -> Optional[float]:
+    for condition in conditions or []:
+        if condition.get("type") == kind and condition.get("status", "True") == "True":
+            return parse_time(condition.get("lastTransitionTime"))
+    return None
+
+
+def _first(values: Iterable[Optional[float]]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return min(values) if values else None
+
+
+def _first_pod(pods: List[Dict]) -> Optional[Dict]:
+    return min(pods, key=lambda p: parse_time(p["metadata"].get("creationTimestamp")) or 0.0,
+               default=None)
+
+
+def _seconds(value: float) -> float:
+    # Epoch floats carry ~0.1us of noise; API timestamps are at best microseconds
+    return round(value, 6)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    return values[max(0, min(len(values) - 1, math.ceil(q * len(values)) - 1))]
+
+
+class Timeline:
+    """Milestones (epoch seconds) of one job and the phases between them"""
+
+    def __init__(self, name: str, namespace: str, milestones: Dict[str, Optional[float]],
+                 status: str = "Unknown", pod: Optional[str] = None, attempts: int = 0,
+                 image_cached: Optional[bool] = None):
+        self.name = name
+        self.namespace = namespace
+        self.milestones = {m: milestones.get(m) for m in MILESTONES}
+        self.status = status
+        self.pod = pod                    # the pod the milestones were read from
+        self.attempts = attempts          # pods the job has created
+        self.image_cached = image_cached  # Pulled said "already present on machine"
+
+    @property
+    def phases(self) -> Dict[str, Optional[float]]:
+        """Seconds per phase; None where the milestone ending it is unknown"""
+        phases = {}
+        last = self.milestones["submitted"]
+        for phase, milestone in PHASES.items():
+            at = self.milestones[milestone]
+            phases[phase] = None if at is None or last is None else _seconds(max(0.0, at - last))
+            if at is not None:
+                last = at
+        return phases
+
+    @property
+    def to_first_work(self) -> Optional[float]:
+        """Submit -> Ray connected, or container running when the driver never said so"""
+        start = self.milestones["submitted"]
+        work = self.milestones["ray_connected"] or self.milestones["container_started"]
+        return None if start is None or work is None else _seconds(work - start)
+
+    @property
+    def total(self) -> Optional[float]:
+        start, end = self.milestones["submitted"], self.milestones["finished"]
+        return None if start is None or end is None else _seconds(end - start)
+
+    def durations(self) -> Dict[str, Optional[float]]:
+        return dict(self.phases, to_first_work=self.to_first_work, total=self.total)
+
+    def to_dict(self) -> Dict:
+        return {"name": self.name, "namespace": self.namespace, "status": self.status,
+                "pod": self.pod, "attempts": self.attempts, "image_cached": self.image_cached,
+                "milestones": self.milestones, "phases": self.phases,
+                "to_first_work": self.to_first_work, "total": self.total}
+
+    def __repr__(self) -> str:
+        return f"Timeline({self.name!r}, status={self.status!r}, total={self.total})"
+
+
+def build_timeline(job: Dict, pods: List[Dict], events: List[Dict],
+                   log_lines: Optional[List[str]] = None, pattern=RAY_CONNECTED) -> Timeline:
+    """Timeline of one Job from its object, its pods, their events and timestamped log lines
+
+    log_lines are the first pod's lines as read with timestamps=true.
+    """
+    meta = job.get("metadata", {})
+    status = job.get("status", {})
+    milestones = {
+        "submitted": parse_time(meta.get("creationTimestamp")),
+        "finished": (parse_time(status.get("completionTime"))
+                     or _condition_time(status.get("conditions"), "Complete")
+                     or _condition_time(status.get("conditions"), "Failed")),
+    }
+    pod = _first_pod(pods)
+    image_cached = None
+    if pod is not None:
+        pod_name = pod["metadata"]["name"]
+        pod_events = {}
+        for event in events:
+            involved = event.get("involvedObject", {})
+            if involved.get("kind", "Pod") == "Pod" and involved.get("name") == pod_name:
+                pod_events.setdefault(event.get("reason"), []).append(event)
+        pulled = [e for e in pod_events.get("Pulled", []) if _main_container(e)]
+        pulled_at = [t for t in map(_event_time, pulled) if t is not None]
+        if pulled:
+            image_cached = all("already present" in e.get("message", "") for e in pulled)
+        pod_status = pod.get("status", {})
+        started = []
+        for container in pod_status.get("containerStatuses") or []:
+            for state in (container.get("lastState") or {}, container.get("state") or {}):
+                run = state.get("running") or state.get("terminated") or {}
+                started.append(parse_time(run.get("startedAt")))
+        milestones.update({
+            "pod_created": parse_time(pod["metadata"].get("creationTimestamp")),
+            # The scheduler's event carries microseconds; the condition only seconds
+            "scheduled": (_first(_event_time(e) for e in pod_events.get("Scheduled", []))
+                          or _condition_time(pod_status.get("conditions"), "PodScheduled")),
+            # The last container's image gates the pod; each container's first pull counts
+            "image_pulled": max(pulled_at, default=None),
+            "container_started": (_first(started) or _first(
+                _event_time(e) for e in pod_events.get("Started", []) if _main_container(e))),
+        })
+        for raw in log_lines or []:
+            stamp, text = split_timestamp(raw)
+            if stamp and pattern.search(text):
+                milestones["ray_connected"] = parse_time(stamp)
+                break
+    state = job_condition(job)
+    if state == "Unknown" and status.get("active"):
+        state = "Running"
+    return Timeline(meta.get("name", ""), meta.get("namespace", ""), milestones, state,
+                    pod["metadata"]["name"] if pod else None, len(pods), image_cached)
+
+
+def collect(transport: Transport, namespace: str = "jobs", names: Optional[List[str]] = None,
+            label_selector: Optional[str] = None, logs: bool = True,
+            max_concurrency: int = 16) -> Dict:
+    """Read the objects timelines are built from
+
+    Returns {"jobs": [...], "pods": [...], "events": [...], "logs": {pod: [lines]}}:
+    the named jobs (or those matching label_selector), their pods, the pods'
+    events and the start of each job's first pod log (timestamps=true).
+    """
+    jobs_path = api_path("batch", "v1", "jobs", namespace)
+    if names:
+        jobs = [transport.get(f"{jobs_path}/{name}") for name in names]
+    else:
+        jobs = list(paginate(transport, jobs_path, {"labelSelector": label_selector}))
+    job_names = {j["metadata"]["name"] for j in jobs}
+    if not job_names:
+        return {"jobs": [], "pods": [], "events": [], "logs": {}}
+
+    pods_path = api_path("", "v1", "pods", namespace)
+    if len(job_names) <= MAX_SELECTOR_NAMES:
+        selector = f"job-name in ({','.join(sorted(job_names))})"
+    else:
+        selector = "job-name"
+    pods = [p for p in paginate(transport, pods_path, {"labelSelector": selector})
+            if p["metadata"].get("labels", {}).get("job-name") in job_names]
+
+    events_path = api_path("", "v1", "events", namespace)
+    pod_names = {p["metadata"]["name"] for p in pods}
+    if len(pod_names) == 1:
+        fields = f"involvedObject.kind=Pod,involvedObject.name={next(iter(pod_names))}"
+    else:
+        fields = "involvedObject.kind=Pod"
+    events = [e for e in paginate(transport, events_path, {"fieldSelector": fields})
+              if e.get("involvedObject", {}).get("name") in pod_names]
+
+    log_lines = {}
+    if logs and pods:
+        first = [_first_pod(group) for group in _by_job(pods).values()]
+
+        def read(pod):
+            name = pod["metadata"]["name"]
+            containers = pod.get("spec", {}).get("containers") or [{}]
+            params = {"timestamps": True, "limitBytes": LOG_SCAN_BYTES,
+                      "container": containers[0].get("name")}
+            try:
+                text = transport.request_raw("GET", f"{pods_path}/{name}/log", params)
+                return name, text.splitlines()
+            except ApiError:
+                return name, []
+
+        with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(first)))) as pool:
+            log_lines = dict(pool.map(propagate(read), first))
+    return {"jobs": jobs, "pods": pods, "events": events, "logs": log_lines}
+
+
+def _by_job(pods: List[Dict]) -> Dict[str, List[Dict]]:
+    by_job = {}
+    for pod in pods:
+        by_job.setdefault(pod["metadata"].get("labels", {}).get("job-name"), []).append(pod)
+    return by_job
+
+
+def build_timelines(objects: Dict, pattern=RAY_CONNECTED) -> List[Timeline]:
+    """Timelines for everything collect() returned (or a recorded fixture of it)"""
+    pods_by_job = _by_job(objects["pods"])
+    events_by_pod = {}
+    for event in objects["events"]:
+        events_by_pod.setdefault(event.get("involvedObject", {}).get("name"), []).append(event)
+    timelines = []
+    for job in objects["jobs"]:
+        pods = pods_by_job.get(job["metadata"]["name"], [])
+        events = [e for p in pods for e in events_by_pod.get(p["metadata"]["name"], [])]
+        first = _first_pod(pods)
+        lines = objects["logs"].get(first["metadata"]["name"]) if first else None
+        timelines.append(build_timeline(job, pods, events, lines, pattern))
+    return timelines
+
+
+def fetch_timelines(transport: Transport, namespace: str = "jobs",
+                    names: Optional[List[str]] = None, label_selector: Optional[str] = None,
+                    logs: bool = True, pattern=RAY_CONNECTED,
+                    max_concurrency: int = 16) -> List[Timeline]:
+    """Timelines of the named jobs, or of every job matching label_selector
+
+    Args:
+        transport: API transport
+        namespace: Namespace of the jobs
+        names: Job names (a missing job raises ApiError)
+        label_selector: Include every job matching it, e.g. a sweep's "app=..." label
+        logs: Read the start of each first pod's log to find the Ray connect
+        pattern: Regex marking the driver's connect line
+        max_concurrency: Parallel log reads
+    """
+    return build_timelines(collect(transport, namespace, names, label_selector, logs,
+                                   max_concurrency), pattern)
+
+
+def to_fixture(objects: Dict) -> Dict:
+    """collect() output in the recorded-fixture format FakeApiServer.load_fixture() reads"""
+    kinds = (("jobs", "batch/v1", "Job"), ("pods", "v1", "Pod"), ("events", "v1", "Event"))
+    recorded = []
+    for key, api_version, kind in kinds:
+        for obj in objects[key]:
+            obj = dict(obj, apiVersion=api_version, kind=kind)
+            obj["metadata"] = {k: v for k, v in obj["metadata"].items() if k != "managedFields"}
+            recorded.append(obj)
+    namespaces = {p["metadata"]["name"]: p["metadata"].get("namespace") for p in objects["pods"]}
+    return {"objects": recorded,
+            "logs": {f"{namespaces[pod]}/{pod}": "".join(line + "\n" for line in lines)
+                     for pod, lines in objects["logs"].items()}}
+
+
+def summarize(timelines: Iterable[Timeline]) -> Dict[str, Dict]:
+    """Per-phase count, mean, p50/p90/p99 and max seconds over the timelines that have it"""
+    values = {}
+    for timeline in timelines:
+        for key, seconds in timeline.durations().items():
+            if seconds is not None:
+                values.setdefault(key, []).append(seconds)
+    summary = {}
+    for key in list(PHASES) + ["to_first_work", "total"]:
+        if key not in values:
+            continue
+        ordered = sorted(values[key])
+        stats = {"count": len(ordered), "mean": sum(ordered) / len(ordered)}
+        stats.update({f"p{int(q * 100)}": _percentile(ordered, q) for q in QUANTILES})
+        stats["max"] = ordered[-1]
+        summary[key] = stats
+    return summary
@@ -0,0 +1,408 @@
+"""Transports - how the SDK talks to the Kubernetes API server
+
+Two implementations share one small REST-shaped interface:
+
+- HttpTransport: talks to the API server directly over a pool of persistent
+  keep-alive connections. Kubeconfig and credentials are resolved once.
+- KubectlTransport: shells out to ``kubectl`` per call. Slower, but works
+  anywhere kubectl does, so it stays as the fallback.
+
+``default_transport()`` picks one (``ML_PLATFORM_TRANSPORT=http|kubectl|auto``)
+and caches it per kubeconfig context so every client and job shares a pool.
+"""
+
+import http.client
+import json
+import os
+import re
+import subprocess
+import threading
+from typing import Dict, Iterator, Optional
+from urllib.parse import urlencode, urlsplit
+
+from . import metrics
+from .kubeconfig import KubeConfig, KubeConfigError
+
+# Accept header asking for metadata-only lists (no spec/status); ~10x smaller for Jobs
+METADATA_ONLY = "application/json;as=PartialObjectMetadataList;g=meta.k8s.io;v=v1,application/json"
+
+JSON_PATCH = "application/json-patch+json"
+MERGE_PATCH = "application/merge-patch+json"
+STRATEGIC_MERGE_PATCH = "application/strategic-merge-patch+json"
+
+# Errors that mean a pooled keep-alive connection went stale between requests
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine,
+                 ConnectionResetError, BrokenPipeError)
+
+
+class ApiError(RuntimeError):
+    """Error returned by the Kubernetes API server"""
+
+    def __init__(self, status: int, message: str, reason: str = ""):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.message = message
+
+    @property
+    def not_found(self) -> bool:
+        return self.status == 404
+
+
+def api_path(group: str, version: str, resource: str, namespace: Optional[str] = None,
+             name: Optional[str] = None, subresource: Optional[str] = None) -> str:
+    """Build a REST path, e.g. api_path("batch", "v1", "jobs", "jobs", "my-job")"""
+    parts = ["/api", version] if not group else ["/apis", group, version]
+    if namespace:
+        parts.extend(["namespaces", namespace])
+    parts.append(resource)
+    if name:
+        parts.append(name)
+    if subresource:
+        parts.append(subresource)
+    return "/".join(parts)
+
+
+def _with_query(path: str, params: Optional[Dict]) -> str:
+    params = {k: v for k, v in (params or {}).items() if v is not None}
+    if not params:
+        return path
+    return f"{path}?{urlencode({k: _query_value(v) for k, v in params.items()})}"
+
+
+def _query_value(value) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _decode(text: str):
+    return json.loads(text) if text.strip() else {}
+
+
+class Transport:
+    """Base class for Kubernetes API transports"""
+
+    def request_raw(self, method: str, path: str, params: Optional[Dict] = None,
+                    body=None, content_type: str = "application/json",
+                    headers: Optional[Dict[str, str]] = None) -> str:
+        """Send a request and return the response body as text"""
+        raise NotImplementedError
+
+    def request(self, method: str, path: str, params: Optional[Dict] = None,
+                body=None, content_type: str = "application/json",
+                headers: Optional[Dict[str, str]] = None) -> Dict:
+        """Send a request and return the decoded JSON response"""
+        return _decode(self.request_raw(method, path, params, body, content_type, headers))
+
+    def stream(self, path: str, params: Optional[Dict] = None) -> Iterator[str]:
+        """Stream a long-running GET (watch, log follow) line by line"""
+        raise NotImplementedError
+
+    def get(self, path: str, params: Optional[Dict] = None, **kwargs) -> Dict:
+        return self.request("GET", path, params, **kwargs)
+
+    def create(self, path: str, body: Dict, params: Optional[Dict] = None) -> Dict:
+        return self.request("POST", path, params, body=body)
+
+    def delete(self, path: str, params: Optional[Dict] = None, body: Optional[Dict] = None) -> Dict:
+        return self.request("DELETE", path, params, body=body)
+
+    def patch(self, path: str, body, content_type: str = MERGE_PATCH) -> Dict:
+        return self.request("PATCH", path, body=body, content_type=content_type)
+
+    def close(self):
+        """Release any pooled resources"""
+
+
+def paginate(transport: "Transport", path: str, params: Optional[Dict] = None,
+             page_size: int = 500, metadata_only: bool = False) -> Iterator[Dict]:
+    """Yield the items of a list page by page using limit/continue tokens
+
+    Only one page is held in memory at a time.
+    """
+    params = dict(params or {}, limit=page_size or None)
+    headers = {"Accept": METADATA_ONLY} if metadata_only else None
+    while True:
+        page = transport.get(path, params, headers=headers)
+        for item in page.get("items") or []:
+            yield item
+        token = page.get("metadata", {}).get("continue")
+        if not token:
+            return
+        params["continue"] = token
+
+
+class ConnectionPool:
+    """Thread-safe pool of keep-alive HTTP(S) connections to one host
+
+    Idle connections are reused LIFO. When all are busy a new one is opened,
+    and at most ``maxsize`` idle connections are retained afterwards.
+    """
+
+    def __init__(self, base_url: str, ssl_context=None, maxsize: int = 16, timeout: float = 30.0):
+        url = urlsplit(base_url)
+        self.scheme = url.scheme or "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.scheme == "https" else 80)
+        self.base_path = url.path.rstrip("/")
+        self.ssl_context = ssl_context
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _new_connection(self, timeout: Optional[float]) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=timeout,
+                                               context=self.ssl_context)
+        return http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+
+    def acquire(self):
+        """Return (connection, reused)"""
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        return self._new_connection(self.timeout), False
+
+    def release(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            if len(self._idle) < self.maxsize:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def open_stream(self, timeout: Optional[float] = None) -> http.client.HTTPConnection:
+        """Dedicated connection for long-lived streams (never pooled, no timeout by default)"""
+        return self._new_connection(timeout)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class HttpTransport(Transport):
+    """Direct API server access over pooled keep-alive connections"""
+
+    def __init__(self, config: KubeConfig, pool_size: int = 16, timeout: float = 30.0):
+        self.config = config
+        self.pool = ConnectionPool(config.server, config.ssl_context(), pool_size, timeout)
+
+    @classmethod
+    def from_kubeconfig(cls, context: Optional[str] = None, **kwargs) -> "HttpTransport":
+        return cls(KubeConfig.load(context), **kwargs)
+
+    def _headers(self, content_type: Optional[str], extra: Optional[Dict[str, str]]) -> Dict[str, str]:
+        headers = {"Accept": "application/json", "User-Agent": "ml-platform-sdk"}
+        headers.update(self.config.auth_headers())
+        if content_type:
+            headers["Content-Type"] = content_type
+        headers.update(extra or {})
+        return headers
+
+    def request_raw(self, method, path, params=None, body=None,
+                    content_type="application/json", headers=None) -> str:
+        url = self.pool.base_path + _with_query(path, params)
+        payload = None
+        if body is not None:
+            payload = body if isinstance(body, (bytes, str)) else json.dumps(body)
+            payload = payload.encode() if isinstance(payload, str) else payload
+        hdrs = self._headers(content_type if payload is not None else None, headers)
+
+        while True:
+            conn, reused = self.pool.acquire()
+            try:
+                conn.request(method, url, body=payload, headers=hdrs)
+                resp = conn.getresponse()
+                data = resp.read()
+            except _STALE_ERRORS as e:
+                conn.close()
+                if reused:
+                    # The server closed an idle keep-alive connection; retry on a fresh one
+                    if metrics.sinks:
+                        metrics.record_retry()
+                    continue
+                if metrics.sinks:
+                    metrics.record_error(type(e).__name__)
+                raise
+            except BaseException as e:
+                conn.close()
+                if metrics.sinks and isinstance(e, OSError):
+                    metrics.record_error(type(e).__name__)
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self.pool.release(conn)
+            break
+
+        if metrics.sinks:
+            metrics.record_transfer(len(payload or b""), len(data))
+            if resp.status >= 400:
+                metrics.record_error(resp.status)
+        text = data.decode("utf-8", errors="replace")
+        if resp.status >= 400:
+            raise _api_error(resp.status, text)
+        return text
+
+    def stream(self, path, params=None) -> Iterator[str]:
+        # Watches end server-side after timeoutSeconds; a read timeout a little past
+        # that catches connections that died silently instead of hanging forever
+        server_timeout = (params or {}).get("timeoutSeconds")
+        conn = self.pool.open_stream(float(server_timeout) + 30 if server_timeout else None)
+        try:
+            conn.request("GET", self.pool.base_path + _with_query(path, params),
+                         headers=self._headers(None, None))
+            resp = conn.getresponse()
+            if resp.status >= 400:
+                if metrics.sinks:
+                    metrics.record_error(resp.status)
+                raise _api_error(resp.status, resp.read().decode("utf-8", errors="replace"))
+            while True:
+                line = resp.readline()
+                if not line:
+                    return
+                if metrics.sinks:
+                    metrics.record_transfer(0, len(line))
+                yield line.decode("utf-8", errors="replace").rstrip("\n")
+        finally:
+            conn.close()
+
+    def close(self):
+        self.pool.close()
+
+
+def _api_error(status: int, text: str) -> ApiError:
+    """Turn an error response (usually a metav1.Status) into an ApiError"""
+    try:
+        doc = json.loads(text)
+        return ApiError(status, doc.get("message") or text, doc.get("reason", ""))
+    except ValueError:
+        return ApiError(status, text.strip() or f"HTTP {status}")
+
+
+# kubectl reports server errors as "Error from server (Reason): message"
+_KUBECTL_ERROR = re.compile(r"Error from server \((\w+)\)")
+_REASON_STATUS = {
+    "BadRequest": 400, "Unauthorized": 401, "Forbidden": 403, "NotFound": 404,
+    "MethodNotAllowed": 405, "AlreadyExists": 409, "Conflict": 409, "Gone": 410,
+    "Expired": 410, "Invalid": 422, "TooManyRequests": 429, "InternalError": 500,
+    "ServiceUnavailable": 503, "Timeout": 504,
+}
+_PATCH_TYPES = {JSON_PATCH: "json", MERGE_PATCH: "merge", STRATEGIC_MERGE_PATCH: "strategic"}
+_RESOURCE_PATH = re.compile(
+    r"^/(?:api/(?P<core>[^/]+)|apis/(?P<group>[^/]+)/[^/]+)"
+    r"(?:/namespaces/(?P<ns>[^/]+))?/(?P<resource>[^/]+)/(?P<name>[^/]+)$"
+)
+
+
+class KubectlTransport(Transport):
+    """Fallback transport that runs one kubectl process per call"""
+
+    def __init__(self, context: Optional[str] = None, kubectl: str = "kubectl"):
+        self.context = context
+        self.kubectl = kubectl
+
+    def _base(self):
+        cmd = [self.kubectl]
+        if self.context:
+            cmd.extend(["--context", self.context])
+        return cmd
+
+    def _run(self, args, input_text: Optional[str] = None) -> str:
+        result = subprocess.run(self._base() + args, input=input_text, capture_output=True, text=True)
+        if metrics.sinks:
+            metrics.record_transfer(len(input_text or ""), len(result.stdout))
+        if result.returncode != 0:
+            err = result.stderr.strip()
+            match = _KUBECTL_ERROR.search(err)
+            status = _REASON_STATUS.get(match.group(1), 500) if match else 500
+            if metrics.sinks:
+                metrics.record_error(status)
+            raise ApiError(status, err, match.group(1) if match else "")
+        return result.stdout
+
+    def request_raw(self, method, path, params=None, body=None,
+                    content_type="application/json", headers=None) -> str:
+        # kubectl --raw cannot set headers; callers get full objects instead of
+        # metadata-only responses, which is a superset of what they asked for
+        url = _with_query(path, params)
+        payload = None
+        if body is not None:
+            payload = body if isinstance(body, str) else json.dumps(body)
+        if method == "GET":
+            return self._run(["get", "--raw", url])
+        if method == "POST":
+            return self._run(["create", "--raw", url, "-f", "-"], payload)
+        if method == "PUT":
+            return self._run(["replace", "--raw", url, "-f", "-"], payload)
+        if method == "DELETE":
+            args = ["delete", "--raw", url]
+            return self._run(args + ["-f", "-"], payload) if payload else self._run(args)
+        if method == "PATCH":
+            return self._patch(path, payload, content_type)
+        raise ValueError(f"Unsupported method for kubectl transport: {method}")
+
+    def _patch(self, path: str, payload: str, content_type: str) -> str:
+        # kubectl has no raw PATCH, so map the REST path back to a resource
+        match = _RESOURCE_PATH.match(path)
+        if not match:
+            raise ValueError(f"Cannot patch {path} through kubectl")
+        resource = match.group("resource")
+        if match.group("group"):
+            resource = f"{resource}.{match.group('group')}"
+        args = ["patch", resource, match.group("name"), "--type",
+                _PATCH_TYPES.get(content_type, "merge"), "-p", payload, "-o", "json"]
+        if match.group("ns"):
+            args.extend(["-n", match.group("ns")])
+        return self._run(args)
+
+    def stream(self, path, params=None) -> Iterator[str]:
+        proc = subprocess.Popen(self._base() + ["get", "--raw", _with_query(path, params)],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        try:
+            for line in proc.stdout:
+                yield line.rstrip("\n")
+            if proc.wait() != 0:
+                err = proc.stderr.read().strip()
+                match = _KUBECTL_ERROR.search(err)
+                raise ApiError(_REASON_STATUS.get(match.group(1), 500) if match else 500, err)
+        finally:
+            if proc.poll() is None:
+                proc.terminate()
+                proc.wait()
+            proc.stdout.close()
+            proc.stderr.close()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+def create_transport(context: Optional[str] = None, backend: Optional[str] = None) -> Transport:
+    """Create a transport for a kubeconfig context
+
+    backend: "http", "kubectl" or "auto" (default, from ML_PLATFORM_TRANSPORT).
+    "auto" uses HTTP when the kubeconfig can be resolved and kubectl otherwise.
+    """
+    backend = backend or os.environ.get("ML_PLATFORM_TRANSPORT", "auto")
+    if backend == "kubectl":
+        return KubectlTransport(context)
+    if backend == "http":
+        return HttpTransport.from_kubeconfig(context)
+    if backend != "auto":
+        raise ValueError(f"Unknown transport backend: {backend}")
+    try:
+        return HttpTransport.from_kubeconfig(context)
+    except (KubeConfigError, OSError, ValueError, KeyError):
+        return KubectlTransport(context)
+
+
+def default_transport(context: Optional[str] = None) -> Transport:
+    """Shared transport for a context, created on first use"""
+    with _transports_lock:
+        if context not in _transports:
+            _transports[context] = create_transport(context)
+        return _transports[context]
@@ -0,0 +1,18 @@
+"""Shared fixtures: an in-process fake API server and a transport pointed at it"""
+
+import pytest
+
+from benchmarks.fake_apiserver import FakeApiServer
+from ml_platform.sdk.core.kubeconfig import KubeConfig
+from ml_platform.sdk.core.transport import HttpTransport
+
+
+@pytest.fixture
+def server():
+    with FakeApiServer() as server:
+        yield server
+
+
+@pytest.fixture
+def transport(server):
+    return HttpTransport(KubeConfig(server.url, {}, {}, "fake"))
@@ -0,0 +1,102 @@
+import asyncio
+import functools
+
+import pytest
+
+from ml_platform.sdk.core.async_client import AsyncJob, AsyncJobWatcher
+from ml_platform.sdk.core.async_transport import AsyncHttpTransport
+from ml_platform.sdk.core.kubeconfig import KubeConfig
+
+
+async def _serve(response: bytes):
+    """Server answering every request with response, keeping the connection open"""
+    async def handle(reader, writer):
+        while await reader.readuntil(b"\r\n\r\n"):
+            writer.write(response)
+            await writer.drain()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+@pytest.mark.parametrize("method,response", [
+    ("DELETE", b"HTTP/1.1 204 No Content\r\n\r\n"),
+    ("GET", b"HTTP/1.1 304 Not Modified\r\n\r\n"),
+    ("HEAD", b"HTTP/1.1 200 OK\r\nContent-Length: 42\r\n\r\n"),
+])
+def test_bodyless_responses_return_without_waiting_for_eof(method, response):
+    async def main():
+        server, url = await _serve(response)
+        transport = AsyncHttpTransport(KubeConfig(url, {}, {}, "fake"), timeout=2)
+        assert await transport.request_raw(method, "/api/v1/namespaces") == ""
+        # Still framed, so the connection goes back to the pool
+        assert len(transport.pool._idle) == 1
+        server.close()
+
+    asyncio.run(main())
+
+
+def test_watch_start_times_out_and_status_falls_back(server):
+    server.seed_jobs(1, finished_ratio=1.0)
+
+    async def main():
+        transport = AsyncHttpTransport(KubeConfig(server.url, {}, {}, "fake"))
+        # A watcher on a port nothing listens on never syncs
+        dead = AsyncJobWatcher(AsyncHttpTransport(KubeConfig("http://127.0.0.1:1", {}, {}, "x")))
+        with pytest.raises(TimeoutError):
+            await dead.start(timeout=0.2)
+        job = AsyncJob("sweep-00000", "jobs", transport, watcher=dead)
+        dead.start = functools.partial(AsyncJobWatcher.start, dead, timeout=0.2)
+        assert await job.status() == "Complete"
+        dead.stop()
+
+    asyncio.run(main())
+
+
+def test_create_job_retry_that_finds_the_job_counts_as_created(server, tmp_path):
+    from ml_platform.sdk.core.async_client import AsyncPlatformClient
+
+    async def main():
+        transport = AsyncHttpTransport(KubeConfig(server.url, {}, {}, "fake"), timeout=5)
+        async with AsyncPlatformClient("proj", transport=transport,
+                                       workloads_dir=str(tmp_path)) as client:
+            server.lost_creates = 1
+            [result] = await client.submit_jobs([{"name": "sweep", "image": "img:v1"}])
+            assert result.error is None
+            assert server.cluster.get("batch/v1", "jobs", "jobs", result.job.name) is not None
+
+    asyncio.run(main())
+
+
+def test_exec_auth_plugin_runs_off_the_event_loop_once(server, tmp_path):
+    import sys
+    import time
+
+    calls = tmp_path / "calls"
+    plugin = tmp_path / "auth_plugin.py"
+    plugin.write_text(
+        "import json, sys, time\n"
+        f"open({str(calls)!r}, 'a').write('x')\n"
+        "time.sleep(0.5)\n"
+        "json.dump({'status': {'token': 'fresh', 'expirationTimestamp': '2999-01-01T00:00:00Z'}},"
+        " sys.stdout)\n")
+    user = {"exec": {"command": sys.executable, "args": [str(plugin)]}}
+
+    async def main():
+        transport = AsyncHttpTransport(KubeConfig(server.url, {}, user, "fake"), timeout=5)
+        ticks = []
+
+        async def heartbeat():
+            for _ in range(20):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        beat = asyncio.ensure_future(heartbeat())
+        await asyncio.gather(*(transport.request("GET", "/apis/batch/v1/namespaces/jobs/jobs")
+                               for _ in range(5)))
+        await beat
+        # The loop kept running while the plugin slept
+        assert max(b - a for a, b in zip(ticks, ticks[1:])) < 0.3
+
+    asyncio.run(main())
+    assert calls.read_text() == "x"
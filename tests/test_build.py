@@ -0,0 +1,42 @@
+import pytest
+
+from ml_platform.sdk.core import build
+
+
+@pytest.fixture
+def docker(monkeypatch):
+    """Pretend docker with buildx on the given driver (None: no buildx)"""
+    def use(driver):
+        monkeypatch.setattr(build, "_buildx", driver is not None)
+        monkeypatch.setattr(build, "_buildx_driver", driver or "")
+    return use
+
+
+@pytest.mark.parametrize("driver,exports", [("docker-container", True), ("docker", False),
+                                            ("", False)])
+def test_cache_export_only_with_a_capable_builder(docker, driver, exports):
+    docker(driver)
+    [cmd] = build.build_commands("ctx", "reg/repo", ["v1"])
+    assert cmd[:4] == ["docker", "buildx", "build", "--push"]
+    assert "--cache-from" in cmd
+    assert ("--cache-to" in cmd) == exports
+
+
+def test_classic_build_and_no_retag_without_buildx(docker):
+    docker(None)
+    assert build.build_commands("ctx", "reg/repo", ["v1", "latest"]) == [
+        ["docker", "build", "--cache-from", "reg/repo:latest",
+         "-t", "reg/repo:v1", "-t", "reg/repo:latest", "ctx"],
+        ["docker", "push", "--all-tags", "reg/repo"]]
+    assert build.retag_command("reg/repo", "src-abc", ["v2"]) is None
+
+
+def test_driver_from_buildx_inspect(monkeypatch):
+    class Proc:
+        returncode = 0
+        stdout = "Name:          default\nDriver:        docker\nNodes:\n"
+
+    monkeypatch.setattr(build, "_buildx", True)
+    monkeypatch.setattr(build, "_buildx_driver", None)
+    monkeypatch.setattr(build.subprocess, "run", lambda *a, **k: Proc())
+    assert build.buildx_driver() == "docker"
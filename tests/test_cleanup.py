@@ -0,0 +1,39 @@
+from ml_platform.sdk.core.cleanup import cleanup_jobs
+
+
+def seed(server):
+    server.seed_jobs(4, finished_ratio=0.5)
+    # An Indexed Job with some indexes done and none running right now (between retries)
+    server.cluster.put("batch/v1", "jobs", {
+        "apiVersion": "batch/v1", "kind": "Job",
+        "metadata": {"name": "indexed-sweep", "namespace": "jobs", "labels": {"app": "sweep"}},
+        "spec": {"completionMode": "Indexed", "completions": 10, "backoffLimit": 3},
+        "status": {"succeeded": 3, "active": 0, "completedIndexes": "0-2"},
+    })
+    server.cluster.put("batch/v1", "jobs", {
+        "apiVersion": "batch/v1", "kind": "Job",
+        "metadata": {"name": "broken", "namespace": "jobs", "labels": {"app": "sweep"}},
+        "status": {"failed": 4, "conditions": [{"type": "Failed", "status": "True"}]},
+    })
+
+
+def remaining(server):
+    return sorted(job["metadata"]["name"] for job in server.cluster.list("batch/v1", "jobs", "jobs"))
+
+
+def test_succeeded_skips_partially_complete_indexed_job(server, transport):
+    seed(server)
+    preview = cleanup_jobs(transport, status="succeeded", dry_run=True)
+    assert sorted(preview.matched) == ["sweep-00000", "sweep-00001"]
+
+    report = cleanup_jobs(transport, status="succeeded")
+    assert sorted(report.matched) == sorted(preview.matched)
+    assert report.deleted == 2 and not report.failed
+    assert remaining(server) == ["broken", "indexed-sweep", "sweep-00002", "sweep-00003"]
+
+
+def test_finished_and_failed(server, transport):
+    seed(server)
+    assert cleanup_jobs(transport, status="failed").matched == ["broken"]
+    assert cleanup_jobs(transport).deleted == 2
+    assert remaining(server) == ["indexed-sweep", "sweep-00002", "sweep-00003"]
@@ -0,0 +1,28 @@
+from ml_platform.sdk.core.client import PlatformClient
+
+
+def test_bulk_submit_retries_throttling_and_lost_responses(server, transport, tmp_path):
+    client = PlatformClient("proj", transport=transport, workloads_dir=str(tmp_path))
+    server.throttled_creates = 2
+    server.lost_creates = 1
+    specs = [{"name": "sweep", "image": "img:v1", "env": {"SEED": str(i)}} for i in range(6)]
+    results = client.submit_jobs(specs, max_concurrency=4, retries=3)
+    assert [r.error for r in results] == [None] * 6
+    # One Job per spec: a retry after a lost response finds the first attempt's Job
+    jobs = server.cluster.list("batch/v1", "jobs", "jobs")
+    assert sorted(j["metadata"]["name"] for j in jobs) == sorted(r.job.name for r in results)
+    assert server.throttled_creates == server.lost_creates == 0
+
+
+def test_bulk_submit_records_failures_per_spec(server, transport, tmp_path):
+    client = PlatformClient("proj", transport=transport, workloads_dir=str(tmp_path))
+    server.throttled_creates = 3
+    specs = [{"name": "sweep", "image": "img:v1"}, {"name": "sweep", "image": "img:v1"},
+             {"name": "sweep", "image": "img:v1", "cpu": "lots"}]
+    results = client.submit_jobs(specs, max_concurrency=1, retries=1)
+    # The invalid spec fails before any request; the first job runs out of retries
+    assert results[2].error.startswith("Invalid job spec") and results[2].job is None
+    assert "too many requests" in results[0].error and results[0].job is None
+    assert results[1].error is None
+    assert [j["metadata"]["name"] for j in server.cluster.list("batch/v1", "jobs", "jobs")] == [
+        results[1].job.name]
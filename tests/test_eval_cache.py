@@ -0,0 +1,58 @@
+import json
+import os
+
+from eval_cache import EVICT_TO, EvalCache
+from results_io import LocalStore
+
+
+def result(i):
+    return {"score": i, "pad": "x" * 100}
+
+
+def test_local_tier_evicts_least_recently_used(tmp_path):
+    size = len(json.dumps(result(0), separators=(",", ":")))
+    cache = EvalCache("v1", local_dir=str(tmp_path), max_bytes=3 * size)
+    keys = [cache.key({"config": i}) for i in range(4)]
+    for i, key in enumerate(keys[:3]):
+        cache.store(key, result(i))
+        os.utime(cache.local._path(key), (1000 + i, 1000 + i))
+    # A hit makes the oldest entry the most recently used
+    assert cache.lookup(keys[0]) == (True, result(0))
+    cache.store(keys[3], result(3))
+    # Over max_bytes: the least recently used go until the tier is within EVICT_TO of it
+    assert cache.local._total <= 3 * size * EVICT_TO
+    assert [cache.lookup(key)[0] for key in keys] == [True, False, False, True]
+
+
+def test_bucket_tier_fills_the_local_tier_of_another_machine(tmp_path):
+    bucket = LocalStore(str(tmp_path / "bucket"))
+    first = EvalCache("v1", local_dir=str(tmp_path / "a"), bucket=bucket)
+    key = first.key({"major_radius": 1.0, "beta": 0.04})
+    first.store(key, result(1))
+
+    second = EvalCache("v1", local_dir=str(tmp_path / "b"), bucket=bucket)
+    # Canonical params: key order and 1.0 vs 1 don't matter
+    assert second.key({"beta": 0.04, "major_radius": 1}) == key
+    assert second.lookup(key) == (True, result(1))
+    assert second.lookup(key) == (True, result(1))
+    stats = second.stats()
+    assert (stats["bucket_hits"], stats["local_hits"], stats["misses"]) == (1, 1, 0)
+    # Another version of the code never sees these results
+    other = EvalCache("v2", bucket=bucket)
+    assert other.lookup(other.key({"major_radius": 1.0, "beta": 0.04})) == (False, None)
+
+
+class UnreachableStore:
+    def get_bytes(self, name):
+        raise OSError("bucket unreachable")
+
+    def put_bytes(self, name, data):
+        raise OSError("bucket unreachable")
+
+
+def test_unreachable_bucket_is_a_miss(tmp_path):
+    cache = EvalCache("v1", local_dir=str(tmp_path), bucket=UnreachableStore())
+    key = cache.key({"major_radius": 1.0})
+    assert cache.lookup(key) == (False, None)
+    cache.store(key, result(0))
+    assert cache.lookup(key) == (True, result(0))
@@ -0,0 +1,66 @@
+from ml_platform.sdk.core.informer import JobInformer
+from ml_platform.sdk.core.job import Job
+
+
+def test_future_resolves_when_job_finishes(server, transport):
+    server.seed_jobs(1, finished_ratio=0.0)
+    informer = JobInformer(transport).start()
+    future = informer.future("sweep-00000")
+    assert not future.done()
+    job = server.cluster.get("batch/v1", "jobs", "jobs", "sweep-00000")
+    job["status"] = {"failed": 1, "conditions": [{"type": "Failed", "status": "True"}]}
+    server.cluster.put("batch/v1", "jobs", job, "MODIFIED")
+    assert future.result(10) == "Failed"
+    informer.stop()
+
+
+def test_future_of_missing_job_resolves_once_synced(server, transport):
+    informer = JobInformer(transport).start()
+    assert informer.future("never-created").result(1) == "Deleted"
+    informer.stop()
+
+
+def test_future_registered_before_sync_resolves_on_first_list(server, transport):
+    informer = JobInformer(transport)
+    future = informer.future("never-created")
+    assert not future.done()
+    informer.start()
+    assert future.result(10) == "Deleted"
+    informer.stop()
+
+
+def test_status_falls_back_to_get_when_informer_does_not_sync(server, transport):
+    server.seed_jobs(1, finished_ratio=1.0)
+    informer = JobInformer(transport)
+
+    def start(*args, **kwargs):
+        raise TimeoutError("not synced")
+
+    informer.start = start
+    assert Job("sweep-00000", transport=transport, informer=informer).status() == "Complete"
+
+
+def test_future_of_job_newer_than_the_cache_keeps_waiting(server, transport):
+    informer = JobInformer(transport).start()
+    server.seed_jobs(1, finished_ratio=0.0)
+    # As if the job was created by another process and its ADDED event is still on its way
+    with informer._lock:
+        informer._cache.pop("sweep-00000", None)
+    future = informer.future("sweep-00000")
+    assert not future.done()
+    job = server.cluster.get("batch/v1", "jobs", "jobs", "sweep-00000")
+    job["status"] = {"succeeded": 1, "conditions": [{"type": "Complete", "status": "True"}]}
+    server.cluster.put("batch/v1", "jobs", job, "MODIFIED")
+    assert future.result(10) == "Complete"
+    informer.stop()
+
+
+def test_wait_falls_back_to_a_direct_watch_when_informer_does_not_sync(server, transport):
+    server.seed_jobs(1, finished_ratio=1.0)
+    informer = JobInformer(transport)
+
+    def start(*args, **kwargs):
+        raise TimeoutError("not synced")
+
+    informer.start = start
+    assert Job("sweep-00000", transport=transport, informer=informer).wait(5) == "Complete"
@@ -0,0 +1,147 @@
+import time
+
+import pytest
+
+from ml_platform.sdk.core.client import PlatformClient
+from ml_platform.sdk.core.jobqueue import (
+    BACKFILL_WAIT,
+    QUEUE_LABEL,
+    TEAM_LABEL,
+    Dispatcher,
+    JobQueue,
+    QueueEntry,
+    plan_admissions,
+)
+
+GIB = 2 ** 30
+
+
+def entry(entry_id, team, cpu, memory=GIB, priority=0):
+    return QueueEntry(entry_id, team, priority, float(entry_id), {}, cpu, memory, "queued",
+                      None, None, 0.0, None, None, None)
+
+
+def plan(queued, usage=None, quotas=None, free=(16.0, 64 * GIB), now=0.0):
+    return [e.id for e in plan_admissions(queued, usage or {}, quotas or {}, free,
+                                          (16.0, 64 * GIB), now)]
+
+
+def test_idle_team_goes_ahead_of_a_running_sweep():
+    queued = [entry(1, "sweep", 4), entry(2, "sweep", 4), entry(3, "idle", 4)]
+    assert plan(queued, usage={"sweep": [8.0, 8 * GIB]}, free=(8.0, 64 * GIB)) == [3, 1]
+
+
+def test_backfill_stops_once_a_passed_over_entry_has_waited_too_long():
+    queued = [entry(1, "a", 12, priority=5), entry(2, "b", 2), entry(3, "b", 2)]
+    free = (4.0, 64 * GIB)
+    assert plan(queued, free=free, now=BACKFILL_WAIT - 1) == [2, 3]
+    # Free capacity is held for the 12-CPU entry until it fits
+    assert plan(queued, free=free, now=BACKFILL_WAIT) == []
+    assert plan(queued, free=(12.0, 64 * GIB), now=BACKFILL_WAIT) == [1]
+    # An entry over its quota or bigger than the cluster holds nothing back
+    assert plan(queued, quotas={"a": (8.0, None)}, free=free, now=BACKFILL_WAIT) == [2, 3]
+    huge = [entry(1, "a", 32, priority=5), entry(2, "b", 2)]
+    assert plan(huge, free=free, now=BACKFILL_WAIT) == [2]
+
+
+def test_priority_then_quota_then_backfill():
+    queued = [entry(1, "a", 2), entry(2, "b", 12), entry(3, "b", 2), entry(4, "a", 1, priority=5)]
+    # b's 12-CPU job exceeds its quota, so its smaller one backfills
+    assert plan(queued, quotas={"b": (8.0, None)}) == [4, 3, 1]
+
+
+def test_nothing_fits():
+    assert plan([entry(1, "a", 32)]) == []
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / "queue.db"))
+    yield queue
+    queue.close()
+
+
+def test_queue_reordering_and_lifecycle(queue):
+    ids = queue.enqueue([{"name": f"job{i}", "image": "img"} for i in range(3)], team="fusion")
+    assert [e.cpu for e in queue.queued()] == [4.0, 4.0, 4.0]
+    assert queue.move(ids[2], to="top")
+    assert queue.move(ids[1], before=ids[2])
+    assert [e.id for e in queue.queued()] == [ids[1], ids[2], ids[0]]
+    assert queue.set_priority(ids[0], 10)
+    assert queue.queued()[0].id == ids[0]
+
+    assert queue.admit(ids[0], "job0-abc", "jobs")
+    assert not queue.cancel([ids[0]])
+    assert queue.cancel([ids[1]]) == 1
+    assert queue.usage() == {"fusion": [4.0, 16.0 * GIB]}
+    queue.finish(ids[0])
+    assert queue.get(ids[0]).state == "done"
+    assert queue.wait_stats()["fusion"]["count"] == 1
+
+
+def test_quotas(queue):
+    queue.set_quota("fusion", cpu=64, memory=256 * GIB)
+    assert queue.quotas() == {"fusion": (64.0, 256.0 * GIB)}
+    queue.set_quota("fusion")
+    assert queue.quotas() == {}
+
+
+def _wait_for(predicate, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_dispatcher_admits_as_capacity_frees(server, transport, queue, tmp_path):
+    server.cluster.put("v1", "nodes", {
+        "metadata": {"name": "node-1"},
+        "status": {"allocatable": {"cpu": "8", "memory": "32Gi"},
+                   "conditions": [{"type": "Ready", "status": "True"}]},
+    })
+    client = PlatformClient("proj", transport=transport, workloads_dir=str(tmp_path))
+    ids = client.enqueue_jobs([{"name": "sweep", "image": "img:v1", "memory": "8Gi"}] * 3,
+                              team="fusion", queue=queue)
+    dispatcher = Dispatcher(client, queue, poll_interval=0.05).start()
+    try:
+        admitted = dispatcher.dispatch_once()
+        assert [(e.id, error) for e, _, error in admitted] == [(ids[0], None), (ids[1], None)]
+        assert dispatcher.dispatch_once() == []
+
+        job = server.cluster.get("batch/v1", "jobs", "jobs", admitted[0][1])
+        assert job["metadata"]["labels"][QUEUE_LABEL] == str(ids[0])
+        assert job["metadata"]["labels"][TEAM_LABEL] == "fusion"
+        job["status"] = {"succeeded": 1, "conditions": [{"type": "Complete", "status": "True"}]}
+        server.cluster.put("batch/v1", "jobs", job, "MODIFIED")
+        _wait_for(lambda: queue.get(ids[0]).state == "done")
+
+        assert [e.id for e, _, _ in dispatcher.dispatch_once()] == [ids[2]]
+    finally:
+        dispatcher.stop()
+
+
+def test_one_dispatcher_per_queue(server, transport, queue, tmp_path):
+    client = PlatformClient("proj", transport=transport, workloads_dir=str(tmp_path))
+    first = Dispatcher(client, queue, capacity=(8.0, 32 * GIB)).start()
+    try:
+        with pytest.raises(RuntimeError, match="already running") as raised:
+            Dispatcher(client, queue, capacity=(8.0, 32 * GIB)).start()
+        assert raised.value.__cause__ is None and raised.value.__suppress_context__
+    finally:
+        first.stop()
+
+
+def test_dispatcher_keeps_a_job_whose_create_response_was_lost(server, transport, queue, tmp_path):
+    client = PlatformClient("proj", transport=transport, workloads_dir=str(tmp_path))
+    [entry_id] = client.enqueue_jobs([{"name": "sweep", "image": "img:v1"}], team="fusion",
+                                     queue=queue)
+    dispatcher = Dispatcher(client, queue, capacity=(8.0, 32 * GIB)).start()
+    try:
+        server.lost_creates = 1
+        [(entry, name, error)] = dispatcher.dispatch_once()
+        assert error is None
+        assert server.cluster.get("batch/v1", "jobs", "jobs", name) is not None
+        assert queue.get(entry_id).state == "admitted"
+        assert queue.usage() == {"fusion": [4.0, 16.0 * GIB]}
+    finally:
+        dispatcher.stop()
@@ -0,0 +1,33 @@
+import pytest
+
+from ml_platform.cli.commands import list_jobs
+from ml_platform.sdk.core.client import PlatformClient
+
+
+def test_running_and_completed_use_the_final_condition(server, transport):
+    server.seed_jobs(2, finished_ratio=0.5)
+    server.cluster.put("batch/v1", "jobs", {
+        "metadata": {"name": "broken", "namespace": "jobs"},
+        "status": {"failed": 4, "conditions": [{"type": "Failed", "status": "True"}]}})
+    server.cluster.put("batch/v1", "jobs", {
+        "metadata": {"name": "indexed-sweep", "namespace": "jobs"},
+        "spec": {"completionMode": "Indexed", "completions": 10},
+        "status": {"succeeded": 3, "active": 2}})
+    client = PlatformClient("", transport=transport)
+
+    def names(completed):
+        # As run() lists them: only --completed narrows server-side
+        jobs = client.iter_jobs(completed=completed or None)
+        return sorted(job["metadata"]["name"] for job in jobs if list_jobs.matches(job, completed))
+
+    assert names(True) == ["sweep-00000"]
+    assert names(False) == ["indexed-sweep", "sweep-00001"]
+    assert len(names(None)) == 4
+
+
+@pytest.mark.parametrize("args", [["--bogus"], ["--names", "--running"], ["-l"]])
+def test_bad_options_are_rejected(args, capsys):
+    with pytest.raises(SystemExit) as exited:
+        list_jobs.run(args)
+    assert exited.value.code == 1
+    assert "❌" in capsys.readouterr().out
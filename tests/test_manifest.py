@@ -0,0 +1,90 @@
+import sys
+
+import pytest
+
+from ml_platform.sdk.core.manifest import (
+    JobSpec,
+    ManifestCompiler,
+    ManifestError,
+    generate_job_name,
+    label_value,
+)
+
+
+@pytest.fixture
+def compiler(tmp_path):
+    return ManifestCompiler("proj", workloads_dir=str(tmp_path))
+
+
+def test_compiled_manifests_do_not_share_state(compiler):
+    first = compiler.compile(JobSpec("sweep", "img:v1", env={"LR": "0.1"}))
+    first["spec"]["template"]["spec"]["containers"][0]["resources"]["requests"]["cpu"] = "99"
+    second = compiler.compile(JobSpec("sweep", "img:v1"))
+    container = second["spec"]["template"]["spec"]["containers"][0]
+    assert container["resources"]["requests"]["cpu"] == "4"
+    assert "LR" not in {e["name"] for e in container["env"]}
+
+
+def test_overrides_are_copied(compiler):
+    overrides = {"spec": {"template": {"spec": {"nodeSelector": {"pool": "gpu"}}}}}
+    manifest = compiler.compile(JobSpec("sweep", "img:v1", overrides=overrides))
+    manifest["spec"]["template"]["spec"]["nodeSelector"]["pool"] = "cpu"
+    assert overrides["spec"]["template"]["spec"]["nodeSelector"]["pool"] == "gpu"
+
+
+@pytest.mark.parametrize("name,label", [
+    ("stellar_optimization", "stellar_optimization"),
+    ("Stellar:v1.0.0", "stellar-v1.0.0"),
+    ("A" * 80, "a" * 63),
+    ("_run_", "run"),
+    (":::", "job"),
+])
+def test_app_label_is_a_valid_label_value(compiler, name, label):
+    manifest = compiler.compile(JobSpec(name, "img:v1"))
+    assert manifest["metadata"]["labels"]["app"] == label == label_value(name)
+
+
+def test_job_names_are_unique_and_dns_safe():
+    names = [generate_job_name("My_Sweep:v1") for _ in range(20000)]
+    assert len(set(names)) == len(names)
+    assert all(n.startswith("my-sweep-v1-") and len(n) <= 63 for n in names)
+
+
+def test_invalid_spec_fails_locally(compiler):
+    with pytest.raises(ManifestError):
+        compiler.compile(JobSpec("sweep", "img:v1", cpu="lots"))
+
+
+def test_index_env_must_fit_one_environment_variable(compiler):
+    manifest = compiler.compile(JobSpec("sweep", "img:v1",
+                                        index_env=[{"CONFIG": "x" * 100}] * 1000))
+    assert manifest["spec"]["completions"] == 1000
+    with pytest.raises(ManifestError, match="INDEX_ENV"):
+        compiler.compile(JobSpec("sweep", "img:v1", index_env=[{"CONFIG": "x" * 100}] * 2000))
+
+
+def write_job_yaml(tmp_path, text):
+    (tmp_path / "sweep").mkdir()
+    (tmp_path / "sweep" / "job.yaml").write_text(text)
+
+
+def test_workload_defaults_from_job_yaml(compiler, tmp_path):
+    pytest.importorskip("yaml")
+    write_job_yaml(tmp_path, "spec:\n  template:\n    spec:\n      containers:\n"
+                             "      - env:\n        - {name: NUM_CONFIGS, value: '100'}\n")
+    assert compiler.workload_defaults("sweep") == {"env": {"NUM_CONFIGS": "100"}}
+
+
+@pytest.mark.parametrize("text", ["spec: [unclosed", "- not\n- a manifest\n"])
+def test_unreadable_job_yaml_is_an_error(compiler, tmp_path, text):
+    pytest.importorskip("yaml")
+    write_job_yaml(tmp_path, text)
+    with pytest.raises(ManifestError, match="job.yaml"):
+        compiler.compile(JobSpec("sweep", "img:v1"))
+
+
+def test_job_yaml_without_pyyaml_is_an_error(compiler, tmp_path, monkeypatch):
+    write_job_yaml(tmp_path, "spec: {}\n")
+    monkeypatch.setitem(sys.modules, "yaml", None)
+    with pytest.raises(ManifestError, match="PyYAML is required"):
+        compiler.compile(JobSpec("sweep", "img:v1"))
@@ -0,0 +1,83 @@
+import re
+import urllib.request
+
+import pytest
+
+from ml_platform.sdk.core import metrics
+from ml_platform.sdk.core.client import PlatformClient
+
+# Prometheus text format 0.0.4: name{label="value",...} value
+SAMPLE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})? (\S+)$")
+LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def parse(text):
+    """{(name, frozenset of labels): value}, checking every sample has a TYPE before it"""
+    types, samples = {}, {}
+    for line in text.splitlines():
+        if line.startswith("# TYPE "):
+            _, _, name, kind = line.split(" ")
+            types[name] = kind
+            continue
+        if line.startswith("#"):
+            continue
+        name, labels, value = SAMPLE.match(line).groups()
+        pairs = LABEL.findall(labels or "")
+        assert ",".join(f'{k}="{v}"' for k, v in pairs) == (labels or "")
+        family = re.sub(r"_(bucket|sum|count)$", "", name)
+        assert types.get(name) == "counter" or types.get(family) == "histogram", line
+        samples[(name, frozenset(pairs))] = float(value)
+    return samples
+
+
+def value(samples, name, **labels):
+    return samples[(name, frozenset(labels.items()))]
+
+
+@pytest.fixture
+def registry():
+    registry = metrics.enable()
+    yield registry
+    metrics.disable()
+
+
+def test_prometheus_text_of_real_operations(server, transport, tmp_path, registry):
+    client = PlatformClient("proj", transport=transport, workloads_dir=str(tmp_path))
+    server.seed_jobs(3)
+    server.throttled_creates = 1
+    client.submit_jobs([{"name": "sweep", "image": "img:v1"}], retries=1)
+    assert len(client.list_jobs()) == 4
+
+    samples = parse(metrics.prometheus_text(registry.snapshot()))
+    prefix = "ml_platform_sdk"
+    assert value(samples, f"{prefix}_retries_total", operation="submit") == 1
+    assert value(samples, f"{prefix}_request_errors_total", operation="submit", code="429") == 1
+    assert value(samples, f"{prefix}_operation_failures_total", operation="submit") == 0
+    assert value(samples, f"{prefix}_bytes_total", operation="submit", direction="sent") > 0
+
+    for operation in ("submit", "list"):
+        buckets = sorted((float(dict(labels)["le"]), n) for (name, labels), n in samples.items()
+                         if name.endswith("_bucket") and dict(labels)["operation"] == operation)
+        counts = [n for _, n in buckets]
+        # Cumulative, ending in +Inf with the total count
+        assert counts == sorted(counts) and buckets[-1][0] == float("inf")
+        count = value(samples, f"{prefix}_operation_duration_seconds_count", operation=operation)
+        assert buckets[-1][1] == count >= 1
+        assert value(samples, f"{prefix}_operation_duration_seconds_sum",
+                     operation=operation) > 0
+
+
+def test_metrics_endpoint_serves_the_registry(registry):
+    with metrics.Span("status"):
+        metrics.record_error(404)
+    http = metrics.serve_prometheus(registry, port=0, host="127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{http.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            samples = parse(response.read().decode())
+    finally:
+        http.shutdown()
+        http.server_close()
+    assert value(samples, "ml_platform_sdk_request_errors_total", operation="status",
+                 code="404") == 1
@@ -0,0 +1,95 @@
+import pickle
+
+import pytest
+
+from ml_platform.sdk.core.ray_driver import BatchSizer, SharedInputs, SharedRef, resolve_shared
+
+KIB = 1024
+
+
+def fake_put(value):
+    return ("ref", len(value))
+
+
+def test_identical_content_is_uploaded_once():
+    shared = SharedInputs(put=fake_put)
+    first = shared.dedupe({"geometry": b"x" * (64 * KIB), "beta": 0.04})
+    second = shared.dedupe({"geometry": b"x" * (64 * KIB), "beta": 0.05})
+    assert isinstance(first["geometry"], SharedRef)
+    assert first["geometry"] is second["geometry"]
+    assert (shared.puts, shared.hits) == (1, 1)
+    assert second["beta"] == 0.05
+
+
+def test_small_values_stay_inline():
+    shared = SharedInputs(put=fake_put)
+    assert shared.dedupe((1, [b"y" * KIB])) == (1, [b"y" * KIB])
+    assert shared.puts == 0
+
+
+def test_memo_is_bounded_and_drops_values_that_stop_recurring():
+    shared = SharedInputs(put=fake_put, max_bytes=256 * KIB)
+    recurring = b"r" * (64 * KIB)
+    for i in range(100):
+        shared.dedupe({"geometry": recurring, "noise": bytes([i % 256]) * (64 * KIB)})
+    assert shared.memo_bytes <= 256 * KIB
+    assert len(shared._by_id) <= 4
+    # The recurring value is used every step, so it is never the least recently used
+    assert shared.puts == 101 and shared.evictions == 97
+
+    shared = SharedInputs(put=fake_put, max_entries=3)
+    for i in range(10):
+        shared.put(b"%d" % i * (64 * KIB))
+    assert shared.stats()["evictions"] == 7
+
+
+def test_buffer_refilled_in_place_is_uploaded_again():
+    shared = SharedInputs(put=fake_put)
+    buffer = bytearray(b"a" * (64 * KIB))
+    first = shared.dedupe({"geometry": buffer})["geometry"]
+    buffer[:] = b"b" * (64 * KIB)
+    second = shared.dedupe({"geometry": buffer})["geometry"]
+    assert first.digest != second.digest
+    assert (shared.puts, shared.hits) == (2, 0)
+
+
+def test_read_only_arrays_skip_rehashing_and_writable_ones_do_not():
+    np = pytest.importorskip("numpy")
+    shared = SharedInputs(put=fake_put)
+    frozen = np.zeros(8 * KIB)
+    frozen.setflags(write=False)
+    shared.put(frozen)
+    assert id(frozen) in shared._by_id
+
+    buffer = np.zeros(8 * KIB)
+    first = shared.put(buffer)
+    buffer[:] = 1.0
+    assert shared.put(buffer).digest != first.digest
+    assert id(buffer) not in shared._by_id
+    # A read-only view still changes with its writable base
+    view = buffer[:]
+    view.setflags(write=False)
+    shared.put(view)
+    assert id(view) not in shared._by_id
+
+
+def test_clear_forgets_uploads():
+    shared = SharedInputs(put=fake_put)
+    value = b"z" * (64 * KIB)
+    shared.put(value)
+    shared.clear()
+    shared.put(value)
+    assert shared.puts == 2 and shared.memo_bytes == 64 * KIB
+
+
+def test_shared_refs_pickle_small():
+    ref = SharedRef(("ref", 1), "d" * 40)
+    assert len(pickle.dumps(ref)) < 200
+    assert resolve_shared([(1, {"a": 2})]) == [(1, {"a": 2})]
+
+
+def test_batch_sizer_moves_towards_target():
+    sizer = BatchSizer(target_seconds=1.0)
+    for _ in range(10):
+        sizer.observe(sizer.size, sizer.size * 0.01)
+    assert sizer.size == 100
@@ -0,0 +1,55 @@
+import os
+import signal
+import subprocess
+import sys
+
+import results_io
+from results_io import Checkpoint, LocalStore, ResultReader
+
+# A sweep that dies (SIGKILL, as on an evicted pod) after recording configs 0-24
+SWEEP = """
+import os, signal, sys
+from results_io import Checkpoint, LocalStore
+checkpoint = Checkpoint(LocalStore(sys.argv[1]), chunk_rows=10, background=False)
+for config_id, radius in checkpoint.remaining(enumerate(range(30))):
+    if config_id == 25:
+        os.kill(os.getpid(), signal.SIGKILL)
+    checkpoint.record({"config_id": config_id, "score": radius / 2,
+                       "params": {"major_radius": radius}})
+"""
+
+
+def row(config_id, radius):
+    return {"config_id": config_id, "score": radius / 2, "params": {"major_radius": radius}}
+
+
+def test_checkpoint_resumes_after_the_writer_is_killed(tmp_path):
+    root = str(tmp_path / "run-1")
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(results_io.__file__))
+    assert subprocess.run([sys.executable, "-c", SWEEP, root], env=env).returncode == -signal.SIGKILL
+
+    # The two written chunks count as done; the five buffered rows are redone
+    with Checkpoint(LocalStore(root), chunk_rows=10, background=False) as checkpoint:
+        assert checkpoint.resumed and checkpoint.completed == set(range(20))
+        todo = list(checkpoint.remaining(enumerate(range(30))))
+        assert [config_id for config_id, _ in todo] == list(range(20, 30))
+        for config_id, radius in todo:
+            checkpoint.record(row(config_id, radius))
+
+    reader = ResultReader(LocalStore(root))
+    assert len(reader) == 30
+    assert [c["name"] for c in reader.manifest["chunks"]] == [
+        "chunk-00000", "chunk-00001", "chunk-00002"]
+    assert sorted(reader.column("config_id")) == list(range(30))
+    assert list(reader.rows())[25] == row(25, 25)
+
+
+def test_background_writer_uploads_every_chunk_by_close(tmp_path):
+    store = LocalStore(str(tmp_path))
+    with results_io.ResultWriter(store, chunk_rows=4) as writer:
+        for i in range(10):
+            writer.append(row(i, i))
+    reader = ResultReader(store)
+    assert len(reader) == writer.rows == 10
+    assert [c["rows"] for c in reader.manifest["chunks"]] == [4, 4, 2]
+    assert set(reader.columns) == {"config_id", "score", "params.major_radius"}
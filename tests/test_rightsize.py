@@ -0,0 +1,98 @@
+import json
+
+from ml_platform.sdk.core.rightsize import (
+    FixtureSource,
+    PrometheusSource,
+    RunUsage,
+    UsageHistory,
+    collect,
+    recommend,
+)
+
+GIB = 2 ** 30
+START = 1_700_000_000
+
+
+def put_job(server, name, condition="Complete", memory="16Gi"):
+    server.cluster.put("batch/v1", "jobs", {
+        "apiVersion": "batch/v1", "kind": "Job",
+        "metadata": {"name": name, "namespace": "jobs", "creationTimestamp": "2023-11-14T22:13:20Z"},
+        "spec": {"template": {"spec": {"containers": [{
+            "name": "worker", "image": "registry/ml-platform/sweep:v1",
+            "resources": {"requests": {"cpu": "4", "memory": memory}}}]}}},
+        "status": {"startTime": "2023-11-14T22:13:20Z",
+                   "conditions": [{"type": condition, "status": "True",
+                                   "lastTransitionTime": "2023-11-14T23:13:20Z"}]},
+    })
+
+
+def run(name, memory_max, outcome="Complete", memory_request=16 * GIB):
+    return RunUsage(name, START, 3600.0, 1, 4.0, memory_request,
+                    1.0, 1.5, 2.0, memory_max, memory_max, outcome)
+
+
+def test_prometheus_pairs_cpu_and_memory_by_timestamp(server, transport):
+    put_job(server, "sweep-1")
+    # CPU rises while memory stays flat; rate() has no value at the first point
+    server.add_usage("sweep-1-abcde", [(START + 30 * i, float(i), 2.0 * GIB) for i in range(5)])
+    samples, pods = PrometheusSource(transport, step=30).samples_for(
+        server.cluster.get("batch/v1", "jobs", "jobs", "sweep-1"))
+    assert pods == 1
+    assert samples == [(None, 2.0 * GIB)] + [(float(i), 2.0 * GIB) for i in range(1, 5)]
+
+
+def test_collect_records_failed_and_oom_killed_runs(server, transport, tmp_path):
+    samples = {}
+    for name, condition in [("ok", "Complete"), ("crashed", "Failed"), ("oom", "Failed"),
+                            ("unscraped-oom", "Failed"), ("unscraped", "Failed")]:
+        put_job(server, name, condition, memory="4Gi")
+        if not name.startswith("unscraped"):
+            samples[name] = [[1.0, 3.0 * GIB], [2.0, 3.5 * GIB]]
+    server.add_pod("oom-x", job="oom", phase="Failed", terminated="OOMKilled")
+    server.add_pod("unscraped-oom-x", job="unscraped-oom", phase="Failed", terminated="OOMKilled")
+    server.add_pod("crashed-x", job="crashed", phase="Failed", terminated="Error")
+
+    history = UsageHistory(str(tmp_path / "usage.json"))
+    assert collect(transport, FixtureSource({"jobs": samples}), history) == {"sweep:v1": 4}
+    outcomes = {r.job: r.outcome for r in UsageHistory(history.path).runs("sweep:v1")}
+    assert outcomes == {"ok": "Complete", "crashed": "Failed", "oom": "OOMKilled",
+                        "unscraped-oom": "OOMKilled"}
+
+
+def test_oom_kill_keeps_memory_above_its_request():
+    completed = [run(f"r{i}", 2 * GIB) for i in range(3)]
+    assert recommend(completed, margin=0.0).memory == "2Gi"
+    rec = recommend(completed + [run("oom", 0.0, "OOMKilled", memory_request=3 * GIB)], margin=0.2)
+    assert rec.oom_kills == 1
+    assert rec.memory == "3840Mi"  # 3Gi x 1.2
+
+
+def test_failed_runs_count_towards_peaks_but_not_min_runs():
+    runs = [run("a", 2 * GIB), run("b", 2 * GIB), run("crash", 6 * GIB, "Failed")]
+    assert recommend(runs, margin=0.0) is None
+    assert recommend(runs + [run("c", 2 * GIB)], margin=0.0).memory == "6Gi"
+
+
+def test_history_loads_version_1_rows(tmp_path):
+    path = tmp_path / "usage.json"
+    fields = list(RunUsage._fields[:-1])
+    path.write_text(json.dumps({"version": 1, "fields": fields,
+                                "workloads": {"sweep:v1": [list(run("a", GIB)[:-1])]}}))
+    assert UsageHistory(str(path)).runs("sweep:v1") == [run("a", GIB)]
+
+
+def test_rightsize_on_submit_needs_completed_runs(tmp_path, monkeypatch, capsys):
+    from ml_platform.cli.commands import submit
+
+    monkeypatch.setenv("ML_PLATFORM_USAGE", str(tmp_path / "usage.json"))
+    history = UsageHistory()
+    for r in [run("a", GIB), run("b", GIB, "Failed"), run("c", GIB, "OOMKilled")]:
+        history.add("sweep:v1", r)
+    history.save()
+    assert history.completed("sweep:v1") == 1
+    assert history.latest("sweep") is None
+
+    specs = [{"name": "sweep", "image": "img"}]
+    submit.rightsize(None, specs, "sweep", "v1", 0.2)
+    assert specs == [{"name": "sweep", "image": "img"}]
+    assert "No usage history for sweep" in capsys.readouterr().out
@@ -0,0 +1,30 @@
+from benchmarks.bench_startup import (
+    BUDGET_MS,
+    CASES,
+    UNUSED_BY_STATUS,
+    imported_modules,
+    measure,
+    top_level_imports,
+)
+
+
+def test_config_imports_no_other_sdk_module():
+    modules = imported_modules("import ml_platform.sdk.core.config")
+    ours = {m for m in modules if m.startswith("ml_platform")}
+    assert ours == {"ml_platform", "ml_platform.sdk", "ml_platform.sdk.core",
+                    "ml_platform.sdk.core.config", "ml_platform.sdk.core.kubeconfig"}
+
+
+def test_status_imports_only_what_it_uses():
+    assert set(UNUSED_BY_STATUS).isdisjoint(imported_modules(CASES["status"]))
+
+
+def test_sdk_exports_load_on_access():
+    modules = imported_modules("from ml_platform.sdk import PlatformClient, Job")
+    assert "ml_platform.sdk.core.client" in modules
+    assert "asyncio" not in modules
+
+
+def test_status_import_budget():
+    startup = set(top_level_imports("pass")[0])
+    assert measure(CASES["status"], 5, startup)["import_ms"] < BUDGET_MS
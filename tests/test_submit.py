@@ -0,0 +1,24 @@
+import json
+
+import pytest
+
+from ml_platform.cli.commands import submit
+
+
+@pytest.mark.parametrize("value", [0, -4, "many", True])
+def test_sweep_file_concurrency_is_validated(tmp_path, capsys, value):
+    path = tmp_path / "sweep.json"
+    path.write_text(json.dumps({"concurrency": value, "matrix": {"SEED": [1, 2]}}))
+    with pytest.raises(SystemExit):
+        submit.run_sweep("sweep", "img:v1", "proj", "europe-west3", str(path), None, None)
+    assert "Invalid concurrency" in capsys.readouterr().out
+
+
+def test_concurrency_flag_wins_over_the_sweep_file(server, tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("KUBECONFIG", server.write_kubeconfig(str(tmp_path), "fake-sweep"))
+    path = tmp_path / "sweep.json"
+    path.write_text(json.dumps({"concurrency": 0, "matrix": {"SEED": [1, 2]}}))
+    submit.run_sweep("sweep", "img:v1", "proj", "europe-west3", str(path), None, 3,
+                     context="fake-sweep")
+    assert "(concurrency 3)" in capsys.readouterr().out
+    assert len(server.cluster.list("batch/v1", "jobs", "jobs")) == 2
@@ -0,0 +1,48 @@
+import pytest
+
+from benchmarks.bench_trace import FIXTURE, check
+from ml_platform.sdk.core.job import Job
+from ml_platform.sdk.core.timeline import collect, fetch_timelines, summarize, to_fixture
+
+
+@pytest.fixture
+def recorded(server, transport):
+    server.load_fixture(FIXTURE)
+    return transport
+
+
+def test_fixture_timelines_are_consistent(recorded):
+    timelines = fetch_timelines(recorded)
+    assert len(timelines) == 4
+    assert {t.name: check(t) for t in timelines if check(t)} == {}
+
+
+def test_phases_of_a_cold_start(recorded):
+    timeline = Job("stellar-optimization-20251201-120000-000000", transport=recorded).timeline()
+    assert timeline.status == "Complete"
+    assert timeline.image_cached is False
+    assert timeline.durations() == {
+        "queue": 1.0, "schedule": 0.7, "image_pull": 46.3, "container_start": 2.0,
+        "ray_connect": 3.4, "run": 1197.6, "to_first_work": 53.4, "total": 1251.0,
+    }
+
+
+def test_retried_and_running_jobs(recorded):
+    timelines = {t.name[-6:]: t for t in fetch_timelines(recorded)}
+    assert timelines["000002"].attempts == 2
+    assert timelines["000002"].phases["schedule"] == 93.0
+    running = timelines["000003"]
+    assert running.status == "Running"
+    assert running.total is None and running.to_first_work == 8.8
+
+
+def test_without_logs_ray_connect_is_unknown(recorded):
+    timelines = fetch_timelines(recorded, logs=False)
+    assert all(t.milestones["ray_connected"] is None for t in timelines)
+    assert summarize(timelines)["queue"]["count"] == 4
+
+
+def test_recording_captures_every_object(recorded):
+    objects = to_fixture(collect(recorded))["objects"]
+    assert len(objects) == 27
+    assert {o["kind"] for o in objects} == {"Job", "Pod", "Event"}
@@ -0,0 +1,88 @@
+import time
+
+import pytest
+
+from ml_platform.sdk.core import metrics
+from ml_platform.sdk.core.transport import JSON_PATCH, ApiError, KubectlTransport, api_path
+
+JOBS = api_path("batch", "v1", "jobs", "jobs")
+
+
+def test_stale_keep_alive_connection_is_retried(server, transport, monkeypatch):
+    # The server drops connections idle for longer than this, as API servers and proxies do
+    monkeypatch.setattr(server.RequestHandlerClass, "timeout", 0.2)
+    server.seed_jobs(2)
+    registry = metrics.enable()
+    try:
+        transport.get(JOBS)
+        assert len(transport.pool._idle) == 1
+        time.sleep(0.5)
+        assert len(transport.get(JOBS)["items"]) == 2
+    finally:
+        metrics.disable()
+    stats = registry.snapshot()["operations"][metrics.UNSCOPED]
+    assert stats["retries"] == 1 and stats["errors"] == {}
+
+
+def test_fresh_connection_failures_are_not_retried(transport):
+    transport.close()
+    transport.pool.port = 1
+    with pytest.raises(ConnectionRefusedError):
+        transport.get(JOBS)
+
+
+@pytest.fixture
+def kubectl(server, tmp_path, monkeypatch):
+    """KubectlTransport on the fake kubectl, and the kubectl arguments of each call"""
+    monkeypatch.setenv("KUBECONFIG", server.write_kubeconfig(str(tmp_path)))
+    transport = KubectlTransport(kubectl=server.install_kubectl(str(tmp_path)))
+    calls = []
+    run = transport._run
+
+    def spy(args, input_text=None):
+        calls.append(args)
+        return run(args, input_text)
+
+    monkeypatch.setattr(transport, "_run", spy)
+    return transport, calls
+
+
+def test_kubectl_transport_maps_rest_calls_to_kubectl_verbs(server, kubectl):
+    transport, calls = kubectl
+    job = {"apiVersion": "batch/v1", "kind": "Job",
+           "metadata": {"name": "sweep-1", "labels": {"app": "sweep"}}}
+    path = api_path("batch", "v1", "jobs", "jobs", "sweep-1")
+
+    assert transport.create(JOBS, job)["metadata"]["name"] == "sweep-1"
+    listed = transport.get(JOBS, {"labelSelector": "app=sweep"})
+    assert [j["metadata"]["name"] for j in listed["items"]] == ["sweep-1"]
+    transport.patch(path, {"spec": {"suspend": True}})
+    transport.patch(path, [{"op": "replace", "path": "/metadata/labels/app", "value": "done"}],
+                    content_type=JSON_PATCH)
+    stored = server.cluster.get("batch/v1", "jobs", "jobs", "sweep-1")
+    assert stored["spec"]["suspend"] is True and stored["metadata"]["labels"]["app"] == "done"
+    transport.delete(path, body={"propagationPolicy": "Background"})
+    assert server.cluster.get("batch/v1", "jobs", "jobs", "sweep-1") is None
+
+    assert calls[0] == ["create", "--raw", JOBS, "-f", "-"]
+    assert calls[1] == ["get", "--raw", f"{JOBS}?labelSelector=app%3Dsweep"]
+    # kubectl has no raw PATCH: the path becomes resource.group, name and namespace
+    assert calls[2][:5] == ["patch", "jobs.batch", "sweep-1", "--type", "merge"]
+    assert calls[3][:5] == ["patch", "jobs.batch", "sweep-1", "--type", "json"]
+    assert calls[2][-2:] == ["-n", "jobs"]
+    assert calls[4] == ["delete", "--raw", path, "-f", "-"]
+
+
+def test_kubectl_errors_carry_the_api_status(server, kubectl):
+    transport, _ = kubectl
+    server.seed_jobs(1)
+    missing = api_path("batch", "v1", "jobs", "jobs", "missing")
+    with pytest.raises(ApiError) as raised:
+        transport.get(missing)
+    assert raised.value.not_found and raised.value.reason == "NotFound"
+    job = server.cluster.get("batch/v1", "jobs", "jobs", "sweep-00000")
+    with pytest.raises(ApiError) as raised:
+        transport.create(JOBS, job)
+    assert raised.value.status == 409
+    with pytest.raises(ValueError, match="Cannot patch"):
+        transport.patch(JOBS, {})